@@ -6,11 +6,33 @@ from dependency_injector.wiring import Provide, inject
 from loguru import logger
 from telegram.ext import Application as TelegramApp
 
+from pdf_bot.analytics import AnalyticsService
 from pdf_bot.containers import Application
+from pdf_bot.datastore import DatastoreService
 from pdf_bot.error import ErrorHandler
+from pdf_bot.executor import ExecutorService
+from pdf_bot.file_cache import FileCacheService
 from pdf_bot.log import MyLogHandler
 from pdf_bot.settings import Settings
 from pdf_bot.telegram_handler import AbstractTelegramHandler
+from pdf_bot.webpage import WebpageRenderer
+
+
+@inject
+async def post_shutdown(
+    _telegram_app: TelegramApp,
+    executor_service: ExecutorService = Provide[Application.services.executor],
+    file_cache_service: FileCacheService = Provide[Application.services.file_cache],
+    datastore_service: DatastoreService = Provide[Application.repositories.datastore],
+    analytics_service: AnalyticsService = Provide[Application.services.analytics],
+    webpage_renderer: WebpageRenderer = Provide[Application.services.webpage_renderer],
+) -> None:
+    # Commit the writes and send the events that are still queued
+    await datastore_service.flush()
+    await analytics_service.flush()
+    executor_service.shutdown()
+    webpage_renderer.shutdown()
+    file_cache_service.clear()
 
 
 @inject
@@ -47,7 +69,11 @@ if __name__ == "__main__":
     app.wire(modules=[__name__])
 
     _telegram_app = (
-        TelegramApp.builder().bot(app.core.telegram_bot()).concurrent_updates(True).build()
+        TelegramApp.builder()
+        .bot(app.core.telegram_bot())
+        .concurrent_updates(True)
+        .post_shutdown(post_shutdown)
+        .build()
     )
 
     # Dependency injectior only initialises the classes if they are referenced. Since
@@ -62,7 +88,7 @@ if __name__ == "__main__":
         if isinstance(provider, Singleton):
             handler = provider()
             if isinstance(handler, AbstractTelegramHandler):
-                _telegram_app.add_handlers(handler.handlers)
+                _telegram_app.add_handlers(handler.handlers, group=handler.group)
             elif isinstance(handler, ErrorHandler):
                 _telegram_app.add_error_handler(handler.callback)
 
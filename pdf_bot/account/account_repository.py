@@ -1,26 +1,23 @@
-from google.cloud.datastore import Client, Entity
+from google.cloud.datastore import Entity
 
 from pdf_bot.consts import LANGUAGE, USER
+from pdf_bot.datastore import DatastoreService
 
 
 class AccountRepository:
-    def __init__(self, datastore_client: Client) -> None:
-        self.datastore_client = datastore_client
-
-    def get_user(self, user_id: int) -> Entity | None:
-        key = self.datastore_client.key(USER, user_id)
-        entity: Entity | None = self.datastore_client.get(key)
-
-        return entity
-
-    def upsert_user(self, user_id: int, language_code: str) -> None:
-        with self.datastore_client.transaction():
-            key = self.datastore_client.key(USER, user_id)
-            db_user = self.datastore_client.get(key)
-
-            if db_user is None:
-                db_user = Entity(key)
-            if LANGUAGE not in db_user:
-                db_user[LANGUAGE] = language_code
-
-            self.datastore_client.put(db_user)
+    def __init__(self, datastore_service: DatastoreService) -> None:
+        self.datastore_service = datastore_service
+
+    async def get_user(self, user_id: int) -> Entity | None:
+        key = self.datastore_service.key(USER, user_id)
+        return await self.datastore_service.get(key)
+
+    async def upsert_user(self, user_id: int, language_code: str) -> None:
+        def set_default_language(user: Entity) -> None:
+            if LANGUAGE not in user:
+                user[LANGUAGE] = language_code
+
+        # Users are created in batches as nothing needs to wait for them to be written,
+        # and reads already include the writes that are yet to be committed
+        key = self.datastore_service.key(USER, user_id)
+        await self.datastore_service.update(key, set_default_language, defer=True)
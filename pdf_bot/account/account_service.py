@@ -13,7 +13,7 @@ class AccountService:
         self.account_repository = account_repository
         self.language_service = language_service
 
-    def create_user(self, telegram_user: User) -> None:
+    async def create_user(self, telegram_user: User) -> None:
         user_lang_code = telegram_user.language_code
         lang_code = self._LANGUAGE_CODE
 
@@ -22,4 +22,7 @@ class AccountService:
             if code is not None:
                 lang_code = code
 
-        self.account_repository.upsert_user(telegram_user.id, lang_code)
+        await self.account_repository.upsert_user(telegram_user.id, lang_code)
+
+        # The default language might have been cached before the user was created
+        self.language_service.clear_cached_language(telegram_user.id)
@@ -1,5 +1,5 @@
 from .analytics_repository import AnalyticsRepository
 from .analytics_service import AnalyticsService
-from .models import EventAction, TaskType
+from .models import AnalyticsEvent, EventAction, TaskType
 
-__all__ = ["AnalyticsRepository", "AnalyticsService", "EventAction", "TaskType"]
+__all__ = ["AnalyticsEvent", "AnalyticsRepository", "AnalyticsService", "EventAction", "TaskType"]
@@ -1,25 +1,55 @@
-from typing import cast
+import asyncio
+from collections import deque
+from collections.abc import Iterator
+from contextlib import suppress
+from typing import Any, cast
 from uuid import UUID
 
 from loguru import logger
-from requests.exceptions import HTTPError
+from requests.exceptions import RequestException
 from telegram import Message, Update, User
 from telegram.ext import ContextTypes
 
 from pdf_bot.language import LanguageService
 
 from .analytics_repository import AnalyticsRepository
-from .models import EventAction, TaskType
+from .models import AnalyticsEvent, EventAction, TaskType
 
 
 class AnalyticsService:
-    def __init__(
+    """Sends analytics events in batches in the background.
+
+    Events are queued and sent off the event loop, grouped by user in batches of up to
+    the maximum number of events per request. The queue is bounded, and the oldest events
+    are dropped once it's full, such as when the analytics endpoint is down.
+    """
+
+    # Maximum number of events per request of the Google Analytics measurement protocol
+    _MAX_BATCH_SIZE = 25
+
+    def __init__(  # noqa: PLR0913, PLR0917
         self,
         analytics_repository: AnalyticsRepository,
         language_service: LanguageService,
+        flush_interval: float = 10,
+        max_queue_size: int = 10_000,
+        max_retries: int = 3,
+        retry_delay: float = 1,
     ) -> None:
         self.analytics_repository = analytics_repository
         self.language_service = language_service
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+
+        self._events: deque[AnalyticsEvent] = deque(maxlen=max_queue_size)
+        self._dropped_events = 0
+        self._flush_event = asyncio.Event()
+        self._flush_task: asyncio.Task[None] | None = None
+
+    @property
+    def dropped_events(self) -> int:
+        return self._dropped_events
 
     def send_event(
         self,
@@ -32,18 +62,69 @@ class AnalyticsService:
         msg = cast("Message", update.effective_message)
         msg_user = cast("User", msg.from_user)
 
-        event = {
-            "client_id": str(UUID(int=msg_user.id)),
-            "user_properties": {"bot_language": {"value": lang}},
-            "events": [
-                {
-                    "name": task_type.value,
-                    "params": {"action": action.value},
-                }
-            ],
-        }
+        if len(self._events) == self._events.maxlen:
+            self._dropped_events += 1
+
+        self._events.append(
+            AnalyticsEvent(
+                client_id=str(UUID(int=msg_user.id)),
+                language=lang,
+                name=task_type.value,
+                params={"action": action.value},
+            )
+        )
 
+        if len(self._events) >= self._MAX_BATCH_SIZE:
+            self._flush_event.set()
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._send_queued_events())
+
+    async def flush(self) -> None:
+        self._flush_event.set()
+        if self._flush_task is not None:
+            await asyncio.shield(self._flush_task)
+
+    async def _send_queued_events(self) -> None:
+        # Always reset the task, so that a new one is started for the next events even if
+        # this one fails
         try:
-            self.analytics_repository.send_event(event)
-        except HTTPError:
-            logger.exception("Failed to send analytics")
+            while self._events:
+                with suppress(TimeoutError):
+                    await asyncio.wait_for(self._flush_event.wait(), self.flush_interval)
+                self._flush_event.clear()
+
+                events = list(self._events)
+                self._events.clear()
+                for payload in self._get_payloads(events):
+                    await self._send_payload(payload)
+        finally:
+            self._flush_task = None
+
+    def _get_payloads(self, events: list[AnalyticsEvent]) -> Iterator[dict[str, Any]]:
+        # Each request can only contain the events of a single user
+        events_by_user: dict[tuple[str, str], list[AnalyticsEvent]] = {}
+        for event in events:
+            events_by_user.setdefault((event.client_id, event.language), []).append(event)
+
+        for (client_id, language), user_events in events_by_user.items():
+            for i in range(0, len(user_events), self._MAX_BATCH_SIZE):
+                yield {
+                    "client_id": client_id,
+                    "user_properties": {"bot_language": {"value": language}},
+                    "events": [
+                        {"name": x.name, "params": x.params}
+                        for x in user_events[i : i + self._MAX_BATCH_SIZE]
+                    ],
+                }
+
+    async def _send_payload(self, payload: dict[str, Any]) -> None:
+        for attempt in range(self.max_retries + 1):
+            try:
+                await asyncio.to_thread(self.analytics_repository.send_event, payload)
+            except RequestException:
+                if attempt == self.max_retries:
+                    logger.exception("Failed to send analytics")
+                    return
+                await asyncio.sleep(self.retry_delay * 2**attempt)
+            else:
+                return
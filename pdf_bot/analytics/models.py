@@ -1,4 +1,6 @@
+from dataclasses import dataclass
 from enum import Enum
+from typing import Any
 
 
 class TaskType(Enum):
@@ -27,3 +29,11 @@ class TaskType(Enum):
 
 class EventAction(Enum):
     complete = "complete"
+
+
+@dataclass
+class AnalyticsEvent:
+    client_id: str
+    language: str
+    name: str
+    params: dict[str, Any]
@@ -1,4 +1,5 @@
 from .cli_service import CLIService
 from .exceptions import CLIServiceError
+from .models import CLIStats, CompressProfile
 
-__all__ = ["CLIService", "CLIServiceError"]
+__all__ = ["CLIService", "CLIServiceError", "CLIStats", "CompressProfile"]
@@ -1,35 +1,133 @@
+import asyncio
+import os
 import shlex
+import signal
+import time
+from asyncio.subprocess import PIPE, Process, create_subprocess_exec
+from contextlib import suppress
+from dataclasses import replace
 from gettext import gettext as _
 from pathlib import Path
-from subprocess import PIPE, Popen
 
 from loguru import logger
 
-from pdf_bot.cli.exceptions import CLINonZeroExitStatusError
+from pdf_bot.cli.exceptions import CLINonZeroExitStatusError, CLITimeoutError
+from pdf_bot.cli.models import CLIStats, CompressProfile
 
 
 class CLIService:
-    def compress_pdf(self, input_path: Path, output_path: Path) -> None:
+    _MB = 1024 * 1024
+
+    def __init__(
+        self,
+        max_processes: int | None = None,
+        time_limit: float = 300,
+        memory_limit_mb: int | None = None,
+        cpu_time_limit: int | None = None,
+    ) -> None:
+        max_processes = max_processes or os.cpu_count() or 1
+        self.time_limit = time_limit
+        self.memory_limit_mb = memory_limit_mb
+        self.cpu_time_limit = cpu_time_limit
+
+        self._semaphore = asyncio.Semaphore(max_processes)
+        self._stats = CLIStats(max_processes)
+
+    async def compress_pdf(
+        self,
+        input_path: Path,
+        output_path: Path,
+        time_limit: float | None = None,
+        profile: CompressProfile = CompressProfile.default,
+    ) -> None:
         command = (
-            "gs -sDEVICE=pdfwrite -dCompatibilityLevel=1.4 -dPDFSETTINGS=/default "
+            f"gs -sDEVICE=pdfwrite -dCompatibilityLevel=1.4 -dPDFSETTINGS=/{profile.value} "
             f'-dNOPAUSE -dQUIET -dBATCH -sOutputFile="{output_path}" "{input_path}"'
         )
-        self._run_command(command)
+        await self._run_command(command, time_limit)
 
-    def extract_pdf_images(self, input_path: Path, output_path: Path) -> None:
+    async def extract_pdf_images(
+        self, input_path: Path, output_path: Path, time_limit: float | None = None
+    ) -> None:
         command = f'pdfimages -png "{input_path}" "{output_path}/images"'
-        self._run_command(command)
+        await self._run_command(command, time_limit)
 
-    @staticmethod
-    def _run_command(command: str) -> None:
-        proc = Popen(shlex.split(command), stdout=PIPE, stderr=PIPE, shell=False)
-        out, err = proc.communicate()
-
-        if proc.returncode != 0:
-            logger.error(
-                "Command:\n{command}\n\nStdout:\n{stdout}\n\nStderr:\n{stderr}",
-                command=command,
-                stdout=out.decode("utf-8"),
-                stderr=err.decode("utf-8"),
+    def get_stats(self) -> CLIStats:
+        return replace(self._stats)
+
+    async def _run_command(self, command: str, time_limit: float | None = None) -> None:
+        self._stats.queue_length += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self._stats.queue_length -= 1
+
+        try:
+            await self._run_process(command, time_limit or self.time_limit)
+        finally:
+            self._semaphore.release()
+
+    async def _run_process(self, command: str, time_limit: float) -> None:
+        start_time = time.perf_counter()
+        self._stats.running += 1
+
+        try:
+            # Start the process in a new session so that the whole process group can be
+            # killed on timeout, including any child processes that it has spawned
+            proc = await create_subprocess_exec(
+                *self._get_resource_limit_args(),
+                *shlex.split(command),
+                stdout=PIPE,
+                stderr=PIPE,
+                start_new_session=True,
             )
-            raise CLINonZeroExitStatusError(_("Failed to complete process"))
+
+            try:
+                out, err = await asyncio.wait_for(proc.communicate(), time_limit)
+            except TimeoutError as e:
+                await self._kill_process_group(proc)
+                self._stats.timed_out += 1
+                logger.error(
+                    "Command timed out after {time_limit}s:\n{command}",
+                    time_limit=time_limit,
+                    command=command,
+                )
+                raise CLITimeoutError(_("The process took too long to complete")) from e
+            except asyncio.CancelledError:
+                await self._kill_process_group(proc)
+                raise
+
+            if proc.returncode != 0:
+                self._stats.failed += 1
+                logger.error(
+                    "Command:\n{command}\n\nStdout:\n{stdout}\n\nStderr:\n{stderr}",
+                    command=command,
+                    stdout=out.decode("utf-8"),
+                    stderr=err.decode("utf-8"),
+                )
+                raise CLINonZeroExitStatusError(_("Failed to complete process"))
+            self._stats.completed += 1
+        finally:
+            run_time = time.perf_counter() - start_time
+            self._stats.running -= 1
+            self._stats.total_run_time += run_time
+            self._stats.max_run_time = max(self._stats.max_run_time, run_time)
+
+    def _get_resource_limit_args(self) -> list[str]:
+        # The limits are set by prlimit before it executes the command, as setting them
+        # in the forked child with preexec_fn isn't safe with the threads of the bot
+        limits = []
+        if self.memory_limit_mb is not None:
+            limits.append(f"--as={self.memory_limit_mb * self._MB}")
+        if self.cpu_time_limit is not None:
+            limits.append(f"--cpu={self.cpu_time_limit}")
+
+        if not limits:
+            return []
+        return ["prlimit", *limits, "--"]
+
+    @staticmethod
+    async def _kill_process_group(proc: Process) -> None:
+        with suppress(ProcessLookupError):
+            os.killpg(proc.pid, signal.SIGKILL)
+        await proc.wait()
@@ -0,0 +1,29 @@
+from dataclasses import dataclass
+from enum import Enum
+
+
+@dataclass
+class CLIStats:
+    max_processes: int
+    queue_length: int = 0
+    running: int = 0
+    completed: int = 0
+    failed: int = 0
+    timed_out: int = 0
+    total_run_time: float = 0
+    max_run_time: float = 0
+
+    @property
+    def average_run_time(self) -> float:
+        finished = self.completed + self.failed + self.timed_out
+        if finished == 0:
+            return 0
+        return self.total_run_time / finished
+
+
+class CompressProfile(Enum):
+    """Ghostscript `-dPDFSETTINGS` presets, from the smallest to the highest quality."""
+
+    ebook = "ebook"
+    printer = "printer"
+    default = "default"
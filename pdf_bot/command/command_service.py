@@ -22,7 +22,7 @@ class CommandService:
         await msg.reply_chat_action(ChatAction.TYPING)
 
         # Create the user entity in Datastore
-        self.account_service.create_user(msg_user)
+        await self.account_service.create_user(msg_user)
 
         _ = self.language_service.set_app_language(update, context)
         await msg.reply_text(
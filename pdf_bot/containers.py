@@ -6,22 +6,30 @@ from telegram.request import HTTPXRequest
 
 from pdf_bot.account import AccountRepository, AccountService
 from pdf_bot.analytics import AnalyticsRepository, AnalyticsService
-from pdf_bot.cli import CLIService
+from pdf_bot.cli import CLIService, CompressProfile
 from pdf_bot.command import CommandService, MyCommandHandler
 from pdf_bot.compare import CompareHandler, CompareService
-from pdf_bot.datastore import MyDatastoreClient
+from pdf_bot.datastore import DatastoreService, InMemoryDatastoreClient, MyDatastoreClient
 from pdf_bot.error import ErrorCallbackQueryHandler, ErrorHandler, ErrorService
+from pdf_bot.executor import ExecutorService
 from pdf_bot.feedback import FeedbackHandler, FeedbackRepository, FeedbackService
 from pdf_bot.file import FileHandler, FileService
+from pdf_bot.file_cache import FileCacheService
+from pdf_bot.font_cache import FontCacheService
 from pdf_bot.image import ImageService
 from pdf_bot.image_handler import BatchImageHandler, BatchImageService
 from pdf_bot.image_processor import BeautifyImageProcessor, ImageTaskProcessor, ImageToPdfProcessor
 from pdf_bot.io_internal import IOService
-from pdf_bot.language import LanguageHandler, LanguageRepository, LanguageService
+from pdf_bot.language import (
+    LanguageHandler,
+    LanguagePrefetchHandler,
+    LanguageRepository,
+    LanguageService,
+)
 from pdf_bot.log import InterceptLoggingHandler, MyLogHandler
 from pdf_bot.merge import MergeHandler, MergeService
 from pdf_bot.payment import PaymentHandler, PaymentService
-from pdf_bot.pdf import PdfService
+from pdf_bot.pdf import OcrProfile, PdfService
 from pdf_bot.pdf_processor import (
     CompressPdfProcessor,
     CropPdfProcessor,
@@ -39,11 +47,17 @@ from pdf_bot.pdf_processor import (
     ScalePdfProcessor,
     SplitPdfProcessor,
 )
+from pdf_bot.result_cache import (
+    InMemoryResultCacheBackend,
+    ResultCacheService,
+    SqliteResultCacheBackend,
+)
+from pdf_bot.scheduler import SchedulerService
 from pdf_bot.settings import Settings
 from pdf_bot.telegram_internal import TelegramService
 from pdf_bot.text import TextHandler, TextRepository, TextService
 from pdf_bot.watermark import WatermarkHandler, WatermarkService
-from pdf_bot.webpage import WebpageHandler, WebpageService
+from pdf_bot.webpage import WebpageHandler, WebpageRenderer, WebpageService
 
 
 class Core(containers.DeclarativeContainer):
@@ -84,7 +98,11 @@ class Clients(containers.DeclarativeContainer):
     }
 
     api = providers.Object(_session)
-    datastore = providers.Singleton(MyDatastoreClient, _settings.gcp_service_account)
+    datastore = providers.Selector(
+        _settings.datastore_backend,
+        gcp=providers.Singleton(MyDatastoreClient, _settings.gcp_service_account),
+        memory=providers.Singleton(InMemoryDatastoreClient),
+    )
     slack = providers.Singleton(SlackClient, token=_settings.slack_token)
 
 
@@ -92,14 +110,31 @@ class Repositories(containers.DeclarativeContainer):
     _settings = providers.Configuration(pydantic_settings=[Settings()])
     clients = providers.DependenciesContainer()
 
-    account = providers.Singleton(AccountRepository, datastore_client=clients.datastore)
+    datastore = providers.Singleton(
+        DatastoreService,
+        datastore_client=clients.datastore,
+        flush_interval=_settings.datastore_flush_interval,
+        max_batch_size=_settings.datastore_max_batch_size,
+        max_retries=_settings.datastore_max_retries,
+    )
+
+    font_cache = providers.Singleton(
+        FontCacheService,
+        api_client=clients.api,
+        cache_dir=_settings.font_files_cache_dir,
+        max_total_bytes=_settings.font_files_cache_max_total_bytes,
+    )
+
+    account = providers.Singleton(AccountRepository, datastore_service=datastore)
     analytics = providers.Singleton(AnalyticsRepository, api_client=clients.api, settings=_settings)
     feedback = providers.Singleton(FeedbackRepository, slack_client=clients.slack)
-    language = providers.Singleton(LanguageRepository, datastore_client=clients.datastore)
+    language = providers.Singleton(LanguageRepository, datastore_service=datastore)
     text = providers.Singleton(
         TextRepository,
         api_client=clients.api,
         google_fonts_token=_settings.google_fonts_token,
+        cache_path=_settings.fonts_cache_path,
+        cache_ttl=_settings.fonts_cache_ttl,
     )
 
 
@@ -108,10 +143,73 @@ class Services(containers.DeclarativeContainer):
     core = providers.DependenciesContainer()
     repositories = providers.DependenciesContainer()
 
-    cli = providers.Singleton(CLIService)
+    cli = providers.Singleton(
+        CLIService,
+        max_processes=_settings.cli_max_processes,
+        time_limit=_settings.cli_time_limit,
+        memory_limit_mb=_settings.cli_memory_limit_mb,
+        cpu_time_limit=_settings.cli_cpu_time_limit,
+    )
     io = providers.Singleton(IOService)
-
-    language = providers.Singleton(LanguageService, language_repository=repositories.language)
+    file_cache = providers.Singleton(
+        FileCacheService,
+        max_total_bytes=_settings.file_cache_max_total_bytes,
+        ttl=_settings.file_cache_ttl,
+    )
+    executor = providers.Singleton(
+        ExecutorService,
+        max_processes=_settings.executor_max_processes,
+        max_threads=_settings.executor_max_threads,
+    )
+
+    # Results and outputs are kept in separate backends, so that they don't evict each other
+    _result_cache_backend = providers.Selector(
+        _settings.result_cache_backend,
+        memory=providers.Singleton(
+            InMemoryResultCacheBackend,
+            max_size=_settings.result_cache_max_size,
+            ttl=_settings.result_cache_ttl,
+        ),
+        sqlite=providers.Singleton(
+            SqliteResultCacheBackend,
+            path=_settings.result_cache_path,
+            max_size=_settings.result_cache_max_size,
+            ttl=_settings.result_cache_ttl,
+        ),
+    )
+    _output_cache_backend = providers.Selector(
+        _settings.result_cache_backend,
+        memory=providers.Singleton(
+            InMemoryResultCacheBackend,
+            max_size=_settings.result_cache_max_size,
+            ttl=_settings.result_cache_ttl,
+        ),
+        sqlite=providers.Singleton(
+            SqliteResultCacheBackend,
+            path=_settings.output_cache_path,
+            max_size=_settings.result_cache_max_size,
+            ttl=_settings.result_cache_ttl,
+        ),
+    )
+    result_cache = providers.Singleton(ResultCacheService, backend=_result_cache_backend)
+    output_cache = providers.Singleton(ResultCacheService, backend=_output_cache_backend)
+
+    # Webpages change over time, so their results are only kept in memory for a short time
+    webpage_cache = providers.Singleton(
+        ResultCacheService,
+        backend=providers.Singleton(
+            InMemoryResultCacheBackend,
+            max_size=_settings.webpage_cache_max_size,
+            ttl=_settings.webpage_cache_ttl,
+        ),
+    )
+
+    language = providers.Singleton(
+        LanguageService,
+        language_repository=repositories.language,
+        cache_max_size=_settings.language_cache_max_size,
+        cache_ttl=_settings.language_cache_ttl,
+    )
 
     account = providers.Singleton(
         AccountService,
@@ -122,6 +220,9 @@ class Services(containers.DeclarativeContainer):
         AnalyticsService,
         analytics_repository=repositories.analytics,
         language_service=language,
+        flush_interval=_settings.analytics_flush_interval,
+        max_queue_size=_settings.analytics_max_queue_size,
+        max_retries=_settings.analytics_max_retries,
     )
     command = providers.Singleton(
         CommandService, account_service=account, language_service=language
@@ -132,13 +233,42 @@ class Services(containers.DeclarativeContainer):
         io_service=io,
         language_service=language,
         analytics_service=analytics,
+        file_cache_service=file_cache,
+        output_cache_service=output_cache,
         bot=core.telegram_bot,
+        max_concurrent_downloads=_settings.telegram_max_concurrent_downloads,
+        max_concurrent_prefetches=_settings.telegram_max_concurrent_prefetches,
+    )
+
+    scheduler = providers.Singleton(
+        SchedulerService,
+        telegram_service=telegram,
+        max_jobs=_settings.scheduler_max_jobs,
+        task_limits=_settings.scheduler_task_limits,
     )
 
     image = providers.Singleton(
         ImageService, cli_service=cli, io_service=io, telegram_service=telegram
     )
-    pdf = providers.Singleton(PdfService, cli_service=cli, io_service=io, telegram_service=telegram)
+    pdf = providers.Singleton(
+        PdfService,
+        cli_service=cli,
+        io_service=io,
+        telegram_service=telegram,
+        executor_service=executor,
+        font_cache_service=repositories.font_cache,
+        grayscale_dpi=_settings.pdf_grayscale_dpi,
+        rasterise_chunk_size=_settings.pdf_rasterise_chunk_size,
+        ocr_jobs=_settings.pdf_ocr_jobs,
+        ocr_profile=providers.Factory(OcrProfile, _settings.pdf_ocr_profile),
+        ocr_tesseract_timeout=_settings.pdf_ocr_tesseract_timeout,
+        compress_min_gain=_settings.pdf_compress_min_gain,
+        compress_profiles=providers.Callable(
+            lambda profiles: [CompressProfile(x) for x in profiles],
+            _settings.pdf_compress_profiles,
+        ),
+        compress_time_limit=_settings.pdf_compress_time_limit,
+    )
 
     _image_task = providers.Singleton(ImageTaskProcessor, language_service=language)
     _pdf_task = providers.Singleton(PdfTaskProcessor, language_service=language)
@@ -167,6 +297,7 @@ class Services(containers.DeclarativeContainer):
         image_service=image,
         telegram_service=telegram,
         language_service=language,
+        scheduler_service=scheduler,
     )
 
     merge = providers.Singleton(
@@ -174,6 +305,8 @@ class Services(containers.DeclarativeContainer):
         pdf_service=pdf,
         telegram_service=telegram,
         language_service=language,
+        scheduler_service=scheduler,
+        session_ttl=_settings.merge_session_ttl,
     )
     payment = providers.Singleton(
         PaymentService,
@@ -187,6 +320,7 @@ class Services(containers.DeclarativeContainer):
         pdf_service=pdf,
         telegram_service=telegram,
         language_service=language,
+        scheduler_service=scheduler,
     )
     watermark = providers.Singleton(
         WatermarkService,
@@ -194,11 +328,23 @@ class Services(containers.DeclarativeContainer):
         telegram_service=telegram,
         language_service=language,
     )
+    webpage_renderer = providers.Singleton(
+        WebpageRenderer,
+        max_workers=_settings.webpage_max_workers,
+        max_jobs_per_worker=_settings.webpage_max_jobs_per_worker,
+        time_limit=_settings.webpage_time_limit,
+        memory_limit_mb=_settings.webpage_memory_limit_mb,
+        max_pages=_settings.webpage_max_pages,
+        max_fetch_bytes=_settings.webpage_max_fetch_bytes,
+    )
     webpage = providers.Singleton(
         WebpageService,
         io_service=io,
         telegram_service=telegram,
         language_service=language,
+        scheduler_service=scheduler,
+        webpage_renderer=webpage_renderer,
+        webpage_cache_service=webpage_cache,
     )
 
 
@@ -210,84 +356,112 @@ class Processors(containers.DeclarativeContainer):
         pdf_service=services.pdf,
         telegram_service=services.telegram,
         language_service=services.language,
+        result_cache_service=services.result_cache,
+        scheduler_service=services.scheduler,
     )
     crop = providers.Singleton(
         CropPdfProcessor,
         pdf_service=services.pdf,
         telegram_service=services.telegram,
         language_service=services.language,
+        result_cache_service=services.result_cache,
+        scheduler_service=services.scheduler,
     )
     decrypt = providers.Singleton(
         DecryptPdfProcessor,
         pdf_service=services.pdf,
         telegram_service=services.telegram,
         language_service=services.language,
+        result_cache_service=services.result_cache,
+        scheduler_service=services.scheduler,
     )
     encrypt = providers.Singleton(
         EncryptPdfProcessor,
         pdf_service=services.pdf,
         telegram_service=services.telegram,
         language_service=services.language,
+        result_cache_service=services.result_cache,
+        scheduler_service=services.scheduler,
     )
     extract_image = providers.Singleton(
         ExtractPdfImageProcessor,
         pdf_service=services.pdf,
         telegram_service=services.telegram,
         language_service=services.language,
+        result_cache_service=services.result_cache,
+        scheduler_service=services.scheduler,
     )
     extract_text = providers.Singleton(
         ExtractPdfTextProcessor,
         pdf_service=services.pdf,
         telegram_service=services.telegram,
         language_service=services.language,
+        result_cache_service=services.result_cache,
+        scheduler_service=services.scheduler,
     )
     grayscale = providers.Singleton(
         GrayscalePdfProcessor,
         pdf_service=services.pdf,
         telegram_service=services.telegram,
         language_service=services.language,
+        result_cache_service=services.result_cache,
+        scheduler_service=services.scheduler,
     )
     ocr = providers.Singleton(
         OcrPdfProcessor,
         pdf_service=services.pdf,
         telegram_service=services.telegram,
         language_service=services.language,
+        result_cache_service=services.result_cache,
+        scheduler_service=services.scheduler,
     )
     pdf_to_image = providers.Singleton(
         PdfToImageProcessor,
         pdf_service=services.pdf,
         telegram_service=services.telegram,
         language_service=services.language,
+        result_cache_service=services.result_cache,
+        scheduler_service=services.scheduler,
     )
     preview_pdf = providers.Singleton(
         PreviewPdfProcessor,
         pdf_service=services.pdf,
         telegram_service=services.telegram,
         language_service=services.language,
+        result_cache_service=services.result_cache,
+        scheduler_service=services.scheduler,
     )
     rename = providers.Singleton(
         RenamePdfProcessor,
         pdf_service=services.pdf,
         telegram_service=services.telegram,
         language_service=services.language,
+        result_cache_service=services.result_cache,
+        scheduler_service=services.scheduler,
     )
     rotate = providers.Singleton(
         RotatePdfProcessor,
         pdf_service=services.pdf,
         telegram_service=services.telegram,
         language_service=services.language,
+        result_cache_service=services.result_cache,
+        scheduler_service=services.scheduler,
     )
     scale = providers.Singleton(
         ScalePdfProcessor,
         pdf_service=services.pdf,
         telegram_service=services.telegram,
         language_service=services.language,
+        result_cache_service=services.result_cache,
+        scheduler_service=services.scheduler,
     )
     split = providers.Singleton(
         SplitPdfProcessor,
         pdf_service=services.pdf,
         telegram_service=services.telegram,
         language_service=services.language,
+        result_cache_service=services.result_cache,
+        scheduler_service=services.scheduler,
     )
 
     beautify = providers.Singleton(
@@ -295,12 +469,16 @@ class Processors(containers.DeclarativeContainer):
         image_service=services.image,
         telegram_service=services.telegram,
         language_service=services.language,
+        result_cache_service=services.result_cache,
+        scheduler_service=services.scheduler,
     )
     image_to_pdf = providers.Singleton(
         ImageToPdfProcessor,
         image_service=services.image,
         telegram_service=services.telegram,
         language_service=services.language,
+        result_cache_service=services.result_cache,
+        scheduler_service=services.scheduler,
     )
 
 
@@ -309,6 +487,9 @@ class Handlers(containers.DeclarativeContainer):
     services = providers.DependenciesContainer()
 
     error = providers.Singleton(ErrorHandler, language_service=services.language)
+    language_prefetch = providers.Singleton(
+        LanguagePrefetchHandler, language_service=services.language
+    )
 
     # Make sure payment handler comes first as it contains handlers that need to be
     # prioritised
@@ -1,3 +1,6 @@
 from .datastore_client import MyDatastoreClient
+from .datastore_service import DatastoreService
+from .in_memory_datastore_client import InMemoryDatastoreClient
+from .models import EntityUpdate
 
-__all__ = ["MyDatastoreClient"]
+__all__ = ["DatastoreService", "EntityUpdate", "InMemoryDatastoreClient", "MyDatastoreClient"]
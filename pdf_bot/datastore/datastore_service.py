@@ -0,0 +1,161 @@
+import asyncio
+from contextlib import suppress
+from typing import Any
+
+from google.api_core.exceptions import GoogleAPIError
+from google.cloud.datastore import Client, Entity, Key
+from loguru import logger
+
+from .in_memory_datastore_client import InMemoryDatastoreClient
+from .models import EntityUpdate, PendingWrite
+
+
+class DatastoreService:
+    """Runs Datastore calls off the event loop and batches writes.
+
+    Writes are queued per entity, so that concurrent writes to the same entity are
+    coalesced into one, and are committed in batches in a single transaction. Writes
+    that are waited on are committed right away along with any other queued writes,
+    while deferred writes are committed periodically.
+
+    Reads apply the writes that haven't been committed yet, so that they aren't stale.
+    As such, updates should only set values on the entity, as they may be applied more
+    than once. Batches that fail with a Datastore error are retried with backoff, as most
+    writes are deferred and nothing else would write them again.
+    """
+
+    def __init__(
+        self,
+        datastore_client: Client | InMemoryDatastoreClient,
+        flush_interval: float = 5,
+        max_batch_size: int = 100,
+        max_retries: int = 3,
+        retry_delay: float = 1,
+    ) -> None:
+        self.datastore_client = datastore_client
+        self.flush_interval = flush_interval
+        self.max_batch_size = max_batch_size
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+
+        self._pending: dict[Key, PendingWrite] = {}
+        self._in_flight: dict[Key, PendingWrite] = {}
+        self._flush_event = asyncio.Event()
+        self._flush_task: asyncio.Task[None] | None = None
+
+    def key(self, kind: str, id_or_name: int | str) -> Key:
+        return self.datastore_client.key(kind, id_or_name)
+
+    async def get(self, key: Key) -> Entity | None:
+        entity = await asyncio.to_thread(self.datastore_client.get, key)
+        return self._apply_uncommitted_writes(key, entity)
+
+    def get_blocking(self, key: Key) -> Entity | None:
+        # For callers that can't await, such as the fallback of the user language lookup
+        entity = self.datastore_client.get(key)
+        return self._apply_uncommitted_writes(key, entity)
+
+    async def get_multi(self, keys: list[Key]) -> list[Entity]:
+        entities = await asyncio.to_thread(self.datastore_client.get_multi, keys)
+        entities_by_key = {x.key: x for x in entities}
+
+        results = [self._apply_uncommitted_writes(x, entities_by_key.get(x)) for x in keys]
+        return [x for x in results if x is not None]
+
+    async def update(self, key: Key, update: EntityUpdate, defer: bool = False) -> None:
+        write = self._pending.get(key)
+        if write is None:
+            write = self._pending[key] = PendingWrite(key)
+        write.updates.append(update)
+
+        if defer:
+            self._start_flushing()
+            return
+
+        future: asyncio.Future[Any] = asyncio.get_running_loop().create_future()
+        write.futures.append(future)
+        self._flush_event.set()
+        self._start_flushing()
+        await future
+
+    async def flush(self) -> None:
+        self._flush_event.set()
+        if self._flush_task is not None:
+            await asyncio.shield(self._flush_task)
+
+    def _start_flushing(self) -> None:
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_pending_writes())
+
+    async def _flush_pending_writes(self) -> None:
+        while self._pending:
+            with suppress(TimeoutError):
+                await asyncio.wait_for(self._flush_event.wait(), self.flush_interval)
+            self._flush_event.clear()
+
+            while self._pending:
+                keys = list(self._pending)[: self.max_batch_size]
+                writes = [self._pending.pop(x) for x in keys]
+                await self._commit_writes(writes)
+
+        self._flush_task = None
+
+    async def _commit_writes(self, writes: list[PendingWrite]) -> None:
+        self._in_flight.update((x.key, x) for x in writes)
+        futures = [future for write in writes for future in write.futures]
+
+        try:
+            await self._commit_with_retries(writes)
+        except Exception as e:  # noqa: BLE001
+            logger.opt(exception=True).warning("Failed to commit {count} writes", count=len(writes))
+            for future in futures:
+                if not future.done():
+                    future.set_exception(e)
+        else:
+            for future in futures:
+                if not future.done():
+                    future.set_result(None)
+        finally:
+            for write in writes:
+                if self._in_flight.get(write.key) is write:
+                    del self._in_flight[write.key]
+
+    async def _commit_with_retries(self, writes: list[PendingWrite]) -> None:
+        for attempt in range(self.max_retries + 1):
+            try:
+                await asyncio.to_thread(self._commit, writes)
+            except GoogleAPIError:
+                if attempt == self.max_retries:
+                    raise
+                await asyncio.sleep(self.retry_delay * 2**attempt)
+            else:
+                return
+
+    def _commit(self, writes: list[PendingWrite]) -> None:
+        with self.datastore_client.transaction():
+            entities = self.datastore_client.get_multi([x.key for x in writes])
+            entities_by_key = {x.key: x for x in entities}
+
+            updated_entities = []
+            for write in writes:
+                entity = entities_by_key.get(write.key)
+                if entity is None:
+                    entity = Entity(write.key)
+
+                for update in write.updates:
+                    update(entity)
+                updated_entities.append(entity)
+
+            self.datastore_client.put_multi(updated_entities)
+
+    def _apply_uncommitted_writes(self, key: Key, entity: Entity | None) -> Entity | None:
+        writes = [x for x in (self._in_flight.get(key), self._pending.get(key)) if x is not None]
+        if not writes:
+            return entity
+
+        if entity is None:
+            entity = Entity(key)
+        for write in writes:
+            for update in write.updates:
+                update(entity)
+        return entity
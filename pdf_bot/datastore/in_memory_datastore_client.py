@@ -0,0 +1,49 @@
+import threading
+from collections.abc import Generator, Iterable
+from contextlib import contextmanager
+
+from google.cloud.datastore import Entity, Key
+
+
+class InMemoryDatastoreClient:
+    """Keeps entities in memory, for running the bot without access to Datastore.
+
+    Only the subset of the Datastore client that the repositories use is implemented.
+    """
+
+    def __init__(self, project: str = "local") -> None:
+        self.project = project
+        self._entities: dict[Key, Entity] = {}
+        self._lock = threading.RLock()
+
+    def key(self, kind: str, id_or_name: int | str) -> Key:
+        return Key(kind, id_or_name, project=self.project)
+
+    def get(self, key: Key) -> Entity | None:
+        with self._lock:
+            entity = self._entities.get(key)
+            return None if entity is None else self._copy(entity)
+
+    def get_multi(self, keys: Iterable[Key]) -> list[Entity]:
+        with self._lock:
+            return [self._copy(self._entities[x]) for x in keys if x in self._entities]
+
+    def put(self, entity: Entity) -> None:
+        with self._lock:
+            self._entities[entity.key] = self._copy(entity)
+
+    def put_multi(self, entities: Iterable[Entity]) -> None:
+        with self._lock:
+            for entity in entities:
+                self.put(entity)
+
+    @contextmanager
+    def transaction(self) -> Generator[None, None, None]:
+        with self._lock:
+            yield
+
+    @staticmethod
+    def _copy(entity: Entity) -> Entity:
+        copy = Entity(entity.key)
+        copy.update(entity)
+        return copy
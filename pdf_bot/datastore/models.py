@@ -0,0 +1,15 @@
+import asyncio
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from typing import Any
+
+from google.cloud.datastore import Entity, Key
+
+EntityUpdate = Callable[[Entity], None]
+
+
+@dataclass
+class PendingWrite:
+    key: Key
+    updates: list[EntityUpdate] = field(default_factory=list)
+    futures: list[asyncio.Future[Any]] = field(default_factory=list)
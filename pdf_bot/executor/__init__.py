@@ -0,0 +1,4 @@
+from .executor_service import ExecutorService
+from .models import ExecutorStats, PoolType
+
+__all__ = ["ExecutorService", "ExecutorStats", "PoolType"]
@@ -0,0 +1,87 @@
+import asyncio
+import os
+import time
+from collections.abc import Callable
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import replace
+from functools import partial
+from typing import ParamSpec, TypeVar
+
+from loguru import logger
+
+from .models import ExecutorStats, PoolType
+
+_P = ParamSpec("_P")
+_T = TypeVar("_T")
+
+
+class ExecutorService:
+    """Runs blocking work off the event loop.
+
+    CPU-bound jobs are dispatched to a bounded process pool and I/O-bound jobs to a
+    thread pool, so that the event loop is only used for coordinating the jobs.
+    Functions and arguments sent to the process pool must be picklable.
+    """
+
+    _THREAD_WORKERS_OFFSET = 4
+
+    def __init__(self, max_processes: int | None = None, max_threads: int | None = None) -> None:
+        cpu_count = os.cpu_count() or 1
+        self._stats = {
+            PoolType.process: ExecutorStats(max_processes or cpu_count),
+            PoolType.thread: ExecutorStats(max_threads or cpu_count + self._THREAD_WORKERS_OFFSET),
+        }
+        self._executors: dict[PoolType, Executor] = {}
+
+    async def run(
+        self, pool_type: PoolType, func: Callable[_P, _T], *args: _P.args, **kwargs: _P.kwargs
+    ) -> _T:
+        executor = self._get_executor(pool_type)
+        stats = self._stats[pool_type]
+        if stats.in_flight >= stats.max_workers:
+            logger.info(
+                "Queueing {func} in {pool} pool, queue depth: {depth}",
+                func=getattr(func, "__qualname__", func),
+                pool=pool_type.value,
+                depth=stats.queue_depth + 1,
+            )
+
+        loop = asyncio.get_running_loop()
+        start_time = time.perf_counter()
+        stats.in_flight += 1
+
+        try:
+            result = await loop.run_in_executor(executor, partial(func, *args, **kwargs))
+        except BaseException:
+            stats.failed += 1
+            raise
+        else:
+            stats.completed += 1
+            return result
+        finally:
+            stats.in_flight -= 1
+            stats.total_run_time += time.perf_counter() - start_time
+
+    def get_stats(self) -> dict[PoolType, ExecutorStats]:
+        return {pool_type: replace(stats) for pool_type, stats in self._stats.items()}
+
+    def shutdown(self) -> None:
+        for executor in self._executors.values():
+            executor.shutdown(wait=False, cancel_futures=True)
+        self._executors.clear()
+
+    def _get_executor(self, pool_type: PoolType) -> Executor:
+        # Pools are created lazily so that worker processes are only spawned once the
+        # bot actually needs them
+        executor = self._executors.get(pool_type)
+        if executor is not None:
+            return executor
+
+        max_workers = self._stats[pool_type].max_workers
+        if pool_type == PoolType.process:
+            executor = ProcessPoolExecutor(max_workers=max_workers)
+        else:
+            executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="pdf_bot")
+
+        self._executors[pool_type] = executor
+        return executor
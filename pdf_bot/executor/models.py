@@ -0,0 +1,27 @@
+from dataclasses import dataclass
+from enum import Enum
+
+
+class PoolType(Enum):
+    process = "process"
+    thread = "thread"
+
+
+@dataclass
+class ExecutorStats:
+    max_workers: int
+    in_flight: int = 0
+    completed: int = 0
+    failed: int = 0
+    total_run_time: float = 0
+
+    @property
+    def queue_depth(self) -> int:
+        return max(self.in_flight - self.max_workers, 0)
+
+    @property
+    def average_run_time(self) -> float:
+        finished = self.completed + self.failed
+        if finished == 0:
+            return 0
+        return self.total_run_time / finished
@@ -1,6 +1,6 @@
 from typing import cast
 
-from telegram import Message, Update
+from telegram import Document, Message, PhotoSize, Update
 from telegram.constants import FileSizeLimit
 from telegram.ext import ContextTypes, ConversationHandler
 
@@ -25,24 +25,28 @@ class FileService:
         self.language_service = language_service
 
     async def check_pdf(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> str | int:
-        file_data = await self._get_file_data(update, context)
-        if file_data is None:
+        file = await self._get_file(update, context)
+        if file is None:
             return ConversationHandler.END
-        self.telegram_service.cache_file_data(context, file_data)
+
+        self.telegram_service.cache_file_data(context, FileData.from_telegram_object(file))
+        self.telegram_service.prefetch_file(update, file, ".pdf")
 
         return await self.pdf_task_processor.ask_task(update, context)
 
     async def check_image(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> int | str:
-        file_data = await self._get_file_data(update, context)
-        if file_data is None:
+        file = await self._get_file(update, context)
+        if file is None:
             return ConversationHandler.END
-        self.telegram_service.cache_file_data(context, file_data)
+
+        self.telegram_service.cache_file_data(context, FileData.from_telegram_object(file))
+        self.telegram_service.prefetch_file(update, file)
 
         return await self.image_task_processor.ask_task(update, context)
 
-    async def _get_file_data(
+    async def _get_file(
         self, update: Update, context: ContextTypes.DEFAULT_TYPE
-    ) -> FileData | None:
+    ) -> Document | PhotoSize | None:
         msg = cast("Message", update.effective_message)
         file = msg.document or msg.photo[-1]
         file_size = file.file_size
@@ -59,4 +63,4 @@ class FileService:
                 ),
             )
             return None
-        return FileData.from_telegram_object(file)
+        return file
@@ -0,0 +1,4 @@
+from .file_cache_service import FileCacheService
+from .models import CachedFile
+
+__all__ = ["CachedFile", "FileCacheService"]
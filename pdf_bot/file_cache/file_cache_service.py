@@ -0,0 +1,247 @@
+import asyncio
+import shutil
+import tempfile
+from collections import OrderedDict
+from collections.abc import AsyncGenerator, Callable, Coroutine
+from contextlib import asynccontextmanager, suppress
+from pathlib import Path
+from typing import Any
+from uuid import uuid4
+
+from loguru import logger
+
+from .models import CachedFile
+
+DownloadFunc = Callable[[Path], Coroutine[Any, Any, None]]
+
+
+class FileCacheService:
+    """Keeps local copies of files that were sent by users.
+
+    Files are prefetched into a per-user scratch directory as soon as they are received,
+    so that they are ready by the time the user has selected a task. Files that are
+    downloaded during a task are kept as well, so that retries and multi-step
+    conversations reuse the same local copy instead of downloading the file again.
+
+    Files expire once they haven't been used for the TTL, and the least recently used
+    files are evicted once the total size goes over the limit. Files that are in use
+    are never removed until they are released.
+    """
+
+    _SHARED_DIR = "shared"
+
+    def __init__(self, max_total_bytes: int, ttl: float) -> None:
+        self.max_total_bytes = max_total_bytes
+        self.ttl = ttl
+
+        # Files are ordered from the least to the most recently used
+        self._files: OrderedDict[str, CachedFile] = OrderedDict()
+        self._user_files: dict[int, str] = {}
+        self._total_bytes = 0
+        self._root_dir: Path | None = None
+
+    @property
+    def total_bytes(self) -> int:
+        return self._total_bytes
+
+    def prefetch(
+        self,
+        user_id: int,
+        file_id: str,
+        file_size: int | None,
+        download: DownloadFunc,
+        suffix: str | None = None,
+    ) -> bool:
+        if file_id in self._files:
+            return True
+
+        # Only keep the latest file for each user as that's the one they will be working on
+        self.discard_user_files(user_id)
+
+        if file_size is None or not self._make_room(file_size):
+            logger.info(
+                "Skipping prefetch of file of size {file_size}, total cached bytes: {total}",
+                file_size=file_size,
+                total=self._total_bytes,
+            )
+            return False
+
+        self._add(file_id, download, file_size, user_id, suffix)
+        return True
+
+    @asynccontextmanager
+    async def get(self, file_id: str) -> AsyncGenerator[Path | None, None]:
+        cached_file = self._files.get(file_id)
+        if cached_file is None:
+            yield None
+            return
+
+        async with self._use(cached_file):
+            is_downloaded = await self._is_downloaded(cached_file)
+            yield cached_file.path if is_downloaded else None
+
+    @asynccontextmanager
+    async def get_or_download(
+        self, file_id: str, download: DownloadFunc, suffix: str | None = None
+    ) -> AsyncGenerator[Path, None]:
+        async with self.get(file_id) as path:
+            if path is not None:
+                yield path
+                return
+
+        cached_file = self._add(file_id, download, None, None, suffix)
+        async with self._use(cached_file):
+            await self._wait_for_download(cached_file)
+            yield cached_file.path
+
+    def discard_user_files(self, user_id: int) -> None:
+        file_id = self._user_files.get(user_id)
+        if file_id is None:
+            return
+
+        cached_file = self._files.get(file_id)
+        if cached_file is not None:
+            self._discard(cached_file)
+
+    def clear(self) -> None:
+        for cached_file in list(self._files.values()):
+            self._discard(cached_file)
+
+        if self._root_dir is not None:
+            shutil.rmtree(self._root_dir, ignore_errors=True)
+            self._root_dir = None
+
+    def _add(
+        self,
+        file_id: str,
+        download: DownloadFunc,
+        file_size: int | None,
+        user_id: int | None,
+        suffix: str | None,
+    ) -> CachedFile:
+        dir_name = self._SHARED_DIR if user_id is None else str(user_id)
+        file_dir = self._get_root_dir() / dir_name
+        file_dir.mkdir(exist_ok=True)
+        path = file_dir / f"{uuid4().hex}{suffix or ''}"
+
+        cached_file = CachedFile(file_id, path, file_size or 0, user_id)
+        cached_file.task = asyncio.create_task(self._download(cached_file, download))
+        self._reset_expiry(cached_file)
+
+        self._files[file_id] = cached_file
+        if user_id is not None:
+            self._user_files[user_id] = file_id
+        self._total_bytes += cached_file.size
+
+        return cached_file
+
+    async def _download(self, cached_file: CachedFile, download: DownloadFunc) -> None:
+        await download(cached_file.path)
+        if cached_file.size != 0:
+            return
+
+        # The file size is only known after downloading files that weren't prefetched
+        size = cached_file.path.stat().st_size
+        cached_file.size = size
+        if not cached_file.is_discarded:
+            self._total_bytes += size
+            self._make_room(0)
+
+    @asynccontextmanager
+    async def _use(self, cached_file: CachedFile) -> AsyncGenerator[None, None]:
+        # Hold a reference so that the file isn't removed while it's being used
+        cached_file.ref_count += 1
+        if not cached_file.is_discarded:
+            self._files.move_to_end(cached_file.file_id)
+            self._reset_expiry(cached_file)
+
+        try:
+            yield
+        finally:
+            cached_file.ref_count -= 1
+            if cached_file.is_discarded:
+                if cached_file.ref_count == 0:
+                    self._remove_file(cached_file)
+            else:
+                self._make_room(0)
+
+    async def _is_downloaded(self, cached_file: CachedFile) -> bool:
+        try:
+            await self._wait_for_download(cached_file)
+        except asyncio.CancelledError:
+            if cached_file.task is None or not cached_file.task.cancelled():
+                raise
+            return False
+        except Exception:  # noqa: BLE001
+            logger.opt(exception=True).warning("Failed to download file")
+            return False
+        return True
+
+    async def _wait_for_download(self, cached_file: CachedFile) -> None:
+        if cached_file.task is None:
+            return
+
+        try:
+            # Shield the download so that it isn't cancelled along with the caller
+            await asyncio.shield(cached_file.task)
+        except Exception:
+            self._discard(cached_file)
+            raise
+
+    def _make_room(self, file_size: int) -> bool:
+        for cached_file in list(self._files.values()):
+            if self._total_bytes + file_size <= self.max_total_bytes:
+                break
+            if cached_file.ref_count == 0:
+                self._discard(cached_file)
+
+        return self._total_bytes + file_size <= self.max_total_bytes
+
+    def _reset_expiry(self, cached_file: CachedFile) -> None:
+        if cached_file.expiry_handle is not None:
+            cached_file.expiry_handle.cancel()
+        cached_file.expiry_handle = asyncio.get_running_loop().call_later(
+            self.ttl, self._expire, cached_file
+        )
+
+    def _expire(self, cached_file: CachedFile) -> None:
+        # Files that are in use are expired once they are released
+        if cached_file.ref_count > 0:
+            self._reset_expiry(cached_file)
+        else:
+            self._discard(cached_file)
+
+    def _discard(self, cached_file: CachedFile) -> None:
+        if cached_file.is_discarded:
+            return
+
+        cached_file.is_discarded = True
+        if self._files.get(cached_file.file_id) is cached_file:
+            del self._files[cached_file.file_id]
+        if (
+            cached_file.user_id is not None
+            and self._user_files.get(cached_file.user_id) == cached_file.file_id
+        ):
+            del self._user_files[cached_file.user_id]
+
+        self._total_bytes -= cached_file.size
+        if cached_file.expiry_handle is not None:
+            cached_file.expiry_handle.cancel()
+
+        if cached_file.task is not None and not cached_file.task.done():
+            # Remove the file once the download has stopped, in case it was already
+            # being written when the download was cancelled
+            cached_file.task.add_done_callback(lambda _: self._remove_file(cached_file))
+            cached_file.task.cancel()
+        elif cached_file.ref_count == 0:
+            self._remove_file(cached_file)
+
+    @staticmethod
+    def _remove_file(cached_file: CachedFile) -> None:
+        with suppress(FileNotFoundError):
+            cached_file.path.unlink()
+
+    def _get_root_dir(self) -> Path:
+        if self._root_dir is None:
+            self._root_dir = Path(tempfile.mkdtemp(prefix="pdf_bot_files_"))
+        return self._root_dir
@@ -0,0 +1,15 @@
+import asyncio
+from dataclasses import dataclass, field
+from pathlib import Path
+
+
+@dataclass
+class CachedFile:
+    file_id: str
+    path: Path
+    size: int
+    user_id: int | None = None
+    task: asyncio.Task[None] | None = None
+    expiry_handle: asyncio.TimerHandle | None = None
+    ref_count: int = 0
+    is_discarded: bool = field(default=False, init=False)
@@ -1,7 +1,8 @@
-import shutil
+import asyncio
 from abc import ABC, abstractmethod
 from collections.abc import AsyncGenerator, Callable, Coroutine, Sequence
 from contextlib import asynccontextmanager, suppress
+from dataclasses import fields
 from pathlib import Path
 from typing import Any, ClassVar, cast
 
@@ -12,8 +13,11 @@ from telegram.ext import BaseHandler, ContextTypes, ConversationHandler
 from pdf_bot.analytics import TaskType
 from pdf_bot.errors import CallbackQueryDataTypeError
 from pdf_bot.file_processor.errors import DuplicateClassError
+from pdf_bot.io_internal import ZipArchiver
 from pdf_bot.language import LanguageService
-from pdf_bot.models import FileData, FileTaskResult, TaskData
+from pdf_bot.models import FileData, FileTaskResult, TaskData, TranslatableText
+from pdf_bot.result_cache import CachedResult, ResultCacheService
+from pdf_bot.scheduler import SchedulerService
 from pdf_bot.telegram_internal import TelegramGetUserDataError, TelegramService
 
 from .file_task_mixin import FileTaskMixin
@@ -26,15 +30,20 @@ ErrorHandlerType = Callable[
 
 class AbstractFileProcessor(FileTaskMixin, ABC):
     _FILE_PROCESSORS: ClassVar[dict[str, "AbstractFileProcessor"]] = {}
+    _RESULT_CACHE_KEY_EXCLUDED_FIELDS = frozenset({"id", "unique_id"})
 
     def __init__(
         self,
         telegram_service: TelegramService,
         language_service: LanguageService,
+        result_cache_service: ResultCacheService,
+        scheduler_service: SchedulerService,
         bypass_init_check: bool = False,
     ) -> None:
         self.telegram_service = telegram_service
         self.language_service = language_service
+        self.result_cache_service = result_cache_service
+        self.scheduler_service = scheduler_service
 
         cls_name = self.__class__.__name__
         if not bypass_init_check and cls_name in self._FILE_PROCESSORS:
@@ -74,6 +83,10 @@ class AbstractFileProcessor(FileTaskMixin, ABC):
     def generic_error_types(self) -> set[type[Exception]]:
         return set()
 
+    @property
+    def cache_results(self) -> bool:
+        return True
+
     @property
     def custom_error_handlers(
         self,
@@ -123,19 +136,27 @@ class AbstractFileProcessor(FileTaskMixin, ABC):
     async def _process_file_task(
         self, update: Update, context: ContextTypes.DEFAULT_TYPE, file_data: FileData
     ) -> str | int | None:
+        cache_key = self._get_result_cache_key(file_data)
+        if cache_key is not None and await self._send_cached_result(update, context, cache_key):
+            return None
+
         try:
-            async with self.process_file_task(file_data) as result:
+            async with (
+                self.scheduler_service.schedule(update, context, self.task_type),
+                self.process_file_task(file_data) as result,
+            ):
                 if result.message is not None:
                     await self.telegram_service.send_message(update, context, result.message)
 
-                out_path = final_path = result.path
-                final_path = out_path
-
-                if out_path.is_dir():
-                    shutil.make_archive(str(out_path), "zip", out_path)
-                    final_path = out_path.with_suffix(".zip")
+                async with self._get_result_paths(result.path) as paths:
+                    messages = [
+                        await self.telegram_service.send_file(update, context, x, self.task_type)
+                        for x in paths
+                    ]
 
-                await self.telegram_service.send_file(update, context, final_path, self.task_type)
+                # Only single file results are cached as only one file can be resent
+                if cache_key is not None and len(messages) == 1 and messages[0] is not None:
+                    await self._cache_result(cache_key, messages[0], result.message)
         except Exception as e:
             handlers = self._get_error_handlers()
             error_handler: ErrorHandlerType | None = None
@@ -148,6 +169,61 @@ class AbstractFileProcessor(FileTaskMixin, ABC):
             raise
         return None
 
+    @asynccontextmanager
+    async def _get_result_paths(self, path: Path | list[Path]) -> AsyncGenerator[list[Path], None]:
+        if isinstance(path, list):
+            yield path
+            return
+
+        if not await asyncio.to_thread(path.is_dir):
+            yield [path]
+            return
+
+        file_paths = await asyncio.to_thread(lambda: sorted(path.iterdir()))
+        async with ZipArchiver(path.name) as archiver:
+            for file_path in file_paths:
+                await archiver.add(file_path)
+            yield await archiver.finish()
+
+    def _get_result_cache_key(self, file_data: FileData) -> str | None:
+        if not self.cache_results or file_data.unique_id is None:
+            return None
+
+        # File IDs differ between messages of the same file, so the file unique ID is used
+        # to identify the file instead
+        params = {
+            x.name: getattr(file_data, x.name)
+            for x in fields(file_data)
+            if x.name not in self._RESULT_CACHE_KEY_EXCLUDED_FIELDS
+        }
+        return self.result_cache_service.get_key(file_data.unique_id, self.task_type.value, params)
+
+    async def _send_cached_result(
+        self, update: Update, context: ContextTypes.DEFAULT_TYPE, cache_key: str
+    ) -> bool:
+        cached_result = await self.result_cache_service.get(cache_key)
+        if cached_result is None:
+            return False
+
+        try:
+            if cached_result.message is not None:
+                await self.telegram_service.send_message(update, context, cached_result.message)
+            await self.telegram_service.send_cached_file(
+                update, context, cached_result, self.task_type
+            )
+        except BadRequest:
+            # The cached file ID is no longer valid, so process the file again
+            await self.result_cache_service.delete(cache_key)
+            return False
+        return True
+
+    async def _cache_result(
+        self, cache_key: str, message: Message, text: TranslatableText | None
+    ) -> None:
+        cached_result = CachedResult.from_telegram_message(message, text)
+        if cached_result is not None:
+            await self.result_cache_service.set(cache_key, cached_result)
+
     async def _process_previous_message(
         self, update: Update, context: ContextTypes.DEFAULT_TYPE
     ) -> None:
@@ -48,7 +48,7 @@ class FileTaskMixin:
 
         def get_callback_data(data_type: type[FileData]) -> FileData:
             if file_data is not None:
-                return data_type(file_data.id, file_data.name)
+                return data_type(file_data.id, file_data.name, file_data.unique_id)
             return data_type.from_telegram_object(file)
 
         keyboard = [
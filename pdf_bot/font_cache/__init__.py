@@ -0,0 +1,4 @@
+from .font_cache_service import FontCacheService
+from .models import CachedFont
+
+__all__ = ["CachedFont", "FontCacheService"]
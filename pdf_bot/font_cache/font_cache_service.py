@@ -0,0 +1,153 @@
+import asyncio
+import hashlib
+from collections import OrderedDict
+from collections.abc import AsyncGenerator
+from contextlib import asynccontextmanager, suppress
+from pathlib import Path
+
+from loguru import logger
+from requests import Session
+
+from .models import CachedFont
+
+
+class FontCacheService:
+    """Keeps local copies of the fonts used for rendering text.
+
+    Each font is downloaded once into the cache directory and served from there, so that
+    renders don't fetch the font over the network. The directory is kept across restarts
+    and the least recently used fonts are evicted once the total size goes over the
+    limit. Fonts that are in use are never removed until they are released.
+    """
+
+    REQUEST_TIMEOUT = 30
+    DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+    def __init__(self, api_client: Session, cache_dir: Path, max_total_bytes: int) -> None:
+        self.api_client = api_client
+        self.cache_dir = cache_dir
+        self.max_total_bytes = max_total_bytes
+
+        # Fonts are ordered from the least to the most recently used
+        self._fonts: OrderedDict[str, CachedFont] | None = None
+        self._total_bytes = 0
+
+    @property
+    def total_bytes(self) -> int:
+        return self._total_bytes
+
+    @asynccontextmanager
+    async def get(self, font_url: str) -> AsyncGenerator[Path | None, None]:
+        """Yields the path to the local copy of the font.
+
+        None is yielded if the font couldn't be downloaded, in which case the renderer
+        can still try to fetch it.
+        """
+        fonts = self._get_fonts()
+        name = self._get_file_name(font_url)
+
+        cached_font = fonts.get(name)
+        if cached_font is None:
+            cached_font = CachedFont(self.cache_dir / name)
+            cached_font.task = asyncio.create_task(self._download(cached_font, font_url))
+            fonts[name] = cached_font
+        fonts.move_to_end(name)
+
+        # Hold a reference so that the font isn't removed while it's being used
+        cached_font.ref_count += 1
+        try:
+            yield await self._wait_for_download(name, cached_font, font_url)
+        finally:
+            cached_font.ref_count -= 1
+            if cached_font.is_discarded:
+                if cached_font.ref_count == 0:
+                    self._remove_file(cached_font)
+            else:
+                self._make_room()
+
+    async def _wait_for_download(
+        self, name: str, cached_font: CachedFont, font_url: str
+    ) -> Path | None:
+        if cached_font.task is None:
+            return cached_font.path
+
+        try:
+            # Shield the download so that it isn't cancelled along with the caller
+            await asyncio.shield(cached_font.task)
+        except Exception:  # noqa: BLE001
+            logger.opt(exception=True).warning("Failed to download font {url}", url=font_url)
+            self._discard(name, cached_font)
+            return None
+        return cached_font.path
+
+    async def _download(self, cached_font: CachedFont, font_url: str) -> None:
+        # Download to a temporary path first so that a partially downloaded font is
+        # never picked up from the cache directory after a restart
+        tmp_path = cached_font.path.with_suffix(".tmp")
+        try:
+            await asyncio.to_thread(self._download_file, font_url, tmp_path)
+            await asyncio.to_thread(tmp_path.replace, cached_font.path)
+        finally:
+            with suppress(FileNotFoundError):
+                tmp_path.unlink()
+
+        cached_font.size = cached_font.path.stat().st_size
+        cached_font.task = None
+        if not cached_font.is_discarded:
+            self._total_bytes += cached_font.size
+
+    def _download_file(self, font_url: str, out_path: Path) -> None:
+        with self.api_client.get(font_url, stream=True, timeout=self.REQUEST_TIMEOUT) as r:
+            r.raise_for_status()
+            with out_path.open("wb") as f:
+                for chunk in r.iter_content(self.DOWNLOAD_CHUNK_SIZE):
+                    f.write(chunk)
+
+    def _get_fonts(self) -> OrderedDict[str, CachedFont]:
+        if self._fonts is not None:
+            return self._fonts
+
+        # Pick up the fonts that were downloaded before a restart, using the modified
+        # time as an approximation of when they were last used
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        paths = [(x, x.stat()) for x in self.cache_dir.iterdir() if x.suffix == ".ttf"]
+        paths.sort(key=lambda x: x[1].st_mtime)
+
+        self._fonts = OrderedDict()
+        for path, stat in paths:
+            self._fonts[path.name] = CachedFont(path, stat.st_size)
+            self._total_bytes += stat.st_size
+
+        self._make_room()
+        return self._fonts
+
+    def _make_room(self) -> None:
+        if self._fonts is None:
+            return
+
+        for name, cached_font in list(self._fonts.items()):
+            if self._total_bytes <= self.max_total_bytes:
+                break
+            if cached_font.ref_count == 0 and cached_font.task is None:
+                self._discard(name, cached_font)
+
+    def _discard(self, name: str, cached_font: CachedFont) -> None:
+        if cached_font.is_discarded:
+            return
+
+        cached_font.is_discarded = True
+        if self._fonts is not None and self._fonts.get(name) is cached_font:
+            del self._fonts[name]
+
+        self._total_bytes -= cached_font.size
+        if cached_font.ref_count == 0:
+            self._remove_file(cached_font)
+
+    @staticmethod
+    def _remove_file(cached_font: CachedFont) -> None:
+        with suppress(FileNotFoundError):
+            cached_font.path.unlink()
+
+    @staticmethod
+    def _get_file_name(font_url: str) -> str:
+        return f"{hashlib.sha256(font_url.encode()).hexdigest()}.ttf"
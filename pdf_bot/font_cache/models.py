@@ -0,0 +1,12 @@
+import asyncio
+from dataclasses import dataclass, field
+from pathlib import Path
+
+
+@dataclass
+class CachedFont:
+    path: Path
+    size: int = 0
+    task: asyncio.Task[None] | None = None
+    ref_count: int = 0
+    is_discarded: bool = field(default=False, init=False)
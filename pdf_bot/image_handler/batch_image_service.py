@@ -10,6 +10,7 @@ from pdf_bot.consts import CANCEL
 from pdf_bot.image import ImageService
 from pdf_bot.language import LanguageService
 from pdf_bot.models import FileData
+from pdf_bot.scheduler import SchedulerService
 from pdf_bot.telegram_internal import TelegramService, TelegramServiceError
 
 
@@ -26,10 +27,12 @@ class BatchImageService:
         image_service: ImageService,
         telegram_service: TelegramService,
         language_service: LanguageService,
+        scheduler_service: SchedulerService,
     ) -> None:
         self.image_service = image_service
         self.telegram_service = telegram_service
         self.language_service = language_service
+        self.scheduler_service = scheduler_service
 
     async def ask_first_image(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
         self.telegram_service.update_user_data(context, self.IMAGE_DATA, [])
@@ -174,14 +177,18 @@ class BatchImageService:
         await msg.reply_text(text, reply_markup=ReplyKeyboardRemove())
 
         if is_beautify:
-            async with self.image_service.beautify_and_convert_images_to_pdf(
-                file_data_list
-            ) as out_path:
+            async with (
+                self.scheduler_service.schedule(update, context, TaskType.beautify_image),
+                self.image_service.beautify_and_convert_images_to_pdf(file_data_list) as out_path,
+            ):
                 await self.telegram_service.send_file(
                     update, context, out_path, TaskType.beautify_image
                 )
         else:
-            async with self.image_service.convert_images_to_pdf(file_data_list) as out_path:
+            async with (
+                self.scheduler_service.schedule(update, context, TaskType.image_to_pdf),
+                self.image_service.convert_images_to_pdf(file_data_list) as out_path,
+            ):
                 await self.telegram_service.send_file(
                     update, context, out_path, TaskType.image_to_pdf
                 )
@@ -1,3 +1,4 @@
 from .io_service import IOService
+from .zip_archiver import ZipArchiver
 
-__all__ = ["IOService"]
+__all__ = ["IOService", "ZipArchiver"]
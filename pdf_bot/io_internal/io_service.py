@@ -1,3 +1,4 @@
+import re
 from collections.abc import Generator
 from contextlib import contextmanager
 from pathlib import Path
@@ -5,6 +6,15 @@ from tempfile import NamedTemporaryFile, TemporaryDirectory
 
 
 class IOService:
+    # Temporary files are named with their prefix, an underscore and a random part of fixed
+    # length, which is the same for every file created with the same prefix
+    _TEMP_NAME_PATTERN = re.compile(r"_[a-z0-9_]{8}$")
+
+    @classmethod
+    def get_display_name(cls, path: Path) -> str:
+        stem = cls._TEMP_NAME_PATTERN.sub("", path.stem)
+        return f"{stem}{path.suffix}"
+
     @staticmethod
     @contextmanager
     def create_temp_directory(prefix: str | None = None) -> Generator[Path, None, None]:
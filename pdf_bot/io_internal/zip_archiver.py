@@ -0,0 +1,108 @@
+import asyncio
+from contextlib import ExitStack
+from pathlib import Path
+from types import TracebackType
+from typing import Self
+from zipfile import ZIP_DEFLATED, ZIP_STORED, ZipFile
+
+from telegram.constants import FileSizeLimit
+
+from .io_service import IOService
+
+
+class ZipArchiver:
+    """Writes files into zip archives as they are produced.
+
+    Each file is written off the event loop as soon as it's added, so the archive is ready
+    once the last file has been added instead of needing another pass over all the files.
+    Files that are already compressed are stored as is.
+
+    The archive is split into multiple volumes whenever the next file would take the
+    current volume over the size limit, so that each volume can still be uploaded.
+    """
+
+    _STORED_SUFFIXES = frozenset({".gz", ".jpeg", ".jpg", ".pdf", ".png", ".webp", ".zip"})
+
+    # Upper bound of the local file header and central directory record of each entry,
+    # excluding the file name, including the zip64 extra fields
+    _ENTRY_OVERHEAD = 30 + 46 + 2 * 32
+    _END_RECORD_SIZE = 22 + 56 + 20
+
+    def __init__(
+        self, name: str, max_volume_size: int = FileSizeLimit.FILESIZE_UPLOAD.value
+    ) -> None:
+        self.name = name
+        self.max_volume_size = max_volume_size
+
+        self._lock = asyncio.Lock()
+        self._stack = ExitStack()
+        self._out_dir: Path | None = None
+        self._zip_file: ZipFile | None = None
+        self._volume_size = 0
+        self._volumes: list[Path] = []
+
+    async def __aenter__(self) -> Self:
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        await asyncio.to_thread(self._cleanup)
+
+    async def add(self, path: Path, arcname: str | None = None, delete: bool = False) -> None:
+        async with self._lock:
+            await asyncio.to_thread(self._write, path, arcname or path.name, delete)
+
+    async def finish(self) -> list[Path]:
+        async with self._lock:
+            return await asyncio.to_thread(self._finish)
+
+    def _write(self, path: Path, arcname: str, delete: bool) -> None:
+        # The compressed size isn't known until the file has been written, so the file
+        # size is used as the upper bound, as deflate barely grows incompressible data
+        entry_size = path.stat().st_size + self._ENTRY_OVERHEAD + 2 * len(arcname.encode())
+        zip_file = self._zip_file
+        if zip_file is None or (
+            self._volume_size > self._END_RECORD_SIZE
+            and self._volume_size + entry_size > self.max_volume_size
+        ):
+            zip_file = self._open_volume()
+
+        compress_type = ZIP_STORED if path.suffix.lower() in self._STORED_SUFFIXES else ZIP_DEFLATED
+        zip_file.write(path, arcname, compress_type)
+        self._volume_size += entry_size
+
+        if delete:
+            path.unlink()
+
+    def _open_volume(self) -> ZipFile:
+        self._close_volume()
+        if self._out_dir is None:
+            self._out_dir = self._stack.enter_context(IOService.create_temp_directory("Zip"))
+
+        path = self._out_dir / f"{self.name}_part{len(self._volumes) + 1}.zip"
+        self._zip_file = ZipFile(path, "w", allowZip64=True)
+        self._volume_size = self._END_RECORD_SIZE
+        self._volumes.append(path)
+        return self._zip_file
+
+    def _close_volume(self) -> None:
+        if self._zip_file is not None:
+            self._zip_file.close()
+            self._zip_file = None
+
+    def _finish(self) -> list[Path]:
+        self._close_volume()
+        if len(self._volumes) == 1:
+            path = self._volumes[0].with_name(f"{self.name}.zip")
+            self._volumes[0] = self._volumes[0].rename(path)
+
+        return list(self._volumes)
+
+    def _cleanup(self) -> None:
+        self._close_volume()
+        self._stack.close()
+        self._out_dir = None
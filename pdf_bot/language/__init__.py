@@ -1,11 +1,14 @@
 from .language_handler import LanguageHandler
+from .language_prefetch_handler import LanguagePrefetchHandler
 from .language_repository import LanguageRepository
 from .language_service import LanguageService
-from .models import LanguageData, SetLanguageData
+from .models import LanguageCacheStats, LanguageData, SetLanguageData
 
 __all__ = [
+    "LanguageCacheStats",
     "LanguageData",
     "LanguageHandler",
+    "LanguagePrefetchHandler",
     "LanguageRepository",
     "LanguageService",
     "SetLanguageData",
@@ -0,0 +1,23 @@
+from telegram import Update
+from telegram.ext import BaseHandler, TypeHandler
+
+from pdf_bot.telegram_handler import AbstractTelegramHandler
+
+from .language_service import LanguageService
+
+
+class LanguagePrefetchHandler(AbstractTelegramHandler):
+    # Run before all the other handlers so that the user language is already cached
+    # by the time they need it
+    _GROUP = -1
+
+    def __init__(self, language_service: LanguageService) -> None:
+        self.language_service = language_service
+
+    @property
+    def group(self) -> int:
+        return self._GROUP
+
+    @property
+    def handlers(self) -> list[BaseHandler]:
+        return [TypeHandler(Update, self.language_service.prefetch_user_language)]
@@ -1,35 +1,40 @@
-from google.cloud.datastore import Client, Entity
+from google.cloud.datastore import Entity
 
 from pdf_bot.consts import LANGUAGE, USER
+from pdf_bot.datastore import DatastoreService
 
 
 class LanguageRepository:
     EN_GB_CODE = "en_GB"
     EN_CODE = "en"
 
-    def __init__(self, datastore_client: Client) -> None:
-        self.datastore_client = datastore_client
+    def __init__(self, datastore_service: DatastoreService) -> None:
+        self.datastore_service = datastore_service
 
     def get_language(self, user_id: int) -> str:
-        user_key = self.datastore_client.key(USER, user_id)
-        user = self.datastore_client.get(key=user_key)
-        lang: str
+        user_key = self.datastore_service.key(USER, user_id)
+        user = self.datastore_service.get_blocking(user_key)
+        return self._get_user_language(user)
 
+    async def get_languages(self, user_ids: list[int]) -> dict[int, str]:
+        keys = [self.datastore_service.key(USER, x) for x in user_ids]
+        users = {x.key.id: x for x in await self.datastore_service.get_multi(keys)}
+        return {x: self._get_user_language(users.get(x)) for x in user_ids}
+
+    async def upsert_language(self, user_id: int, language_code: str) -> None:
+        def set_language(user: Entity) -> None:
+            user[LANGUAGE] = language_code
+
+        user_key = self.datastore_service.key(USER, user_id)
+        await self.datastore_service.update(user_key, set_language)
+
+    def _get_user_language(self, user: Entity | None) -> str:
         if user is None or LANGUAGE not in user:
             return self.EN_GB_CODE
 
-        lang = user[LANGUAGE]
+        lang: str = user[LANGUAGE]
 
         # This check is for backwards compatibility
         if lang == self.EN_CODE:
             return self.EN_GB_CODE
         return lang
-
-    def upsert_language(self, user_id: int, language_code: str) -> None:
-        with self.datastore_client.transaction():
-            user_key = self.datastore_client.key(USER, user_id)
-            user = self.datastore_client.get(key=user_key)
-            if user is None:
-                user = Entity(user_key)
-            user[LANGUAGE] = language_code
-            self.datastore_client.put(user)
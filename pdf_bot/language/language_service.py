@@ -1,20 +1,27 @@
+import asyncio
 import gettext
-from collections.abc import Callable
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Mapping
 from contextlib import suppress
+from types import MappingProxyType
 from typing import cast
 
+from loguru import logger
 from telegram import CallbackQuery, InlineKeyboardButton, InlineKeyboardMarkup, Message, Update
 from telegram.ext import ContextTypes
 
 from pdf_bot.errors import CallbackQueryDataTypeError, UserIdError
 
 from .language_repository import LanguageRepository
-from .models import LanguageData
+from .models import LanguageCacheStats, LanguageData
 
 
 class LanguageService:
     _LANGUAGE_CODE = "language_code"
     _KEYBOARD_SIZE = 2
+    _TRANSLATION_DOMAIN = "pdf_bot"
+    _LOCALE_DIR = "locale"
 
     _LANGUAGE_DATA_LIST = sorted(
         [
@@ -62,8 +69,27 @@ class LanguageService:
         key=lambda x: x.long_code,
     )
 
-    def __init__(self, language_repository: LanguageRepository) -> None:
+    def __init__(
+        self,
+        language_repository: LanguageRepository,
+        cache_max_size: int = 100_000,
+        cache_ttl: float = 60 * 60,
+    ) -> None:
         self.language_repository = language_repository
+        self.cache_max_size = cache_max_size
+        self.cache_ttl = cache_ttl
+
+        # User languages are ordered from the least to the most recently used. This is
+        # shared across all users, unlike the user data which is empty after restarts
+        self._cache: OrderedDict[int, tuple[float, str]] = OrderedDict()
+        self._cache_hits = 0
+        self._cache_misses = 0
+        self._pending_user_ids: set[int] = set()
+        self._prefetch_task: asyncio.Task[None] | None = None
+
+        # Translations are loaded once up front as they are looked up several times for
+        # every update, which would otherwise look up and parse the catalogue files
+        self._translations = self._load_translations()
 
     def get_language_code_from_short_code(self, short_code: str) -> str | None:
         for data in self._LANGUAGE_DATA_LIST:
@@ -94,12 +120,57 @@ class LanguageService:
                 return lang
 
         user_id = self._get_user_id(update)
-        lang = self.language_repository.get_language(user_id)
+        lang = self._get_cached_language(user_id)
+
+        if lang is None:
+            self._cache_misses += 1
+            lang = self.language_repository.get_language(user_id)
+            self._cache_language(user_id, lang)
+        else:
+            self._cache_hits += 1
 
         if user_data is not None:
             user_data[self._LANGUAGE_CODE] = lang
         return lang
 
+    async def prefetch_user_language(
+        self, update: Update, context: ContextTypes.DEFAULT_TYPE
+    ) -> None:
+        user_data = context.user_data
+        if user_data is not None and user_data.get(self._LANGUAGE_CODE) is not None:
+            return
+
+        try:
+            user_id = self._get_user_id(update)
+        except UserIdError:
+            return
+
+        if self._get_cached_language(user_id) is not None:
+            return
+
+        # Users of updates that are processed concurrently are looked up in one batch
+        self._pending_user_ids.add(user_id)
+        if self._prefetch_task is None:
+            self._prefetch_task = asyncio.create_task(self._prefetch_pending_languages())
+        await asyncio.shield(self._prefetch_task)
+
+    async def warm_cache(self, user_ids: list[int]) -> None:
+        user_ids = [x for x in user_ids if self._get_cached_language(x) is None]
+        if not user_ids:
+            return
+
+        languages = await self.language_repository.get_languages(user_ids)
+        for user_id, lang in languages.items():
+            self._cache_language(user_id, lang)
+
+    def clear_cached_language(self, user_id: int) -> None:
+        self._cache.pop(user_id, None)
+
+    def get_cache_stats(self) -> LanguageCacheStats:
+        return LanguageCacheStats(
+            hits=self._cache_hits, misses=self._cache_misses, size=len(self._cache)
+        )
+
     async def update_user_language(
         self, update: Update, context: ContextTypes.DEFAULT_TYPE
     ) -> None:
@@ -110,7 +181,8 @@ class LanguageService:
         if not isinstance(data, LanguageData):
             raise CallbackQueryDataTypeError(data)
 
-        self.language_repository.upsert_language(query.from_user.id, data.long_code)
+        await self.language_repository.upsert_language(query.from_user.id, data.long_code)
+        self._cache_language(query.from_user.id, data.long_code)
         if context.user_data is not None:
             context.user_data[self._LANGUAGE_CODE] = data.long_code
 
@@ -123,9 +195,67 @@ class LanguageService:
         self, update: Update, context: ContextTypes.DEFAULT_TYPE
     ) -> Callable[[str], str]:
         lang = self.get_user_language(update, context)
-        t = gettext.translation("pdf_bot", localedir="locale", languages=[lang])
+        translation = self._translations.get(lang)
+
+        if translation is None:
+            translation = self._translations[LanguageRepository.EN_GB_CODE]
+        return translation
+
+    @classmethod
+    def _load_translations(cls) -> Mapping[str, Callable[[str], str]]:
+        start = time.perf_counter()
+        translations: dict[str, Callable[[str], str]] = {}
+
+        for data in cls._LANGUAGE_DATA_LIST:
+            t: gettext.NullTranslations
+            try:
+                t = gettext.translation(
+                    cls._TRANSLATION_DOMAIN, localedir=cls._LOCALE_DIR, languages=[data.long_code]
+                )
+            except FileNotFoundError:
+                logger.warning("Translation not found for {language}", language=data.long_code)
+                t = gettext.NullTranslations()
+            translations[data.long_code] = t.gettext
+
+        logger.info(
+            "Loaded {count} translations in {elapsed:.3f}s",
+            count=len(translations),
+            elapsed=time.perf_counter() - start,
+        )
+        return MappingProxyType(translations)
+
+    async def _prefetch_pending_languages(self) -> None:
+        # Yield to the event loop first so that the other updates can join the batch
+        await asyncio.sleep(0)
+        user_ids = list(self._pending_user_ids)
+        self._pending_user_ids.clear()
+        self._prefetch_task = None
+
+        try:
+            await self.warm_cache(user_ids)
+        except Exception:  # noqa: BLE001
+            # The languages are looked up one by one when they are used instead
+            logger.opt(exception=True).warning("Failed to prefetch user languages")
+
+    def _get_cached_language(self, user_id: int) -> str | None:
+        entry = self._cache.get(user_id)
+        if entry is None:
+            return None
+
+        expires_at, lang = entry
+        if expires_at <= time.monotonic():
+            del self._cache[user_id]
+            return None
+
+        self._cache.move_to_end(user_id)
+        return lang
+
+    def _cache_language(self, user_id: int, lang: str) -> None:
+        self._cache[user_id] = (time.monotonic() + self.cache_ttl, lang)
+        self._cache.move_to_end(user_id)
 
-        return t.gettext
+        while len(self._cache) > self.cache_max_size:
+            self._cache.popitem(last=False)
 
     async def _answer_query_and_drop_data(
         self, context: ContextTypes.DEFAULT_TYPE, query: CallbackQuery
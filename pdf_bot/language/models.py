@@ -1,3 +1,5 @@
+from dataclasses import dataclass
+
 from pydantic import BaseModel
 
 
@@ -12,3 +14,15 @@ class LanguageData(BaseModel):
     @property
     def short_code(self) -> str:
         return self.long_code.split("_")[0]
+
+
+@dataclass
+class LanguageCacheStats:
+    hits: int
+    misses: int
+    size: int
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0
@@ -27,7 +27,7 @@ class MergeHandler(AbstractTelegramHandler):
                         MessageHandler(TEXT_FILTER, self.merge_service.check_text),
                     ],
                 },
-                fallbacks=[CommandHandler("cancel", self.telegram_service.cancel_conversation)],
+                fallbacks=[CommandHandler("cancel", self.merge_service.cancel_conversation)],
                 allow_reentry=True,
             )
         ]
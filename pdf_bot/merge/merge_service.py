@@ -1,7 +1,9 @@
+import asyncio
+from contextlib import suppress
 from gettext import gettext as _
 from typing import cast
 
-from telegram import Document, Message, ReplyKeyboardMarkup, ReplyKeyboardRemove, Update
+from telegram import Message, ReplyKeyboardMarkup, ReplyKeyboardRemove, Update
 from telegram.constants import ParseMode
 from telegram.ext import ContextTypes, ConversationHandler
 
@@ -9,8 +11,13 @@ from pdf_bot.analytics import TaskType
 from pdf_bot.consts import CANCEL, DONE
 from pdf_bot.language import LanguageService
 from pdf_bot.models import FileData
-from pdf_bot.pdf import PdfService, PdfServiceError
-from pdf_bot.telegram_internal import TelegramService, TelegramServiceError
+from pdf_bot.pdf import PdfMergeSession, PdfService, PdfServiceError
+from pdf_bot.scheduler import SchedulerService
+from pdf_bot.telegram_internal import (
+    TelegramGetUserDataError,
+    TelegramService,
+    TelegramServiceError,
+)
 
 
 class MergeService:
@@ -23,24 +30,23 @@ class MergeService:
         pdf_service: PdfService,
         telegram_service: TelegramService,
         language_service: LanguageService,
+        scheduler_service: SchedulerService,
+        session_ttl: float = 60 * 60,
     ) -> None:
         self.pdf_service = pdf_service
         self.telegram_service = telegram_service
         self.language_service = language_service
+        self.scheduler_service = scheduler_service
+        self.session_ttl = session_ttl
 
-    async def ask_first_pdf(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
-        self.telegram_service.update_user_data(context, self._MERGE_PDF_DATA, [])
-        _ = self.language_service.set_app_language(update, context)
-        await self.telegram_service.reply_with_cancel_markup(
-            update,
-            context,
-            "{desc_1}\n\n{desc_2}".format(
-                desc_1=_("Send me the PDF files that you'll like to merge"),
-                desc_2=_("Note that the files will be merged in the order that you send me"),
-            ),
-        )
+        # Sessions hold an open merged file, so they're closed if they're left unused
+        self._session_expiries: dict[PdfMergeSession, asyncio.TimerHandle] = {}
 
-        return self.WAIT_MERGE_PDF
+    async def ask_first_pdf(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
+        await self._close_merge_session(context)
+        session = self.pdf_service.create_merge_session()
+        self._store_merge_session(context, session)
+        return await self._ask_first_pdf(update, context)
 
     async def check_pdf(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
         _ = self.language_service.set_app_language(update, context)
@@ -53,12 +59,21 @@ class MergeService:
             return self.WAIT_MERGE_PDF
 
         try:
-            self._append_file_data(context, doc)
+            session = self._get_merge_session(context)
         except TelegramServiceError as e:
             await msg.reply_text(_(str(e)))
             return ConversationHandler.END
 
-        return await self._ask_next_pdf(update, context)
+        # Download and merge the file in the background while the user sends the next one,
+        # scheduled like other jobs so that the files of a user don't run all at once
+        task = session.add_file(
+            FileData.from_telegram_object(doc),
+            self.scheduler_service.schedule(update, context, TaskType.merge_pdf),
+        )
+        context.application.create_task(
+            self._check_merged_pdf(update, context, task), update=update
+        )
+        return await self._ask_next_pdf(update, context, session)
 
     async def check_text(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
         _ = self.language_service.set_app_language(update, context)
@@ -67,27 +82,42 @@ class MergeService:
 
         if text in [_(self._REMOVE_LAST), _(DONE)]:
             try:
-                file_data_list = self.telegram_service.get_user_data(context, self._MERGE_PDF_DATA)
+                session = self.telegram_service.get_user_data(context, self._MERGE_PDF_DATA)
             except TelegramServiceError as e:
                 await msg.reply_text(_(str(e)))
                 return ConversationHandler.END
 
             if text == _(self._REMOVE_LAST):
-                return await self._remove_last_pdf(update, context, file_data_list)
-            return await self._preprocess_pdfs(update, context, file_data_list)
+                return await self._remove_last_pdf(update, context, session)
+            return await self._preprocess_pdfs(update, context, session)
         if text == _(CANCEL):
-            return await self.telegram_service.cancel_conversation(update, context)
+            return await self.cancel_conversation(update, context)
+        return self.WAIT_MERGE_PDF
+
+    async def cancel_conversation(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
+        await self._close_merge_session(context)
+        return await self.telegram_service.cancel_conversation(update, context)
+
+    async def _ask_first_pdf(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
+        _ = self.language_service.set_app_language(update, context)
+        await self.telegram_service.reply_with_cancel_markup(
+            update,
+            context,
+            "{desc_1}\n\n{desc_2}".format(
+                desc_1=_("Send me the PDF files that you'll like to merge"),
+                desc_2=_("Note that the files will be merged in the order that you send me"),
+            ),
+        )
+
         return self.WAIT_MERGE_PDF
 
-    async def _ask_next_pdf(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
+    async def _ask_next_pdf(
+        self, update: Update, context: ContextTypes.DEFAULT_TYPE, session: PdfMergeSession
+    ) -> int:
         _ = self.language_service.set_app_language(update, context)
         msg = cast("Message", update.effective_message)
         text = "{desc}\n".format(desc=_("You've sent me these PDF files so far:"))
-        await self.telegram_service.send_file_names(
-            msg.chat_id,
-            text,
-            context.user_data[self._MERGE_PDF_DATA],  # type: ignore[index]
-        )
+        await self.telegram_service.send_file_names(msg.chat_id, text, session.file_data_list)
 
         reply_markup = ReplyKeyboardMarkup(
             [[_(DONE)], [_(self._REMOVE_LAST), _(CANCEL)]],
@@ -109,16 +139,16 @@ class MergeService:
         self,
         update: Update,
         context: ContextTypes.DEFAULT_TYPE,
-        file_data_list: list[FileData],
+        session: PdfMergeSession,
     ) -> int:
         _ = self.language_service.set_app_language(update, context)
         msg = cast("Message", update.effective_message)
+        self._store_merge_session(context, session)
 
-        try:
-            file_data = file_data_list.pop()
-        except IndexError:
+        file_data = await session.remove_last_file()
+        if file_data is None:
             await msg.reply_text(_("You've already removed all the PDF files you've sent me"))
-            return await self.ask_first_pdf(update, context)
+            return await self._ask_first_pdf(update, context)
 
         await msg.reply_text(
             _("{file_name} has been removed for merging").format(
@@ -127,52 +157,115 @@ class MergeService:
             parse_mode=ParseMode.HTML,
         )
 
-        if file_data_list:
-            self.telegram_service.update_user_data(context, self._MERGE_PDF_DATA, file_data_list)
-            return await self._ask_next_pdf(update, context)
-        return await self.ask_first_pdf(update, context)
+        if session.file_data_list:
+            return await self._ask_next_pdf(update, context, session)
+        return await self._ask_first_pdf(update, context)
 
     async def _preprocess_pdfs(
         self,
         update: Update,
         context: ContextTypes.DEFAULT_TYPE,
-        file_data_list: list[FileData],
+        session: PdfMergeSession,
     ) -> int:
         _ = self.language_service.set_app_language(update, context)
         msg = cast("Message", update.effective_message)
-        num_files = len(file_data_list)
+        num_files = len(session.file_data_list)
 
         if num_files == 0:
             await msg.reply_text(_("You haven't sent me any PDF files"))
-            return await self.ask_first_pdf(update, context)
+            self._store_merge_session(context, session)
+            return await self._ask_first_pdf(update, context)
         if num_files == 1:
             await msg.reply_text(_("You've only sent me one PDF file"))
-            self.telegram_service.update_user_data(context, self._MERGE_PDF_DATA, file_data_list)
-            return await self._ask_next_pdf(update, context)
-        return await self._merge_pdfs(update, context, file_data_list)
+            self._store_merge_session(context, session)
+            return await self._ask_next_pdf(update, context, session)
+        return await self._merge_pdfs(update, context, session)
 
     async def _merge_pdfs(
         self,
         update: Update,
         context: ContextTypes.DEFAULT_TYPE,
-        file_data_list: list[FileData],
+        session: PdfMergeSession,
     ) -> int:
         _ = self.language_service.set_app_language(update, context)
         msg = cast("Message", update.effective_message)
         await msg.reply_text(_("Merging your PDF files"), reply_markup=ReplyKeyboardRemove())
 
+        # The files have been merged while the user sent them, so only the end of the
+        # merged file is left to be written
         try:
-            async with self.pdf_service.merge_pdfs(file_data_list) as out_path:
+            async with session.finish(
+                self.scheduler_service.schedule(update, context, TaskType.merge_pdf)
+            ) as out_path:
                 await self.telegram_service.send_file(update, context, out_path, TaskType.merge_pdf)
         except PdfServiceError as e:
             await msg.reply_text(_(str(e)))
+        finally:
+            await self._close_session(session)
 
         return ConversationHandler.END
 
-    def _append_file_data(self, context: ContextTypes.DEFAULT_TYPE, document: Document) -> None:
-        file_data_list: list[FileData] = self.telegram_service.get_user_data(
+    async def _check_merged_pdf(
+        self, update: Update, context: ContextTypes.DEFAULT_TYPE, task: asyncio.Task[None]
+    ) -> None:
+        await asyncio.wait([task])
+        if task.cancelled():
+            return
+
+        error = task.exception()
+        if isinstance(error, PdfServiceError | TelegramServiceError):
+            # The file has been removed from the session, so let the user know right away
+            _ = self.language_service.set_app_language(update, context)
+            msg = cast("Message", update.effective_message)
+            await msg.reply_text(_(str(error)))
+        elif error is not None:
+            raise error
+
+    def _get_merge_session(self, context: ContextTypes.DEFAULT_TYPE) -> PdfMergeSession:
+        session: PdfMergeSession = self.telegram_service.get_user_data(
             context, self._MERGE_PDF_DATA
         )
-        file_data = FileData.from_telegram_object(document)
-        file_data_list.append(file_data)
-        self.telegram_service.update_user_data(context, self._MERGE_PDF_DATA, file_data_list)
+        self._store_merge_session(context, session)
+        return session
+
+    def _store_merge_session(
+        self, context: ContextTypes.DEFAULT_TYPE, session: PdfMergeSession
+    ) -> None:
+        self.telegram_service.update_user_data(context, self._MERGE_PDF_DATA, session)
+
+        handle = self._session_expiries.pop(session, None)
+        if handle is not None:
+            handle.cancel()
+        self._session_expiries[session] = asyncio.get_running_loop().call_later(
+            self.session_ttl, self._expire_merge_session, context, session
+        )
+
+    def _expire_merge_session(
+        self, context: ContextTypes.DEFAULT_TYPE, session: PdfMergeSession
+    ) -> None:
+        self._session_expiries.pop(session, None)
+
+        # Sessions are taken out of the user data while they're being used, so the
+        # session is only closed if it's still waiting for the user
+        try:
+            stored_session = self.telegram_service.get_user_data(context, self._MERGE_PDF_DATA)
+        except TelegramGetUserDataError:
+            return
+
+        if stored_session is session:
+            context.application.create_task(session.close())
+        else:
+            self.telegram_service.update_user_data(context, self._MERGE_PDF_DATA, stored_session)
+
+    async def _close_merge_session(self, context: ContextTypes.DEFAULT_TYPE) -> None:
+        with suppress(TelegramGetUserDataError):
+            session: PdfMergeSession = self.telegram_service.get_user_data(
+                context, self._MERGE_PDF_DATA
+            )
+            await self._close_session(session)
+
+    async def _close_session(self, session: PdfMergeSession) -> None:
+        handle = self._session_expiries.pop(session, None)
+        if handle is not None:
+            handle.cancel()
+        await session.close()
@@ -1,4 +1,5 @@
-from dataclasses import dataclass
+from collections.abc import Callable
+from dataclasses import dataclass, field
 from pathlib import Path
 
 from telegram import Document, Message, PhotoSize
@@ -16,12 +17,13 @@ class SupportData:
 class FileData:
     id: str
     name: str | None = None
+    unique_id: str | None = field(default=None, compare=False)
 
     @classmethod
     def from_telegram_object(cls, obj: Document | PhotoSize) -> "FileData":
         if isinstance(obj, Document):
-            return cls(obj.file_id, obj.file_name)
-        return cls(obj.file_id)
+            return cls(obj.file_id, obj.file_name, obj.file_unique_id)
+        return cls(obj.file_id, unique_id=obj.file_unique_id)
 
 
 @dataclass
@@ -43,7 +45,19 @@ class MessageData:
         return cls(message.chat_id, message.id)
 
 
+@dataclass
+class TranslatableText:
+    # The text is kept untranslated so that it can be translated into the language of
+    # each user that it's sent to, such as when a cached result is sent to another user
+    text: str
+    params: dict[str, str] = field(default_factory=dict)
+
+    def translate(self, _: Callable[[str], str]) -> str:
+        return _(self.text).format(**self.params)
+
+
 @dataclass
 class FileTaskResult:
-    path: Path
-    message: str | None = None
+    # Results that are split into multiple files, such as zip volumes, are sent in order
+    path: Path | list[Path]
+    message: TranslatableText | None = None
@@ -6,15 +6,29 @@ from .exceptions import (
     PdfReadError,
     PdfServiceError,
 )
-from .models import CompressResult, FontData, ScaleByData, ScaleData, ScaleToData
+from .merge_session import PdfMergeSession
+from .models import (
+    CompressEstimate,
+    CompressResult,
+    FontData,
+    ImageFormat,
+    OcrProfile,
+    ScaleByData,
+    ScaleData,
+    ScaleToData,
+)
 from .pdf_service import PdfService
 
 __all__ = [
+    "CompressEstimate",
     "CompressResult",
     "FontData",
+    "ImageFormat",
+    "OcrProfile",
     "PdfDecryptError",
     "PdfEncryptedError",
     "PdfIncorrectPasswordError",
+    "PdfMergeSession",
     "PdfNoTextError",
     "PdfReadError",
     "PdfService",
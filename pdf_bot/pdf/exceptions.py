@@ -30,3 +30,8 @@ class PdfEncryptedError(PdfServiceError):
 
     def __init__(self, *args: object, **kwargs: object) -> None:
         super().__init__(self._MESSAGE, *args, **kwargs)
+
+    def __reduce__(self) -> tuple[type["PdfEncryptedError"], tuple[object, ...]]:
+        # Unpickle without the message, which is added again by the constructor, so that
+        # the error can be raised from the process pool
+        return type(self), self.args[1:]
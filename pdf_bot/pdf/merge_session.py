@@ -0,0 +1,204 @@
+import asyncio
+from collections.abc import AsyncGenerator
+from contextlib import AbstractAsyncContextManager, ExitStack, asynccontextmanager, nullcontext
+from dataclasses import dataclass
+from gettext import gettext as _
+from pathlib import Path
+
+import pikepdf
+
+from pdf_bot.executor import ExecutorService, PoolType
+from pdf_bot.io_internal import IOService
+from pdf_bot.models import FileData
+from pdf_bot.pdf.exceptions import PdfReadError, PdfServiceError
+from pdf_bot.pdf.pdf_merger import PdfMerger
+from pdf_bot.telegram_internal import TelegramService
+
+
+@dataclass(eq=False)
+class _MergeFile:
+    file_data: FileData
+    previous: asyncio.Task[None] | None = None
+    task: asyncio.Task[None] | None = None
+    append: asyncio.Future[int] | None = None
+
+
+class PdfMergeSession:
+    """Merges PDF files in the background as they're added to the session.
+
+    Each file is downloaded and appended to the merger as soon as it's added, in the order
+    that the files are added, so most of the files have been merged in chunks by the time
+    all the files have been added.
+    """
+
+    def __init__(
+        self,
+        io_service: IOService,
+        telegram_service: TelegramService,
+        executor_service: ExecutorService,
+    ) -> None:
+        self.telegram_service = telegram_service
+        self.executor_service = executor_service
+
+        self._stack = ExitStack()
+        self._out_path = self._stack.enter_context(io_service.create_temp_pdf_file("Merged"))
+        temp_dir = self._stack.enter_context(io_service.create_temp_directory("Merge"))
+        self._merger = PdfMerger(temp_dir)
+
+        # The merger isn't thread-safe, so it's only used by one task at a time
+        self._lock = asyncio.Lock()
+        self._files: list[_MergeFile] = []
+
+        # Files are appended and removed in the order that they're added and removed, so
+        # each task waits for the task that was started before it
+        self._last_task: asyncio.Task[None] | None = None
+
+    @property
+    def file_data_list(self) -> list[FileData]:
+        return [x.file_data for x in self._files]
+
+    def add_file(
+        self, file_data: FileData, job: AbstractAsyncContextManager[None] | None = None
+    ) -> asyncio.Task[None]:
+        """Starts merging the file in the background.
+
+        Args:
+            file_data: The file to merge
+            job: Entered around the download and append of the file, such as a job of
+                the scheduler to limit how many files are processed at once
+
+        Returns:
+            The task that merges the file, which raises `PdfReadError` if the file is
+            invalid, in which case the file is removed from the session
+        """
+        merge_file = _MergeFile(file_data, self._last_task)
+        merge_file.task = asyncio.create_task(
+            self._merge_file(merge_file, self._last_task, job or nullcontext())
+        )
+        self._files.append(merge_file)
+        self._last_task = merge_file.task
+        return merge_file.task
+
+    async def remove_last_file(self) -> FileData | None:
+        """Removes the last added file and its pages from the merged file.
+
+        Returns:
+            The removed file, or `None` if there are no files
+        """
+        if not self._files:
+            return None
+
+        merge_file = self._files.pop()
+        if merge_file.task is not None:
+            merge_file.task.cancel()
+
+        # The cancelled task may not have waited for the tasks before it, so they're
+        # waited for here instead
+        previous = [
+            x for x in (merge_file.task, merge_file.previous, self._last_task) if x is not None
+        ]
+        removal = asyncio.create_task(self._remove_file(merge_file, previous))
+        self._last_task = removal
+
+        await asyncio.shield(removal)
+        return merge_file.file_data
+
+    @asynccontextmanager
+    async def finish(
+        self, job: AbstractAsyncContextManager[None] | None = None
+    ) -> AsyncGenerator[Path, None]:
+        """Waits for the files to be appended and writes the merged file.
+
+        Args:
+            job: Entered once the files have been appended, around writing and using the
+                merged file. It isn't entered while waiting for the files, as their own
+                jobs could be waiting for it otherwise
+
+        Raises:
+            PdfServiceError: If none of the files could be merged
+        """
+        tasks = [x.task for x in self._files if x.task is not None]
+        if self._last_task is not None:
+            tasks.append(self._last_task)
+        if tasks:
+            await asyncio.wait(tasks)
+        if not self._files:
+            raise PdfServiceError(_("None of your PDF files could be merged"))
+
+        async with job or nullcontext():
+            async with self._lock:
+                await self.executor_service.run(PoolType.thread, self._merger.save, self._out_path)
+            yield self._out_path
+
+    async def close(self) -> None:
+        """Stops merging the files and deletes the merged file."""
+        tasks = [x.task for x in self._files if x.task is not None]
+        for task in tasks:
+            task.cancel()
+
+        # Removals are waited for rather than cancelled, as they can't be stopped once
+        # they have started changing the merger
+        if self._last_task is not None:
+            tasks.append(self._last_task)
+        if tasks:
+            await asyncio.wait(tasks)
+
+        self._files.clear()
+        self._stack.close()
+
+    async def _merge_file(
+        self,
+        merge_file: _MergeFile,
+        previous: asyncio.Task[None] | None,
+        job: AbstractAsyncContextManager[None],
+    ) -> None:
+        try:
+            async with (
+                job,
+                self.telegram_service.download_pdf_file(merge_file.file_data.id) as path,
+            ):
+                # Files are appended in the order that they were added
+                if previous is not None:
+                    await asyncio.wait([previous])
+
+                async with self._lock:
+                    await self._append_file(merge_file, path)
+        except pikepdf.PdfError as e:
+            self._discard(merge_file)
+            raise PdfReadError(
+                _("I couldn't merge your PDF files as this file is invalid: %s")
+                % merge_file.file_data.name
+            ) from e
+        except Exception:
+            self._discard(merge_file)
+            raise
+
+    async def _remove_file(
+        self, merge_file: _MergeFile, previous: list[asyncio.Task[None]]
+    ) -> None:
+        # The pages of the file are the last pages of the merged file once the tasks
+        # before it have finished, and the tasks after it wait for this to finish
+        await asyncio.wait(previous)
+
+        append = merge_file.append
+        if append is not None and not append.cancelled() and append.exception() is None:
+            async with self._lock:
+                await self.executor_service.run(PoolType.thread, self._merger.remove_last)
+
+    async def _append_file(self, merge_file: _MergeFile, file_path: Path) -> None:
+        append = asyncio.ensure_future(
+            self.executor_service.run(PoolType.thread, self._merger.append, file_path)
+        )
+        merge_file.append = append
+
+        try:
+            await asyncio.shield(append)
+        except asyncio.CancelledError:
+            # The append can't be stopped once it has started, so keep the downloaded file
+            # and the merger until it has finished
+            await asyncio.wait([append])
+            raise
+
+    def _discard(self, merge_file: _MergeFile) -> None:
+        if merge_file in self._files:
+            self._files.remove(merge_file)
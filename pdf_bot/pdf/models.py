@@ -1,14 +1,24 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from enum import Enum
 from pathlib import Path
 
 import humanize
 
 
+@dataclass
+class CompressEstimate:
+    num_images: int = 0
+    image_bytes: int = 0
+    stream_bytes: int = 0
+    estimated_saving: float = 0
+
+
 @dataclass
 class CompressResult:
     old_size: int
     new_size: int
     out_path: Path
+    stage_times: dict[str, float] = field(default_factory=dict)
 
     @property
     def reduced_percentage(self) -> float:
@@ -53,3 +63,20 @@ class ScaleByData(ScaleData):
 
 class ScaleToData(ScaleData):
     pass
+
+
+class OcrProfile(Enum):
+    default = "default"
+    fast = "fast"
+
+
+class ImageFormat(Enum):
+    png = "png"
+    jpeg = "jpeg"
+    webp = "webp"
+
+    @property
+    def extension(self) -> str:
+        if self == ImageFormat.jpeg:
+            return "jpg"
+        return str(self.value)
@@ -0,0 +1,15 @@
+"""An ocrmypdf plugin that rejects files without any pages to recognise.
+
+Pages with a text layer are skipped instead of rejected, so this rejects the file with
+ocrmypdf's own analysis of the file before any of its pages are processed.
+"""
+
+from ocrmypdf import OcrOptions, hookimpl
+from ocrmypdf.exceptions import PriorOcrFoundError
+from ocrmypdf.pdfinfo import PdfInfo
+
+
+@hookimpl
+def validate(pdfinfo: PdfInfo, options: OcrOptions) -> None:  # noqa: ARG001
+    if all(x is not None and x.has_text for x in pdfinfo.pages):
+        raise PriorOcrFoundError
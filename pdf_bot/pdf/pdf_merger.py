@@ -0,0 +1,195 @@
+import os
+import shutil
+from collections.abc import Iterator
+from contextlib import ExitStack
+from dataclasses import dataclass
+from itertools import count
+from pathlib import Path
+
+import pikepdf
+
+
+@dataclass
+class _MergeFile:
+    path: Path
+    num_pages: int
+
+
+@dataclass
+class _Chunk:
+    path: Path
+    num_files: int
+
+
+class PdfMerger:
+    """Merges PDF files by copying their pages with pikepdf.
+
+    pikepdf reads the content of the copied pages from the source files when the merged
+    file is saved, so the sources stay open until then. To bound the number of files open
+    at once, every `chunk_size` appended files are merged into an intermediate file, which
+    the merged file is then copied from. qpdf writes the objects shared by the pages of a
+    file, such as fonts and images, once.
+
+    Form fields and the named destinations that the pages refer to are carried over by
+    `pikepdf.Pdf.add_pages_from`, and the outlines of the files are merged as well.
+    """
+
+    _MAX_OUTLINE_ITEMS = 10_000
+
+    def __init__(self, temp_dir: Path, chunk_size: int = 20) -> None:
+        self._temp_dir = temp_dir
+        self._chunk_size = chunk_size
+        self._files: list[_MergeFile] = []
+        self._chunks: list[_Chunk] = []
+        self._path_ids = count()
+
+    @property
+    def num_pages(self) -> int:
+        return sum(x.num_pages for x in self._files)
+
+    def append(self, file_path: Path) -> int:
+        """Appends the file to the merged file.
+
+        The file is kept in the temporary directory, so it can be deleted once this
+        returns.
+
+        Returns:
+            The number of pages of the file
+
+        Raises:
+            pikepdf.PdfError: If the file is invalid, in which case it isn't appended
+        """
+        path = self._get_temp_path()
+        try:
+            os.link(file_path, path)
+        except OSError:
+            shutil.copyfile(file_path, path)
+
+        try:
+            with pikepdf.Pdf.open(path) as pdf:
+                num_pages = len(pdf.pages)
+        except pikepdf.PdfError:
+            path.unlink()
+            raise
+
+        self._files.append(_MergeFile(path, num_pages))
+        files = self._get_unchunked_files()
+        if len(files) < self._chunk_size:
+            return num_pages
+
+        chunk_path = self._get_temp_path()
+        try:
+            self._merge_files([x.path for x in files], chunk_path)
+        except pikepdf.PdfError:
+            self._files.pop()
+            path.unlink()
+            chunk_path.unlink(missing_ok=True)
+            raise
+
+        self._chunks.append(_Chunk(chunk_path, len(files)))
+        return num_pages
+
+    def remove_last(self) -> int:
+        """Removes the last appended file from the merged file.
+
+        Returns:
+            The number of pages of the removed file
+        """
+        merge_file = self._files.pop()
+        merge_file.path.unlink()
+
+        # The other files of the chunk are merged again with the next chunk
+        if self._chunks and sum(x.num_files for x in self._chunks) > len(self._files):
+            self._chunks.pop().path.unlink()
+
+        return merge_file.num_pages
+
+    def save(self, out_path: Path) -> None:
+        paths = [x.path for x in self._chunks] + [x.path for x in self._get_unchunked_files()]
+        self._merge_files(paths, out_path)
+
+    def _get_temp_path(self) -> Path:
+        return self._temp_dir / f"{next(self._path_ids)}.pdf"
+
+    def _get_unchunked_files(self) -> list[_MergeFile]:
+        return self._files[sum(x.num_files for x in self._chunks) :]
+
+    @classmethod
+    def _merge_files(cls, paths: list[Path], out_path: Path) -> None:
+        with ExitStack() as stack, pikepdf.Pdf.new() as pdf:
+            for path in paths:
+                src = stack.enter_context(pikepdf.Pdf.open(path))
+                pdf.add_pages_from(src)
+                cls._append_outlines(pdf, src)
+            pdf.save(out_path)
+
+    @classmethod
+    def _append_outlines(cls, pdf: pikepdf.Pdf, src: pikepdf.Pdf) -> None:
+        if "/First" not in src.Root.get("/Outlines", {}):
+            return
+
+        # The pages have been copied already, so the copied outline items refer to the
+        # copied pages
+        cls._resolve_outline_dests(src)
+        outlines = src.Root.Outlines
+        if not outlines.is_indirect:
+            outlines = src.make_indirect(outlines)
+        copied = pdf.copy_foreign(outlines)
+
+        if "/First" not in pdf.Root.get("/Outlines", {}):
+            pdf.Root.Outlines = copied
+            return
+
+        root = pdf.Root.Outlines
+        for item in cls._iter_outline_items(copied, recursive=False):
+            item.Parent = root
+
+        root.Last.Next = copied.First
+        copied.First.Prev = root.Last
+        root.Last = copied.Last
+        root.Count = abs(int(root.get("/Count", 0))) + abs(int(copied.get("/Count", 0)))
+
+    @classmethod
+    def _resolve_outline_dests(cls, src: pikepdf.Pdf) -> None:
+        # Named destinations are only carried over if the pages refer to them, so the
+        # outline items are changed to refer to the pages directly
+        for item in cls._iter_outline_items(src.Root.Outlines, recursive=True):
+            action = item.get("/A")
+            for obj, key in ((item, "/Dest"), (action, "/D")):
+                if not isinstance(obj, pikepdf.Dictionary) or key not in obj:
+                    continue
+
+                dest = cls._get_named_dest(src, obj[key])
+                if dest is not None:
+                    obj[key] = dest
+
+    @staticmethod
+    def _get_named_dest(src: pikepdf.Pdf, name: pikepdf.Object) -> pikepdf.Object | None:
+        if isinstance(name, pikepdf.Name):
+            dest = src.Root.get("/Dests", pikepdf.Dictionary()).get(name)
+        elif isinstance(name, pikepdf.String) and "/Dests" in src.Root.get("/Names", {}):
+            dest = pikepdf.NameTree(src.Root.Names.Dests).get(str(name))
+        else:
+            return None
+
+        if isinstance(dest, pikepdf.Dictionary):
+            return dest.get("/D")
+        return dest
+
+    @classmethod
+    def _iter_outline_items(
+        cls, parent: pikepdf.Object, *, recursive: bool
+    ) -> Iterator[pikepdf.Object]:
+        # Outline items may refer to each other in a cycle in invalid files
+        seen: set[tuple[int, int]] = set()
+        items = [parent.get("/First")]
+        while items and len(seen) < cls._MAX_OUTLINE_ITEMS:
+            item = items.pop()
+            if not isinstance(item, pikepdf.Dictionary) or item.objgen in seen:
+                continue
+
+            seen.add(item.objgen)
+            yield item
+            items.append(item.get("/Next"))
+            if recursive:
+                items.append(item.get("/First"))
@@ -1,29 +1,40 @@
 import asyncio
+import hashlib
+import os
 import shutil
 import textwrap
-from collections.abc import AsyncGenerator, Generator
-from contextlib import asynccontextmanager, contextmanager
+import time
+from collections.abc import AsyncGenerator, Callable, Coroutine
+from contextlib import AsyncExitStack, ExitStack, asynccontextmanager
+from functools import lru_cache
 from gettext import gettext as _
 from pathlib import Path
+from typing import Any, cast
 
 import img2pdf
 import ocrmypdf
 import pdf2image
 import pdf_diff
+import pikepdf
 from img2pdf import Rotation
+from loguru import logger
 from ocrmypdf.exceptions import EncryptedPdfError, PriorOcrFoundError, TaggedPDFError
 from pdfCropMargins import crop
 from pdfminer.high_level import extract_text
 from pdfminer.pdfdocument import PDFPasswordIncorrect
+from PIL import Image
 from pypdf import PasswordType, PdfReader, PdfWriter
 from pypdf.errors import PdfReadError as PyPdfReadError
 from pypdf.pagerange import PageRange
 from weasyprint import CSS, HTML
 from weasyprint.text.fonts import FontConfiguration
 
-from pdf_bot.cli import CLIService, CLIServiceError
-from pdf_bot.io_internal import IOService
+from pdf_bot.cli import CLIService, CLIServiceError, CompressProfile
+from pdf_bot.executor import ExecutorService, PoolType
+from pdf_bot.font_cache import FontCacheService
+from pdf_bot.io_internal import IOService, ZipArchiver
 from pdf_bot.models import FileData
+from pdf_bot.pdf import ocr_plugin
 from pdf_bot.pdf.exceptions import (
     PdfDecryptError,
     PdfEncryptedError,
@@ -33,20 +44,58 @@ from pdf_bot.pdf.exceptions import (
     PdfReadError,
     PdfServiceError,
 )
-from pdf_bot.pdf.models import CompressResult, FontData, ScaleData
+from pdf_bot.pdf.merge_session import PdfMergeSession
+from pdf_bot.pdf.models import (
+    CompressEstimate,
+    CompressResult,
+    FontData,
+    ImageFormat,
+    OcrProfile,
+    ScaleData,
+)
+from pdf_bot.pdf.pdf_merger import PdfMerger
 from pdf_bot.telegram_internal import TelegramService
 
+ChunkProcessor = Callable[[int, list[Any]], Coroutine[Any, Any, None]]
+
+_POINTS_PER_INCH = 72
+_DOWNSAMPLE_RESOLUTION = 150
+_LOSSY_RECOMPRESS_RATIO = 0.9
+_LOSSLESS_TO_JPEG_RATIO = 0.3
+_BILEVEL_IMAGE_FILTERS = {"/CCITTFaxDecode", "/JBIG2Decode"}
+_LOSSY_IMAGE_FILTERS = {"/DCTDecode", "/JPXDecode"}
+
 
 class PdfService:
-    def __init__(
+    def __init__(  # noqa: PLR0913, PLR0917
         self,
         cli_service: CLIService,
         io_service: IOService,
         telegram_service: TelegramService,
+        executor_service: ExecutorService,
+        font_cache_service: FontCacheService,
+        grayscale_dpi: int = 200,
+        rasterise_chunk_size: int = 10,
+        ocr_jobs: int | None = None,
+        ocr_profile: OcrProfile = OcrProfile.default,
+        ocr_tesseract_timeout: float = 60,
+        compress_min_gain: float = 0.05,
+        compress_profiles: list[CompressProfile] | None = None,
+        compress_time_limit: float = 120,
     ) -> None:
         self.cli_service = cli_service
         self.io_service = io_service
         self.telegram_service = telegram_service
+        self.executor_service = executor_service
+        self.font_cache_service = font_cache_service
+        self.grayscale_dpi = grayscale_dpi
+        self.rasterise_chunk_size = rasterise_chunk_size
+        self.ocr_jobs = ocr_jobs
+        self.ocr_profile = ocr_profile
+        self.ocr_tesseract_timeout = ocr_tesseract_timeout
+        self.compress_min_gain = compress_min_gain
+        self.compress_profiles = compress_profiles or list(CompressProfile)
+        self.compress_time_limit = compress_time_limit
 
     @asynccontextmanager
     async def add_watermark_to_pdf(
@@ -55,14 +104,11 @@ class PdfService:
         src_reader, wmk_reader = await asyncio.gather(
             self._open_pdf(source_file_id), self._open_pdf(watermark_file_id)
         )
-        wmk_page = wmk_reader.pages[0]
-        writer = PdfWriter()
-
-        for page in src_reader.pages:
-            page.merge_page(wmk_page)
-            writer.add_page(page)
+        writer = await self.executor_service.run(
+            PoolType.thread, self._merge_watermark, src_reader, wmk_reader
+        )
 
-        with self._write_pdf(writer, "File_with_watermark") as out_path:
+        async with self._write_pdf(writer, "File_with_watermark") as out_path:
             yield out_path
 
     @asynccontextmanager
@@ -72,16 +118,28 @@ class PdfService:
                 self.io_service.create_temp_directory() as dir_name,
                 self.io_service.create_temp_pdf_file("Grayscale") as out_path,
             ):
-                images = pdf2image.convert_from_path(
+                chunk_paths: list[Path] = []
+
+                async def write_chunk(first_page: int, image_paths: list[Any]) -> None:
+                    chunk_path = dir_name / f"chunk_{first_page}.pdf"
+                    chunk_paths.append(chunk_path)
+                    await self.executor_service.run(
+                        PoolType.process, _write_image_chunk_to_pdf, image_paths, chunk_path
+                    )
+
+                num_pages = await self._get_num_pages(file_path)
+                await self._rasterise_pdf(
                     file_path,
-                    output_folder=dir_name,
+                    dir_name,
+                    num_pages,
+                    write_chunk,
+                    dpi=self.grayscale_dpi,
                     fmt="png",
                     grayscale=True,
-                    paths_only=True,
                 )
-
-                with out_path.open("wb") as f:
-                    f.write(img2pdf.convert(images, rotation=Rotation.ifvalid))
+                await self.executor_service.run(
+                    PoolType.thread, _concatenate_pdfs, chunk_paths, out_path
+                )
                 yield out_path
 
     @asynccontextmanager
@@ -91,51 +149,98 @@ class PdfService:
             self.telegram_service.download_pdf_file(file_id_b) as file_name_b,
         ):
             with self.io_service.create_temp_png_file("Differences") as out_path:
-                pdf_diff.main(files=[file_name_a, file_name_b], out_file=out_path)
+                await self.executor_service.run(
+                    PoolType.process,
+                    pdf_diff.main,
+                    files=[file_name_a, file_name_b],
+                    out_file=out_path,
+                )
                 yield out_path
 
     @asynccontextmanager
     async def compress_pdf(self, file_id: str) -> AsyncGenerator[CompressResult, None]:
         async with self.telegram_service.download_pdf_file(file_id) as file_path:
-            with self.io_service.create_temp_pdf_file("Compressed") as out_path:
-                self.cli_service.compress_pdf(file_path, out_path)
+            with ExitStack() as stack:
+                stage_times: dict[str, float] = {}
+                out_paths: list[Path] = []
+
+                # Start with a cheap lossless pass, which also inspects the images to
+                # estimate how much more Ghostscript could save
+                lossless_path = stack.enter_context(
+                    self.io_service.create_temp_pdf_file("Compressed")
+                )
+                start_time = time.perf_counter()
+                try:
+                    estimate = await self.executor_service.run(
+                        PoolType.process, _compress_pdf_losslessly, file_path, lossless_path
+                    )
+                except pikepdf.PdfError:
+                    logger.opt(exception=True).warning("Failed to compress PDF losslessly")
+                    estimate = None
+                else:
+                    out_paths.append(lossless_path)
+                stage_times["lossless"] = time.perf_counter() - start_time
+
+                if estimate is None or self._should_run_ghostscript(lossless_path, estimate):
+                    gs_paths = {
+                        x: stack.enter_context(self.io_service.create_temp_pdf_file("Compressed"))
+                        for x in self.compress_profiles
+                    }
+                    gs_times = await self._compress_pdf_with_ghostscript(
+                        lossless_path if out_paths else file_path, gs_paths
+                    )
+                    if not out_paths and not gs_times:
+                        raise PdfServiceError(_("Failed to compress your PDF file"))
+
+                    out_paths.extend(gs_paths[x] for x in gs_times)
+                    stage_times |= {f"ghostscript_{k.value}": v for k, v in gs_times.items()}
+
                 old_size = file_path.stat().st_size
-                new_size = out_path.stat().st_size
-                yield CompressResult(old_size, new_size, out_path)
+                sizes = {x: x.stat().st_size for x in out_paths}
+                out_path = min(out_paths, key=lambda x: sizes[x])
+                if sizes[out_path] >= old_size:
+                    raise PdfServiceError(_("Your PDF file can't be compressed any further"))
+
+                result = CompressResult(old_size, sizes[out_path], out_path, stage_times)
+                logger.info(
+                    "Compressed PDF from {old_size} to {new_size} bytes, stage times: {times}",
+                    old_size=result.old_size,
+                    new_size=result.new_size,
+                    times=", ".join(f"{k} {v:.2f}s" for k, v in stage_times.items()),
+                )
+                yield result
 
     @asynccontextmanager
-    async def convert_pdf_to_images(self, file_id: str) -> AsyncGenerator[Path, None]:
-        async with self.telegram_service.download_pdf_file(file_id) as file_path:
-            with self.io_service.create_temp_directory("PDF_images") as out_dir:
-                pdf2image.convert_from_path(file_path, output_folder=out_dir, fmt="png")
-                yield out_dir
+    async def convert_pdf_to_images(
+        self,
+        file_id: str,
+        image_format: ImageFormat = ImageFormat.png,
+        dpi: int = 200,
+    ) -> AsyncGenerator[list[Path], None]:
+        async with (
+            self.telegram_service.download_pdf_file(file_id) as file_path,
+            ZipArchiver("PDF_images") as archiver,
+        ):
+            with self.io_service.create_temp_directory() as dir_name:
+                await self._rasterise_pdf_to_zip(file_path, dir_name, archiver, image_format, dpi)
+            yield await archiver.finish()
 
     @asynccontextmanager
     async def create_pdf_from_text(
         self, text: str, font_data: FontData | None
     ) -> AsyncGenerator[Path, None]:
-        html = HTML(string="<p>{content}</p>".format(content=text.replace("\n", "<br/>")))
-        font_config = FontConfiguration()
-        stylesheets: list[CSS] | None = None
-
-        if font_data is not None:
-            stylesheets = [
-                CSS(
-                    string=(
-                        "@font-face {"
-                        f"font-family: {font_data.font_family};"
-                        f"src: url({font_data.font_url});"
-                        "}"
-                        "p {"
-                        f"font-family: {font_data.font_family};"
-                        "}"
-                    ),
-                    font_config=font_config,
+        async with AsyncExitStack() as stack:
+            if font_data is not None:
+                font_path = await stack.enter_async_context(
+                    self.font_cache_service.get(font_data.font_url)
                 )
-            ]
+                if font_path is not None:
+                    font_data = FontData(font_data.font_family, font_path.as_uri())
 
-        with self.io_service.create_temp_pdf_file("Text") as out_path:
-            html.write_pdf(out_path, stylesheets=stylesheets, font_config=font_config)
+            out_path = stack.enter_context(self.io_service.create_temp_pdf_file("Text"))
+            await self.executor_service.run(
+                PoolType.process, _write_text_to_pdf, text, font_data, out_path
+            )
             yield out_path
 
     @asynccontextmanager
@@ -144,7 +249,11 @@ class PdfService:
     ) -> AsyncGenerator[Path, None]:
         async with self.telegram_service.download_pdf_file(file_id) as file_path:
             with self.io_service.create_temp_pdf_file("Cropped") as out_path:
-                crop(["-p", str(percentage), "-o", str(out_path), str(file_path)])
+                await self.executor_service.run(
+                    PoolType.process,
+                    crop,
+                    ["-p", str(percentage), "-o", str(out_path), str(file_path)],
+                )
                 yield out_path
 
     @asynccontextmanager
@@ -153,40 +262,21 @@ class PdfService:
     ) -> AsyncGenerator[Path, None]:
         async with self.telegram_service.download_pdf_file(file_id) as file_path:
             with self.io_service.create_temp_pdf_file("Cropped") as out_path:
-                crop(["-a", str(margin_size), "-o", str(out_path), str(file_path)])
+                await self.executor_service.run(
+                    PoolType.process,
+                    crop,
+                    ["-a", str(margin_size), "-o", str(out_path), str(file_path)],
+                )
                 yield out_path
 
     @asynccontextmanager
     async def decrypt_pdf(self, file_id: str, password: str) -> AsyncGenerator[Path, None]:
-        reader = await self._open_pdf(file_id, allow_encrypted=True)
-        if not reader.is_encrypted:
-            raise PdfDecryptError(_("Your PDF file is not encrypted"))
-
-        try:
-            if reader.decrypt(password) == PasswordType.NOT_DECRYPTED:
-                raise PdfIncorrectPasswordError(_("Incorrect password, please try again"))
-        except NotImplementedError as e:
-            raise PdfDecryptError(
-                _("Your PDF file is encrypted with a method that I can't decrypt")
-            ) from e
-
-        writer = PdfWriter()
-        for page in reader.pages:
-            writer.add_page(page)
-
-        with self._write_pdf(writer, "Decrypted") as out_path:
+        async with self._transform_pdf(file_id, "Decrypted", _decrypt_pdf, password) as out_path:
             yield out_path
 
     @asynccontextmanager
     async def encrypt_pdf(self, file_id: str, password: str) -> AsyncGenerator[Path, None]:
-        reader = await self._open_pdf(file_id)
-        writer = PdfWriter()
-
-        for page in reader.pages:
-            writer.add_page(page)
-        writer.encrypt(password)
-
-        with self._write_pdf(writer, "Encrypted") as out_path:
+        async with self._transform_pdf(file_id, "Encrypted", _encrypt_pdf, password) as out_path:
             yield out_path
 
     @asynccontextmanager
@@ -194,7 +284,7 @@ class PdfService:
         async with self.telegram_service.download_pdf_file(file_id) as file_path:
             with self.io_service.create_temp_directory("PDF_images") as out_dir:
                 try:
-                    self.cli_service.extract_pdf_images(file_path, out_dir)
+                    await self.cli_service.extract_pdf_images(file_path, out_dir)
                 except CLIServiceError as e:
                     raise PdfServiceError(e) from e
 
@@ -206,7 +296,7 @@ class PdfService:
     async def extract_pdf_text(self, file_id: str) -> AsyncGenerator[Path, None]:
         async with self.telegram_service.download_pdf_file(file_id) as file_path:
             try:
-                text = extract_text(file_path)
+                text = await self.executor_service.run(PoolType.process, extract_text, file_path)
             except PDFPasswordIncorrect as e:
                 raise PdfEncryptedError from e
 
@@ -219,36 +309,136 @@ class PdfService:
                 f.write("\n".join(wrapped_text))
             yield out_path
 
+    def create_merge_session(self) -> PdfMergeSession:
+        return PdfMergeSession(self.io_service, self.telegram_service, self.executor_service)
+
     @asynccontextmanager
     async def merge_pdfs(self, file_data_list: list[FileData]) -> AsyncGenerator[Path, None]:
         file_ids = self._get_file_ids(file_data_list)
-        writer = PdfWriter()
 
         async with self.telegram_service.download_files(file_ids) as file_paths:
-            for i, file_path in enumerate(file_paths):
+            with (
+                self.io_service.create_temp_directory("Merge") as temp_dir,
+                self.io_service.create_temp_pdf_file("Merged") as out_path,
+            ):
                 try:
-                    writer.append(file_path)
-                except (PyPdfReadError, ValueError) as e:
+                    await self.executor_service.run(
+                        PoolType.process, _merge_pdfs, file_paths, out_path, temp_dir
+                    )
+                except _MergePdfInputError as e:
                     raise PdfReadError(
                         _("I couldn't merge your PDF files as this file is invalid: %s")
-                        % file_data_list[i].name
+                        % file_data_list[e.index].name
                     ) from e
-
-        with self._write_pdf(writer, "Merged") as out_path:
-            yield out_path
+                yield out_path
 
     @asynccontextmanager
     async def ocr_pdf(self, file_id: str) -> AsyncGenerator[Path, None]:
         async with self.telegram_service.download_pdf_file(file_id) as file_path:
             with self.io_service.create_temp_pdf_file("OCR") as out_path:
                 try:
-                    ocrmypdf.ocr(file_path, out_path, progress_bar=False)
+                    start_time = time.perf_counter()
+                    num_pages = await self.executor_service.run(
+                        PoolType.process, _ocr_pdf, file_path, out_path, **self._get_ocr_options()
+                    )
+                    run_time = time.perf_counter() - start_time
+                    logger.info(
+                        "OCR of {num_pages} pages took {run_time:.2f}s ({rate:.2f} pages/s) "
+                        "with the {profile} profile",
+                        num_pages=num_pages,
+                        run_time=run_time,
+                        rate=num_pages / run_time if run_time > 0 else 0,
+                        profile=self.ocr_profile.value,
+                    )
                     yield out_path
                 except (PriorOcrFoundError, TaggedPDFError) as e:
                     raise PdfServiceError(_("Your PDF file already has a text layer")) from e
                 except EncryptedPdfError as e:
                     raise PdfEncryptedError from e
 
+    def _should_run_ghostscript(self, lossless_path: Path, estimate: CompressEstimate) -> bool:
+        lossless_size = lossless_path.stat().st_size
+        if lossless_size == 0:
+            return False
+
+        estimated_gain = estimate.estimated_saving / lossless_size
+        logger.info(
+            "Estimated Ghostscript saving of {gain:.0%} from {num_images} images, which make "
+            "up {image_share:.0%} of the streams",
+            gain=estimated_gain,
+            num_images=estimate.num_images,
+            image_share=estimate.image_bytes / estimate.stream_bytes
+            if estimate.stream_bytes
+            else 0,
+        )
+        return estimated_gain >= self.compress_min_gain
+
+    async def _compress_pdf_with_ghostscript(
+        self, file_path: Path, out_paths: dict[CompressProfile, Path]
+    ) -> dict[CompressProfile, float]:
+        """Runs the Ghostscript profiles concurrently under the time limit.
+
+        Returns:
+            The run times of the profiles that completed successfully
+        """
+
+        async def compress(profile: CompressProfile, out_path: Path) -> float:
+            start_time = time.perf_counter()
+            await self.cli_service.compress_pdf(file_path, out_path, profile=profile)
+            return time.perf_counter() - start_time
+
+        tasks = {
+            asyncio.create_task(compress(profile, out_path)): profile
+            for profile, out_path in out_paths.items()
+        }
+        try:
+            done, pending = await asyncio.wait(tasks, timeout=self.compress_time_limit)
+        finally:
+            # Stop the profiles that are still running, which also kills their processes
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        if pending:
+            logger.warning(
+                "Ghostscript profiles {profiles} timed out after {time_limit}s",
+                profiles=", ".join(tasks[x].value for x in pending),
+                time_limit=self.compress_time_limit,
+            )
+
+        run_times: dict[CompressProfile, float] = {}
+        for task in done:
+            error = task.exception()
+            if error is None:
+                run_times[tasks[task]] = task.result()
+            elif isinstance(error, CLIServiceError):
+                logger.warning(
+                    "Failed to compress PDF with the {profile} profile: {error}",
+                    profile=tasks[task].value,
+                    error=error,
+                )
+            else:
+                raise error
+        return run_times
+
+    def _get_ocr_options(self) -> dict[str, Any]:
+        # Only OCR the pages without a text layer instead of rejecting the whole file,
+        # unless none of the pages need OCR
+        options: dict[str, Any] = {
+            "jobs": self.ocr_jobs,
+            "skip_text": True,
+            "plugins": [ocr_plugin.__name__],
+        }
+        if self.ocr_profile == OcrProfile.fast:
+            # Skip the PDF/A conversion and the output optimisation, and give up on
+            # pages that take too long to recognise
+            options |= {
+                "optimize": 0,
+                "output_type": "pdf",
+                "tesseract_timeout": self.ocr_tesseract_timeout,
+            }
+        return options
+
     @asynccontextmanager
     async def preview_pdf(self, file_id: str) -> AsyncGenerator[Path, None]:
         with (
@@ -258,11 +448,12 @@ class PdfService:
             reader = await self._open_pdf(file_id)
             writer = PdfWriter()
             writer.add_page(reader.pages[0])
-            writer.write(pdf_path)
+            await self.executor_service.run(PoolType.thread, writer.write, pdf_path)
 
             # Convert cover preview to image
-            imgs = pdf2image.convert_from_path(pdf_path, fmt="png")
-            imgs[0].save(out_path)
+            await self.executor_service.run(
+                PoolType.thread, _convert_first_page_to_image, pdf_path, out_path
+            )
             yield out_path
 
     @asynccontextmanager
@@ -270,46 +461,30 @@ class PdfService:
         async with self.telegram_service.download_pdf_file(file_id) as file_path:
             with self.io_service.create_temp_directory() as dir_name:
                 out_path = dir_name / file_name
-                shutil.copy(file_path, out_path)
+                await self.executor_service.run(PoolType.thread, shutil.copy, file_path, out_path)
                 yield out_path
 
     @asynccontextmanager
     async def rotate_pdf(self, file_id: str, degree: int) -> AsyncGenerator[Path, None]:
-        reader = await self._open_pdf(file_id)
-        writer = PdfWriter()
-
-        for page in reader.pages:
-            writer.add_page(page.rotate(degree))
-
-        with self._write_pdf(writer, "Rotated") as out_path:
+        async with self._transform_pdf(file_id, "Rotated", _rotate_pdf, degree) as out_path:
             yield out_path
 
     @asynccontextmanager
     async def scale_pdf_by_factor(
         self, file_id: str, scale_data: ScaleData
     ) -> AsyncGenerator[Path, None]:
-        reader = await self._open_pdf(file_id)
-        writer = PdfWriter()
-
-        for page in reader.pages:
-            page.scale(scale_data.x, scale_data.y)
-            writer.add_page(page)
-
-        with self._write_pdf(writer, "Scaled") as out_path:
+        async with self._transform_pdf(
+            file_id, "Scaled", _scale_pdf_by_factor, scale_data
+        ) as out_path:
             yield out_path
 
     @asynccontextmanager
     async def scale_pdf_to_dimension(
         self, file_id: str, scale_data: ScaleData
     ) -> AsyncGenerator[Path, None]:
-        reader = await self._open_pdf(file_id)
-        writer = PdfWriter()
-
-        for page in reader.pages:
-            page.scale_to(scale_data.x, scale_data.y)
-            writer.add_page(page)
-
-        with self._write_pdf(writer, "Scaled") as out_path:
+        async with self._transform_pdf(
+            file_id, "Scaled", _scale_pdf_to_dimension, scale_data
+        ) as out_path:
             yield out_path
 
     @staticmethod
@@ -320,28 +495,386 @@ class PdfService:
     async def split_pdf(self, file_id: str, split_range: str) -> AsyncGenerator[Path, None]:
         reader = await self._open_pdf(file_id)
         writer = PdfWriter()
-        writer.append(reader, pages=PageRange(split_range))
+        await self.executor_service.run(
+            PoolType.thread, writer.append, reader, pages=PageRange(split_range)
+        )
 
-        with self._write_pdf(writer, "Split") as out_path:
+        async with self._write_pdf(writer, "Split") as out_path:
             yield out_path
 
+    async def _rasterise_pdf_to_zip(
+        self,
+        file_path: Path,
+        dir_name: Path,
+        archiver: ZipArchiver,
+        image_format: ImageFormat,
+        dpi: int,
+    ) -> None:
+        num_pages = await self._get_num_pages(file_path)
+        name_width = len(str(num_pages))
+
+        async def write_chunk(first_page: int, image_paths: list[Any]) -> None:
+            if image_format == ImageFormat.webp:
+                image_paths = await self.executor_service.run(
+                    PoolType.process, _convert_images_to_webp, image_paths
+                )
+
+            for page, image_path in enumerate(image_paths, start=first_page):
+                name = f"page_{page:0{name_width}d}.{image_format.extension}"
+                await archiver.add(Path(image_path), name, delete=True)
+
+        # WebP isn't supported by pdftoppm, so the pages are rasterised in the uncompressed
+        # PPM format and converted afterwards
+        fmt = "ppm" if image_format == ImageFormat.webp else image_format.value
+        await self._rasterise_pdf(file_path, dir_name, num_pages, write_chunk, dpi=dpi, fmt=fmt)
+
+    async def _get_num_pages(self, file_path: Path) -> int:
+        pdf_info = await self.executor_service.run(
+            PoolType.thread, pdf2image.pdfinfo_from_path, str(file_path)
+        )
+        return cast("int", pdf_info["Pages"])
+
+    async def _rasterise_pdf(
+        self,
+        file_path: Path,
+        dir_name: Path,
+        num_pages: int,
+        process_chunk: ChunkProcessor,
+        **kwargs: Any,
+    ) -> None:
+        # Pages are rasterised a chunk at a time so that only a couple of chunks of images
+        # are on disk at once. The next chunk is rasterised while the previous one is
+        # being processed, which should delete the images once it's done with them.
+        process_task: asyncio.Task[None] | None = None
+
+        try:
+            for first_page in range(1, num_pages + 1, self.rasterise_chunk_size):
+                last_page = min(first_page + self.rasterise_chunk_size - 1, num_pages)
+
+                # pdf2image splits the pages across this many pdftoppm processes
+                thread_count = min(os.cpu_count() or 1, last_page - first_page + 1)
+                image_paths = await self.executor_service.run(
+                    PoolType.thread,
+                    pdf2image.convert_from_path,
+                    file_path,
+                    output_folder=dir_name,
+                    first_page=first_page,
+                    last_page=last_page,
+                    thread_count=thread_count,
+                    paths_only=True,
+                    **kwargs,
+                )
+
+                if process_task is not None:
+                    await process_task
+                process_task = asyncio.create_task(process_chunk(first_page, image_paths))
+
+            if process_task is not None:
+                await process_task
+        except BaseException:
+            if process_task is not None:
+                process_task.cancel()
+            raise
+
     @staticmethod
     def _get_file_ids(file_data_list: list[FileData]) -> list[str]:
         return [x.id for x in file_data_list]
 
-    async def _open_pdf(self, file_id: str, allow_encrypted: bool = False) -> PdfReader:
+    @staticmethod
+    def _merge_watermark(src_reader: PdfReader, wmk_reader: PdfReader) -> PdfWriter:
+        wmk_page = wmk_reader.pages[0]
+        writer = PdfWriter()
+
+        for page in src_reader.pages:
+            page.merge_page(wmk_page)
+            writer.add_page(page)
+        return writer
+
+    async def _open_pdf(self, file_id: str) -> PdfReader:
         async with self.telegram_service.download_pdf_file(file_id) as file_name:
-            try:
-                pdf_reader = PdfReader(file_name)
-            except PyPdfReadError as e:
-                raise PdfReadError(_("Your PDF file is invalid")) from e
+            return await self.executor_service.run(PoolType.thread, _read_pdf, file_name)
 
-        if pdf_reader.is_encrypted and not allow_encrypted:
-            raise PdfEncryptedError
-        return pdf_reader
+    @asynccontextmanager
+    async def _transform_pdf(
+        self, file_id: str, file_prefix: str, transform: Callable[..., None], *args: Any
+    ) -> AsyncGenerator[Path, None]:
+        # The whole transform is run in the process pool, as reading and transforming the
+        # pages with pypdf is as CPU bound as writing them
+        async with self.telegram_service.download_pdf_file(file_id) as file_path:
+            with self.io_service.create_temp_pdf_file(file_prefix) as out_path:
+                await self.executor_service.run(
+                    PoolType.process, transform, file_path, out_path, *args
+                )
+                yield out_path
 
-    @contextmanager
-    def _write_pdf(self, writer: PdfWriter, file_prefix: str) -> Generator[Path, None, None]:
+    @asynccontextmanager
+    async def _write_pdf(self, writer: PdfWriter, file_prefix: str) -> AsyncGenerator[Path, None]:
         with self.io_service.create_temp_pdf_file(file_prefix) as out_path:
-            writer.write(out_path)
+            await self.executor_service.run(PoolType.thread, writer.write, out_path)
             yield out_path
+
+
+# Functions that are run in the process pool need to be defined at the module level so
+# that they can be pickled
+
+
+def _read_pdf(file_path: Path, allow_encrypted: bool = False) -> PdfReader:
+    try:
+        reader = PdfReader(file_path)
+    except PyPdfReadError as e:
+        raise PdfReadError(_("Your PDF file is invalid")) from e
+
+    if reader.is_encrypted and not allow_encrypted:
+        raise PdfEncryptedError
+    return reader
+
+
+def _decrypt_pdf(file_path: Path, out_path: Path, password: str) -> None:
+    reader = _read_pdf(file_path, allow_encrypted=True)
+    if not reader.is_encrypted:
+        raise PdfDecryptError(_("Your PDF file is not encrypted"))
+
+    try:
+        if reader.decrypt(password) == PasswordType.NOT_DECRYPTED:
+            raise PdfIncorrectPasswordError(_("Incorrect password, please try again"))
+    except NotImplementedError as e:
+        raise PdfDecryptError(
+            _("Your PDF file is encrypted with a method that I can't decrypt")
+        ) from e
+
+    writer = PdfWriter()
+    for page in reader.pages:
+        writer.add_page(page)
+    writer.write(out_path)
+
+
+def _encrypt_pdf(file_path: Path, out_path: Path, password: str) -> None:
+    reader = _read_pdf(file_path)
+    writer = PdfWriter()
+
+    for page in reader.pages:
+        writer.add_page(page)
+    writer.encrypt(password)
+    writer.write(out_path)
+
+
+def _rotate_pdf(file_path: Path, out_path: Path, degree: int) -> None:
+    reader = _read_pdf(file_path)
+    writer = PdfWriter()
+
+    for page in reader.pages:
+        writer.add_page(page.rotate(degree))
+    writer.write(out_path)
+
+
+def _scale_pdf_by_factor(file_path: Path, out_path: Path, scale_data: ScaleData) -> None:
+    reader = _read_pdf(file_path)
+    writer = PdfWriter()
+
+    for page in reader.pages:
+        page.scale(scale_data.x, scale_data.y)
+        writer.add_page(page)
+    writer.write(out_path)
+
+
+def _scale_pdf_to_dimension(file_path: Path, out_path: Path, scale_data: ScaleData) -> None:
+    reader = _read_pdf(file_path)
+    writer = PdfWriter()
+
+    for page in reader.pages:
+        page.scale_to(scale_data.x, scale_data.y)
+        writer.add_page(page)
+    writer.write(out_path)
+
+
+def _write_images_to_pdf(images: list[Any], out_path: Path) -> None:
+    with out_path.open("wb") as f:
+        f.write(img2pdf.convert(images, rotation=Rotation.ifvalid))
+
+
+def _write_image_chunk_to_pdf(image_paths: list[Any], out_path: Path) -> None:
+    _write_images_to_pdf(image_paths, out_path)
+    for image_path in image_paths:
+        Path(image_path).unlink()
+
+
+def _convert_images_to_webp(image_paths: list[Any]) -> list[Path]:
+    out_paths: list[Path] = []
+    for image_path in image_paths:
+        path = Path(image_path)
+        out_path = path.with_suffix(".webp")
+
+        with Image.open(path) as image:
+            image.save(out_path, "WEBP")
+
+        path.unlink()
+        out_paths.append(out_path)
+
+    return out_paths
+
+
+def _concatenate_pdfs(pdf_paths: list[Path], out_path: Path) -> None:
+    # The page contents are only read from the source files when the output is saved, so
+    # the pages don't all have to be loaded into memory at once
+    with ExitStack() as stack, pikepdf.Pdf.new() as pdf:
+        for pdf_path in pdf_paths:
+            src = stack.enter_context(pikepdf.Pdf.open(pdf_path))
+            pdf.pages.extend(src.pages)
+        pdf.save(out_path)
+
+
+def _compress_pdf_losslessly(file_path: Path, out_path: Path) -> CompressEstimate:
+    """Compresses the PDF file without changing any content.
+
+    Returns:
+        The estimate of how much more Ghostscript could save
+    """
+    with pikepdf.Pdf.open(file_path) as pdf:
+        pdf.remove_unreferenced_resources()
+        estimate = _dedupe_xobjects(pdf)
+        estimate.stream_bytes = sum(
+            len(x.read_raw_bytes()) for x in pdf.objects if isinstance(x, pikepdf.Stream)
+        )
+        pdf.save(
+            out_path,
+            compress_streams=True,
+            recompress_flate=True,
+            object_stream_mode=pikepdf.ObjectStreamMode.generate,
+        )
+    return estimate
+
+
+def _dedupe_xobjects(pdf: pikepdf.Pdf) -> CompressEstimate:
+    # Point the pages to a single copy of the images and forms that are embedded more
+    # than once, so that the duplicates are dropped when the file is saved
+    xobjects_by_key: dict[bytes, pikepdf.Object] = {}
+    estimate = CompressEstimate()
+
+    for page in pdf.pages:
+        resources = page.obj.get("/Resources")
+        if not isinstance(resources, pikepdf.Dictionary):
+            continue
+        xobjects = resources.get("/XObject")
+        if not isinstance(xobjects, pikepdf.Dictionary):
+            continue
+
+        for name, xobject in list(xobjects.items()):
+            if not isinstance(xobject, pikepdf.Stream):
+                continue
+
+            raw_bytes = xobject.read_raw_bytes()
+            stream_dict = pikepdf.Dictionary({k: v for k, v in xobject.items() if k != "/Length"})
+            key = hashlib.sha256(stream_dict.unparse() + raw_bytes).digest()
+
+            existing = xobjects_by_key.get(key)
+            if existing is None:
+                xobjects_by_key[key] = xobject
+                if xobject.get("/Subtype") == pikepdf.Name.Image:
+                    estimate.num_images += 1
+                    estimate.image_bytes += len(raw_bytes)
+                    estimate.estimated_saving += _estimate_image_saving(
+                        xobject, len(raw_bytes), page.mediabox
+                    )
+            elif existing.objgen != xobject.objgen:
+                xobjects[name] = existing
+
+    return estimate
+
+
+def _estimate_image_saving(image: pikepdf.Stream, size: int, mediabox: pikepdf.Array) -> float:
+    # Ghostscript can't do much with bilevel images, which are already encoded compactly
+    filters = image.get("/Filter")
+    filter_names = {str(x) for x in filters} if isinstance(filters, pikepdf.Array) else set()
+    if filters is not None and not isinstance(filters, pikepdf.Array):
+        filter_names.add(str(filters))
+    if (
+        filter_names & _BILEVEL_IMAGE_FILTERS
+        or bool(image.get("/ImageMask"))
+        or image.get("/BitsPerComponent") == 1
+    ):
+        return 0
+
+    # The resolution assumes the image covers the whole page, so it's a lower bound of
+    # the actual resolution, and the downsampling of the ebook profile is the best case
+    page_width = float(mediabox[2]) - float(mediabox[0])
+    page_height = float(mediabox[3]) - float(mediabox[1])
+    ratio = 1.0
+    if page_width > 0 and page_height > 0:
+        resolution = (
+            min(
+                int(image.get("/Width", 0)) / page_width, int(image.get("/Height", 0)) / page_height
+            )
+            * _POINTS_PER_INCH
+        )
+        if resolution > _DOWNSAMPLE_RESOLUTION:
+            ratio *= (_DOWNSAMPLE_RESOLUTION / resolution) ** 2
+
+    # Losslessly encoded images are converted into JPEG, while JPEG images are only
+    # recompressed with a lower quality
+    if filter_names & _LOSSY_IMAGE_FILTERS:
+        ratio *= _LOSSY_RECOMPRESS_RATIO
+    else:
+        ratio *= _LOSSLESS_TO_JPEG_RATIO
+    return size * (1 - ratio)
+
+
+def _merge_pdfs(file_paths: list[Path], out_path: Path, temp_dir: Path) -> None:
+    merger = PdfMerger(temp_dir)
+    for i, file_path in enumerate(file_paths):
+        try:
+            merger.append(file_path)
+        except pikepdf.PdfError as e:
+            raise _MergePdfInputError(i) from e
+    merger.save(out_path)
+
+
+class _MergePdfInputError(Exception):
+    def __init__(self, index: int) -> None:
+        super().__init__(index)
+        self.index = index
+
+
+def _ocr_pdf(file_path: Path, out_path: Path, **kwargs: Any) -> int:
+    ocrmypdf.ocr(file_path, out_path, progress_bar=False, **kwargs)
+    with pikepdf.Pdf.open(out_path) as pdf:
+        return len(pdf.pages)
+
+
+def _write_text_to_pdf(text: str, font_data: FontData | None, out_path: Path) -> None:
+    html = HTML(string="<p>{content}</p>".format(content=text.replace("\n", "<br/>")))
+    font_family = font_url = None
+    if font_data is not None:
+        font_family, font_url = font_data.font_family, font_data.font_url
+
+    font_config, stylesheets = _get_text_stylesheets(font_family, font_url)
+    html.write_pdf(out_path, stylesheets=stylesheets, font_config=font_config)
+
+
+@lru_cache(maxsize=32)
+def _get_text_stylesheets(
+    font_family: str | None, font_url: str | None
+) -> tuple[FontConfiguration, list[CSS] | None]:
+    # Cached per worker process, so that repeated renders with the same font reuse the
+    # loaded font instead of fetching and parsing it again
+    font_config = FontConfiguration()
+    if font_family is None or font_url is None:
+        return font_config, None
+
+    css = CSS(
+        string=(
+            "@font-face {"
+            f"font-family: {font_family};"
+            f"src: url({font_url});"
+            "}"
+            "p {"
+            f"font-family: {font_family};"
+            "}"
+        ),
+        font_config=font_config,
+    )
+    return font_config, [css]
+
+
+def _convert_first_page_to_image(pdf_path: Path, out_path: Path) -> None:
+    imgs = pdf2image.convert_from_path(pdf_path, fmt="png")
+    imgs[0].save(out_path)
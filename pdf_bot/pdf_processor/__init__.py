@@ -23,7 +23,7 @@ from .extract_pdf_text_processor import ExtractPdfTextData, ExtractPdfTextProces
 from .grayscale_pdf_processor import GrayscalePdfData, GrayscalePdfProcessor
 from .ocr_pdf_processor import OcrPdfData, OcrPdfProcessor
 from .pdf_task_processor import PdfTaskProcessor
-from .pdf_to_image_processor import PdfToImageData, PdfToImageProcessor
+from .pdf_to_image_processor import PdfToImageData, PdfToImageOptionData, PdfToImageProcessor
 from .preview_pdf_processor import PreviewPdfData, PreviewPdfProcessor
 from .rename_pdf_processor import RenamePdfData, RenamePdfProcessor
 from .rotate_pdf_processor import RotateDegreeData, RotatePdfData, RotatePdfProcessor
@@ -60,6 +60,7 @@ __all__ = [
     "OptionAndInputData",
     "PdfTaskProcessor",
     "PdfToImageData",
+    "PdfToImageOptionData",
     "PdfToImageProcessor",
     "PreviewPdfData",
     "PreviewPdfProcessor",
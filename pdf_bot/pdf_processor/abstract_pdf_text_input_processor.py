@@ -100,7 +100,9 @@ class AbstractPdfTextInputProcessor(AbstractPdfProcessor):
             await msg.reply_text(_(str(e)))
             return ConversationHandler.END
 
-        text_input_data = TextInputData(id=file_data.id, name=file_data.name, text=cleaned_text)
+        text_input_data = TextInputData(
+            id=file_data.id, name=file_data.name, unique_id=file_data.unique_id, text=cleaned_text
+        )
         self.telegram_service.cache_file_data(context, text_input_data)
 
         return await self.process_file(update, context)
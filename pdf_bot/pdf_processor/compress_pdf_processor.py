@@ -5,7 +5,7 @@ from gettext import gettext as _
 from telegram.ext import CallbackQueryHandler
 
 from pdf_bot.analytics import TaskType
-from pdf_bot.models import FileData, FileTaskResult, TaskData
+from pdf_bot.models import FileData, FileTaskResult, TaskData, TranslatableText
 
 from .abstract_pdf_processor import AbstractPdfProcessor
 
@@ -32,9 +32,12 @@ class CompressPdfProcessor(AbstractPdfProcessor):
         async with self.pdf_service.compress_pdf(file_data.id) as result:
             yield FileTaskResult(
                 result.out_path,
-                _("File size reduced by {percent}, from {old_size} to {new_size}").format(
-                    percent=f"{result.reduced_percentage:.0%}",
-                    old_size=result.readable_old_size,
-                    new_size=result.readable_new_size,
+                TranslatableText(
+                    _("File size reduced by {percent}, from {old_size} to {new_size}"),
+                    {
+                        "percent": f"{result.reduced_percentage:.0%}",
+                        "old_size": result.readable_old_size,
+                        "new_size": result.readable_new_size,
+                    },
                 ),
             )
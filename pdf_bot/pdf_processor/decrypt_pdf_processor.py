@@ -42,6 +42,11 @@ class DecryptPdfProcessor(AbstractPdfTextInputProcessor):
     def get_cleaned_text_input(self, text: str) -> str:
         return text
 
+    @property
+    def cache_results(self) -> bool:
+        # Don't keep the results around as they are derived from the user's password
+        return False
+
     @property
     def custom_error_handlers(self) -> dict[type[Exception], ErrorHandlerType]:
         return {PdfIncorrectPasswordError: self._handle_incorrect_password}
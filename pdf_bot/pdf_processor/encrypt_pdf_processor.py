@@ -36,6 +36,11 @@ class EncryptPdfProcessor(AbstractPdfTextInputProcessor):
     def get_cleaned_text_input(self, text: str) -> str:
         return text
 
+    @property
+    def cache_results(self) -> bool:
+        # Don't keep the results around as they are derived from the user's password
+        return False
+
     @asynccontextmanager
     async def process_file_task(self, file_data: FileData) -> AsyncGenerator[FileTaskResult, None]:
         if not isinstance(file_data, TextInputData):
@@ -1,11 +1,18 @@
 from collections.abc import AsyncGenerator
 from contextlib import asynccontextmanager
+from dataclasses import dataclass
 from gettext import gettext as _
+from typing import cast
 
-from telegram.ext import CallbackQueryHandler
+from telegram import CallbackQuery, InlineKeyboardButton, InlineKeyboardMarkup, Update
+from telegram.ext import CallbackQueryHandler, CommandHandler, ContextTypes, ConversationHandler
 
 from pdf_bot.analytics import TaskType
+from pdf_bot.errors import CallbackQueryDataTypeError, FileDataTypeError
+from pdf_bot.file_processor import AbstractFileTaskProcessor
 from pdf_bot.models import FileData, FileTaskResult, TaskData
+from pdf_bot.pdf import ImageFormat
+from pdf_bot.telegram_internal import BackData
 
 from .abstract_pdf_processor import AbstractPdfProcessor
 
@@ -14,7 +21,16 @@ class PdfToImageData(FileData):
     pass
 
 
+@dataclass(kw_only=True)
+class PdfToImageOptionData(PdfToImageData):
+    image_format: ImageFormat
+    dpi: int
+
+
 class PdfToImageProcessor(AbstractPdfProcessor):
+    _WAIT_IMAGE_OPTION = "wait_image_option"
+    _DPIS = (100, 200, 300)
+
     @property
     def task_type(self) -> TaskType:
         return TaskType.pdf_to_image
@@ -24,10 +40,75 @@ class PdfToImageProcessor(AbstractPdfProcessor):
         return TaskData(_("To images"), PdfToImageData)
 
     @property
-    def handler(self) -> CallbackQueryHandler:
-        return CallbackQueryHandler(self.process_file, pattern=PdfToImageData)
+    def handler(self) -> ConversationHandler:
+        return ConversationHandler(
+            entry_points=[CallbackQueryHandler(self.ask_image_option, pattern=PdfToImageData)],
+            states={
+                self._WAIT_IMAGE_OPTION: [
+                    CallbackQueryHandler(self.process_file, pattern=PdfToImageOptionData),
+                    CallbackQueryHandler(self.ask_task, pattern=BackData),
+                ]
+            },
+            fallbacks=[CommandHandler("cancel", self.telegram_service.cancel_conversation)],
+            map_to_parent={
+                # Return to wait file task state
+                AbstractFileTaskProcessor.WAIT_FILE_TASK: AbstractFileTaskProcessor.WAIT_FILE_TASK,
+            },
+        )
 
     @asynccontextmanager
     async def process_file_task(self, file_data: FileData) -> AsyncGenerator[FileTaskResult, None]:
-        async with self.pdf_service.convert_pdf_to_images(file_data.id) as path:
+        if not isinstance(file_data, PdfToImageOptionData):
+            raise FileDataTypeError(file_data)
+
+        async with self.pdf_service.convert_pdf_to_images(
+            file_data.id, file_data.image_format, file_data.dpi
+        ) as path:
             yield FileTaskResult(path)
+
+    async def ask_image_option(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> str:
+        query = cast("CallbackQuery", update.callback_query)
+        await self.telegram_service.answer_query_and_drop_data(context, query)
+        data: str | PdfToImageData | None = query.data
+
+        if not isinstance(data, PdfToImageData):
+            raise CallbackQueryDataTypeError(data)
+
+        reply_markup = self._get_ask_image_option_reply_markup(update, context, data)
+        _ = self.language_service.set_app_language(update, context)
+        await query.edit_message_text(
+            _(
+                "Select the image format and resolution that you'll like to convert your PDF "
+                "file into, higher resolutions take longer and create larger files"
+            ),
+            reply_markup=reply_markup,
+        )
+
+        return self._WAIT_IMAGE_OPTION
+
+    def _get_ask_image_option_reply_markup(
+        self,
+        update: Update,
+        context: ContextTypes.DEFAULT_TYPE,
+        image_data: PdfToImageData,
+    ) -> InlineKeyboardMarkup:
+        back_button = self.telegram_service.get_back_button(update, context)
+        keyboard = [
+            [
+                InlineKeyboardButton(
+                    f"{image_format.name.upper()} {dpi} DPI",
+                    callback_data=PdfToImageOptionData(
+                        id=image_data.id,
+                        name=image_data.name,
+                        unique_id=image_data.unique_id,
+                        image_format=image_format,
+                        dpi=dpi,
+                    ),
+                )
+                for dpi in self._DPIS
+            ]
+            for image_format in ImageFormat
+        ]
+        keyboard.append([back_button])
+
+        return InlineKeyboardMarkup(keyboard)
@@ -0,0 +1,14 @@
+from .abstract_result_cache_backend import AbstractResultCacheBackend
+from .in_memory_result_cache_backend import InMemoryResultCacheBackend
+from .models import CachedResult, ResultFileType
+from .result_cache_service import ResultCacheService
+from .sqlite_result_cache_backend import SqliteResultCacheBackend
+
+__all__ = [
+    "AbstractResultCacheBackend",
+    "CachedResult",
+    "InMemoryResultCacheBackend",
+    "ResultCacheService",
+    "ResultFileType",
+    "SqliteResultCacheBackend",
+]
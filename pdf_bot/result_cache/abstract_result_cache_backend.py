@@ -0,0 +1,17 @@
+from abc import ABC, abstractmethod
+
+from .models import CachedResult
+
+
+class AbstractResultCacheBackend(ABC):
+    @abstractmethod
+    async def get(self, key: str) -> CachedResult | None:
+        pass
+
+    @abstractmethod
+    async def set(self, key: str, result: CachedResult) -> None:
+        pass
+
+    @abstractmethod
+    async def delete(self, key: str) -> None:
+        pass
@@ -0,0 +1,37 @@
+import time
+from collections import OrderedDict
+
+from .abstract_result_cache_backend import AbstractResultCacheBackend
+from .models import CachedResult
+
+
+class InMemoryResultCacheBackend(AbstractResultCacheBackend):
+    def __init__(self, max_size: int, ttl: float) -> None:
+        self.max_size = max_size
+        self.ttl = ttl
+
+        # Entries are ordered from the least to the most recently used
+        self._entries: OrderedDict[str, tuple[float, CachedResult]] = OrderedDict()
+
+    async def get(self, key: str) -> CachedResult | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        expires_at, result = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+
+        self._entries.move_to_end(key)
+        return result
+
+    async def set(self, key: str, result: CachedResult) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl, result)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    async def delete(self, key: str) -> None:
+        self._entries.pop(key, None)
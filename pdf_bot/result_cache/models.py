@@ -0,0 +1,28 @@
+from dataclasses import dataclass
+from enum import Enum
+
+from telegram import Message
+
+from pdf_bot.models import TranslatableText
+
+
+class ResultFileType(Enum):
+    document = "document"
+    photo = "photo"
+
+
+@dataclass
+class CachedResult:
+    file_id: str
+    file_type: ResultFileType
+    message: TranslatableText | None = None
+
+    @classmethod
+    def from_telegram_message(
+        cls, message: Message, text: TranslatableText | None
+    ) -> "CachedResult | None":
+        if message.photo:
+            return cls(message.photo[-1].file_id, ResultFileType.photo, text)
+        if message.document is not None:
+            return cls(message.document.file_id, ResultFileType.document, text)
+        return None
@@ -0,0 +1,48 @@
+import hashlib
+import json
+from typing import Any
+
+from .abstract_result_cache_backend import AbstractResultCacheBackend
+from .models import CachedResult
+
+
+class ResultCacheService:
+    def __init__(self, backend: AbstractResultCacheBackend) -> None:
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def get_key(source_key: str, task: str, params: dict[str, Any]) -> str:
+        """Returns the cache key of a task result.
+
+        Args:
+            source_key: Identifies the source of the result, such as the unique ID of a
+                file, a webpage URL or a file digest
+            task: The task that produced the result
+            params: The parameters of the task
+        """
+        # The source is stored under its original field name so that existing keys stay
+        # valid
+        data = json.dumps(
+            {"file_unique_id": source_key, "task": task, "params": params},
+            sort_keys=True,
+            default=str,
+        )
+
+        # Hash the key so that task parameters are not stored as is in the cache
+        return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+    async def get(self, key: str) -> CachedResult | None:
+        result = await self.backend.get(key)
+        if result is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return result
+
+    async def set(self, key: str, result: CachedResult) -> None:
+        await self.backend.set(key, result)
+
+    async def delete(self, key: str) -> None:
+        await self.backend.delete(key)
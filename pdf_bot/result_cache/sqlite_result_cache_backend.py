@@ -0,0 +1,110 @@
+import asyncio
+import json
+import sqlite3
+import time
+from pathlib import Path
+from threading import Lock
+
+from pdf_bot.models import TranslatableText
+
+from .abstract_result_cache_backend import AbstractResultCacheBackend
+from .models import CachedResult, ResultFileType
+
+
+class SqliteResultCacheBackend(AbstractResultCacheBackend):
+    """Caches results in a SQLite database.
+
+    Queries block on disk access, so they're run in threads rather than on the event loop,
+    and the connection is only used by one thread at a time.
+    """
+
+    def __init__(self, path: str | Path, max_size: int, ttl: float) -> None:
+        self.max_size = max_size
+        self.ttl = ttl
+
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS result_cache ("
+            "key TEXT PRIMARY KEY, "
+            "file_id TEXT NOT NULL, "
+            "file_type TEXT NOT NULL, "
+            "message TEXT, "
+            "expires_at REAL NOT NULL, "
+            "accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS result_cache_accessed_at ON result_cache (accessed_at)"
+        )
+        self._lock = Lock()
+
+    async def get(self, key: str) -> CachedResult | None:
+        return await asyncio.to_thread(self._get, key)
+
+    async def set(self, key: str, result: CachedResult) -> None:
+        await asyncio.to_thread(self._set, key, result)
+
+    async def delete(self, key: str) -> None:
+        await asyncio.to_thread(self._delete, key)
+
+    def _get(self, key: str) -> CachedResult | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT file_id, file_type, message, expires_at FROM result_cache WHERE key = ?",
+                (key,),
+            ).fetchone()
+            if row is None:
+                return None
+
+            file_id, file_type, message, expires_at = row
+            now = time.time()
+
+            if expires_at <= now:
+                self._conn.execute("DELETE FROM result_cache WHERE key = ?", (key,))
+                return None
+
+            self._conn.execute("UPDATE result_cache SET accessed_at = ? WHERE key = ?", (now, key))
+        return CachedResult(file_id, ResultFileType(file_type), self._load_message(message))
+
+    def _set(self, key: str, result: CachedResult) -> None:
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO result_cache VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    key,
+                    result.file_id,
+                    result.file_type.value,
+                    self._dump_message(result.message),
+                    now + self.ttl,
+                    now,
+                ),
+            )
+            self._conn.execute("DELETE FROM result_cache WHERE expires_at <= ?", (now,))
+            self._conn.execute(
+                "DELETE FROM result_cache WHERE key IN ("
+                "SELECT key FROM result_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_size,),
+            )
+
+    def _delete(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM result_cache WHERE key = ?", (key,))
+
+    @staticmethod
+    def _dump_message(message: TranslatableText | None) -> str | None:
+        if message is None:
+            return None
+        return json.dumps({"text": message.text, "params": message.params})
+
+    @staticmethod
+    def _load_message(message: str | None) -> TranslatableText | None:
+        if message is None:
+            return None
+
+        # Messages cached before they were stored untranslated are dropped, as they may be
+        # in the language of another user
+        try:
+            data = json.loads(message)
+            return TranslatableText(data["text"], data["params"])
+        except (ValueError, TypeError, KeyError):
+            return None
@@ -0,0 +1,4 @@
+from .models import ScheduledJob, SchedulerStats
+from .scheduler_service import SchedulerService
+
+__all__ = ["ScheduledJob", "SchedulerService", "SchedulerStats"]
@@ -0,0 +1,21 @@
+import asyncio
+from dataclasses import dataclass
+
+from pdf_bot.analytics import TaskType
+
+
+@dataclass
+class ScheduledJob:
+    user_id: int | None
+    task_type: TaskType
+    future: asyncio.Future[None]
+
+
+@dataclass
+class SchedulerStats:
+    max_jobs: int
+    queued: int = 0
+    running: int = 0
+    completed: int = 0
+    total_wait_time: float = 0
+    max_wait_time: float = 0
@@ -0,0 +1,179 @@
+import asyncio
+import os
+import time
+from collections import Counter, OrderedDict, deque
+from collections.abc import AsyncGenerator
+from contextlib import asynccontextmanager, suppress
+from dataclasses import replace
+from gettext import gettext as _
+
+from loguru import logger
+from telegram import Update
+from telegram.error import TelegramError
+from telegram.ext import ContextTypes
+
+from pdf_bot.analytics import TaskType
+from pdf_bot.models import TranslatableText
+from pdf_bot.telegram_internal import TelegramService
+
+from .models import ScheduledJob, SchedulerStats
+
+
+class SchedulerService:
+    """Limits how many jobs are processed at once.
+
+    A job starts straight away if both the global limit and the limit of its task type
+    have room, otherwise it's queued and the user is told their position in the queue.
+    Queued jobs are started in a round-robin order across users, so that a user with many
+    queued jobs can't hold back the jobs of other users.
+    """
+
+    def __init__(
+        self,
+        telegram_service: TelegramService,
+        max_jobs: int | None = None,
+        task_limits: dict[str, int] | None = None,
+    ) -> None:
+        self.telegram_service = telegram_service
+        self.max_jobs = max_jobs or os.cpu_count() or 1
+        self.task_limits = {
+            TaskType(task_type): limit for task_type, limit in (task_limits or {}).items()
+        }
+
+        # Users are ordered by who should be served next
+        self._queues: OrderedDict[int | None, deque[ScheduledJob]] = OrderedDict()
+        self._running: Counter[TaskType] = Counter()
+        self._stats = SchedulerStats(self.max_jobs)
+
+    @asynccontextmanager
+    async def schedule(
+        self, update: Update, context: ContextTypes.DEFAULT_TYPE, task_type: TaskType
+    ) -> AsyncGenerator[None, None]:
+        user = update.effective_user
+        user_id = None if user is None else user.id
+
+        await self._acquire(update, context, user_id, task_type)
+        try:
+            yield
+        finally:
+            self._release(task_type)
+
+    def get_stats(self) -> SchedulerStats:
+        return replace(self._stats)
+
+    async def _acquire(
+        self,
+        update: Update,
+        context: ContextTypes.DEFAULT_TYPE,
+        user_id: int | None,
+        task_type: TaskType,
+    ) -> None:
+        if not self._queues and self._has_capacity(task_type):
+            self._start(task_type)
+            return
+
+        job = ScheduledJob(user_id, task_type, asyncio.get_running_loop().create_future())
+        self._queues.setdefault(user_id, deque()).append(job)
+        self._stats.queued += 1
+        start_time = time.perf_counter()
+
+        try:
+            # The job might be able to start straight away if the jobs ahead of it are
+            # waiting for their task types to have room
+            self._dispatch()
+            if not job.future.done():
+                await self._send_queue_position(update, context, job)
+            await job.future
+        except BaseException:
+            if job.future.done() and not job.future.cancelled():
+                # The job was started right before it was cancelled
+                self._release(task_type)
+            else:
+                self._remove(job)
+            raise
+        finally:
+            wait_time = time.perf_counter() - start_time
+            self._stats.total_wait_time += wait_time
+            self._stats.max_wait_time = max(self._stats.max_wait_time, wait_time)
+
+    def _release(self, task_type: TaskType) -> None:
+        self._running[task_type] -= 1
+        self._stats.running -= 1
+        self._stats.completed += 1
+        self._dispatch()
+
+    def _start(self, task_type: TaskType) -> None:
+        self._running[task_type] += 1
+        self._stats.running += 1
+
+    def _dispatch(self) -> None:
+        while self._stats.running < self.max_jobs:
+            job = self._pop_next_job()
+            if job is None:
+                return
+
+            self._start(job.task_type)
+            job.future.set_result(None)
+
+    def _pop_next_job(self) -> ScheduledJob | None:
+        for user_id, jobs in self._queues.items():
+            job = jobs[0]
+            if not self._has_capacity(job.task_type):
+                continue
+
+            jobs.popleft()
+            if jobs:
+                self._queues.move_to_end(user_id)
+            else:
+                del self._queues[user_id]
+            self._stats.queued -= 1
+            return job
+        return None
+
+    def _remove(self, job: ScheduledJob) -> None:
+        jobs = self._queues.get(job.user_id)
+        if jobs is None or job not in jobs:
+            return
+
+        jobs.remove(job)
+        if not jobs:
+            del self._queues[job.user_id]
+        self._stats.queued -= 1
+
+    def _has_capacity(self, task_type: TaskType) -> bool:
+        task_limit = self.task_limits.get(task_type, self.max_jobs)
+        return self._stats.running < self.max_jobs and self._running[task_type] < task_limit
+
+    def _get_queue_position(self, job: ScheduledJob) -> int:
+        # Users are served one job at a time in turn, so every other user gets to start
+        # up to the same number of jobs before this one
+        index = self._queues[job.user_id].index(job)
+        position = index + 1
+        is_ahead = True
+
+        for user_id, jobs in self._queues.items():
+            if user_id == job.user_id:
+                is_ahead = False
+                continue
+            position += min(len(jobs), index + 1 if is_ahead else index)
+
+        return position
+
+    async def _send_queue_position(
+        self, update: Update, context: ContextTypes.DEFAULT_TYPE, job: ScheduledJob
+    ) -> None:
+        position = self._get_queue_position(job)
+        logger.info(
+            "Queued {task_type} job at position {position}",
+            task_type=job.task_type.value,
+            position=position,
+        )
+
+        text = TranslatableText(
+            _("You're #{position} in the queue, I'll start working on it as soon as possible"),
+            {"position": str(position)},
+        )
+
+        # The job should stay in the queue even if the user can't be notified
+        with suppress(TelegramError):
+            await self.telegram_service.send_message(update, context, text)
@@ -1,6 +1,8 @@
+import os
 from pathlib import Path
+from typing import Literal, Self
 
-from pydantic import Field
+from pydantic import Field, model_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -30,3 +32,97 @@ class Settings(BaseSettings):
     request_pool_timeout: int = 45
 
     telegram_max_retries: int = 2
+    telegram_max_concurrent_downloads: int = 4
+    telegram_max_concurrent_prefetches: int = 2
+
+    analytics_flush_interval: float = 10
+    analytics_max_queue_size: int = 10_000
+    analytics_max_retries: int = 3
+
+    datastore_backend: Literal["gcp", "memory"] = "gcp"
+    datastore_flush_interval: float = 5
+    datastore_max_batch_size: int = 100
+    datastore_max_retries: int = 3
+
+    merge_session_ttl: int = 60 * 60
+
+    fonts_cache_path: Path = Path("webfonts.json")
+    fonts_cache_ttl: int = 60 * 60 * 24
+    font_files_cache_dir: Path = Path("font_cache")
+    font_files_cache_max_total_bytes: int = 100 * 1024 * 1024
+
+    language_cache_max_size: int = 100_000
+    language_cache_ttl: int = 60 * 60
+
+    file_cache_max_total_bytes: int = 1024 * 1024 * 1024
+    file_cache_ttl: int = 60 * 30
+
+    executor_max_processes: int | None = None
+    executor_max_threads: int | None = None
+
+    pdf_grayscale_dpi: int = 200
+    pdf_rasterise_chunk_size: int = 10
+    pdf_ocr_jobs: int | None = None
+    pdf_ocr_profile: Literal["default", "fast"] = "default"
+    pdf_ocr_tesseract_timeout: float = 60
+    pdf_compress_min_gain: float = 0.05
+    pdf_compress_profiles: list[Literal["ebook", "printer", "default"]] = [
+        "ebook",
+        "printer",
+        "default",
+    ]
+    pdf_compress_time_limit: float = 120
+
+    cli_max_processes: int | None = None
+    cli_time_limit: int = 300
+    cli_memory_limit_mb: int | None = 2048
+    cli_cpu_time_limit: int | None = 600
+
+    webpage_max_workers: int = 2
+    webpage_max_jobs_per_worker: int = 20
+    webpage_time_limit: float = 120
+    webpage_memory_limit_mb: int | None = 1024
+    webpage_max_pages: int = 500
+    webpage_max_fetch_bytes: int = 50 * 1024 * 1024
+    webpage_cache_max_size: int = 1000
+    webpage_cache_ttl: int = 60 * 10
+
+    scheduler_max_jobs: int | None = None
+    scheduler_task_limits: dict[str, int] = Field(
+        default_factory=lambda: {"compress_pdf": 2, "ocr_pdf": 2, "url_to_pdf": 2}
+    )
+
+    result_cache_backend: Literal["memory", "sqlite"] = "memory"
+    result_cache_path: Path = Path("result_cache.sqlite3")
+    result_cache_max_size: int = 10_000
+    result_cache_ttl: int = 60 * 60 * 24
+    output_cache_path: Path = Path("output_cache.sqlite3")
+
+    @model_validator(mode="after")
+    def limit_concurrent_downloads(self) -> Self:
+        # Leave at least one connection in the pool for the other bot requests, so that
+        # downloads don't block replies from being sent
+        self.telegram_max_concurrent_downloads = max(
+            min(self.telegram_max_concurrent_downloads, self.request_connection_pool_size - 1), 1
+        )
+
+        # Prefetches are speculative, so leave at least one download for the files that
+        # users are waiting for
+        self.telegram_max_concurrent_prefetches = max(
+            min(
+                self.telegram_max_concurrent_prefetches,
+                self.telegram_max_concurrent_downloads - 1,
+            ),
+            1,
+        )
+        return self
+
+    @model_validator(mode="after")
+    def limit_ocr_jobs(self) -> Self:
+        # Split the CPU budget between the OCR tasks that can run at the same time, as
+        # each of them runs its own pool of OCR processes
+        if self.pdf_ocr_jobs is None:
+            cpu_count = self.executor_max_processes or os.cpu_count() or 1
+            max_tasks = self.scheduler_task_limits.get("ocr_pdf") or 1
+            self.pdf_ocr_jobs = max(cpu_count // max_tasks, 1)
+        return self
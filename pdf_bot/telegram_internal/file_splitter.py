@@ -0,0 +1,85 @@
+import asyncio
+import math
+import shutil
+from collections import deque
+from collections.abc import AsyncGenerator
+from contextlib import asynccontextmanager
+from itertools import pairwise
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from zipfile import ZipFile
+
+from pypdf import PdfReader, PdfWriter
+
+from pdf_bot.io_internal import ZipArchiver
+
+
+@asynccontextmanager
+async def split_file(path: Path, max_size: int) -> AsyncGenerator[list[Path], None]:
+    """Splits the file into parts that are each at most the max size where possible.
+
+    PDF files are split by page ranges and zip files are split into multiple volumes.
+    Other files are returned as is, and so are parts that can't be split any further,
+    such as a single page that is larger than the max size.
+    """
+    if path.suffix == ".pdf":
+        with TemporaryDirectory(prefix="pdf_bot_split_") as dir_name:
+            yield await asyncio.to_thread(_split_pdf, path, Path(dir_name), max_size)
+    elif path.suffix == ".zip":
+        async with _split_zip(path, max_size) as paths:
+            yield paths
+    else:
+        yield [path]
+
+
+def _split_pdf(path: Path, out_dir: Path, max_size: int) -> list[Path]:
+    reader = PdfReader(path)
+    num_pages = len(reader.pages)
+    if num_pages <= 1:
+        return [path]
+
+    # Start with evenly sized parts based on the file size, and halve the parts that are
+    # still too large, as shared resources such as fonts are written to every part
+    num_parts = min(num_pages, math.ceil(path.stat().st_size / max_size))
+    bounds = [round(i * num_pages / num_parts) for i in range(num_parts + 1)]
+    page_ranges = deque(pairwise(bounds))
+    out_paths: list[Path] = []
+
+    while page_ranges:
+        start, end = page_ranges.popleft()
+        out_path = out_dir / f"{path.stem}_pages_{start + 1}-{end}.pdf"
+
+        writer = PdfWriter()
+        writer.append(reader, pages=(start, end))
+        writer.write(out_path)
+
+        if out_path.stat().st_size <= max_size or end - start == 1:
+            out_paths.append(out_path)
+        else:
+            out_path.unlink()
+            mid = (start + end) // 2
+            page_ranges.extendleft([(mid, end), (start, mid)])
+
+    return out_paths
+
+
+@asynccontextmanager
+async def _split_zip(path: Path, max_size: int) -> AsyncGenerator[list[Path], None]:
+    with TemporaryDirectory(prefix="pdf_bot_split_") as dir_name:
+        async with ZipArchiver(path.stem, max_size) as archiver:
+            with ZipFile(path) as zip_file:
+                for info in zip_file.infolist():
+                    if info.is_dir():
+                        continue
+
+                    # Extract the files one at a time to limit the disk space used
+                    out_path = Path(dir_name) / Path(info.filename).name
+                    await asyncio.to_thread(_extract_zip_entry, zip_file, info.filename, out_path)
+                    await archiver.add(out_path, info.filename, delete=True)
+
+            yield await archiver.finish()
+
+
+def _extract_zip_entry(zip_file: ZipFile, name: str, out_path: Path) -> None:
+    with zip_file.open(name) as src, out_path.open("wb") as dst:
+        shutil.copyfileobj(src, dst)
@@ -1,5 +1,8 @@
+import asyncio
+import hashlib
 from collections.abc import AsyncGenerator, Coroutine
-from contextlib import asynccontextmanager, suppress
+from contextlib import AsyncExitStack, asynccontextmanager, suppress
+from functools import partial
 from gettext import gettext as _
 from pathlib import Path
 from typing import Any, cast
@@ -11,20 +14,30 @@ from telegram import (
     Document,
     InlineKeyboardButton,
     InlineKeyboardMarkup,
+    InputMediaDocument,
     Message,
     PhotoSize,
     ReplyKeyboardMarkup,
     ReplyKeyboardRemove,
     Update,
 )
-from telegram.constants import ChatAction, FileSizeLimit, MessageLimit, ParseMode
+from telegram.constants import (
+    ChatAction,
+    FileSizeLimit,
+    MediaGroupLimit,
+    MessageLimit,
+    ParseMode,
+)
+from telegram.error import BadRequest
 from telegram.ext import ContextTypes, ConversationHandler
 
 from pdf_bot.analytics import AnalyticsService, EventAction, TaskType
 from pdf_bot.consts import BACK, CANCEL, CHANNEL_NAME, FILE_DATA, MESSAGE_DATA
+from pdf_bot.file_cache import FileCacheService
 from pdf_bot.io_internal import IOService
 from pdf_bot.language import LanguageService
-from pdf_bot.models import BackData, FileData, MessageData, SupportData
+from pdf_bot.models import BackData, FileData, MessageData, SupportData, TranslatableText
+from pdf_bot.result_cache import CachedResult, ResultCacheService, ResultFileType
 
 from .exceptions import (
     TelegramFileMimeTypeError,
@@ -33,6 +46,7 @@ from .exceptions import (
     TelegramImageNotFoundError,
     TelegramUpdateUserDataError,
 )
+from .file_splitter import split_file
 
 
 class _ReplyData(BaseModel):
@@ -47,18 +61,27 @@ class TelegramService:
     PNG_SUFFIX = ".png"
     BACK = _("Back")
     MESSAGE_TRUNCATED = "\n..."
+    _OUTPUT_CACHE_TASK = "output"
 
-    def __init__(
+    def __init__(  # noqa: PLR0913, PLR0917
         self,
         io_service: IOService,
         language_service: LanguageService,
         analytics_service: AnalyticsService,
+        file_cache_service: FileCacheService,
+        output_cache_service: ResultCacheService,
         bot: Bot,
+        max_concurrent_downloads: int = 4,
+        max_concurrent_prefetches: int = 2,
     ) -> None:
         self.io_service = io_service
         self.language_service = language_service
         self.analytics_service = analytics_service
+        self.file_cache_service = file_cache_service
+        self.output_cache_service = output_cache_service
         self.bot = bot
+        self._download_semaphore = asyncio.Semaphore(max_concurrent_downloads)
+        self._prefetch_semaphore = asyncio.Semaphore(max_concurrent_prefetches)
 
     @staticmethod
     def check_file_size(file: Document | PhotoSize) -> None:
@@ -173,25 +196,70 @@ class TelegramService:
         self.check_file_size(doc)
         return doc
 
+    def prefetch_file(
+        self, update: Update, file: Document | PhotoSize, suffix: str | None = None
+    ) -> None:
+        user = update.effective_user
+        if user is None:
+            return
+
+        self.file_cache_service.prefetch(
+            user.id,
+            file.file_id,
+            file.file_size,
+            partial(self._prefetch_file, file.file_id),
+            suffix,
+        )
+
     @asynccontextmanager
     async def download_pdf_file(self, file_id: str) -> AsyncGenerator[Path, None]:
-        with self.io_service.create_temp_pdf_file() as path:
-            file = await self.bot.get_file(file_id)
-            await file.download_to_drive(custom_path=path)
+        # Keep the downloaded file in the cache so that it can be reused if the user retries
+        # the task or continues the conversation with the same file
+        async with self.file_cache_service.get_or_download(
+            file_id, partial(self._download_file, file_id), ".pdf"
+        ) as path:
             yield path
 
     @asynccontextmanager
     async def download_files(self, file_ids: list[str]) -> AsyncGenerator[list[Path], None]:
-        with self.io_service.create_temp_files(len(file_ids)) as out_paths:
-            for i, file_id in enumerate(file_ids):
-                file = await self.bot.get_file(file_id)
-                await file.download_to_drive(custom_path=out_paths[i])
-            yield out_paths
+        async with AsyncExitStack() as stack:
+            cached_paths = [
+                await stack.enter_async_context(self.file_cache_service.get(file_id))
+                for file_id in file_ids
+            ]
+            out_paths = stack.enter_context(self.io_service.create_temp_files(len(file_ids)))
+
+            # Each file is downloaded to its own preassigned path, so the output order
+            # matches the order of the file IDs regardless of when each download finishes
+            tasks = [
+                asyncio.create_task(self._download_file(file_id, out_path))
+                for file_id, out_path, cached_path in zip(
+                    file_ids, out_paths, cached_paths, strict=True
+                )
+                if cached_path is None
+            ]
+
+            try:
+                await asyncio.gather(*tasks)
+            except BaseException:
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+                raise
+
+            yield [
+                out_path if cached_path is None else cached_path
+                for out_path, cached_path in zip(out_paths, cached_paths, strict=True)
+            ]
 
     async def cancel_conversation(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
         _ = self.language_service.set_app_language(update, context)
         query: CallbackQuery | None = update.callback_query
 
+        user = update.effective_user
+        if user is not None:
+            self.file_cache_service.discard_user_files(user.id)
+
         if query is not None:
             await self.answer_query_and_drop_data(context, query)
             await query.edit_message_text(_("Action cancelled"))
@@ -252,34 +320,71 @@ class TelegramService:
         context: ContextTypes.DEFAULT_TYPE,
         file_path: Path,
         task: TaskType,
-    ) -> None:
+    ) -> Message | None:
         _ = self.language_service.set_app_language(update, context)
         chat_id = self._get_chat_id(update)
 
         try:
             self.check_file_upload_size(file_path)
-        except TelegramFileTooLargeError as e:
-            await self.bot.send_message(chat_id, _(str(e)))
-            return
+        except TelegramFileTooLargeError:
+            await self._send_split_file(update, context, file_path, task)
+            return None
 
         reply_markup = self.get_support_markup(update, context)
+        caption = _("Here is your result file")
+        file_type = ResultFileType.document
+        chat_action = ChatAction.UPLOAD_DOCUMENT
+
         if file_path.suffix == self.PNG_SUFFIX:
-            await self.bot.send_chat_action(chat_id, ChatAction.UPLOAD_PHOTO)
-            await self.bot.send_photo(
-                chat_id,
-                file_path,
-                caption=_("Here is your result file"),
-                reply_markup=reply_markup,
-            )
-        else:
-            await self.bot.send_chat_action(chat_id, ChatAction.UPLOAD_DOCUMENT)
-            await self.bot.send_document(
-                chat_id,
-                file_path,
-                caption=_("Here is your result file"),
-                reply_markup=reply_markup,
+            file_type = ResultFileType.photo
+            chat_action = ChatAction.UPLOAD_PHOTO
+
+        # Identical outputs are sent by the file ID of their first upload. Documents sent by
+        # file ID keep the name of their first upload, so they're uploaded under a name
+        # without the random part of the temporary file name, which is part of the key
+        file_name: str | None = None
+        params: dict[str, str] = {}
+        if file_type == ResultFileType.document:
+            file_name = self.io_service.get_display_name(file_path)
+            params["file_name"] = file_name
+
+        digest = await asyncio.to_thread(self._get_file_digest, file_path)
+        cache_key = self.output_cache_service.get_key(digest, self._OUTPUT_CACHE_TASK, params)
+        message = await self._send_uploaded_file(chat_id, cache_key, caption, reply_markup)
+
+        if message is None:
+            await self.bot.send_chat_action(chat_id, chat_action)
+            message = await self._send_file_by_type(
+                chat_id, file_path, file_type, caption, reply_markup, file_name
             )
 
+            cached_result = CachedResult.from_telegram_message(message, None)
+            if cached_result is not None:
+                await self.output_cache_service.set(cache_key, cached_result)
+
+        self.analytics_service.send_event(update, context, task, EventAction.complete)
+        return message
+
+    async def send_cached_file(
+        self,
+        update: Update,
+        context: ContextTypes.DEFAULT_TYPE,
+        cached_result: CachedResult,
+        task: TaskType,
+    ) -> None:
+        _ = self.language_service.set_app_language(update, context)
+        chat_id = self._get_chat_id(update)
+        reply_markup = self.get_support_markup(update, context)
+
+        # Files that were already uploaded are sent by their file ID, which doesn't
+        # require uploading the file again
+        await self._send_file_by_type(
+            chat_id,
+            cached_result.file_id,
+            cached_result.file_type,
+            _("Here is your result file"),
+            reply_markup,
+        )
         self.analytics_service.send_event(update, context, task, EventAction.complete)
 
     async def send_file_names(
@@ -301,11 +406,105 @@ class TelegramService:
         await self.bot.send_message(chat_id, msg_text)
 
     async def send_message(
-        self, update: Update, context: ContextTypes.DEFAULT_TYPE, text: str
+        self, update: Update, context: ContextTypes.DEFAULT_TYPE, text: str | TranslatableText
     ) -> None:
         _ = self.language_service.set_app_language(update, context)
         chat_id = self._get_chat_id(update)
-        await self.bot.send_message(chat_id, _(text))
+        if isinstance(text, TranslatableText):
+            await self.bot.send_message(chat_id, text.translate(_))
+        else:
+            await self.bot.send_message(chat_id, _(text))
+
+    async def _send_split_file(
+        self,
+        update: Update,
+        context: ContextTypes.DEFAULT_TYPE,
+        file_path: Path,
+        task: TaskType,
+    ) -> None:
+        _ = self.language_service.set_app_language(update, context)
+        chat_id = self._get_chat_id(update)
+
+        # The result is split into parts that can each be uploaded instead of discarding it
+        async with split_file(file_path, FileSizeLimit.FILESIZE_UPLOAD) as paths:
+            try:
+                for path in paths:
+                    self.check_file_upload_size(path)
+            except TelegramFileTooLargeError as e:
+                await self.bot.send_message(chat_id, _(str(e)))
+                return
+
+            await self.bot.send_chat_action(chat_id, ChatAction.UPLOAD_DOCUMENT)
+            for i in range(0, len(paths), MediaGroupLimit.MAX_MEDIA_LENGTH):
+                group = paths[i : i + MediaGroupLimit.MAX_MEDIA_LENGTH]
+                if len(group) < MediaGroupLimit.MIN_MEDIA_LENGTH:
+                    await self.bot.send_document(chat_id, group[0])
+                else:
+                    await self.bot.send_media_group(chat_id, [InputMediaDocument(x) for x in group])
+
+        # Media groups can't have reply markups, so the caption is sent separately
+        await self.bot.send_message(
+            chat_id,
+            _(
+                "Your result file is too large to send as a single file, "
+                "so I've split it into {num_parts} files"
+            ).format(num_parts=len(paths)),
+            reply_markup=self.get_support_markup(update, context),
+        )
+        self.analytics_service.send_event(update, context, task, EventAction.complete)
+
+    async def _send_uploaded_file(
+        self,
+        chat_id: int,
+        cache_key: str,
+        caption: str,
+        reply_markup: InlineKeyboardMarkup,
+    ) -> Message | None:
+        cached_result = await self.output_cache_service.get(cache_key)
+        if cached_result is None:
+            return None
+
+        try:
+            return await self._send_file_by_type(
+                chat_id, cached_result.file_id, cached_result.file_type, caption, reply_markup
+            )
+        except BadRequest:
+            # The file ID is no longer valid, so upload the file again
+            await self.output_cache_service.delete(cache_key)
+            return None
+
+    async def _send_file_by_type(  # noqa: PLR0913, PLR0917
+        self,
+        chat_id: int,
+        file: Path | str,
+        file_type: ResultFileType,
+        caption: str,
+        reply_markup: InlineKeyboardMarkup,
+        file_name: str | None = None,
+    ) -> Message:
+        if file_type == ResultFileType.photo:
+            return await self.bot.send_photo(
+                chat_id, file, caption=caption, reply_markup=reply_markup
+            )
+        return await self.bot.send_document(
+            chat_id, file, caption=caption, reply_markup=reply_markup, filename=file_name
+        )
+
+    @staticmethod
+    def _get_file_digest(file_path: Path) -> str:
+        with file_path.open("rb") as f:
+            return hashlib.file_digest(f, "sha256").hexdigest()
+
+    async def _prefetch_file(self, file_id: str, path: Path) -> None:
+        # Prefetches take fewer downloads than the limit, so that the downloads that users
+        # are waiting for always have capacity
+        async with self._prefetch_semaphore:
+            await self._download_file(file_id, path)
+
+    async def _download_file(self, file_id: str, path: Path) -> None:
+        async with self._download_semaphore:
+            file = await self.bot.get_file(file_id)
+            await file.download_to_drive(custom_path=path)
 
     @staticmethod
     def _get_chat_id(update: Update) -> int:
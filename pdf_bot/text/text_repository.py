@@ -1,26 +1,128 @@
-from requests import Session
+import json
+import time
+from difflib import get_close_matches
+from http import HTTPStatus
+from pathlib import Path
+from threading import Lock
+
+from loguru import logger
+from requests import RequestException, Session
 
 from pdf_bot.pdf import FontData
 
 
 class TextRepository:
-    def __init__(self, api_client: Session, google_fonts_token: str) -> None:
+    """Looks up fonts from the Google Fonts catalogue.
+
+    The catalogue is fetched once and indexed by the case-folded font family. It's also
+    persisted to disk, so that it survives restarts, and is refreshed with a conditional
+    request once it's older than the cache TTL.
+    """
+
+    WEBFONTS_URL = "https://www.googleapis.com/webfonts/v1/webfonts"
+    REQUEST_TIMEOUT = 30
+    REFRESH_RETRY_INTERVAL = 60 * 5
+
+    def __init__(
+        self,
+        api_client: Session,
+        google_fonts_token: str,
+        cache_path: Path = Path("webfonts.json"),
+        cache_ttl: int = 60 * 60 * 24,
+    ) -> None:
         self.api_client = api_client
         self.google_fonts_token = google_fonts_token
+        self.cache_path = cache_path
+        self.cache_ttl = cache_ttl
+
+        self._fonts: dict[str, FontData] | None = None
+        self._etag: str | None = None
+        self._fetched_at: float = 0
+        self._lock = Lock()
 
     def get_font(self, font: str) -> FontData | None:
-        font_data: FontData | None = None
-        font = font.lower()
+        return self._get_fonts().get(font.casefold())
+
+    def get_font_suggestions(self, font: str, limit: int = 3) -> list[str]:
+        fonts = self._get_fonts()
+        matches = get_close_matches(font.casefold(), fonts, n=limit)
+        return [fonts[x].font_family for x in matches]
+
+    def _get_fonts(self) -> dict[str, FontData]:
+        with self._lock:
+            if self._fonts is None:
+                self._load_cache()
+
+            if self._fonts is None or time.time() - self._fetched_at >= self.cache_ttl:
+                self._refresh_fonts()
+
+            return self._fonts or {}
+
+    def _refresh_fonts(self) -> None:
+        headers = {}
+        if self._fonts is not None and self._etag is not None:
+            headers["If-None-Match"] = self._etag
+
+        try:
+            r = self.api_client.get(
+                self.WEBFONTS_URL,
+                params={"key": self.google_fonts_token},
+                headers=headers,
+                timeout=self.REQUEST_TIMEOUT,
+            )
+            r.raise_for_status()
+        except RequestException:
+            if self._fonts is None:
+                raise
+            logger.opt(exception=True).warning("Failed to refresh fonts, using cached fonts")
+
+            # Retry after a while rather than on every lookup, which holds the lock
+            self._fetched_at = time.time() - self.cache_ttl + self.REFRESH_RETRY_INTERVAL
+            return
+
+        if r.status_code != HTTPStatus.NOT_MODIFIED:
+            fonts = {
+                item["family"]: item["files"]["regular"]
+                for item in r.json()["items"]
+                if "regular" in item["files"]
+            }
+            self._set_fonts(fonts)
+            self._etag = r.headers.get("ETag")
+
+        self._fetched_at = time.time()
+        self._save_cache()
+
+    def _load_cache(self) -> None:
+        try:
+            data = json.loads(self.cache_path.read_text())
+            self._set_fonts(data["fonts"])
+            self._etag = data["etag"]
+            self._fetched_at = data["fetched_at"]
+        except FileNotFoundError:
+            return
+        except (ValueError, KeyError, TypeError):
+            logger.warning("Ignoring invalid fonts cache at {path}", path=self.cache_path)
+            self._fonts = None
+
+    def _save_cache(self) -> None:
+        if self._fonts is None:
+            return
 
-        r = self.api_client.get(
-            "https://www.googleapis.com/webfonts/v1/webfonts",
-            params={"key": self.google_fonts_token},
-        )
+        data = {
+            "etag": self._etag,
+            "fetched_at": self._fetched_at,
+            "fonts": {x.font_family: x.font_url for x in self._fonts.values()},
+        }
 
-        for item in r.json()["items"]:
-            if item["family"].lower() == font:
-                if "regular" in item["files"]:
-                    font_data = FontData(item["family"], item["files"]["regular"])
-                break
+        # Write to a temporary file first so that the cache is never left half written
+        tmp_path = self.cache_path.with_suffix(".tmp")
+        try:
+            tmp_path.write_text(json.dumps(data))
+            tmp_path.replace(self.cache_path)
+        except OSError:
+            logger.opt(exception=True).warning(
+                "Failed to save fonts cache to {path}", path=self.cache_path
+            )
 
-        return font_data
+    def _set_fonts(self, fonts: dict[str, str]) -> None:
+        self._fonts = {family.casefold(): FontData(family, url) for family, url in fonts.items()}
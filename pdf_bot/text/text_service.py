@@ -1,3 +1,4 @@
+import asyncio
 from gettext import gettext as _
 from typing import cast
 
@@ -9,6 +10,7 @@ from pdf_bot.analytics import TaskType
 from pdf_bot.consts import CANCEL
 from pdf_bot.language import LanguageService
 from pdf_bot.pdf import FontData, PdfService
+from pdf_bot.scheduler import SchedulerService
 from pdf_bot.telegram_internal import TelegramService, TelegramServiceError
 from pdf_bot.text.text_repository import TextRepository
 
@@ -26,11 +28,13 @@ class TextService:
         pdf_service: PdfService,
         telegram_service: TelegramService,
         language_service: LanguageService,
+        scheduler_service: SchedulerService,
     ) -> None:
         self.text_repository = text_repository
         self.pdf_service = pdf_service
         self.telegram_service = telegram_service
         self.language_service = language_service
+        self.scheduler_service = scheduler_service
 
     async def ask_pdf_text(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
         _ = self.language_service.set_app_language(update, context)
@@ -83,11 +87,19 @@ class TextService:
         if msg_text == _(self.SKIP):
             return await self._text_to_pdf(update, context)
 
-        font_data = self.text_repository.get_font(msg_text)
+        font_data = await asyncio.to_thread(self.text_repository.get_font, msg_text)
         if font_data is not None:
             return await self._text_to_pdf(update, context, font_data)
 
-        await msg.reply_text(_("Unknown font, please try again"))
+        text = _("Unknown font, please try again")
+        suggestions = await asyncio.to_thread(self.text_repository.get_font_suggestions, msg_text)
+        if suggestions:
+            text = "{text}\n\n{suggestions}".format(
+                text=text,
+                suggestions=_("Did you mean: {fonts}").format(fonts=", ".join(suggestions)),
+            )
+
+        await msg.reply_text(text)
         return self.WAIT_FONT
 
     async def _text_to_pdf(
@@ -106,7 +118,10 @@ class TextService:
             return ConversationHandler.END
 
         await msg.reply_text(_("Creating your PDF file"), reply_markup=ReplyKeyboardRemove())
-        async with self.pdf_service.create_pdf_from_text(text, font_data) as out_path:
+        async with (
+            self.scheduler_service.schedule(update, context, TaskType.text_to_pdf),
+            self.pdf_service.create_pdf_from_text(text, font_data) as out_path,
+        ):
             await self.telegram_service.send_file(update, context, out_path, TaskType.text_to_pdf)
 
         return ConversationHandler.END
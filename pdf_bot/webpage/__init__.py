@@ -1,4 +1,23 @@
+from .exceptions import (
+    WebpageFetchError,
+    WebpageRenderError,
+    WebpageServiceError,
+    WebpageTimeoutError,
+    WebpageTooLargeError,
+)
+from .models import WebpageRenderLimits
 from .webpage_handler import WebpageHandler
+from .webpage_renderer import WebpageRenderer
 from .webpage_service import WebpageService
 
-__all__ = ["WebpageHandler", "WebpageService"]
+__all__ = [
+    "WebpageFetchError",
+    "WebpageHandler",
+    "WebpageRenderError",
+    "WebpageRenderLimits",
+    "WebpageRenderer",
+    "WebpageService",
+    "WebpageServiceError",
+    "WebpageTimeoutError",
+    "WebpageTooLargeError",
+]
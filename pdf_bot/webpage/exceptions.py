@@ -0,0 +1,18 @@
+class WebpageServiceError(Exception):
+    pass
+
+
+class WebpageFetchError(WebpageServiceError):
+    pass
+
+
+class WebpageRenderError(WebpageServiceError):
+    pass
+
+
+class WebpageTimeoutError(WebpageServiceError):
+    pass
+
+
+class WebpageTooLargeError(WebpageServiceError):
+    pass
@@ -0,0 +1,9 @@
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class WebpageRenderLimits:
+    max_pages: int
+    max_fetch_bytes: int
+    fetch_timeout: float
+    memory_limit_mb: int | None = None
@@ -0,0 +1,189 @@
+import asyncio
+import multiprocessing
+import resource
+from contextlib import suppress
+from gettext import gettext as _
+from multiprocessing.connection import Connection
+from multiprocessing.context import BaseContext
+from pathlib import Path
+from typing import Any
+
+from loguru import logger
+from weasyprint import HTML
+from weasyprint.urls import (
+    FatalURLFetchingError,
+    URLFetcher,
+    URLFetcherResponse,
+    URLFetchingError,
+)
+
+from pdf_bot.webpage.exceptions import (
+    WebpageFetchError,
+    WebpageRenderError,
+    WebpageServiceError,
+    WebpageTimeoutError,
+    WebpageTooLargeError,
+)
+from pdf_bot.webpage.models import WebpageRenderLimits
+
+_MB = 1024 * 1024
+
+
+class WebpageRenderer:
+    """Renders webpages into PDF files in a pool of worker processes.
+
+    Each job runs in its own worker with a memory limit, and the worker is killed if the
+    job takes longer than the time limit, so that a heavy page can neither block nor
+    crash the bot. Workers are replaced after a number of jobs to contain the memory
+    growth of weasyprint.
+    """
+
+    _START_METHOD = "spawn"
+    _STOP_TIMEOUT = 5
+
+    def __init__(  # noqa: PLR0913, PLR0917
+        self,
+        max_workers: int = 2,
+        max_jobs_per_worker: int = 20,
+        time_limit: float = 120,
+        memory_limit_mb: int | None = 1024,
+        max_pages: int = 500,
+        max_fetch_bytes: int = 50 * _MB,
+    ) -> None:
+        self.max_jobs_per_worker = max_jobs_per_worker
+        self.time_limit = time_limit
+        self.limits = WebpageRenderLimits(
+            max_pages=max_pages,
+            max_fetch_bytes=max_fetch_bytes,
+            fetch_timeout=time_limit,
+            memory_limit_mb=memory_limit_mb,
+        )
+
+        self._semaphore = asyncio.Semaphore(max_workers)
+        self._idle_workers: list[_RenderWorker] = []
+
+    async def render(self, url: str, out_path: Path) -> None:
+        async with self._semaphore:
+            worker = self._idle_workers.pop() if self._idle_workers else self._start_worker()
+
+            try:
+                error = await asyncio.wait_for(
+                    asyncio.to_thread(worker.run, url, out_path), self.time_limit
+                )
+            except TimeoutError as e:
+                await asyncio.to_thread(worker.kill)
+                logger.error(
+                    "Rendering {url} timed out after {time_limit}s",
+                    url=url,
+                    time_limit=self.time_limit,
+                )
+                raise WebpageTimeoutError(_("Your webpage took too long to convert")) from e
+            except (EOFError, OSError) as e:
+                # The worker died, most likely from running out of memory
+                await asyncio.to_thread(worker.kill)
+                logger.error("Worker died while rendering {url}", url=url)
+                raise WebpageTooLargeError(_("Your webpage is too large to convert")) from e
+            except asyncio.CancelledError:
+                await asyncio.to_thread(worker.kill)
+                raise
+
+            if worker.num_jobs >= self.max_jobs_per_worker:
+                await asyncio.to_thread(worker.stop, self._STOP_TIMEOUT)
+            else:
+                self._idle_workers.append(worker)
+
+        if error is not None:
+            raise error
+
+    def shutdown(self) -> None:
+        for worker in self._idle_workers:
+            worker.kill()
+        self._idle_workers.clear()
+
+    def _start_worker(self) -> "_RenderWorker":
+        # Spawn fresh interpreters instead of forking the bot, which has running
+        # threads and an event loop
+        context = multiprocessing.get_context(self._START_METHOD)
+        return _RenderWorker(context, self.limits)
+
+
+class _RenderWorker:
+    def __init__(self, context: BaseContext, limits: WebpageRenderLimits) -> None:
+        self.num_jobs = 0
+        self._conn, child_conn = context.Pipe()
+        self._process = context.Process(  # type: ignore[attr-defined]
+            target=_run_worker, args=(child_conn, limits), daemon=True
+        )
+        self._process.start()
+        child_conn.close()
+
+    def run(self, url: str, out_path: Path) -> WebpageServiceError | None:
+        self.num_jobs += 1
+        self._conn.send((url, out_path))
+        result: WebpageServiceError | None = self._conn.recv()
+        return result
+
+    def stop(self, timeout: float) -> None:
+        with suppress(OSError):
+            self._conn.send(None)
+        self._process.join(timeout)
+        self.kill()
+
+    def kill(self) -> None:
+        if self._process.is_alive():
+            self._process.kill()
+        self._process.join()
+        self._conn.close()
+
+
+class _LimitedURLFetcher(URLFetcher):
+    """Fails the render once the fetched resources go over the size limit."""
+
+    def __init__(self, max_bytes: int, **kwargs: Any) -> None:
+        super().__init__(**kwargs)
+        self.remaining_bytes = max_bytes
+
+    def fetch(self, url: str, headers: dict[str, str] | None = None) -> URLFetcherResponse:
+        response = super().fetch(url, headers)
+        try:
+            body = response.read(self.remaining_bytes + 1)
+        finally:
+            response.close()
+
+        self.remaining_bytes -= len(body)
+        if self.remaining_bytes < 0:
+            raise _FetchLimitError(url)
+        return URLFetcherResponse(response.url, body, response.headers, response.status)
+
+
+class _FetchLimitError(FatalURLFetchingError):
+    pass
+
+
+def _run_worker(conn: Connection, limits: WebpageRenderLimits) -> None:
+    if limits.memory_limit_mb is not None:
+        memory_limit = limits.memory_limit_mb * _MB
+        resource.setrlimit(resource.RLIMIT_AS, (memory_limit, memory_limit))
+
+    while (job := conn.recv()) is not None:
+        url, out_path = job
+        conn.send(_render_webpage(url, out_path, limits))
+
+
+def _render_webpage(
+    url: str, out_path: Path, limits: WebpageRenderLimits
+) -> WebpageServiceError | None:
+    try:
+        url_fetcher = _LimitedURLFetcher(limits.max_fetch_bytes, timeout=limits.fetch_timeout)
+        document = HTML(url=url, url_fetcher=url_fetcher).render()
+        if len(document.pages) > limits.max_pages:
+            return WebpageTooLargeError(_("Your webpage is too large to convert"))
+        document.write_pdf(out_path)
+    except URLFetchingError:
+        return WebpageFetchError(_("Unable to reach your webpage"))
+    except (_FetchLimitError, MemoryError):
+        return WebpageTooLargeError(_("Your webpage is too large to convert"))
+    except Exception:  # noqa: BLE001
+        logger.opt(exception=True).warning("Failed to render {url}", url=url)
+        return WebpageRenderError(_("Failed to convert your webpage"))
+    return None
@@ -1,34 +1,49 @@
+import asyncio
 import hashlib
 from contextlib import suppress
-from typing import cast
-from urllib.parse import urlparse
+from gettext import gettext as _
+from typing import ClassVar, cast
+from urllib.parse import urlsplit, urlunsplit
 
 from telegram import Message, Update
+from telegram.error import BadRequest
 from telegram.ext import ContextTypes
-from weasyprint import HTML
-from weasyprint.css.tokens import InvalidValues
-from weasyprint.urls import URLFetchingError
 
 from pdf_bot.analytics import TaskType
 from pdf_bot.io_internal import IOService
 from pdf_bot.language import LanguageService
+from pdf_bot.result_cache import CachedResult, ResultCacheService
+from pdf_bot.scheduler import SchedulerService
 from pdf_bot.telegram_internal import (
     TelegramGetUserDataError,
     TelegramService,
     TelegramUpdateUserDataError,
 )
+from pdf_bot.webpage.exceptions import WebpageRenderError, WebpageServiceError
+from pdf_bot.webpage.webpage_renderer import WebpageRenderer
 
 
 class WebpageService:
-    def __init__(
+    _DEFAULT_PORTS: ClassVar[dict[str, int]] = {"http": 80, "https": 443}
+
+    def __init__(  # noqa: PLR0913, PLR0917
         self,
         io_service: IOService,
         language_service: LanguageService,
         telegram_service: TelegramService,
+        scheduler_service: SchedulerService,
+        webpage_renderer: WebpageRenderer,
+        webpage_cache_service: ResultCacheService,
     ) -> None:
         self.io_service = io_service
         self.language_service = language_service
         self.telegram_service = telegram_service
+        self.scheduler_service = scheduler_service
+        self.webpage_renderer = webpage_renderer
+        self.webpage_cache_service = webpage_cache_service
+
+        # Renders in progress by their cache key, which resolve to the render error if any
+        self._renders: dict[str, asyncio.Future[WebpageServiceError | None]] = {}
 
     async def url_to_pdf(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         _ = self.language_service.set_app_language(update, context)
@@ -58,31 +73,104 @@ class WebpageService:
     async def _url_to_pdf(
         self, update: Update, context: ContextTypes.DEFAULT_TYPE, url: str
     ) -> None:
-        _ = self.language_service.set_app_language(update, context)
-        o = urlparse(url)
-        err_text = None
+        cache_key = self.webpage_cache_service.get_key(
+            self._normalize_url(url), TaskType.url_to_pdf.value, {}
+        )
+        if await self._send_cached_result(update, context, cache_key):
+            return
+
+        # The same webpage is only rendered once at a time across all users, and the
+        # other requests are sent the uploaded result of that render
+        render = self._renders.get(cache_key)
+        if render is not None:
+            error = await asyncio.shield(render)
+            if error is not None:
+                await self._reply_error(update, context, error)
+                return
+            if await self._send_cached_result(update, context, cache_key):
+                return
+
+        render = asyncio.get_running_loop().create_future()
+        self._renders[cache_key] = render
+        error = None
 
-        with self.io_service.create_temp_pdf_file(o.hostname) as out_path:
+        try:
+            async with self.scheduler_service.schedule(update, context, TaskType.url_to_pdf):
+                error = await self._render_url(update, context, url, cache_key)
+        except Exception:
+            # The other requests are sent the failure instead of rendering the webpage again
+            error = WebpageRenderError(_("Failed to convert your webpage"))
+            raise
+        finally:
+            if self._renders.get(cache_key) is render:
+                del self._renders[cache_key]
+            render.set_result(error)
+
+        if error is not None:
+            await self._reply_error(update, context, error)
+
+    async def _render_url(
+        self, update: Update, context: ContextTypes.DEFAULT_TYPE, url: str, cache_key: str
+    ) -> WebpageServiceError | None:
+        with self.io_service.create_temp_pdf_file(urlsplit(url).hostname) as out_path:
             try:
-                HTML(url=url).write_pdf(out_path)
-                await self.telegram_service.send_file(
-                    update, context, out_path, TaskType.url_to_pdf
-                )
-            except URLFetchingError:
-                err_text = _("Unable to reach your webpage")
-            except (
-                AssertionError,
-                AttributeError,
-                IndexError,
-                InvalidValues,
-                KeyError,
-                OverflowError,
-                RuntimeError,
-                ValueError,
-                TypeError,
-            ):
-                err_text = _("Failed to convert your webpage")
-
-        if err_text is not None:
-            msg = cast("Message", update.effective_message)
-            await msg.reply_text(err_text)
+                await self.webpage_renderer.render(url, out_path)
+            except WebpageServiceError as e:
+                return e
+
+            message = await self.telegram_service.send_file(
+                update, context, out_path, TaskType.url_to_pdf
+            )
+
+        if message is not None:
+            cached_result = CachedResult.from_telegram_message(message, None)
+            if cached_result is not None:
+                await self.webpage_cache_service.set(cache_key, cached_result)
+        return None
+
+    async def _send_cached_result(
+        self, update: Update, context: ContextTypes.DEFAULT_TYPE, cache_key: str
+    ) -> bool:
+        cached_result = await self.webpage_cache_service.get(cache_key)
+        if cached_result is None:
+            return False
+
+        try:
+            await self.telegram_service.send_cached_file(
+                update, context, cached_result, TaskType.url_to_pdf
+            )
+        except BadRequest:
+            # The cached file ID is no longer valid, so render the webpage again
+            await self.webpage_cache_service.delete(cache_key)
+            return False
+        return True
+
+    async def _reply_error(
+        self, update: Update, context: ContextTypes.DEFAULT_TYPE, error: WebpageServiceError
+    ) -> None:
+        _ = self.language_service.set_app_language(update, context)
+        msg = cast("Message", update.effective_message)
+        await msg.reply_text(_(str(error)))
+
+    @classmethod
+    def _normalize_url(cls, url: str) -> str:
+        # Scheme and host names are case insensitive, default ports are implied and
+        # fragments are never sent to the server, so they don't change the webpage
+        parts = urlsplit(url.strip())
+        scheme = parts.scheme.lower()
+
+        try:
+            port = parts.port
+        except ValueError:
+            return url
+
+        netloc = (parts.hostname or "").lower()
+        if port is not None and port != cls._DEFAULT_PORTS.get(scheme):
+            netloc = f"{netloc}:{port}"
+        if parts.username is not None:
+            userinfo = parts.username
+            if parts.password is not None:
+                userinfo = f"{userinfo}:{parts.password}"
+            netloc = f"{userinfo}@{netloc}"
+
+        return urlunsplit((scheme, netloc, parts.path or "/", parts.query, ""))
@@ -0,0 +1,163 @@
+"""Benchmarks the peak memory use of merging PDF files.
+
+Each merge runs in a fresh process, and the peak RSS of that process is reported for the
+chunked pikepdf merger used by the bot, for copying all the pages with pikepdf at once
+and for the pypdf merge used before, against the number and size of the input files.
+
+Usage:
+    python scripts/benchmark_merge.py --num-files 5 20 50 --file-size-mb 1 5
+"""
+
+import argparse
+import multiprocessing
+import os
+import resource
+import tempfile
+import time
+from collections.abc import Callable
+from contextlib import ExitStack
+from multiprocessing.connection import Connection
+from pathlib import Path
+
+import pikepdf
+from pypdf import PdfWriter
+
+from pdf_bot.pdf.pdf_merger import PdfMerger
+
+MergeFunc = Callable[[list[Path], Path], None]
+
+_MB = 1024 * 1024
+_PAGES_PER_FILE = 4
+_IMAGE_WIDTH = 1024
+_FONT_SIZE = 256 * 1024
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--num-files", type=int, nargs="+", default=[5, 20, 50])
+    parser.add_argument("--file-size-mb", type=float, nargs="+", default=[1, 5])
+    args = parser.parse_args()
+
+    engines: dict[str, MergeFunc] = {
+        "merger": _merge_with_merger,
+        "pikepdf": _merge_with_pikepdf,
+        "pypdf": _merge_with_pypdf,
+    }
+    print(
+        f"{'engine':<8} {'files':>6} {'file MB':>8} {'input MB':>9} {'output MB':>10} "
+        f"{'peak RSS MB':>12} {'time s':>7}"
+    )
+
+    with tempfile.TemporaryDirectory() as dir_name:
+        dir_path = Path(dir_name)
+        font_data = os.urandom(_FONT_SIZE)
+
+        for file_size_mb in args.file_size_mb:
+            for num_files in args.num_files:
+                file_paths = [dir_path / f"in_{i}.pdf" for i in range(num_files)]
+                for file_path in file_paths:
+                    _write_input_pdf(file_path, int(file_size_mb * _MB), font_data)
+                input_size = sum(x.stat().st_size for x in file_paths)
+
+                for name, merge in engines.items():
+                    out_path = dir_path / f"out_{name}.pdf"
+                    run_time, peak_rss = _measure(merge, file_paths, out_path)
+                    print(
+                        f"{name:<8} {num_files:>6} {file_size_mb:>8.1f} "
+                        f"{input_size / _MB:>9.1f} {out_path.stat().st_size / _MB:>10.1f} "
+                        f"{peak_rss / _MB:>12.1f} {run_time:>7.2f}"
+                    )
+                    out_path.unlink()
+
+                for file_path in file_paths:
+                    file_path.unlink()
+
+
+def _write_input_pdf(file_path: Path, size: int, font_data: bytes) -> None:
+    # Each file embeds the same font, as files created by the same tool do, and its own
+    # incompressible images that make up the rest of the file size
+    image_height = max((size - _FONT_SIZE) // (_PAGES_PER_FILE * _IMAGE_WIDTH * 3), 1)
+
+    with pikepdf.Pdf.new() as pdf:
+        font_file = pdf.make_stream(font_data)
+        font = pdf.make_indirect(
+            pikepdf.Dictionary(
+                Type=pikepdf.Name.Font,
+                Subtype=pikepdf.Name.TrueType,
+                BaseFont=pikepdf.Name.Benchmark,
+                FontDescriptor=pikepdf.Dictionary(
+                    Type=pikepdf.Name.FontDescriptor,
+                    FontName=pikepdf.Name.Benchmark,
+                    FontFile2=font_file,
+                ),
+            )
+        )
+
+        for _ in range(_PAGES_PER_FILE):
+            page = pdf.add_blank_page()
+            image = pikepdf.Stream(
+                pdf,
+                os.urandom(_IMAGE_WIDTH * image_height * 3),
+                Type=pikepdf.Name.XObject,
+                Subtype=pikepdf.Name.Image,
+                Width=_IMAGE_WIDTH,
+                Height=image_height,
+                BitsPerComponent=8,
+                ColorSpace=pikepdf.Name.DeviceRGB,
+            )
+            page.obj.Resources = pikepdf.Dictionary(
+                Font=pikepdf.Dictionary(F1=font),
+                XObject=pikepdf.Dictionary(Im0=pdf.make_indirect(image)),
+            )
+            page.obj.Contents = pdf.make_stream(
+                b"q 612 0 0 792 0 0 cm /Im0 Do Q BT /F1 12 Tf (Benchmark) Tj ET"
+            )
+        pdf.save(file_path)
+
+
+def _measure(merge: MergeFunc, file_paths: list[Path], out_path: Path) -> tuple[float, int]:
+    # Spawn a fresh interpreter for each run, as the peak RSS of a process never goes down
+    context = multiprocessing.get_context("spawn")
+    conn, child_conn = context.Pipe()
+    process = context.Process(target=_run_merge, args=(merge, file_paths, out_path, child_conn))
+    process.start()
+    result: tuple[float, int] = conn.recv()
+    process.join()
+    return result
+
+
+def _run_merge(merge: MergeFunc, file_paths: list[Path], out_path: Path, conn: Connection) -> None:
+    start_time = time.perf_counter()
+    merge(file_paths, out_path)
+    run_time = time.perf_counter() - start_time
+
+    # The max RSS is reported in kilobytes on Linux
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    conn.send((run_time, peak_rss))
+
+
+def _merge_with_merger(file_paths: list[Path], out_path: Path) -> None:
+    with tempfile.TemporaryDirectory() as temp_dir:
+        merger = PdfMerger(Path(temp_dir))
+        for file_path in file_paths:
+            merger.append(file_path)
+        merger.save(out_path)
+
+
+def _merge_with_pikepdf(file_paths: list[Path], out_path: Path) -> None:
+    with ExitStack() as stack, pikepdf.Pdf.new() as pdf:
+        for file_path in file_paths:
+            src = stack.enter_context(pikepdf.Pdf.open(file_path))
+            pdf.pages.extend(src.pages)
+        pdf.save(out_path)
+
+
+def _merge_with_pypdf(file_paths: list[Path], out_path: Path) -> None:
+    writer = PdfWriter()
+    for file_path in file_paths:
+        writer.append(file_path)
+    writer.write(out_path)
+
+
+if __name__ == "__main__":
+    main()
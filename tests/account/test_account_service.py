@@ -1,5 +1,6 @@
 from unittest.mock import MagicMock
 
+import pytest
 from telegram import User
 
 from pdf_bot.account import AccountRepository, AccountService
@@ -20,24 +21,28 @@ class TestAccountService(LanguageServiceTestMixin):
 
         self.service = AccountService(self.account_repository, self.language_service)
 
-    def test_create_user(self) -> None:
+    @pytest.mark.asyncio
+    async def test_create_user(self) -> None:
         self.user.language_code = None
-        self.service.create_user(self.user)
+        await self.service.create_user(self.user)
         self.account_repository.upsert_user.assert_called_with(self.USER_ID, self.LANGUAGE_CODE)
+        self.language_service.clear_cached_language.assert_called_once_with(self.USER_ID)
 
-    def test_create_user_with_language_code(self) -> None:
+    @pytest.mark.asyncio
+    async def test_create_user_with_language_code(self) -> None:
         user_code = "user_code"
         self.user.language_code = user_code
         self.language_service.get_language_code_from_short_code.return_value = user_code
 
-        self.service.create_user(self.user)
+        await self.service.create_user(self.user)
 
         self.account_repository.upsert_user.assert_called_with(self.USER_ID, user_code)
 
-    def test_create_user_with_invalid_language_code(self) -> None:
+    @pytest.mark.asyncio
+    async def test_create_user_with_invalid_language_code(self) -> None:
         self.user.language_code = "clearly_invalid"
         self.language_service.get_language_code_from_short_code.return_value = None
 
-        self.service.create_user(self.user)
+        await self.service.create_user(self.user)
 
         self.account_repository.upsert_user.assert_called_with(self.USER_ID, self.LANGUAGE_CODE)
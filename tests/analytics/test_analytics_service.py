@@ -1,7 +1,10 @@
+import asyncio
 from unittest.mock import MagicMock, patch
 from uuid import UUID
 
+import pytest
 from requests import HTTPError
+from telegram import Update
 
 from pdf_bot.analytics import AnalyticsRepository, AnalyticsService, EventAction, TaskType
 from tests.language import LanguageServiceTestMixin
@@ -12,6 +15,9 @@ class TestAnalyticsService(LanguageServiceTestMixin, TelegramTestMixin):
     TASK_TYPE = TaskType.beautify_image
     EVENT_ACTION = EventAction.complete
     LANGUAGE = "language"
+    FLUSH_INTERVAL = 60
+    MAX_QUEUE_SIZE = 30
+    MAX_RETRIES = 2
 
     def setup_method(self) -> None:
         super().setup_method()
@@ -22,40 +28,115 @@ class TestAnalyticsService(LanguageServiceTestMixin, TelegramTestMixin):
         self.sut = AnalyticsService(
             self.analytics_repository,
             self.language_service,
+            flush_interval=self.FLUSH_INTERVAL,
+            max_queue_size=self.MAX_QUEUE_SIZE,
+            max_retries=self.MAX_RETRIES,
+            retry_delay=0,
         )
 
-    def test_send_event(self) -> None:
-        self._test_and_assert_send_event()
+    @pytest.mark.asyncio
+    async def test_send_event(self) -> None:
+        self._send_event()
+        self.analytics_repository.send_event.assert_not_called()
 
-    def test_send_event_error(self) -> None:
+        await self.sut.flush()
+
+        self.language_service.get_user_language.assert_called_once_with(
+            self.telegram_update, self.telegram_context
+        )
+        self.analytics_repository.send_event.assert_called_once_with(
+            {
+                "client_id": str(UUID(int=self.TELEGRAM_USER_ID)),
+                "user_properties": {"bot_language": {"value": self.LANGUAGE}},
+                "events": [
+                    {
+                        "name": self.TASK_TYPE.value,
+                        "params": {"action": self.EVENT_ACTION.value},
+                    }
+                ],
+            }
+        )
+
+    @pytest.mark.asyncio
+    async def test_send_event_batched(self) -> None:
+        other_user_id = self.TELEGRAM_USER_ID + 1
+        other_update = MagicMock(spec=Update)
+        other_update.effective_message.from_user.id = other_user_id
+
+        for _ in range(26):
+            self._send_event()
+        self._send_event(other_update)
+
+        # The queue is flushed early once there are enough events for a full batch
+        await asyncio.sleep(0.01)
+
+        payloads = [x.args[0] for x in self.analytics_repository.send_event.call_args_list]
+        assert [(x["client_id"], len(x["events"])) for x in payloads] == [
+            (str(UUID(int=self.TELEGRAM_USER_ID)), 25),
+            (str(UUID(int=self.TELEGRAM_USER_ID)), 1),
+            (str(UUID(int=other_user_id)), 1),
+        ]
+
+    @pytest.mark.asyncio
+    async def test_send_event_drop_oldest(self) -> None:
+        with patch.object(self.sut, "_MAX_BATCH_SIZE", self.MAX_QUEUE_SIZE + 10):
+            for i in range(self.MAX_QUEUE_SIZE + 2):
+                self._send_event(task_type=list(TaskType)[i % len(TaskType)])
+            await self.sut.flush()
+
+        assert self.sut.dropped_events == 2
+        events = self.analytics_repository.send_event.call_args.args[0]["events"]
+        assert len(events) == self.MAX_QUEUE_SIZE
+        assert events[0]["name"] == list(TaskType)[2].value
+
+    @pytest.mark.asyncio
+    async def test_send_event_retry(self) -> None:
+        self.analytics_repository.send_event.side_effect = [
+            HTTPError(request=MagicMock(), response=MagicMock()),
+            None,
+        ]
+
+        self._send_event()
+        await self.sut.flush()
+
+        assert self.analytics_repository.send_event.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_send_event_error(self) -> None:
         self.analytics_repository.send_event.side_effect = HTTPError(
             request=MagicMock(), response=MagicMock()
         )
 
         with patch("pdf_bot.analytics.analytics_service.logger") as logger:
-            self._test_and_assert_send_event()
+            self._send_event()
+            await self.sut.flush()
+
             logger.exception.assert_called_once()
+            assert self.analytics_repository.send_event.call_count == self.MAX_RETRIES + 1
+
+    @pytest.mark.asyncio
+    async def test_send_event_unexpected_error(self) -> None:
+        self.analytics_repository.send_event.side_effect = [ValueError(), None]
+
+        self._send_event()
+        with pytest.raises(ValueError):  # noqa: PT011
+            await self.sut.flush()
+
+        # The queue is still flushed after the error
+        self._send_event()
+        await self.sut.flush()
+
+        assert self.analytics_repository.send_event.call_count == 2
 
-    def _test_and_assert_send_event(self) -> None:
+    @pytest.mark.asyncio
+    async def test_flush_without_events(self) -> None:
+        await self.sut.flush()
+        self.analytics_repository.send_event.assert_not_called()
+
+    def _send_event(self, update: Update | None = None, task_type: TaskType = TASK_TYPE) -> None:
         self.sut.send_event(
-            self.telegram_update,
+            update or self.telegram_update,
             self.telegram_context,
-            self.TASK_TYPE,
+            task_type,
             self.EVENT_ACTION,
         )
-
-        self.language_service.get_user_language.assert_called_once_with(
-            self.telegram_update, self.telegram_context
-        )
-
-        event = {
-            "client_id": str(UUID(int=self.TELEGRAM_USER_ID)),
-            "user_properties": {"bot_language": {"value": self.LANGUAGE}},
-            "events": [
-                {
-                    "name": self.TASK_TYPE.value,
-                    "params": {"action": self.EVENT_ACTION.value},
-                }
-            ],
-        }
-        self.analytics_repository.send_event.assert_called_once_with(event)
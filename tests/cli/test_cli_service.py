@@ -1,54 +1,77 @@
+import asyncio
 import shlex
-from subprocess import Popen
-from unittest.mock import MagicMock, patch
+import signal
+from asyncio.subprocess import Process
+from unittest.mock import AsyncMock, patch
 
 import pytest
 
-from pdf_bot.cli import CLIService, CLIServiceError
+from pdf_bot.cli import CLIService, CLIServiceError, CompressProfile
+from pdf_bot.cli.exceptions import CLITimeoutError
 from tests.path_test_mixin import PathTestMixin
 
 
 class TestCLIService(PathTestMixin):
     PERCENT = 0.1
     MARGIN_SIZE = 10
+    PROCESS_ID = 123
+    MAX_PROCESSES = 2
+    TIME_LIMIT = 10
 
     def setup_method(self) -> None:
         self.input_path = self.mock_file_path()
         self.output_path = self.mock_file_path()
 
-        self.process = MagicMock(spec=Popen)
-        self.process.communicate.return_value = (
-            b"0",
-            b"1",
-        )
+        self.process = AsyncMock(spec=Process)
+        self.process.pid = self.PROCESS_ID
+        self.process.communicate.return_value = (b"0", b"1")
 
-        self.popen_patcher = patch("pdf_bot.cli.cli_service.Popen", return_value=self.process)
-        self.popen = self.popen_patcher.start()
+        self.create_subprocess_exec_patcher = patch(
+            "pdf_bot.cli.cli_service.create_subprocess_exec", return_value=self.process
+        )
+        self.killpg_patcher = patch("pdf_bot.cli.cli_service.os.killpg")
+        self.create_subprocess_exec = self.create_subprocess_exec_patcher.start()
+        self.killpg = self.killpg_patcher.start()
 
-        self.sut = CLIService()
+        self.sut = CLIService(max_processes=self.MAX_PROCESSES, time_limit=self.TIME_LIMIT)
 
     def teardown_method(self) -> None:
-        self.popen_patcher.stop()
+        self.create_subprocess_exec_patcher.stop()
+        self.killpg_patcher.stop()
 
     @pytest.mark.asyncio
     async def test_compress_pdf(self) -> None:
         self.process.returncode = 0
-        self.sut.compress_pdf(self.input_path, self.output_path)
+        await self.sut.compress_pdf(self.input_path, self.output_path)
+
         self._assert_compress_command()
+        stats = self.sut.get_stats()
+        assert stats.completed == 1
+        assert stats.running == 0
+        assert stats.queue_length == 0
+
+    @pytest.mark.asyncio
+    async def test_compress_pdf_with_profile(self) -> None:
+        self.process.returncode = 0
+        await self.sut.compress_pdf(
+            self.input_path, self.output_path, profile=CompressProfile.ebook
+        )
+        self._assert_compress_command("ebook")
 
     @pytest.mark.asyncio
     async def test_compress_pdf_error(self) -> None:
         self.process.returncode = 1
 
         with pytest.raises(CLIServiceError):
-            self.sut.compress_pdf(self.input_path, self.output_path)
+            await self.sut.compress_pdf(self.input_path, self.output_path)
 
         self._assert_compress_command()
+        assert self.sut.get_stats().failed == 1
 
     @pytest.mark.asyncio
     async def test_extract_pdf_images(self) -> None:
         self.process.returncode = 0
-        self.sut.extract_pdf_images(self.input_path, self.output_path)
+        await self.sut.extract_pdf_images(self.input_path, self.output_path)
         self._assert_get_pdf_images_command()
 
     @pytest.mark.asyncio
@@ -56,32 +79,96 @@ class TestCLIService(PathTestMixin):
         self.process.returncode = 1
 
         with pytest.raises(CLIServiceError):
-            self.sut.extract_pdf_images(self.input_path, self.output_path)
+            await self.sut.extract_pdf_images(self.input_path, self.output_path)
 
         self._assert_get_pdf_images_command()
 
-    def _assert_compress_command(self) -> None:
-        args = self.popen.call_args.args[0]
-        assert args == shlex.split(
-            "gs -sDEVICE=pdfwrite -dCompatibilityLevel=1.4 -dPDFSETTINGS=/default "
+    @pytest.mark.asyncio
+    async def test_run_command_timeout(self) -> None:
+        async def communicate() -> tuple[bytes, bytes]:
+            await asyncio.sleep(1)
+            return b"0", b"1"
+
+        self.process.communicate.side_effect = communicate
+
+        with pytest.raises(CLITimeoutError):
+            await self.sut.compress_pdf(self.input_path, self.output_path, time_limit=0.01)
+
+        self.killpg.assert_called_once_with(self.PROCESS_ID, signal.SIGKILL)
+        self.process.wait.assert_awaited_once()
+
+        stats = self.sut.get_stats()
+        assert stats.timed_out == 1
+        assert stats.running == 0
+
+    @pytest.mark.asyncio
+    async def test_run_command_cancelled(self) -> None:
+        async def communicate() -> tuple[bytes, bytes]:
+            await asyncio.sleep(1)
+            return b"0", b"1"
+
+        self.process.communicate.side_effect = communicate
+        task = asyncio.create_task(self.sut.compress_pdf(self.input_path, self.output_path))
+        await asyncio.sleep(0.01)
+        task.cancel()
+
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+        self.killpg.assert_called_once_with(self.PROCESS_ID, signal.SIGKILL)
+
+    @pytest.mark.asyncio
+    async def test_run_command_concurrency_limit(self) -> None:
+        self.process.returncode = 0
+        release = asyncio.Event()
+
+        async def communicate() -> tuple[bytes, bytes]:
+            await release.wait()
+            return b"0", b"1"
+
+        self.process.communicate.side_effect = communicate
+        tasks = [
+            asyncio.create_task(self.sut.compress_pdf(self.input_path, self.output_path))
+            for _ in range(self.MAX_PROCESSES + 1)
+        ]
+        await asyncio.sleep(0.01)
+
+        stats = self.sut.get_stats()
+        assert stats.running == self.MAX_PROCESSES
+        assert stats.queue_length == 1
+
+        release.set()
+        await asyncio.gather(*tasks)
+
+        stats = self.sut.get_stats()
+        assert stats.completed == self.MAX_PROCESSES + 1
+        assert stats.queue_length == 0
+
+    @pytest.mark.asyncio
+    async def test_run_command_resource_limits(self) -> None:
+        self.process.returncode = 0
+        sut = CLIService(memory_limit_mb=1, cpu_time_limit=2)
+
+        await sut.compress_pdf(self.input_path, self.output_path)
+
+        args = self.create_subprocess_exec.call_args.args
+        assert args[:4] == ("prlimit", f"--as={1024 * 1024}", "--cpu=2", "--")
+        assert args[4] == "gs"
+        assert self.create_subprocess_exec.call_args.kwargs["start_new_session"] is True
+
+    def _assert_compress_command(self, profile: str = "default") -> None:
+        args = self.create_subprocess_exec.call_args.args
+        assert list(args) == shlex.split(
+            f"gs -sDEVICE=pdfwrite -dCompatibilityLevel=1.4 -dPDFSETTINGS=/{profile} "
             f'-dNOPAUSE -dQUIET -dBATCH -sOutputFile="{self.output_path}" '
             f'"{self.input_path}"'
         )
 
-    def _assert_crop_pdf_percentage_command(self) -> None:
-        args = self.popen.call_args.args[0]
-        assert args == shlex.split(
-            f'pdfcropmargins -o "{self.output_path}" "{self.input_path}" -p {self.PERCENT}'
-        )
-
-    def _assert_crop_pdf_margin_size_command(self) -> None:
-        args = self.popen.call_args.args[0]
-        assert args == shlex.split(
-            f'pdfcropmargins -o "{self.output_path}" "{self.input_path}" -a {self.MARGIN_SIZE}'
-        )
+        kwargs = self.create_subprocess_exec.call_args.kwargs
+        assert kwargs["start_new_session"] is True
 
     def _assert_get_pdf_images_command(self) -> None:
-        args = self.popen.call_args.args[0]
-        assert args == shlex.split(
+        args = self.create_subprocess_exec.call_args.args
+        assert list(args) == shlex.split(
             f'pdfimages -png "{self.input_path}" "{self.output_path}/images"'
         )
@@ -0,0 +1,148 @@
+import asyncio
+from unittest.mock import MagicMock
+
+import pytest
+from google.api_core.exceptions import ServiceUnavailable
+from google.cloud.datastore import Entity
+
+from pdf_bot.datastore import DatastoreService, InMemoryDatastoreClient
+
+
+class TestDatastoreService:
+    KIND = "kind"
+    ID = 0
+    OTHER_ID = 1
+    FLUSH_INTERVAL = 0.01
+
+    def setup_method(self) -> None:
+        self.datastore_client = MagicMock(wraps=InMemoryDatastoreClient())
+        self.datastore_client.key.side_effect = InMemoryDatastoreClient().key
+        self.sut = DatastoreService(
+            self.datastore_client, flush_interval=self.FLUSH_INTERVAL, retry_delay=0
+        )
+
+        self.key = self.sut.key(self.KIND, self.ID)
+        self.other_key = self.sut.key(self.KIND, self.OTHER_ID)
+
+    @pytest.mark.asyncio
+    async def test_update(self) -> None:
+        await self.sut.update(self.key, self._set_value("a"))
+
+        actual = self.datastore_client.get(self.key)
+        assert actual == {"value": "a"}
+        self.datastore_client.put_multi.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_update_coalesced(self) -> None:
+        await asyncio.gather(
+            self.sut.update(self.key, self._set_value("a")),
+            self.sut.update(self.key, self._set_value("b")),
+            self.sut.update(self.other_key, self._set_value("c")),
+        )
+
+        assert self.datastore_client.get(self.key) == {"value": "b"}
+        assert self.datastore_client.get(self.other_key) == {"value": "c"}
+        self.datastore_client.put_multi.assert_called_once()
+        assert len(self.datastore_client.put_multi.call_args.args[0]) == 2
+
+    @pytest.mark.asyncio
+    async def test_update_deferred(self) -> None:
+        await self.sut.update(self.key, self._set_value("a"), defer=True)
+        await self.sut.update(self.other_key, self._set_value("b"), defer=True)
+        assert self.datastore_client.get(self.key) is None
+
+        await asyncio.sleep(self.FLUSH_INTERVAL * 5)
+
+        assert self.datastore_client.get(self.key) == {"value": "a"}
+        assert self.datastore_client.get(self.other_key) == {"value": "b"}
+        self.datastore_client.put_multi.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_update_max_batch_size(self) -> None:
+        sut = DatastoreService(self.datastore_client, max_batch_size=1)
+
+        await asyncio.gather(
+            sut.update(self.key, self._set_value("a")),
+            sut.update(self.other_key, self._set_value("b")),
+        )
+
+        assert self.datastore_client.put_multi.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_update_error(self) -> None:
+        self.datastore_client.put_multi.side_effect = RuntimeError
+
+        with pytest.raises(RuntimeError):
+            await self.sut.update(self.key, self._set_value("a"))
+
+        assert self.datastore_client.get(self.key) is None
+        assert await self.sut.get(self.key) is None
+
+    @pytest.mark.asyncio
+    async def test_update_retry(self) -> None:
+        self.datastore_client.put_multi.side_effect = [ServiceUnavailable("error"), None]
+
+        await self.sut.update(self.key, self._set_value("a"))
+
+        assert self.datastore_client.put_multi.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_update_retry_exhausted(self) -> None:
+        self.datastore_client.put_multi.side_effect = ServiceUnavailable("error")
+
+        with pytest.raises(ServiceUnavailable):
+            await self.sut.update(self.key, self._set_value("a"))
+
+        assert self.datastore_client.put_multi.call_count == 4
+        assert await self.sut.get(self.key) is None
+
+    @pytest.mark.asyncio
+    async def test_flush(self) -> None:
+        sut = DatastoreService(self.datastore_client, flush_interval=60)
+        await sut.update(self.key, self._set_value("a"), defer=True)
+
+        await sut.flush()
+
+        assert self.datastore_client.get(self.key) == {"value": "a"}
+
+    @pytest.mark.asyncio
+    async def test_get(self) -> None:
+        self._put_entity({"value": "a", "other": "value"})
+
+        actual = await self.sut.get(self.key)
+
+        assert actual == {"value": "a", "other": "value"}
+
+    @pytest.mark.asyncio
+    async def test_get_uncommitted_writes(self) -> None:
+        self._put_entity({"value": "a", "other": "value"})
+        await self.sut.update(self.key, self._set_value("b"), defer=True)
+        await self.sut.update(self.other_key, self._set_value("c"), defer=True)
+
+        assert await self.sut.get(self.key) == {"value": "b", "other": "value"}
+        assert self.sut.get_blocking(self.other_key) == {"value": "c"}
+
+        actual = await self.sut.get_multi([self.key, self.other_key])
+        assert actual == [{"value": "b", "other": "value"}, {"value": "c"}]
+
+        await self.sut.flush()
+
+    @pytest.mark.asyncio
+    async def test_get_multi(self) -> None:
+        self._put_entity({"value": "a"})
+
+        actual = await self.sut.get_multi([self.key, self.other_key])
+
+        assert actual == [{"value": "a"}]
+
+    def _put_entity(self, values: dict[str, str]) -> None:
+        entity = Entity(self.key)
+        entity.update(values)
+        self.datastore_client.put(entity)
+
+    @staticmethod
+    def _set_value(value: str) -> MagicMock:
+        def update(entity: Entity) -> None:
+            entity["value"] = value
+
+        return MagicMock(side_effect=update)
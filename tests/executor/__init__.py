@@ -0,0 +1,3 @@
+from .executor_service_test_mixin import ExecutorServiceTestMixin
+
+__all__ = ["ExecutorServiceTestMixin"]
@@ -0,0 +1,16 @@
+from collections.abc import Callable
+from typing import Any
+from unittest.mock import AsyncMock
+
+from pdf_bot.executor import ExecutorService, PoolType
+
+
+class ExecutorServiceTestMixin:
+    @staticmethod
+    def mock_executor_service() -> AsyncMock:
+        async def run(_pool_type: PoolType, func: Callable, *args: Any, **kwargs: Any) -> Any:
+            return func(*args, **kwargs)
+
+        service = AsyncMock(spec=ExecutorService)
+        service.run.side_effect = run
+        return service
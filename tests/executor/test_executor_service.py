@@ -0,0 +1,85 @@
+import os
+import threading
+
+import pytest
+
+from pdf_bot.executor import ExecutorService, ExecutorStats, PoolType
+
+
+class CustomError(Exception):
+    pass
+
+
+def _raise_error() -> None:
+    raise CustomError
+
+
+class TestExecutorService:
+    MAX_PROCESSES = 1
+    MAX_THREADS = 2
+
+    def setup_method(self) -> None:
+        self.sut = ExecutorService(max_processes=self.MAX_PROCESSES, max_threads=self.MAX_THREADS)
+
+    def teardown_method(self) -> None:
+        self.sut.shutdown()
+
+    def test_init_default_max_workers(self) -> None:
+        sut = ExecutorService()
+        stats = sut.get_stats()
+
+        cpu_count = os.cpu_count() or 1
+        assert stats[PoolType.process].max_workers == cpu_count
+        assert stats[PoolType.thread].max_workers == cpu_count + 4
+
+    @pytest.mark.asyncio
+    async def test_run_thread(self) -> None:
+        actual = await self.sut.run(PoolType.thread, threading.current_thread)
+
+        assert actual != threading.current_thread()
+        stats = self.sut.get_stats()[PoolType.thread]
+        assert stats.max_workers == self.MAX_THREADS
+        assert stats.in_flight == 0
+        assert stats.completed == 1
+        assert stats.failed == 0
+
+    @pytest.mark.asyncio
+    async def test_run_process(self) -> None:
+        actual = await self.sut.run(PoolType.process, os.getpid)
+
+        assert actual != os.getpid()
+        stats = self.sut.get_stats()[PoolType.process]
+        assert stats.max_workers == self.MAX_PROCESSES
+        assert stats.completed == 1
+
+    @pytest.mark.asyncio
+    async def test_run_with_args(self) -> None:
+        actual = await self.sut.run(PoolType.thread, int, "ff", base=16)
+        assert actual == 255
+
+    @pytest.mark.asyncio
+    async def test_run_error(self) -> None:
+        with pytest.raises(CustomError):
+            await self.sut.run(PoolType.thread, _raise_error)
+
+        stats = self.sut.get_stats()[PoolType.thread]
+        assert stats.in_flight == 0
+        assert stats.completed == 0
+        assert stats.failed == 1
+
+    def test_get_stats_returns_copy(self) -> None:
+        stats = self.sut.get_stats()
+        stats[PoolType.thread].in_flight = 10
+
+        assert self.sut.get_stats()[PoolType.thread].in_flight == 0
+
+
+class TestExecutorStats:
+    def test_queue_depth(self) -> None:
+        assert ExecutorStats(max_workers=2, in_flight=1).queue_depth == 0
+        assert ExecutorStats(max_workers=2, in_flight=5).queue_depth == 3
+
+    def test_average_run_time(self) -> None:
+        assert ExecutorStats(max_workers=1).average_run_time == 0
+        stats = ExecutorStats(max_workers=1, completed=1, failed=1, total_run_time=3)
+        assert stats.average_run_time == 1.5
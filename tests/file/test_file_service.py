@@ -35,6 +35,9 @@ class TestFileService(LanguageServiceTestMixin, TelegramServiceTestMixin, Telegr
         actual = await self.sut.check_pdf(self.telegram_update, self.telegram_context)
 
         assert actual == self.STATE
+        self.telegram_service.prefetch_file.assert_called_once_with(
+            self.telegram_update, self.telegram_document, ".pdf"
+        )
         self.pdf_task_processor.ask_task.assert_called_once_with(
             self.telegram_update, self.telegram_context
         )
@@ -46,6 +49,7 @@ class TestFileService(LanguageServiceTestMixin, TelegramServiceTestMixin, Telegr
         actual = await self.sut.check_pdf(self.telegram_update, self.telegram_context)
 
         assert actual == ConversationHandler.END
+        self.telegram_service.prefetch_file.assert_not_called()
         self.pdf_task_processor.ask_task.assert_not_called()
 
     @pytest.mark.asyncio
@@ -56,6 +60,9 @@ class TestFileService(LanguageServiceTestMixin, TelegramServiceTestMixin, Telegr
         actual = await self.sut.check_image(self.telegram_update, self.telegram_context)
 
         assert actual == self.STATE
+        self.telegram_service.prefetch_file.assert_called_once_with(
+            self.telegram_update, self.telegram_document
+        )
         self.image_task_processor.ask_task.assert_called_once_with(
             self.telegram_update, self.telegram_context
         )
@@ -67,4 +74,5 @@ class TestFileService(LanguageServiceTestMixin, TelegramServiceTestMixin, Telegr
         actual = await self.sut.check_image(self.telegram_update, self.telegram_context)
 
         assert actual == ConversationHandler.END
+        self.telegram_service.prefetch_file.assert_not_called()
         self.pdf_task_processor.ask_task.assert_not_called()
@@ -0,0 +1,3 @@
+from .file_cache_service_test_mixin import FileCacheServiceTestMixin
+
+__all__ = ["FileCacheServiceTestMixin"]
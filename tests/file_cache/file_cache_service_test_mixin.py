@@ -0,0 +1,11 @@
+from unittest.mock import MagicMock
+
+from pdf_bot.file_cache import FileCacheService
+
+
+class FileCacheServiceTestMixin:
+    @staticmethod
+    def mock_file_cache_service() -> MagicMock:
+        service = MagicMock(spec=FileCacheService)
+        service.get.return_value.__aenter__.return_value = None
+        return service
@@ -0,0 +1,256 @@
+import asyncio
+from pathlib import Path
+
+import pytest
+
+from pdf_bot.file_cache import FileCacheService
+
+
+class TestFileCacheService:
+    USER_ID = 0
+    OTHER_USER_ID = 1
+    FILE_ID = "file_id"
+    OTHER_FILE_ID = "other_file_id"
+    FILE_SIZE = 10
+    MAX_TOTAL_BYTES = 15
+    TTL = 60
+    CONTENT = b"content"
+
+    def setup_method(self) -> None:
+        self.downloaded: list[Path] = []
+        self.sut = FileCacheService(self.MAX_TOTAL_BYTES, self.TTL)
+
+    def teardown_method(self) -> None:
+        self.sut.clear()
+
+    async def download(self, path: Path) -> None:
+        await asyncio.to_thread(path.write_bytes, self.CONTENT)
+        self.downloaded.append(path)
+
+    @pytest.mark.asyncio
+    async def test_prefetch_and_get(self) -> None:
+        actual = self.sut.prefetch(
+            self.USER_ID, self.FILE_ID, self.FILE_SIZE, self.download, ".pdf"
+        )
+
+        assert actual is True
+        assert self.sut.total_bytes == self.FILE_SIZE
+
+        async with self.sut.get(self.FILE_ID) as path:
+            assert path is not None
+            assert path.suffix == ".pdf"
+            assert path.parent.name == str(self.USER_ID)
+            assert path.read_bytes() == self.CONTENT
+
+    @pytest.mark.asyncio
+    async def test_prefetch_already_prefetched(self) -> None:
+        self.sut.prefetch(self.USER_ID, self.FILE_ID, self.FILE_SIZE, self.download)
+        actual = self.sut.prefetch(self.USER_ID, self.FILE_ID, self.FILE_SIZE, self.download)
+
+        assert actual is True
+        async with self.sut.get(self.FILE_ID) as path:
+            assert path is not None
+        assert len(self.downloaded) == 1
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("file_size", [None, MAX_TOTAL_BYTES + 1])
+    async def test_prefetch_skipped(self, file_size: int | None) -> None:
+        actual = self.sut.prefetch(self.USER_ID, self.FILE_ID, file_size, self.download)
+
+        assert actual is False
+        assert self.sut.total_bytes == 0
+        async with self.sut.get(self.FILE_ID) as path:
+            assert path is None
+
+    @pytest.mark.asyncio
+    async def test_prefetch_evicts_least_recently_used(self) -> None:
+        self.sut.prefetch(self.USER_ID, self.FILE_ID, self.FILE_SIZE, self.download)
+
+        actual = self.sut.prefetch(
+            self.OTHER_USER_ID, self.OTHER_FILE_ID, self.FILE_SIZE, self.download
+        )
+
+        assert actual is True
+        assert self.sut.total_bytes == self.FILE_SIZE
+        async with self.sut.get(self.FILE_ID) as path:
+            assert path is None
+
+    @pytest.mark.asyncio
+    async def test_prefetch_total_bytes_limit_files_in_use(self) -> None:
+        self.sut.prefetch(self.USER_ID, self.FILE_ID, self.FILE_SIZE, self.download)
+
+        async with self.sut.get(self.FILE_ID) as path:
+            actual = self.sut.prefetch(
+                self.OTHER_USER_ID, self.OTHER_FILE_ID, self.FILE_SIZE, self.download
+            )
+
+            assert actual is False
+            assert path is not None
+            assert self.sut.total_bytes == self.FILE_SIZE
+
+    @pytest.mark.asyncio
+    async def test_prefetch_replaces_user_file(self) -> None:
+        self.sut.prefetch(self.USER_ID, self.FILE_ID, self.FILE_SIZE, self.download)
+        async with self.sut.get(self.FILE_ID) as path:
+            assert path is not None
+            old_path = path
+
+        self.sut.prefetch(self.USER_ID, self.OTHER_FILE_ID, self.FILE_SIZE, self.download)
+
+        assert not old_path.exists()
+        assert self.sut.total_bytes == self.FILE_SIZE
+        async with self.sut.get(self.FILE_ID) as path:
+            assert path is None
+
+    @pytest.mark.asyncio
+    async def test_discard_user_files_cancels_download(self) -> None:
+        started = asyncio.Event()
+
+        async def download(_path: Path) -> None:
+            started.set()
+            await asyncio.sleep(1)
+
+        self.sut.prefetch(self.USER_ID, self.FILE_ID, self.FILE_SIZE, download)
+        await started.wait()
+
+        self.sut.discard_user_files(self.USER_ID)
+        await asyncio.sleep(0)
+
+        assert self.sut.total_bytes == 0
+        async with self.sut.get(self.FILE_ID) as path:
+            assert path is None
+
+    @pytest.mark.asyncio
+    async def test_discard_user_files_while_waiting(self) -> None:
+        async def download(_path: Path) -> None:
+            await asyncio.sleep(1)
+
+        self.sut.prefetch(self.USER_ID, self.FILE_ID, self.FILE_SIZE, download)
+
+        async def get() -> Path | None:
+            async with self.sut.get(self.FILE_ID) as path:
+                return path
+
+        task = asyncio.create_task(get())
+        await asyncio.sleep(0)
+        self.sut.discard_user_files(self.USER_ID)
+
+        assert await task is None
+
+    @pytest.mark.asyncio
+    async def test_discard_user_files_in_use(self) -> None:
+        self.sut.prefetch(self.USER_ID, self.FILE_ID, self.FILE_SIZE, self.download)
+
+        async with self.sut.get(self.FILE_ID) as path:
+            assert path is not None
+            self.sut.discard_user_files(self.USER_ID)
+            assert path.exists()
+
+        assert not path.exists()
+
+    @pytest.mark.asyncio
+    async def test_discard_user_files_without_files(self) -> None:
+        self.sut.discard_user_files(self.USER_ID)
+        assert self.sut.total_bytes == 0
+
+    @pytest.mark.asyncio
+    async def test_get_download_error(self) -> None:
+        async def download(_path: Path) -> None:
+            raise OSError
+
+        self.sut.prefetch(self.USER_ID, self.FILE_ID, self.FILE_SIZE, download)
+
+        async with self.sut.get(self.FILE_ID) as path:
+            assert path is None
+        assert self.sut.total_bytes == 0
+
+    @pytest.mark.asyncio
+    async def test_get_or_download(self) -> None:
+        async with self.sut.get_or_download(self.FILE_ID, self.download, ".pdf") as path:
+            assert path.suffix == ".pdf"
+            assert path.read_bytes() == self.CONTENT
+
+        async with self.sut.get_or_download(self.FILE_ID, self.download) as other_path:
+            assert other_path == path
+
+        assert len(self.downloaded) == 1
+        assert self.sut.total_bytes == len(self.CONTENT)
+
+    @pytest.mark.asyncio
+    async def test_get_or_download_prefetched(self) -> None:
+        self.sut.prefetch(self.USER_ID, self.FILE_ID, self.FILE_SIZE, self.download)
+
+        async with self.sut.get_or_download(self.FILE_ID, self.download) as path:
+            assert path.parent.name == str(self.USER_ID)
+
+        assert len(self.downloaded) == 1
+
+    @pytest.mark.asyncio
+    async def test_get_or_download_concurrent(self) -> None:
+        async def get() -> Path:
+            async with self.sut.get_or_download(self.FILE_ID, self.download) as path:
+                return path
+
+        actual = await asyncio.gather(get(), get())
+
+        assert actual[0] == actual[1]
+        assert len(self.downloaded) == 1
+
+    @pytest.mark.asyncio
+    async def test_get_or_download_error(self) -> None:
+        async def download(_path: Path) -> None:
+            raise OSError
+
+        with pytest.raises(OSError):  # noqa: PT011
+            async with self.sut.get_or_download(self.FILE_ID, download):
+                pass
+
+        async with self.sut.get(self.FILE_ID) as path:
+            assert path is None
+
+    @pytest.mark.asyncio
+    async def test_get_or_download_evicts_least_recently_used(self) -> None:
+        sut = FileCacheService(len(self.CONTENT), self.TTL)
+
+        async with sut.get_or_download(self.FILE_ID, self.download) as path:
+            pass
+        async with sut.get_or_download(self.OTHER_FILE_ID, self.download):
+            pass
+
+        assert not path.exists()
+        assert sut.total_bytes == len(self.CONTENT)
+        sut.clear()
+
+    @pytest.mark.asyncio
+    async def test_get_refreshes_expiry(self) -> None:
+        sut = FileCacheService(self.MAX_TOTAL_BYTES, 0.05)
+        sut.prefetch(self.USER_ID, self.FILE_ID, self.FILE_SIZE, self.download)
+
+        await asyncio.sleep(0.03)
+        async with sut.get(self.FILE_ID) as path:
+            assert path is not None
+        await asyncio.sleep(0.03)
+
+        assert path.exists()
+        sut.clear()
+
+    @pytest.mark.asyncio
+    async def test_expiry(self) -> None:
+        sut = FileCacheService(self.MAX_TOTAL_BYTES, 0.01)
+        sut.prefetch(self.USER_ID, self.FILE_ID, self.FILE_SIZE, self.download)
+        await asyncio.sleep(0.05)
+
+        assert sut.total_bytes == 0
+        assert not self.downloaded[0].exists()
+        sut.clear()
+
+    @pytest.mark.asyncio
+    async def test_clear(self) -> None:
+        self.sut.prefetch(self.USER_ID, self.FILE_ID, self.FILE_SIZE, self.download)
+        async with self.sut.get(self.FILE_ID) as path:
+            assert path is not None
+
+        self.sut.clear()
+
+        assert self.sut.total_bytes == 0
+        assert not path.parent.exists()
@@ -1,7 +1,7 @@
 from collections.abc import AsyncGenerator, Sequence
 from contextlib import asynccontextmanager
 from pathlib import Path
-from unittest.mock import MagicMock, patch
+from unittest.mock import MagicMock, call, patch
 
 import pytest
 from telegram import Update
@@ -13,10 +13,14 @@ from pdf_bot.errors import CallbackQueryDataTypeError
 from pdf_bot.file_processor import AbstractFileProcessor, ErrorHandlerType
 from pdf_bot.file_processor.errors import DuplicateClassError
 from pdf_bot.language import LanguageService
-from pdf_bot.models import FileData, FileTaskResult, TaskData
+from pdf_bot.models import FileData, FileTaskResult, TaskData, TranslatableText
+from pdf_bot.result_cache import CachedResult, ResultCacheService, ResultFileType
+from pdf_bot.scheduler import SchedulerService
 from pdf_bot.telegram_internal import TelegramGetUserDataError, TelegramService
 from tests.language import LanguageServiceTestMixin
 from tests.path_test_mixin import PathTestMixin
+from tests.result_cache import ResultCacheServiceTestMixin
+from tests.scheduler import SchedulerServiceTestMixin
 from tests.telegram_internal import TelegramServiceTestMixin, TelegramTestMixin
 
 
@@ -41,9 +45,17 @@ class MockProcessor(PathTestMixin, AbstractFileProcessor):
         self,
         telegram_service: TelegramService,
         language_service: LanguageService,
+        result_cache_service: ResultCacheService,
+        scheduler_service: SchedulerService,
         bypass_init_check: bool = False,
     ) -> None:
-        super().__init__(telegram_service, language_service, bypass_init_check)
+        super().__init__(
+            telegram_service,
+            language_service,
+            result_cache_service,
+            scheduler_service,
+            bypass_init_check,
+        )
         self.path = self.mock_file_path()
         self.file_task_result = FileTaskResult(self.path)
 
@@ -96,10 +108,14 @@ class MockProcessorWithCustomErrorHandler(MockProcessor):
 class TestAbstractFileProcessorInit(
     LanguageServiceTestMixin,
     TelegramServiceTestMixin,
+    ResultCacheServiceTestMixin,
+    SchedulerServiceTestMixin,
 ):
     def setup_method(self) -> None:
         super().setup_method()
         self.language_service = self.mock_language_service()
+        self.result_cache_service = self.mock_result_cache_service()
+        self.scheduler_service = self.mock_scheduler_service()
         self.telegram_service = self.mock_telegram_service()
 
         self.file_processors_patcher = patch(
@@ -115,7 +131,12 @@ class TestAbstractFileProcessorInit(
         processors: dict = {}
         self.file_processors.__contains__.side_effect = processors.__contains__
 
-        proc = MockProcessor(self.telegram_service, self.language_service)
+        proc = MockProcessor(
+            self.telegram_service,
+            self.language_service,
+            self.result_cache_service,
+            self.scheduler_service,
+        )
 
         self.file_processors.__setitem__.assert_called_once_with(proc.__class__.__name__, proc)
 
@@ -124,7 +145,12 @@ class TestAbstractFileProcessorInit(
         self.file_processors.__contains__.side_effect = processors.__contains__
 
         with pytest.raises(DuplicateClassError):
-            MockProcessor(self.telegram_service, self.language_service)
+            MockProcessor(
+                self.telegram_service,
+                self.language_service,
+                self.result_cache_service,
+                self.scheduler_service,
+            )
 
         self.file_processors.__setitem__.assert_not_called()
 
@@ -133,6 +159,8 @@ class TestAbstractFileProcessor(
     LanguageServiceTestMixin,
     TelegramServiceTestMixin,
     TelegramTestMixin,
+    ResultCacheServiceTestMixin,
+    SchedulerServiceTestMixin,
 ):
     BACK = "Back"
     WAIT_FILE_TASK = "wait_file_task"
@@ -142,11 +170,15 @@ class TestAbstractFileProcessor(
         self.telegram_update.callback_query = None
 
         self.language_service = self.mock_language_service()
+        self.result_cache_service = self.mock_result_cache_service()
+        self.scheduler_service = self.mock_scheduler_service()
         self.telegram_service = self.mock_telegram_service()
 
         self.sut = MockProcessor(
             self.telegram_service,
             self.language_service,
+            self.result_cache_service,
+            self.scheduler_service,
             bypass_init_check=True,
         )
 
@@ -196,7 +228,7 @@ class TestAbstractFileProcessor(
     @pytest.mark.asyncio
     async def test_process_file_with_result_message(self) -> None:
         with patch.object(self.sut, "process_file_task") as process_file_task:
-            result = FileTaskResult(self.sut.path, self.TELEGRAM_TEXT)
+            result = FileTaskResult(self.sut.path, TranslatableText(self.TELEGRAM_TEXT))
             process_file_task.return_value.__aenter__.return_value = result
 
             actual = await self.sut.process_file(self.telegram_update, self.telegram_context)
@@ -204,30 +236,50 @@ class TestAbstractFileProcessor(
             assert actual == ConversationHandler.END
             self._assert_process_file_succeed()
             self.telegram_service.send_message.assert_called_once_with(
-                self.telegram_update, self.telegram_context, self.TELEGRAM_TEXT
+                self.telegram_update, self.telegram_context, TranslatableText(self.TELEGRAM_TEXT)
             )
 
     @pytest.mark.asyncio
     async def test_process_file_dir_output(self) -> None:
         with (
             patch.object(self.sut, "process_file_task") as process_file_task,
-            patch("pdf_bot.file_processor.abstract_file_processor.shutil") as mock_shutil,
+            patch("pdf_bot.file_processor.abstract_file_processor.ZipArchiver") as zip_archiver_cls,
         ):
-            path_with_suffix = self.mock_file_path()
+            zip_path = self.mock_file_path()
+            file_paths = [Path("image_1.png"), Path("image_2.png")]
             dir_path = self.mock_dir_path()
-            dir_path.with_suffix.return_value = path_with_suffix
+            dir_path.iterdir.return_value = reversed(file_paths)
 
-            result = FileTaskResult(dir_path, self.TELEGRAM_TEXT)
+            archiver = zip_archiver_cls.return_value.__aenter__.return_value
+            archiver.finish.return_value = [zip_path]
+
+            result = FileTaskResult(dir_path, TranslatableText(self.TELEGRAM_TEXT))
             process_file_task.return_value.__aenter__.return_value = result
 
             actual = await self.sut.process_file(self.telegram_update, self.telegram_context)
 
             assert actual == ConversationHandler.END
-            self._assert_process_file_succeed(path_with_suffix)
-            dir_path.with_suffix.assert_called_once_with(".zip")
-            mock_shutil.make_archive(
-                MockProcessor.PROCESS_RESULT, "zip", MockProcessor.PROCESS_RESULT
-            )
+            self._assert_process_file_succeed(zip_path)
+            zip_archiver_cls.assert_called_once_with(dir_path.name)
+            archiver.add.assert_has_calls([call(x) for x in file_paths])
+
+    @pytest.mark.asyncio
+    async def test_process_file_multiple_output_files(self) -> None:
+        file_data = FileData(self.TELEGRAM_DOCUMENT_ID, unique_id=self.TELEGRAM_DOCUMENT_UNIQUE_ID)
+        self.telegram_service.get_file_data.return_value = file_data
+        paths: list[Path] = [self.mock_file_path(), self.mock_file_path()]
+        self.sut.file_task_result = FileTaskResult(paths)
+
+        actual = await self.sut.process_file(self.telegram_update, self.telegram_context)
+
+        assert actual == ConversationHandler.END
+        self.telegram_service.send_file.assert_has_calls(
+            [
+                call(self.telegram_update, self.telegram_context, x, MockProcessor.TASK_TYPE)
+                for x in paths
+            ]
+        )
+        self.result_cache_service.set.assert_not_awaited()
 
     @pytest.mark.asyncio
     async def test_process_file_generic_error_not_registered(self) -> None:
@@ -244,7 +296,11 @@ class TestAbstractFileProcessor(
     @pytest.mark.asyncio
     async def test_process_file_error(self) -> None:
         sut = MockProcessorWithGenericError(
-            self.telegram_service, self.language_service, bypass_init_check=True
+            self.telegram_service,
+            self.language_service,
+            self.result_cache_service,
+            self.scheduler_service,
+            bypass_init_check=True,
         )
 
         with patch.object(sut, "process_file_task", side_effect=GenericError):
@@ -258,7 +314,11 @@ class TestAbstractFileProcessor(
     @pytest.mark.asyncio
     async def test_process_file_custom_error(self) -> None:
         sut = MockProcessorWithCustomErrorHandler(
-            self.telegram_service, self.language_service, bypass_init_check=True
+            self.telegram_service,
+            self.language_service,
+            self.result_cache_service,
+            self.scheduler_service,
+            bypass_init_check=True,
         )
 
         with patch.object(sut, "process_file_task", side_effect=CustomError):
@@ -271,7 +331,11 @@ class TestAbstractFileProcessor(
     @pytest.mark.asyncio
     async def test_process_file_unknown_error(self) -> None:
         sut = MockProcessorWithCustomErrorHandler(
-            self.telegram_service, self.language_service, bypass_init_check=True
+            self.telegram_service,
+            self.language_service,
+            self.result_cache_service,
+            self.scheduler_service,
+            bypass_init_check=True,
         )
 
         with (
@@ -332,11 +396,95 @@ class TestAbstractFileProcessor(
         self._assert_process_file_succeed()
         self.telegram_context.bot.delete_message.assert_not_called()
 
+    @pytest.mark.asyncio
+    async def test_process_file_cache_hit(self) -> None:
+        file_data = FileData(self.TELEGRAM_DOCUMENT_ID, unique_id=self.TELEGRAM_DOCUMENT_UNIQUE_ID)
+        message = TranslatableText("message {param}", {"param": "value"})
+        cached_result = CachedResult(self.TELEGRAM_FILE_ID, ResultFileType.document, message)
+        self.telegram_service.get_file_data.return_value = file_data
+        self.result_cache_service.get.return_value = cached_result
+
+        with patch.object(self.sut, "process_file_task") as process_file_task:
+            actual = await self.sut.process_file(self.telegram_update, self.telegram_context)
+
+            assert actual == ConversationHandler.END
+            process_file_task.assert_not_called()
+            self.scheduler_service.schedule.assert_not_called()
+            self.result_cache_service.get_key.assert_called_once_with(
+                self.TELEGRAM_DOCUMENT_UNIQUE_ID,
+                MockProcessor.TASK_TYPE.value,
+                {"name": None},
+            )
+            self.telegram_service.send_message.assert_called_once_with(
+                self.telegram_update, self.telegram_context, message
+            )
+            self.telegram_service.send_cached_file.assert_called_once_with(
+                self.telegram_update,
+                self.telegram_context,
+                cached_result,
+                MockProcessor.TASK_TYPE,
+            )
+            self.telegram_service.send_file.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_process_file_cache_hit_invalid_file_id(self) -> None:
+        file_data = FileData(self.TELEGRAM_DOCUMENT_ID, unique_id=self.TELEGRAM_DOCUMENT_UNIQUE_ID)
+        cache_key = self.result_cache_service.get_key.return_value
+        self.telegram_service.get_file_data.return_value = file_data
+        self.result_cache_service.get.return_value = CachedResult(
+            self.TELEGRAM_FILE_ID, ResultFileType.document
+        )
+        self.telegram_service.send_cached_file.side_effect = BadRequest("Error")
+
+        actual = await self.sut.process_file(self.telegram_update, self.telegram_context)
+
+        assert actual == ConversationHandler.END
+        self.result_cache_service.delete.assert_awaited_once_with(cache_key)
+        self._assert_process_file_succeed()
+
+    @pytest.mark.asyncio
+    async def test_process_file_cache_miss(self) -> None:
+        file_data = FileData(self.TELEGRAM_DOCUMENT_ID, unique_id=self.TELEGRAM_DOCUMENT_UNIQUE_ID)
+        cache_key = self.result_cache_service.get_key.return_value
+        self.telegram_service.get_file_data.return_value = file_data
+        self.telegram_message.photo = ()
+        self.telegram_service.send_file.return_value = self.telegram_message
+
+        actual = await self.sut.process_file(self.telegram_update, self.telegram_context)
+
+        assert actual == ConversationHandler.END
+        self._assert_process_file_succeed()
+        self.result_cache_service.set.assert_awaited_once_with(
+            cache_key, CachedResult(self.TELEGRAM_DOCUMENT_ID, ResultFileType.document)
+        )
+
+    @pytest.mark.asyncio
+    async def test_process_file_cache_file_not_sent(self) -> None:
+        file_data = FileData(self.TELEGRAM_DOCUMENT_ID, unique_id=self.TELEGRAM_DOCUMENT_UNIQUE_ID)
+        self.telegram_service.get_file_data.return_value = file_data
+        self.telegram_service.send_file.return_value = None
+
+        await self.sut.process_file(self.telegram_update, self.telegram_context)
+
+        self._assert_process_file_succeed()
+        self.result_cache_service.set.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_process_file_without_unique_id(self) -> None:
+        await self.sut.process_file(self.telegram_update, self.telegram_context)
+
+        self._assert_process_file_succeed()
+        self.result_cache_service.get.assert_not_awaited()
+        self.result_cache_service.set.assert_not_awaited()
+
     def _assert_process_file_succeed(self, path: Path | None = None) -> None:
         if path is None:
             path = self.sut.path
 
         self._assert_get_file_and_message_data()
+        self.scheduler_service.schedule.assert_called_once_with(
+            self.telegram_update, self.telegram_context, MockProcessor.TASK_TYPE
+        )
         self.telegram_service.send_file.assert_called_once_with(
             self.telegram_update,
             self.telegram_context,
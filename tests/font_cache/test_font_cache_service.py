@@ -0,0 +1,121 @@
+import asyncio
+import os
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+from requests import ConnectionError as RequestsConnectionError
+from requests import Response, Session
+
+from pdf_bot.font_cache import FontCacheService
+
+
+class TestFontCacheService:
+    FONT_URL = "https://fonts.gstatic.com/font.ttf"
+    OTHER_FONT_URL = "https://fonts.gstatic.com/other_font.ttf"
+    FONT_SIZE = 10
+    MAX_TOTAL_BYTES = 15
+
+    @pytest.fixture(autouse=True)
+    def setup_cache_dir(self, tmp_path: Path) -> None:
+        self.cache_dir = tmp_path / "fonts"
+        self.sut = FontCacheService(self.session, self.cache_dir, self.MAX_TOTAL_BYTES)
+
+    def setup_method(self) -> None:
+        self.response = MagicMock(spec=Response)
+        self.response.__enter__.return_value = self.response
+        self.response.iter_content.side_effect = lambda _: [b"a" * self.FONT_SIZE]
+
+        self.session = MagicMock(spec=Session)
+        self.session.get.return_value = self.response
+
+    @pytest.mark.asyncio
+    async def test_get(self) -> None:
+        async with self.sut.get(self.FONT_URL) as actual:
+            assert actual is not None
+            assert actual.parent == self.cache_dir
+            assert actual.read_bytes() == b"a" * self.FONT_SIZE
+
+        assert self.sut.total_bytes == self.FONT_SIZE
+        self.session.get.assert_called_once_with(
+            self.FONT_URL, stream=True, timeout=FontCacheService.REQUEST_TIMEOUT
+        )
+
+    @pytest.mark.asyncio
+    async def test_get_downloaded_once(self) -> None:
+        async def get() -> Path | None:
+            async with self.sut.get(self.FONT_URL) as path:
+                return path
+
+        paths = await asyncio.gather(get(), get())
+        actual = await get()
+
+        assert paths == [actual, actual]
+        self.session.get.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_get_from_cache_dir(self) -> None:
+        async with self.sut.get(self.FONT_URL) as path:
+            pass
+        sut = FontCacheService(self.session, self.cache_dir, self.MAX_TOTAL_BYTES)
+
+        async with sut.get(self.FONT_URL) as actual:
+            assert actual == path
+
+        assert sut.total_bytes == self.FONT_SIZE
+        self.session.get.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_get_evicts_least_recently_used(self) -> None:
+        async with self.sut.get(self.FONT_URL) as path:
+            pass
+        async with self.sut.get(self.OTHER_FONT_URL) as other_path:
+            pass
+
+        assert path is not None
+        assert other_path is not None
+        assert not path.exists()
+        assert other_path.exists()
+        assert self.sut.total_bytes == self.FONT_SIZE
+
+    @pytest.mark.asyncio
+    async def test_get_does_not_evict_font_in_use(self) -> None:
+        async with self.sut.get(self.FONT_URL) as path:
+            async with self.sut.get(self.OTHER_FONT_URL) as other_path:
+                assert path is not None
+                assert path.exists()
+            assert other_path is not None
+            assert not other_path.exists()
+
+        assert path.exists()
+
+    @pytest.mark.asyncio
+    async def test_get_evicts_on_startup(self) -> None:
+        self.cache_dir.mkdir()
+        old_path = self.cache_dir / "old.ttf"
+        old_path.write_bytes(b"a" * self.FONT_SIZE)
+        new_path = self.cache_dir / "new.ttf"
+        new_path.write_bytes(b"a" * self.FONT_SIZE)
+        os.utime(old_path, (0, 0))
+
+        async with self.sut.get(self.FONT_URL):
+            pass
+
+        assert not old_path.exists()
+        assert not new_path.exists()
+        assert self.sut.total_bytes == self.FONT_SIZE
+
+    @pytest.mark.asyncio
+    async def test_get_error(self) -> None:
+        self.session.get.side_effect = RequestsConnectionError
+
+        async with self.sut.get(self.FONT_URL) as actual:
+            assert actual is None
+
+        assert list(self.cache_dir.iterdir()) == []
+        assert self.sut.total_bytes == 0
+
+        # Failed downloads are retried on the next call
+        self.session.get.side_effect = None
+        async with self.sut.get(self.FONT_URL) as actual:
+            assert actual is not None
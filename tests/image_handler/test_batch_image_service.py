@@ -9,10 +9,16 @@ from pdf_bot.image_handler import BatchImageService
 from pdf_bot.models import FileData
 from pdf_bot.telegram_internal import TelegramServiceError
 from tests.language import LanguageServiceTestMixin
+from tests.scheduler import SchedulerServiceTestMixin
 from tests.telegram_internal import TelegramServiceTestMixin, TelegramTestMixin
 
 
-class TestBatchImageService(LanguageServiceTestMixin, TelegramServiceTestMixin, TelegramTestMixin):
+class TestBatchImageService(
+    LanguageServiceTestMixin,
+    SchedulerServiceTestMixin,
+    TelegramServiceTestMixin,
+    TelegramTestMixin,
+):
     WAIT_IMAGE = 0
     IMAGE_DATA = "image_data"
 
@@ -27,6 +33,7 @@ class TestBatchImageService(LanguageServiceTestMixin, TelegramServiceTestMixin,
 
         self.image_service = MagicMock(spec=ImageService)
         self.language_service = self.mock_language_service()
+        self.scheduler_service = self.mock_scheduler_service()
         self.telegram_service = self.mock_telegram_service()
         self.telegram_service.get_user_data.side_effect = None
 
@@ -34,6 +41,7 @@ class TestBatchImageService(LanguageServiceTestMixin, TelegramServiceTestMixin,
             self.image_service,
             self.telegram_service,
             self.language_service,
+            self.scheduler_service,
         )
 
     @pytest.mark.asyncio
@@ -157,6 +165,9 @@ class TestBatchImageService(LanguageServiceTestMixin, TelegramServiceTestMixin,
         self.telegram_service.get_user_data.assert_called_once_with(
             self.telegram_context, self.IMAGE_DATA
         )
+        self.scheduler_service.schedule.assert_called_once_with(
+            self.telegram_update, self.telegram_context, TaskType.beautify_image
+        )
         self.image_service.beautify_and_convert_images_to_pdf.assert_called_once_with(
             self.file_data_list
         )
@@ -182,6 +193,9 @@ class TestBatchImageService(LanguageServiceTestMixin, TelegramServiceTestMixin,
         self.telegram_service.get_user_data.assert_called_once_with(
             self.telegram_context, self.IMAGE_DATA
         )
+        self.scheduler_service.schedule.assert_called_once_with(
+            self.telegram_update, self.telegram_context, TaskType.image_to_pdf
+        )
         self.image_service.convert_images_to_pdf.assert_called_once_with(self.file_data_list)
         self.telegram_service.send_file.assert_called_once_with(
             self.telegram_update,
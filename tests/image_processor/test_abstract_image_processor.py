@@ -11,6 +11,8 @@ from pdf_bot.image import ImageService
 from pdf_bot.image_processor import AbstractImageProcessor
 from pdf_bot.models import FileData, FileTaskResult, TaskData
 from tests.language import LanguageServiceTestMixin
+from tests.result_cache import ResultCacheServiceTestMixin
+from tests.scheduler import SchedulerServiceTestMixin
 from tests.telegram_internal import TelegramServiceTestMixin
 
 
@@ -32,11 +34,18 @@ class MockProcessor(AbstractImageProcessor):
         yield MagicMock(spec=FileTaskResult)
 
 
-class TestAbstractImageProcessor(LanguageServiceTestMixin, TelegramServiceTestMixin):
+class TestAbstractImageProcessor(
+    LanguageServiceTestMixin,
+    TelegramServiceTestMixin,
+    ResultCacheServiceTestMixin,
+    SchedulerServiceTestMixin,
+):
     def setup_method(self) -> None:
         super().setup_method()
         self.image_service = MagicMock(spec=ImageService)
         self.language_service = self.mock_language_service()
+        self.result_cache_service = self.mock_result_cache_service()
+        self.scheduler_service = self.mock_scheduler_service()
         self.telegram_service = self.mock_telegram_service()
 
         self.image_processors_patcher = patch(
@@ -59,7 +68,13 @@ class TestAbstractImageProcessor(LanguageServiceTestMixin, TelegramServiceTestMi
         processors: dict = {}
         self.image_processors.__contains__.side_effect = processors.__contains__
 
-        proc = MockProcessor(self.image_service, self.telegram_service, self.language_service)
+        proc = MockProcessor(
+            self.image_service,
+            self.telegram_service,
+            self.language_service,
+            self.result_cache_service,
+            self.scheduler_service,
+        )
 
         self.image_processors.__setitem__.assert_called_once_with(proc.__class__.__name__, proc)
 
@@ -68,7 +83,13 @@ class TestAbstractImageProcessor(LanguageServiceTestMixin, TelegramServiceTestMi
         self.image_processors.__contains__.side_effect = processors.__contains__
 
         with pytest.raises(DuplicateClassError):
-            MockProcessor(self.image_service, self.telegram_service, self.language_service)
+            MockProcessor(
+                self.image_service,
+                self.telegram_service,
+                self.language_service,
+                self.result_cache_service,
+                self.scheduler_service,
+            )
 
         self.image_processors.__setitem__.assert_not_called()
 
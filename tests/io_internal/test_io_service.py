@@ -64,6 +64,29 @@ class TestIOService:
         expected_prefix = self._get_expected_prefix(prefix)
         self._assert_temp_file(expected_prefix, suffix)
 
+    @pytest.mark.parametrize(
+        ("name", "expected"),
+        [
+            ("Compressed_a1b2c3d4.pdf", "Compressed.pdf"),
+            ("PDF_images_a_b_c_d_.zip", "PDF_images.zip"),
+            ("PDF_images.zip", "PDF_images.zip"),
+            ("tmpa1b2c3d4.pdf", "tmpa1b2c3d4.pdf"),
+        ],
+    )
+    def test_get_display_name(self, name: str, expected: str) -> None:
+        actual = self.sut.get_display_name(Path("dir") / name)
+        assert actual == expected
+
+    def test_get_display_name_of_temp_file(self) -> None:
+        self.tf_cls_patcher.stop()
+        try:
+            with self.sut.create_temp_pdf_file("Compressed") as path:
+                actual = self.sut.get_display_name(path)
+        finally:
+            self.tf_cls_patcher.start()
+
+        assert actual == "Compressed.pdf"
+
     @pytest.mark.parametrize("num_files", [0, 1, 2, 5])
     @pytest.mark.asyncio
     async def test_create_temp_files(self, num_files: int) -> None:
@@ -0,0 +1,79 @@
+from pathlib import Path
+from unittest.mock import patch
+from zipfile import ZIP_DEFLATED, ZIP_STORED, ZipFile
+
+import pytest
+
+from pdf_bot.io_internal import IOService, ZipArchiver
+
+
+class TestZipArchiver:
+    NAME = "archive"
+    FILE_SIZE = 1000
+
+    @pytest.fixture(autouse=True)
+    def setup_files(self, tmp_path: Path) -> None:
+        self.image_path = tmp_path / "image.png"
+        self.image_path.write_bytes(b"a" * self.FILE_SIZE)
+        self.text_path = tmp_path / "text.txt"
+        self.text_path.write_bytes(b"a" * self.FILE_SIZE)
+
+    @pytest.mark.asyncio
+    async def test_finish(self) -> None:
+        async with ZipArchiver(self.NAME) as sut:
+            await sut.add(self.image_path)
+            await sut.add(self.text_path, "renamed.txt")
+            actual = await sut.finish()
+
+            assert actual == [actual[0].with_name(f"{self.NAME}.zip")]
+            with ZipFile(actual[0]) as zip_file:
+                assert zip_file.namelist() == ["image.png", "renamed.txt"]
+                assert zip_file.getinfo("image.png").compress_type == ZIP_STORED
+                assert zip_file.getinfo("renamed.txt").compress_type == ZIP_DEFLATED
+                assert zip_file.read("image.png") == self.image_path.read_bytes()
+
+        assert not actual[0].exists()
+        assert self.image_path.exists()
+
+    @pytest.mark.asyncio
+    async def test_finish_split_volumes(self) -> None:
+        async with ZipArchiver(self.NAME, max_volume_size=self.FILE_SIZE * 3 // 2) as sut:
+            await sut.add(self.image_path)
+            await sut.add(self.text_path)
+            actual = await sut.finish()
+
+            assert [x.name for x in actual] == [f"{self.NAME}_part1.zip", f"{self.NAME}_part2.zip"]
+            for path, name in zip(actual, ["image.png", "text.txt"], strict=True):
+                assert path.stat().st_size <= self.FILE_SIZE * 3 // 2
+                with ZipFile(path) as zip_file:
+                    assert zip_file.namelist() == [name]
+
+    @pytest.mark.asyncio
+    async def test_add_delete(self) -> None:
+        async with ZipArchiver(self.NAME) as sut:
+            await sut.add(self.image_path, delete=True)
+            actual = await sut.finish()
+
+            assert not self.image_path.exists()
+            with ZipFile(actual[0]) as zip_file:
+                assert zip_file.namelist() == ["image.png"]
+
+    @pytest.mark.asyncio
+    async def test_finish_empty(self) -> None:
+        async with ZipArchiver(self.NAME) as sut:
+            actual = await sut.finish()
+            assert actual == []
+
+    @pytest.mark.asyncio
+    async def test_volumes_in_temp_directory(self, tmp_path: Path) -> None:
+        out_dir = tmp_path / "out"
+        out_dir.mkdir()
+
+        with patch.object(IOService, "create_temp_directory") as create_temp_directory:
+            create_temp_directory.return_value.__enter__.return_value = out_dir
+            async with ZipArchiver(self.NAME) as sut:
+                await sut.add(self.text_path)
+                actual = await sut.finish()
+                assert actual == [out_dir / f"{self.NAME}.zip"]
+
+            create_temp_directory.return_value.__exit__.assert_called_once()
@@ -0,0 +1,32 @@
+import pytest
+from telegram import Update
+from telegram.ext import TypeHandler
+
+from pdf_bot.language import LanguagePrefetchHandler
+from tests.telegram_internal import TelegramTestMixin
+
+from .language_service_test_mixin import LanguageServiceTestMixin
+
+
+class TestLanguagePrefetchHandler(LanguageServiceTestMixin, TelegramTestMixin):
+    def setup_method(self) -> None:
+        super().setup_method()
+        self.language_service = self.mock_language_service()
+        self.sut = LanguagePrefetchHandler(self.language_service)
+
+    def test_group(self) -> None:
+        assert self.sut.group < 0
+
+    @pytest.mark.asyncio
+    async def test_handlers(self) -> None:
+        actual = self.sut.handlers
+        assert len(actual) == 1
+
+        handler = actual[0]
+        assert isinstance(handler, TypeHandler)
+        assert handler.type is Update
+
+        await handler.callback(self.telegram_update, self.telegram_context)
+        self.language_service.prefetch_user_language.assert_called_once_with(
+            self.telegram_update, self.telegram_context
+        )
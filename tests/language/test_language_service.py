@@ -1,15 +1,24 @@
+import asyncio
+from typing import Any
 from unittest.mock import MagicMock, patch
 
 import pytest
+from telegram import Update
 
 from pdf_bot.errors import CallbackQueryDataTypeError, UserIdError
-from pdf_bot.language import LanguageData, LanguageRepository, LanguageService
+from pdf_bot.language import (
+    LanguageCacheStats,
+    LanguageData,
+    LanguageRepository,
+    LanguageService,
+)
 from tests.telegram_internal.telegram_test_mixin import TelegramTestMixin
 
 
 class TestLanguageService(TelegramTestMixin):
     LANGUAGE_CODE = "language_code"
     EN_CODE = "en_US"
+    NUM_LANGUAGES = 40
     LANGUAGE_DATA = LanguageData(label="label", long_code=EN_CODE)
 
     def setup_method(self) -> None:
@@ -17,15 +26,42 @@ class TestLanguageService(TelegramTestMixin):
         self.language_repository = MagicMock(spec=LanguageRepository)
         self.language_repository.get_language.return_value = self.EN_CODE
 
-        self.sut = LanguageService(self.language_repository)
-
+        self.translations: dict[str, MagicMock] = {}
         self.gettext_patcher = patch("pdf_bot.language.language_service.gettext")
-        self.gettext_patcher.start()
+        self.gettext = self.gettext_patcher.start()
+        self.gettext.translation.side_effect = self._mock_translation
+
+        self.sut = LanguageService(self.language_repository)
 
     def teardown_method(self) -> None:
         self.gettext_patcher.stop()
         super().teardown_method()
 
+    def test_set_app_language(self) -> None:
+        self.telegram_user_data.get.return_value = self.EN_CODE
+
+        actual = self.sut.set_app_language(self.telegram_update, self.telegram_context)
+        self.sut.set_app_language(self.telegram_update, self.telegram_context)
+
+        assert actual == self._mock_translation(languages=[self.EN_CODE]).gettext
+        assert self.gettext.translation.call_count == self.NUM_LANGUAGES
+
+    def test_set_app_language_unknown_language(self) -> None:
+        self.telegram_user_data.get.return_value = "clearly_invalid"
+
+        actual = self.sut.set_app_language(self.telegram_update, self.telegram_context)
+
+        assert actual == self._mock_translation(languages=["en_GB"]).gettext
+
+    def test_load_translations_not_found(self) -> None:
+        self.gettext.translation.side_effect = FileNotFoundError
+        sut = LanguageService(self.language_repository)
+        self.telegram_user_data.get.return_value = self.EN_CODE
+
+        actual = sut.set_app_language(self.telegram_update, self.telegram_context)
+
+        assert actual == self.gettext.NullTranslations.return_value.gettext
+
     @pytest.mark.parametrize(("value", "expected"), [("es", "es_ES"), ("clearly_invalid", None)])
     def test_get_language_code_from_short_code(self, value: str, expected: str | None) -> None:
         actual = self.sut.get_language_code_from_short_code(value)
@@ -63,6 +99,106 @@ class TestLanguageService(TelegramTestMixin):
             self.LANGUAGE_CODE, self.EN_CODE
         )
 
+    @pytest.mark.asyncio
+    async def test_get_user_language_from_cache(self) -> None:
+        self.telegram_context.user_data = None
+
+        self.sut.get_user_language(self.telegram_update, self.telegram_context)
+        actual = self.sut.get_user_language(self.telegram_update, self.telegram_context)
+
+        assert actual == self.EN_CODE
+        self.language_repository.get_language.assert_called_once_with(self.TELEGRAM_QUERY_USER_ID)
+        assert self.sut.get_cache_stats() == LanguageCacheStats(hits=1, misses=1, size=1)
+        assert self.sut.get_cache_stats().hit_rate == 0.5
+
+    @pytest.mark.asyncio
+    async def test_get_user_language_cache_expired(self) -> None:
+        self.telegram_context.user_data = None
+        sut = LanguageService(self.language_repository, cache_ttl=0)
+
+        sut.get_user_language(self.telegram_update, self.telegram_context)
+        sut.get_user_language(self.telegram_update, self.telegram_context)
+
+        assert self.language_repository.get_language.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_get_user_language_cache_evicted(self) -> None:
+        self.telegram_context.user_data = None
+        sut = LanguageService(self.language_repository, cache_max_size=1)
+        self.language_repository.get_languages.return_value = {self.TELEGRAM_USER_ID: self.EN_CODE}
+
+        sut.get_user_language(self.telegram_update, self.telegram_context)
+        await sut.warm_cache([self.TELEGRAM_USER_ID])
+        sut.get_user_language(self.telegram_update, self.telegram_context)
+
+        assert self.language_repository.get_language.call_count == 2
+        assert sut.get_cache_stats().size == 1
+
+    @pytest.mark.asyncio
+    async def test_clear_cached_language(self) -> None:
+        self.telegram_context.user_data = None
+
+        self.sut.get_user_language(self.telegram_update, self.telegram_context)
+        self.sut.clear_cached_language(self.TELEGRAM_QUERY_USER_ID)
+        self.sut.get_user_language(self.telegram_update, self.telegram_context)
+
+        assert self.language_repository.get_language.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_prefetch_user_language(self) -> None:
+        self.telegram_user_data.get.return_value = None
+        self.language_repository.get_languages.return_value = {
+            self.TELEGRAM_QUERY_USER_ID: self.LANGUAGE_CODE,
+            self.TELEGRAM_USER_ID: self.EN_CODE,
+        }
+        other_update = MagicMock(spec=Update)
+        other_update.callback_query = None
+        other_update.effective_message.from_user.id = self.TELEGRAM_USER_ID
+
+        await asyncio.gather(
+            self.sut.prefetch_user_language(self.telegram_update, self.telegram_context),
+            self.sut.prefetch_user_language(other_update, self.telegram_context),
+        )
+        actual = self.sut.get_user_language(self.telegram_update, self.telegram_context)
+
+        assert actual == self.LANGUAGE_CODE
+        self.language_repository.get_languages.assert_called_once()
+        assert set(self.language_repository.get_languages.call_args.args[0]) == {
+            self.TELEGRAM_QUERY_USER_ID,
+            self.TELEGRAM_USER_ID,
+        }
+        self.language_repository.get_language.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_prefetch_user_language_in_user_data(self) -> None:
+        self.telegram_user_data.get.return_value = self.EN_CODE
+
+        await self.sut.prefetch_user_language(self.telegram_update, self.telegram_context)
+
+        self.language_repository.get_languages.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_prefetch_user_language_without_user_id(self) -> None:
+        self.telegram_user_data.get.return_value = None
+        self.telegram_update.callback_query = None
+        self.telegram_update.effective_message = None
+        self.telegram_update.effective_chat = None
+
+        await self.sut.prefetch_user_language(self.telegram_update, self.telegram_context)
+
+        self.language_repository.get_languages.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_prefetch_user_language_error(self) -> None:
+        self.telegram_user_data.get.return_value = None
+        self.language_repository.get_languages.side_effect = RuntimeError
+
+        await self.sut.prefetch_user_language(self.telegram_update, self.telegram_context)
+        actual = self.sut.get_user_language(self.telegram_update, self.telegram_context)
+
+        assert actual == self.EN_CODE
+        self.language_repository.get_language.assert_called_once_with(self.TELEGRAM_QUERY_USER_ID)
+
     @pytest.mark.asyncio
     async def test_get_user_language_cached(self) -> None:
         self.telegram_user_data.get.return_value = self.EN_CODE
@@ -153,6 +289,11 @@ class TestLanguageService(TelegramTestMixin):
         )
         self.telegram_user_data.__setitem__.assert_not_called()
 
+        # The updated language is cached instead of the stale one
+        actual = self.sut.get_user_language(self.telegram_update, self.telegram_context)
+        assert actual == self.EN_CODE
+        self.language_repository.get_language.assert_not_called()
+
     @pytest.mark.asyncio
     async def test_update_user_language_invalid_callback_query_data(self) -> None:
         self.telegram_callback_query.data = None
@@ -162,3 +303,9 @@ class TestLanguageService(TelegramTestMixin):
 
         self.language_repository.upsert_language.assert_not_called()
         self.telegram_user_data.__setitem__.assert_not_called()
+
+    def _mock_translation(self, *_args: Any, languages: list[str], **_kwargs: Any) -> MagicMock:
+        translation = self.translations.get(languages[0])
+        if translation is None:
+            translation = self.translations[languages[0]] = MagicMock()
+        return translation
@@ -55,4 +55,4 @@ class TestMergeHandler(TelegramServiceTestMixin):
         self.merge_service.ask_first_pdf.assert_called_once()
         self.merge_service.check_pdf.assert_called_once()
         self.merge_service.check_text.assert_called_once()
-        self.telegram_service.cancel_conversation.assert_called_once()
+        self.merge_service.cancel_conversation.assert_called_once()
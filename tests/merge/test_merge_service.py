@@ -1,4 +1,7 @@
-from unittest.mock import MagicMock
+import asyncio
+from collections.abc import Coroutine
+from typing import Any
+from unittest.mock import ANY, MagicMock
 
 import pytest
 from telegram.ext import ConversationHandler
@@ -6,14 +9,16 @@ from telegram.ext import ConversationHandler
 from pdf_bot.analytics import TaskType
 from pdf_bot.merge import MergeService
 from pdf_bot.models import FileData
-from pdf_bot.pdf import PdfService, PdfServiceError
-from pdf_bot.telegram_internal import TelegramServiceError
+from pdf_bot.pdf import PdfMergeSession, PdfReadError, PdfService, PdfServiceError
+from pdf_bot.telegram_internal import TelegramGetUserDataError, TelegramServiceError
 from tests.language import LanguageServiceTestMixin
+from tests.scheduler import SchedulerServiceTestMixin
 from tests.telegram_internal import TelegramServiceTestMixin, TelegramTestMixin
 
 
 class TestMergeService(
     LanguageServiceTestMixin,
+    SchedulerServiceTestMixin,
     TelegramServiceTestMixin,
     TelegramTestMixin,
 ):
@@ -26,21 +31,43 @@ class TestMergeService(
 
     def setup_method(self) -> None:
         super().setup_method()
-        self.file_data_list = MagicMock(spec=list[FileData])
+        self.file_data = FileData(self.TELEGRAM_DOCUMENT_ID, self.TELEGRAM_DOCUMENT_NAME)
+        self.merge_session = MagicMock(spec=PdfMergeSession)
+        self.merge_session.file_data_list = [self.file_data]
+        self.merge_session.remove_last_file.return_value = self.file_data
+        self.merge_session.finish.return_value.__aenter__.return_value = self.file_path
 
         self.pdf_service = MagicMock(spec=PdfService)
+        self.pdf_service.create_merge_session.return_value = self.merge_session
+
         self.language_service = self.mock_language_service()
+        self.scheduler_service = self.mock_scheduler_service()
         self.telegram_service = self.mock_telegram_service()
         self.telegram_service.get_user_data.side_effect = None
+        self.telegram_service.get_user_data.return_value = self.merge_session
 
         self.sut = MergeService(
             self.pdf_service,
             self.telegram_service,
             self.language_service,
+            self.scheduler_service,
         )
 
     @pytest.mark.asyncio
     async def test_ask_first_pdf(self) -> None:
+        previous_session = MagicMock(spec=PdfMergeSession)
+        self.telegram_service.get_user_data.return_value = previous_session
+
+        actual = await self.sut.ask_first_pdf(self.telegram_update, self.telegram_context)
+
+        assert actual == self.WAIT_MERGE_PDF
+        previous_session.close.assert_awaited_once()
+        self._assert_ask_first_pdf()
+
+    @pytest.mark.asyncio
+    async def test_ask_first_pdf_without_session(self) -> None:
+        self.telegram_service.get_user_data.side_effect = TelegramGetUserDataError()
+
         actual = await self.sut.ask_first_pdf(self.telegram_update, self.telegram_context)
 
         assert actual == self.WAIT_MERGE_PDF
@@ -48,16 +75,43 @@ class TestMergeService(
 
     @pytest.mark.asyncio
     async def test_check_pdf(self) -> None:
-        self.telegram_service.get_user_data.return_value = self.file_data_list
+        actual = await self._check_pdf(asyncio.sleep(0))
 
-        actual = await self.sut.check_pdf(self.telegram_update, self.telegram_context)
+        assert actual == self.WAIT_MERGE_PDF
+        self.scheduler_service.schedule.assert_called_once_with(
+            self.telegram_update, self.telegram_context, TaskType.merge_pdf
+        )
+        self.merge_session.add_file.assert_called_once_with(
+            self.file_data, self.scheduler_service.schedule.return_value
+        )
+        self.telegram_service.update_user_data.assert_called_once_with(
+            self.telegram_context, self.MERGE_PDF_DATA, self.merge_session
+        )
+        self.telegram_service.send_file_names.assert_called_once_with(
+            self.TELEGRAM_CHAT_ID, ANY, [self.file_data]
+        )
+
+        # The file is merged in the background, which doesn't reply if it succeeds
+        self.telegram_update.effective_message.reply_text.assert_called_once()
+
+    @pytest.mark.parametrize("error", [PdfReadError(), TelegramServiceError()])
+    @pytest.mark.asyncio
+    async def test_check_pdf_merge_error(self, error: Exception) -> None:
+        actual = await self._check_pdf(self._raise(error))
 
         assert actual == self.WAIT_MERGE_PDF
+        assert self.telegram_update.effective_message.reply_text.call_count == 2
 
-        file_data = self.file_data_list.append.call_args.args[0]
-        assert file_data == FileData(self.TELEGRAM_DOCUMENT_ID, self.TELEGRAM_DOCUMENT_NAME)
+    @pytest.mark.asyncio
+    async def test_check_pdf_merge_unknown_error(self) -> None:
+        with pytest.raises(ValueError):  # noqa: PT011
+            await self._check_pdf(self._raise(ValueError()))
 
-        self.telegram_service.send_file_names.assert_called_once()
+    @pytest.mark.asyncio
+    async def test_check_pdf_merge_cancelled(self) -> None:
+        actual = await self._check_pdf(asyncio.sleep(1), cancel=True)
+
+        assert actual == self.WAIT_MERGE_PDF
         self.telegram_update.effective_message.reply_text.assert_called_once()
 
     @pytest.mark.asyncio
@@ -67,7 +121,7 @@ class TestMergeService(
         actual = await self.sut.check_pdf(self.telegram_update, self.telegram_context)
 
         assert actual == self.WAIT_MERGE_PDF
-        self.telegram_context.user_data.__getitem__.assert_not_called()
+        self.merge_session.add_file.assert_not_called()
         self.telegram_service.send_file_names.assert_not_called()
         self.telegram_update.effective_message.reply_text.assert_called_once()
 
@@ -82,7 +136,7 @@ class TestMergeService(
         self.telegram_service.get_user_data.assert_called_once_with(
             self.telegram_context, self.MERGE_PDF_DATA
         )
-        self.file_data_list.append.assert_not_called()
+        self.merge_session.add_file.assert_not_called()
         self.telegram_service.update_user_data.assert_not_called()
 
         self.telegram_service.send_file_names.assert_not_called()
@@ -91,7 +145,7 @@ class TestMergeService(
     @pytest.mark.asyncio
     async def test_check_text_remove_last(self) -> None:
         self.telegram_message.text = self.REMOVE_LAST_FILE
-        self.telegram_service.get_user_data.return_value = self.file_data_list
+        self.merge_session.file_data_list = []
 
         actual = await self.sut.check_text(self.telegram_update, self.telegram_context)
 
@@ -99,15 +153,14 @@ class TestMergeService(
         self.telegram_service.get_user_data.assert_called_once_with(
             self.telegram_context, self.MERGE_PDF_DATA
         )
-        self.file_data_list.pop.assert_called_once()
+        self.merge_session.remove_last_file.assert_awaited_once()
+        self.merge_session.close.assert_not_called()
         self.telegram_update.effective_message.reply_text.assert_called_once()
         self._assert_ask_first_pdf()
 
     @pytest.mark.asyncio
     async def test_check_text_remove_last_with_existing_file(self) -> None:
         self.telegram_message.text = self.REMOVE_LAST_FILE
-        self.file_data_list.__len__.return_value = 1
-        self.telegram_service.get_user_data.return_value = self.file_data_list
 
         actual = await self.sut.check_text(self.telegram_update, self.telegram_context)
 
@@ -115,35 +168,29 @@ class TestMergeService(
         self.telegram_service.get_user_data.assert_called_once_with(
             self.telegram_context, self.MERGE_PDF_DATA
         )
-        self.file_data_list.pop.assert_called_once()
+        self.merge_session.remove_last_file.assert_awaited_once()
         assert self.telegram_update.effective_message.reply_text.call_count == 2
         self.telegram_service.update_user_data.assert_called_once_with(
-            self.telegram_context, self.MERGE_PDF_DATA, self.file_data_list
+            self.telegram_context, self.MERGE_PDF_DATA, self.merge_session
         )
         self.telegram_service.send_file_names.assert_called_once()
 
     @pytest.mark.asyncio
-    async def test_check_text_remove_last_remove_error(self) -> None:
+    async def test_check_text_remove_last_without_files(self) -> None:
         self.telegram_message.text = self.REMOVE_LAST_FILE
-        self.file_data_list.pop.side_effect = IndexError()
-        self.telegram_service.get_user_data.return_value = self.file_data_list
+        self.merge_session.remove_last_file.return_value = None
 
         actual = await self.sut.check_text(self.telegram_update, self.telegram_context)
 
         assert actual == self.WAIT_MERGE_PDF
-        self.telegram_service.get_user_data.assert_called_once_with(
-            self.telegram_context, self.MERGE_PDF_DATA
-        )
-        self.file_data_list.pop.assert_called_once()
+        self.merge_session.remove_last_file.assert_awaited_once()
         self.telegram_update.effective_message.reply_text.assert_called_once()
         self._assert_ask_first_pdf()
 
     @pytest.mark.asyncio
     async def test_check_text_done_and_merge(self) -> None:
         self.telegram_message.text = self.DONE
-        self.file_data_list.__len__.return_value = 2
-        self.telegram_service.get_user_data.return_value = self.file_data_list
-        self.pdf_service.merge_pdfs.return_value.__aenter__.return_value = self.file_path
+        self.merge_session.file_data_list = [self.file_data, self.file_data]
 
         actual = await self.sut.check_text(self.telegram_update, self.telegram_context)
 
@@ -151,20 +198,25 @@ class TestMergeService(
         self.telegram_service.get_user_data.assert_called_once_with(
             self.telegram_context, self.MERGE_PDF_DATA
         )
-        self.pdf_service.merge_pdfs.assert_called_once_with(self.file_data_list)
+        self.scheduler_service.schedule.assert_called_once_with(
+            self.telegram_update, self.telegram_context, TaskType.merge_pdf
+        )
+        self.merge_session.finish.assert_called_once_with(
+            self.scheduler_service.schedule.return_value
+        )
         self.telegram_service.send_file.assert_called_once_with(
             self.telegram_update,
             self.telegram_context,
             self.file_path,
             TaskType.merge_pdf,
         )
+        self.merge_session.close.assert_awaited_once()
 
     @pytest.mark.asyncio
     async def test_check_text_done_pdf_service_error(self) -> None:
         self.telegram_message.text = self.DONE
-        self.file_data_list.__len__.return_value = 2
-        self.telegram_service.get_user_data.return_value = self.file_data_list
-        self.pdf_service.merge_pdfs.side_effect = PdfServiceError()
+        self.merge_session.file_data_list = [self.file_data, self.file_data]
+        self.merge_session.finish.side_effect = PdfServiceError()
 
         actual = await self.sut.check_text(self.telegram_update, self.telegram_context)
 
@@ -172,14 +224,13 @@ class TestMergeService(
         self.telegram_service.get_user_data.assert_called_once_with(
             self.telegram_context, self.MERGE_PDF_DATA
         )
-        self.pdf_service.merge_pdfs.assert_called_once_with(self.file_data_list)
+        self.merge_session.finish.assert_called_once()
         self.telegram_service.send_file.assert_not_called()
+        self.merge_session.close.assert_awaited_once()
 
     @pytest.mark.asyncio
     async def test_check_text_done_with_one_file_only(self) -> None:
         self.telegram_message.text = self.DONE
-        self.file_data_list.__len__.return_value = 1
-        self.telegram_service.get_user_data.return_value = self.file_data_list
 
         actual = await self.sut.check_text(self.telegram_update, self.telegram_context)
 
@@ -187,14 +238,16 @@ class TestMergeService(
         self.telegram_service.get_user_data.assert_called_once_with(
             self.telegram_context, self.MERGE_PDF_DATA
         )
-        self.pdf_service.merge_pdfs.assert_not_called()
+        self.telegram_service.update_user_data.assert_called_once_with(
+            self.telegram_context, self.MERGE_PDF_DATA, self.merge_session
+        )
+        self.merge_session.finish.assert_not_called()
         self.telegram_service.send_file.assert_not_called()
 
     @pytest.mark.asyncio
     async def test_check_text_done_without_files(self) -> None:
         self.telegram_message.text = self.DONE
-        self.file_data_list.__len__.return_value = 0
-        self.telegram_service.get_user_data.return_value = self.file_data_list
+        self.merge_session.file_data_list = []
 
         actual = await self.sut.check_text(self.telegram_update, self.telegram_context)
 
@@ -202,22 +255,75 @@ class TestMergeService(
         self.telegram_service.get_user_data.assert_called_once_with(
             self.telegram_context, self.MERGE_PDF_DATA
         )
-        self.pdf_service.merge_pdfs.assert_not_called()
+        self.merge_session.finish.assert_not_called()
         self.telegram_service.send_file.assert_not_called()
         self._assert_ask_first_pdf()
 
     @pytest.mark.asyncio
     async def test_check_text_cancel(self) -> None:
         self.telegram_message.text = self.CANCEL
-        self.telegram_service.cancel_conversation.return_value = ConversationHandler.END
 
         actual = await self.sut.check_text(self.telegram_update, self.telegram_context)
 
+        assert actual == ConversationHandler.END
+        self.merge_session.close.assert_awaited_once()
+        self.telegram_service.cancel_conversation.assert_called_once_with(
+            self.telegram_update, self.telegram_context
+        )
+
+    @pytest.mark.asyncio
+    async def test_cancel_conversation_without_session(self) -> None:
+        self.telegram_service.get_user_data.side_effect = TelegramGetUserDataError()
+
+        actual = await self.sut.cancel_conversation(self.telegram_update, self.telegram_context)
+
         assert actual == ConversationHandler.END
         self.telegram_service.cancel_conversation.assert_called_once_with(
             self.telegram_update, self.telegram_context
         )
 
+    @pytest.mark.asyncio
+    async def test_session_expiry(self) -> None:
+        self.sut.session_ttl = 0
+        await self._ask_first_pdf_without_session()
+
+        await asyncio.sleep(0.01)
+
+        self.telegram_service.get_user_data.assert_called_with(
+            self.telegram_context, self.MERGE_PDF_DATA
+        )
+        create_task = self.telegram_context.application.create_task
+        create_task.assert_called_once()
+        await create_task.call_args.args[0]
+        self.merge_session.close.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_session_expiry_with_other_session(self) -> None:
+        self.sut.session_ttl = 0
+        await self._ask_first_pdf_without_session()
+        other_session = MagicMock(spec=PdfMergeSession)
+        self.telegram_service.get_user_data.return_value = other_session
+
+        await asyncio.sleep(0.01)
+
+        self.telegram_service.update_user_data.assert_called_with(
+            self.telegram_context, self.MERGE_PDF_DATA, other_session
+        )
+        self.telegram_context.application.create_task.assert_not_called()
+        self.merge_session.close.assert_not_called()
+        other_session.close.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_session_expiry_after_close(self) -> None:
+        self.sut.session_ttl = 0
+        await self._ask_first_pdf_without_session()
+
+        await self.sut.cancel_conversation(self.telegram_update, self.telegram_context)
+        await asyncio.sleep(0.01)
+
+        self.merge_session.close.assert_awaited_once()
+        self.telegram_context.application.create_task.assert_not_called()
+
     @pytest.mark.asyncio
     async def test_check_text_unknown_text(self) -> None:
         self.telegram_message.text = "clearly_unknown"
@@ -238,8 +344,31 @@ class TestMergeService(
         )
         self.telegram_update.effective_message.reply_text.assert_called_once()
 
+    async def _ask_first_pdf_without_session(self) -> None:
+        self.telegram_service.get_user_data.side_effect = TelegramGetUserDataError()
+        await self.sut.ask_first_pdf(self.telegram_update, self.telegram_context)
+        self.telegram_service.get_user_data.side_effect = None
+
+    async def _check_pdf(self, merge: Coroutine[Any, Any, None], cancel: bool = False) -> int:
+        task = asyncio.create_task(merge)
+        if cancel:
+            task.cancel()
+        self.merge_session.add_file.return_value = task
+
+        actual = await self.sut.check_pdf(self.telegram_update, self.telegram_context)
+
+        # Run the background task that reports the result of merging the file
+        create_task = self.telegram_context.application.create_task
+        create_task.assert_called_once_with(ANY, update=self.telegram_update)
+        await create_task.call_args.args[0]
+        return actual
+
+    @staticmethod
+    async def _raise(error: Exception) -> None:
+        raise error
+
     def _assert_ask_first_pdf(self) -> None:
         self.telegram_service.update_user_data.assert_called_once_with(
-            self.telegram_context, self.MERGE_PDF_DATA, []
+            self.telegram_context, self.MERGE_PDF_DATA, self.merge_session
         )
         self.telegram_service.reply_with_cancel_markup.assert_called_once()
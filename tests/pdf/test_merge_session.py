@@ -0,0 +1,226 @@
+import asyncio
+from collections.abc import AsyncGenerator, Callable
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Any
+from unittest.mock import MagicMock
+
+import pikepdf
+import pytest
+
+from pdf_bot.executor import PoolType
+from pdf_bot.io_internal import IOService
+from pdf_bot.models import FileData
+from pdf_bot.pdf import PdfMergeSession, PdfReadError, PdfServiceError
+from tests.executor import ExecutorServiceTestMixin
+from tests.telegram_internal import TelegramServiceTestMixin, TelegramTestMixin
+
+
+class TestPdfMergeSession(
+    ExecutorServiceTestMixin,
+    TelegramServiceTestMixin,
+    TelegramTestMixin,
+):
+    @pytest.fixture(autouse=True)
+    def setup_paths(self, tmp_path: Path) -> None:
+        self.tmp_path = tmp_path
+        self.out_path = tmp_path / "out.pdf"
+
+        # Downloads and appends of the files are held until their events are set
+        self.download_events: dict[str, asyncio.Event] = {}
+        self.append_events: dict[str, asyncio.Event] = {}
+
+        self.io_service = MagicMock(spec=IOService)
+        self.io_service.create_temp_pdf_file.return_value.__enter__.return_value = self.out_path
+        self.temp_dir = tmp_path / "merge"
+        self.temp_dir.mkdir()
+        self.io_service.create_temp_directory.return_value.__enter__.return_value = self.temp_dir
+
+        self.telegram_service = self.mock_telegram_service()
+        self.telegram_service.download_pdf_file.side_effect = self._download_pdf_file
+        self.executor_service = self.mock_executor_service()
+        self.executor_service.run.side_effect = self._run
+
+        self.sut = PdfMergeSession(self.io_service, self.telegram_service, self.executor_service)
+
+    @pytest.mark.asyncio
+    async def test_finish(self) -> None:
+        file_data_list = [self._write_pdf(f"in_{i}.pdf", num_pages=i + 1) for i in range(3)]
+
+        tasks = [self.sut.add_file(x) for x in file_data_list]
+        await asyncio.gather(*tasks)
+
+        assert self.sut.file_data_list == file_data_list
+        async with self.sut.finish() as actual:
+            assert actual == self.out_path
+            assert self._read_page_texts() == [
+                b"in_0.pdf 0",
+                b"in_1.pdf 0",
+                b"in_1.pdf 1",
+                b"in_2.pdf 0",
+                b"in_2.pdf 1",
+                b"in_2.pdf 2",
+            ]
+
+        await self.sut.close()
+        self.io_service.create_temp_pdf_file.return_value.__exit__.assert_called_once()
+        self.io_service.create_temp_directory.return_value.__exit__.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_finish_keeps_order_of_files(self) -> None:
+        file_data_list = [self._write_pdf(f"in_{i}.pdf", num_pages=1) for i in range(2)]
+        self.download_events[file_data_list[0].id] = asyncio.Event()
+
+        tasks = [self.sut.add_file(x) for x in file_data_list]
+        await asyncio.sleep(0)
+        self.download_events[file_data_list[0].id].set()
+
+        async with self.sut.finish():
+            assert self._read_page_texts() == [b"in_0.pdf 0", b"in_1.pdf 0"]
+        assert all(x.done() for x in tasks)
+
+    @pytest.mark.asyncio
+    async def test_finish_with_jobs(self) -> None:
+        file_data = self._write_pdf("in.pdf", num_pages=1)
+        events: list[str] = []
+
+        @asynccontextmanager
+        async def job(name: str) -> AsyncGenerator[None, None]:
+            events.append(f"start {name}")
+            yield
+            events.append(f"end {name}")
+
+        await self.sut.add_file(file_data, job("append"))
+        assert events == ["start append", "end append"]
+
+        async with self.sut.finish(job("finish")) as actual:
+            assert events[-1] == "start finish"
+            assert self.out_path.stat().st_size > 0
+            assert actual == self.out_path
+        assert events == ["start append", "end append", "start finish", "end finish"]
+
+    @pytest.mark.asyncio
+    async def test_add_file_invalid(self) -> None:
+        file_data = self._write_pdf("in.pdf", num_pages=1)
+        invalid_path = self.tmp_path / "invalid.pdf"
+        invalid_path.write_bytes(b"invalid")
+        invalid_data = FileData(invalid_path.name, invalid_path.name)
+
+        await self.sut.add_file(file_data)
+        with pytest.raises(PdfReadError):
+            await self.sut.add_file(invalid_data)
+
+        assert self.sut.file_data_list == [file_data]
+        async with self.sut.finish():
+            assert self._read_page_texts() == [b"in.pdf 0"]
+
+    @pytest.mark.asyncio
+    async def test_remove_last_file(self) -> None:
+        file_data_list = [self._write_pdf(f"in_{i}.pdf", num_pages=1) for i in range(3)]
+
+        await self.sut.add_file(file_data_list[0])
+        await self.sut.add_file(file_data_list[1])
+        actual = await self.sut.remove_last_file()
+        await self.sut.add_file(file_data_list[2])
+
+        assert actual == file_data_list[1]
+        assert self.sut.file_data_list == [file_data_list[0], file_data_list[2]]
+        async with self.sut.finish():
+            assert self._read_page_texts() == [b"in_0.pdf 0", b"in_2.pdf 0"]
+
+    @pytest.mark.asyncio
+    async def test_remove_last_file_while_downloading(self) -> None:
+        file_data_list = [self._write_pdf(f"in_{i}.pdf", num_pages=1) for i in range(2)]
+        self.download_events[file_data_list[1].id] = asyncio.Event()
+
+        await self.sut.add_file(file_data_list[0])
+        task = self.sut.add_file(file_data_list[1])
+        await asyncio.sleep(0)
+        actual = await self.sut.remove_last_file()
+
+        assert actual == file_data_list[1]
+        assert task.cancelled()
+        async with self.sut.finish():
+            assert self._read_page_texts() == [b"in_0.pdf 0"]
+
+    @pytest.mark.asyncio
+    async def test_remove_last_file_before_next_file(self) -> None:
+        file_data_list = [self._write_pdf(f"in_{i}.pdf", num_pages=1) for i in range(3)]
+        self.append_events[file_data_list[1].id] = asyncio.Event()
+
+        await self.sut.add_file(file_data_list[0])
+        self.sut.add_file(file_data_list[1])
+        await self._wait_for_tasks()
+        remove_task = asyncio.create_task(self.sut.remove_last_file())
+        await self._wait_for_tasks()
+
+        # The file is added while the file to be removed is still being appended
+        self.sut.add_file(file_data_list[2])
+        await self._wait_for_tasks()
+        self.append_events[file_data_list[1].id].set()
+        actual = await remove_task
+
+        assert actual == file_data_list[1]
+        async with self.sut.finish():
+            assert self._read_page_texts() == [b"in_0.pdf 0", b"in_2.pdf 0"]
+
+    @pytest.mark.asyncio
+    async def test_remove_last_file_without_files(self) -> None:
+        actual = await self.sut.remove_last_file()
+        assert actual is None
+
+    @pytest.mark.asyncio
+    async def test_finish_without_valid_files(self) -> None:
+        invalid_path = self.tmp_path / "invalid.pdf"
+        invalid_path.write_bytes(b"invalid")
+        self.sut.add_file(FileData(invalid_path.name, invalid_path.name))
+
+        with pytest.raises(PdfServiceError):
+            async with self.sut.finish():
+                pass
+
+    @pytest.mark.asyncio
+    async def test_close(self) -> None:
+        file_data = self._write_pdf("in.pdf", num_pages=1)
+        self.download_events[file_data.id] = asyncio.Event()
+
+        task = self.sut.add_file(file_data)
+        await asyncio.sleep(0)
+        await self.sut.close()
+
+        assert task.cancelled()
+        assert self.sut.file_data_list == []
+        self.io_service.create_temp_pdf_file.return_value.__exit__.assert_called_once()
+        self.io_service.create_temp_directory.return_value.__exit__.assert_called_once()
+
+    async def _run(self, _pool_type: PoolType, func: Callable, *args: Any) -> Any:
+        if args and isinstance(args[0], Path) and args[0].name in self.append_events:
+            await self.append_events[args[0].name].wait()
+        return func(*args)
+
+    @staticmethod
+    async def _wait_for_tasks() -> None:
+        for _ in range(10):
+            await asyncio.sleep(0)
+
+    @asynccontextmanager
+    async def _download_pdf_file(self, file_id: str) -> AsyncGenerator[Path, None]:
+        event = self.download_events.get(file_id)
+        if event is not None:
+            await event.wait()
+        yield self.tmp_path / file_id
+
+    def _write_pdf(self, name: str, num_pages: int) -> FileData:
+        with pikepdf.Pdf.new() as pdf:
+            for i in range(num_pages):
+                page = pdf.add_blank_page()
+                page.obj.Contents = pdf.make_stream(f"({name} {i}) Tj".encode())
+            pdf.save(self.tmp_path / name)
+        return FileData(name, name)
+
+    def _read_page_texts(self) -> list[bytes]:
+        with pikepdf.Pdf.open(self.out_path) as pdf:
+            return [
+                x.obj.Contents.read_bytes().removeprefix(b"(").removesuffix(b") Tj")
+                for x in pdf.pages
+            ]
@@ -0,0 +1,23 @@
+from unittest.mock import MagicMock
+
+import pytest
+from ocrmypdf import OcrOptions
+from ocrmypdf.exceptions import PriorOcrFoundError
+from ocrmypdf.pdfinfo import PdfInfo
+
+from pdf_bot.pdf import ocr_plugin
+
+
+class TestOcrPlugin:
+    def setup_method(self) -> None:
+        self.pdf_info = MagicMock(spec=PdfInfo)
+        self.options = MagicMock(spec=OcrOptions)
+
+    def test_validate(self) -> None:
+        self.pdf_info.pages = [MagicMock(has_text=True), MagicMock(has_text=False)]
+        ocr_plugin.validate(self.pdf_info, self.options)
+
+    def test_validate_all_pages_have_text(self) -> None:
+        self.pdf_info.pages = [MagicMock(has_text=True), MagicMock(has_text=True)]
+        with pytest.raises(PriorOcrFoundError):
+            ocr_plugin.validate(self.pdf_info, self.options)
@@ -0,0 +1,258 @@
+from pathlib import Path
+
+import pikepdf
+import pytest
+
+from pdf_bot.pdf.pdf_merger import PdfMerger
+
+
+class TestPdfMerger:
+    FONT_DATA = b"font" * 100
+
+    @pytest.fixture(autouse=True)
+    def setup_paths(self, tmp_path: Path) -> None:
+        self.tmp_path = tmp_path
+        self.out_path = tmp_path / "out.pdf"
+        self.temp_dir = tmp_path / "merge"
+        self.temp_dir.mkdir()
+
+    def test_append(self) -> None:
+        file_paths = [self._write_pdf(f"in_{i}.pdf", num_pages=i + 1) for i in range(3)]
+
+        sut = PdfMerger(self.temp_dir)
+        actual = [sut.append(x) for x in file_paths]
+        sut.save(self.out_path)
+
+        assert actual == [1, 2, 3]
+        assert sut.num_pages == 6
+        assert self._read_page_texts() == [
+            b"in_0.pdf 0",
+            b"in_1.pdf 0",
+            b"in_1.pdf 1",
+            b"in_2.pdf 0",
+            b"in_2.pdf 1",
+            b"in_2.pdf 2",
+        ]
+
+    def test_append_in_chunks(self) -> None:
+        file_paths = [self._write_pdf(f"in_{i}.pdf", num_pages=1) for i in range(5)]
+
+        sut = PdfMerger(self.temp_dir, chunk_size=2)
+        for file_path in file_paths:
+            sut.append(file_path)
+
+        # The five files and the two chunks of two files
+        assert len(list(self.temp_dir.iterdir())) == 7
+
+        sut.save(self.out_path)
+        assert self._read_page_texts() == [f"in_{i}.pdf 0".encode() for i in range(5)]
+
+    def test_append_keeps_file(self) -> None:
+        file_path = self._write_pdf("in.pdf", num_pages=1)
+
+        sut = PdfMerger(self.temp_dir)
+        sut.append(file_path)
+        file_path.unlink()
+        sut.save(self.out_path)
+
+        assert self._read_page_texts() == [b"in.pdf 0"]
+
+    def test_append_copies_shared_objects_once(self) -> None:
+        file_path = self._write_pdf("in.pdf", num_pages=2)
+
+        sut = PdfMerger(self.temp_dir)
+        sut.append(file_path)
+        sut.save(self.out_path)
+
+        with pikepdf.Pdf.open(self.out_path) as pdf:
+            fonts = {x.obj.Resources.Font.F1.FontDescriptor.FontFile2.objgen for x in pdf.pages}
+            assert len(fonts) == 1
+
+    def test_append_copies_inherited_attributes(self) -> None:
+        file_path = self._write_pdf("in.pdf", num_pages=1, inherit_media_box=True)
+
+        sut = PdfMerger(self.temp_dir)
+        sut.append(file_path)
+        sut.save(self.out_path)
+
+        with pikepdf.Pdf.open(self.out_path) as pdf:
+            assert list(pdf.pages[0].obj.MediaBox) == [0, 0, 100, 200]
+
+    def test_append_invalid_file(self) -> None:
+        file_path = self._write_pdf("in.pdf", num_pages=1)
+        invalid_path = self.tmp_path / "invalid.pdf"
+        invalid_path.write_bytes(b"invalid")
+
+        sut = PdfMerger(self.temp_dir)
+        sut.append(file_path)
+        with pytest.raises(pikepdf.PdfError):
+            sut.append(invalid_path)
+        sut.save(self.out_path)
+
+        assert sut.num_pages == 1
+        assert len(list(self.temp_dir.iterdir())) == 1
+        assert self._read_page_texts() == [b"in.pdf 0"]
+
+    def test_remove_last(self) -> None:
+        file_paths = [self._write_pdf(f"in_{i}.pdf", num_pages=2) for i in range(3)]
+
+        sut = PdfMerger(self.temp_dir)
+        sut.append(file_paths[0])
+        sut.append(file_paths[1])
+        actual = sut.remove_last()
+        sut.append(file_paths[2])
+        sut.save(self.out_path)
+
+        assert actual == 2
+        assert self._read_page_texts() == [
+            b"in_0.pdf 0",
+            b"in_0.pdf 1",
+            b"in_2.pdf 0",
+            b"in_2.pdf 1",
+        ]
+
+    def test_remove_last_chunked_file(self) -> None:
+        file_paths = [self._write_pdf(f"in_{i}.pdf", num_pages=1) for i in range(3)]
+
+        sut = PdfMerger(self.temp_dir, chunk_size=2)
+        sut.append(file_paths[0])
+        sut.append(file_paths[1])
+        sut.remove_last()
+
+        # The chunk and the removed file are deleted
+        assert len(list(self.temp_dir.iterdir())) == 1
+
+        sut.append(file_paths[2])
+        sut.save(self.out_path)
+        assert self._read_page_texts() == [b"in_0.pdf 0", b"in_2.pdf 0"]
+
+    def test_append_merges_document_structures(self) -> None:
+        file_paths = [self._write_pdf(f"in_{i}.pdf", num_pages=2) for i in range(3)]
+        for file_path in file_paths:
+            self._add_document_structures(file_path)
+
+        sut = PdfMerger(self.temp_dir, chunk_size=2)
+        for file_path in file_paths:
+            sut.append(file_path)
+        sut.save(self.out_path)
+
+        with pikepdf.Pdf.open(self.out_path) as pdf:
+            assert pdf.check_pdf_syntax() == []
+            page_objgens = [x.obj.objgen for x in pdf.pages]
+
+            with pdf.open_outline() as outline:
+                titles = [(x.title, [y.title for y in x.children]) for x in outline.root]
+                pages = [
+                    page_objgens.index(x.destination[0].objgen)  # type: ignore[index]
+                    for x in outline.root
+                ]
+            assert titles == [("Start", ["End"])] * 3
+            assert pages == [0, 2, 4]
+
+            # The names used by several files are renamed
+            links = [x.obj.Annots[0] for x in pdf.pages[::2]]
+            dests = pikepdf.NameTree(pdf.Root.Names.Dests)
+            assert [page_objgens.index(dests[str(x.Dest)].D[0].objgen) for x in links] == [1, 3, 5]
+
+            fields = pdf.Root.AcroForm.Fields
+            assert [str(x.T) for x in fields] == ["name", "name+1", "name+2"]
+            assert [page_objgens.index(x.P.objgen) for x in fields] == [0, 2, 4]
+            assert pdf.Root.AcroForm.NeedAppearances
+
+    def test_remove_last_document_structures(self) -> None:
+        file_paths = [self._write_pdf(f"in_{i}.pdf", num_pages=2) for i in range(2)]
+        self._add_document_structures(file_paths[1])
+
+        sut = PdfMerger(self.temp_dir)
+        sut.append(file_paths[0])
+        sut.append(file_paths[1])
+        sut.remove_last()
+        sut.save(self.out_path)
+
+        with pikepdf.Pdf.open(self.out_path) as pdf:
+            assert {"/Outlines", "/Names", "/AcroForm"}.isdisjoint(pdf.Root.keys())
+
+    def test_save_without_files(self) -> None:
+        sut = PdfMerger(self.temp_dir)
+        sut.save(self.out_path)
+
+        with pikepdf.Pdf.open(self.out_path) as pdf:
+            assert len(pdf.pages) == 0
+
+    def _write_pdf(self, name: str, num_pages: int, inherit_media_box: bool = False) -> Path:
+        # The pages share a font, and each page has its own text
+        path = self.tmp_path / name
+        with pikepdf.Pdf.new() as pdf:
+            font = pdf.make_indirect(
+                pikepdf.Dictionary(
+                    Type=pikepdf.Name.Font,
+                    Subtype=pikepdf.Name.TrueType,
+                    BaseFont=pikepdf.Name.Test,
+                    FontDescriptor=pikepdf.Dictionary(
+                        Type=pikepdf.Name.FontDescriptor,
+                        FontName=pikepdf.Name.Test,
+                        FontFile2=pdf.make_stream(self.FONT_DATA),
+                    ),
+                )
+            )
+
+            for i in range(num_pages):
+                page = pdf.add_blank_page()
+                page.obj.Resources = pikepdf.Dictionary(Font=pikepdf.Dictionary(F1=font))
+                page.obj.Contents = pdf.make_stream(f"BT /F1 12 Tf ({name} {i}) Tj ET".encode())
+                if inherit_media_box:
+                    del page.obj.MediaBox
+
+            if inherit_media_box:
+                pdf.Root.Pages.MediaBox = pikepdf.Array([0, 0, 100, 200])
+            pdf.save(path)
+        return path
+
+    @staticmethod
+    def _add_document_structures(path: Path) -> None:
+        # An outline, named destinations and a form field that refer to the pages
+        with pikepdf.Pdf.open(path, allow_overwriting_input=True) as pdf:
+            first, last = pdf.pages[0].obj, pdf.pages[-1].obj
+            with pdf.open_outline() as outline:
+                item = pikepdf.OutlineItem("Start", 0)
+                item.children.append(pikepdf.OutlineItem("End", len(pdf.pages) - 1))
+                outline.root.append(item)
+
+            # The outline item refers to the page by a named destination that no page
+            # refers to
+            pdf.Root.Outlines.First.Dest = pikepdf.Name.start
+            pdf.Root.Dests = pikepdf.Dictionary(start=pikepdf.Array([first, pikepdf.Name.Fit]))
+            dests = pikepdf.NameTree.new(pdf)
+            dests["end"] = pikepdf.Array([last, pikepdf.Name.Fit])
+            pdf.Root.Names = pikepdf.Dictionary(Dests=dests.obj)
+
+            link = pdf.make_indirect(
+                pikepdf.Dictionary(
+                    Type=pikepdf.Name.Annot,
+                    Subtype=pikepdf.Name.Link,
+                    Rect=pikepdf.Array([0, 0, 10, 10]),
+                    Dest=pikepdf.String("end"),
+                )
+            )
+            widget = pdf.make_indirect(
+                pikepdf.Dictionary(
+                    Type=pikepdf.Name.Annot,
+                    Subtype=pikepdf.Name.Widget,
+                    FT=pikepdf.Name.Tx,
+                    T=pikepdf.String("name"),
+                    Rect=pikepdf.Array([0, 0, 100, 20]),
+                    P=first,
+                )
+            )
+            first.Annots = pikepdf.Array([link, widget])
+            pdf.Root.AcroForm = pikepdf.Dictionary(
+                Fields=pikepdf.Array([widget]), NeedAppearances=True
+            )
+            pdf.save(path)
+
+    def _read_page_texts(self) -> list[bytes]:
+        with pikepdf.Pdf.open(self.out_path) as pdf:
+            return [
+                x.obj.Contents.read_bytes().removeprefix(b"BT /F1 12 Tf (").removesuffix(b") Tj ET")
+                for x in pdf.pages
+            ]
@@ -1,6 +1,11 @@
+import asyncio
+import pickle
+import zlib
+from pathlib import Path
 from typing import Any
 from unittest.mock import MagicMock, call, patch
 
+import pikepdf
 import pytest
 from img2pdf import Rotation
 from ocrmypdf.exceptions import EncryptedPdfError, PriorOcrFoundError, TaggedPDFError
@@ -11,17 +16,22 @@ from pypdf.pagerange import PageRange
 from weasyprint import CSS, HTML
 from weasyprint.text.fonts import FontConfiguration
 
-from pdf_bot.cli import CLIService, CLIServiceError
+from pdf_bot.cli import CLIService, CLIServiceError, CompressProfile
+from pdf_bot.executor import PoolType
+from pdf_bot.font_cache import FontCacheService
 from pdf_bot.io_internal.io_service import IOService
 from pdf_bot.models import FileData
 from pdf_bot.pdf import (
-    CompressResult,
+    CompressEstimate,
     FontData,
+    ImageFormat,
+    OcrProfile,
     PdfDecryptError,
     PdfReadError,
     PdfService,
     ScaleByData,
     ScaleToData,
+    pdf_service,
 )
 from pdf_bot.pdf.exceptions import (
     PdfEncryptedError,
@@ -30,21 +40,30 @@ from pdf_bot.pdf.exceptions import (
     PdfNoTextError,
     PdfServiceError,
 )
+from tests.executor import ExecutorServiceTestMixin
 from tests.language import LanguageServiceTestMixin
 from tests.telegram_internal import TelegramServiceTestMixin, TelegramTestMixin
 
 
 class TestPDFService(
+    ExecutorServiceTestMixin,
     LanguageServiceTestMixin,
     TelegramServiceTestMixin,
     TelegramTestMixin,
 ):
     PASSWORD = "password"
+    GRAYSCALE_DPI = 150
+    CHUNK_SIZE = 2
+    CPU_COUNT = 4
+    OCR_JOBS = 3
+    OCR_TESSERACT_TIMEOUT = 30
+    FONT_PATH = Path("/fonts/font.ttf")
 
     def setup_method(self) -> None:
         super().setup_method()
         self.cli_service = MagicMock(spec=CLIService)
         self.telegram_service = self.mock_telegram_service()
+        self.executor_service = self.mock_executor_service()
 
         self.io_service = MagicMock(spec=IOService)
         self.io_service.create_temp_directory.return_value.__enter__.return_value = self.dir_path
@@ -52,10 +71,22 @@ class TestPDFService(
         self.io_service.create_temp_png_file.return_value.__enter__.return_value = self.file_path
         self.io_service.create_temp_txt_file.return_value.__enter__.return_value = self.file_path
 
+        self.font_cache_service = MagicMock(spec=FontCacheService)
+        self.estimate = CompressEstimate(
+            num_images=1, image_bytes=60, stream_bytes=70, estimated_saving=30
+        )
+        self.font_cache_service.get.return_value.__aenter__.return_value = self.FONT_PATH
+
         self.sut = PdfService(
             self.cli_service,
             self.io_service,
             self.telegram_service,
+            self.executor_service,
+            self.font_cache_service,
+            grayscale_dpi=self.GRAYSCALE_DPI,
+            rasterise_chunk_size=self.CHUNK_SIZE,
+            ocr_jobs=self.OCR_JOBS,
+            ocr_tesseract_timeout=self.OCR_TESSERACT_TIMEOUT,
         )
 
         self.ocrmypdf_patcher = patch("pdf_bot.pdf.pdf_service.ocrmypdf")
@@ -71,6 +102,7 @@ class TestPDFService(
         self.pdf_writer_cls = self.pdf_writer_patcher.start()
 
     def teardown_method(self) -> None:
+        pdf_service._get_text_stylesheets.cache_clear()  # noqa: SLF001
         self.ocrmypdf_patcher.stop()
         self.extract_text_patcher.stop()
         self.textwrap_patcher.stop()
@@ -131,31 +163,67 @@ class TestPDFService(
 
     @pytest.mark.asyncio
     async def test_grayscale_pdf(self) -> None:
-        image_paths = "image_paths"
+        num_pages = self.CHUNK_SIZE + 1
+        image_paths = [["image_1", "image_2"], ["image_3"]]
         image_bytes = "image_bytes"
-        buffered_writer = self.mock_path_open(self.file_path)
+        chunk_path = self.dir_path.__truediv__.return_value
+        buffered_writer = self.mock_path_open(chunk_path)
 
         with (
             patch("pdf_bot.pdf.pdf_service.pdf2image") as pdf2image,
             patch("pdf_bot.pdf.pdf_service.img2pdf") as img2pdf,
+            patch("pdf_bot.pdf.pdf_service.pikepdf") as pikepdf,
+            patch("pdf_bot.pdf.pdf_service.os.cpu_count", return_value=self.CPU_COUNT),
+            patch("pdf_bot.pdf.pdf_service.Path.unlink") as unlink,
         ):
-            pdf2image.convert_from_path.return_value = image_paths
+            pdf2image.pdfinfo_from_path.return_value = {"Pages": num_pages}
+            pdf2image.convert_from_path.side_effect = image_paths
             img2pdf.convert.return_value = image_bytes
+            out_pdf = pikepdf.Pdf.new.return_value.__enter__.return_value
 
             async with self.sut.grayscale_pdf(self.TELEGRAM_FILE_ID) as actual:
                 assert actual == self.file_path
                 self._assert_telegram_and_io_services("Grayscale")
                 self.io_service.create_temp_directory.assert_called_once()
-                pdf2image.convert_from_path.assert_called_once_with(
-                    self.download_path,
-                    output_folder=self.dir_path,
-                    fmt="png",
-                    grayscale=True,
-                    paths_only=True,
+                pdf2image.pdfinfo_from_path.assert_called_once_with(str(self.download_path))
+                pdf2image.convert_from_path.assert_has_calls(
+                    [
+                        call(
+                            self.download_path,
+                            output_folder=self.dir_path,
+                            first_page=first_page,
+                            last_page=last_page,
+                            thread_count=last_page - first_page + 1,
+                            paths_only=True,
+                            dpi=self.GRAYSCALE_DPI,
+                            fmt="png",
+                            grayscale=True,
+                        )
+                        for first_page, last_page in [
+                            (1, self.CHUNK_SIZE),
+                            (num_pages, num_pages),
+                        ]
+                    ]
+                )
+                img2pdf.convert.assert_has_calls(
+                    [call(x, rotation=Rotation.ifvalid) for x in image_paths]
+                )
+                buffered_writer.write.assert_called_with(image_bytes)
+                assert unlink.call_count == num_pages
+
+                chunk_names = [x.args[0] for x in self.dir_path.__truediv__.call_args_list]
+                assert chunk_names == ["chunk_1.pdf", f"chunk_{num_pages}.pdf"]
+                assert pikepdf.Pdf.open.call_args_list == [call(chunk_path), call(chunk_path)]
+                assert out_pdf.pages.extend.call_count == len(image_paths)
+                out_pdf.save.assert_called_once_with(self.file_path)
+                self._assert_pool_types(
+                    PoolType.thread,
+                    PoolType.thread,
+                    PoolType.thread,
+                    PoolType.process,
+                    PoolType.process,
+                    PoolType.thread,
                 )
-                img2pdf.convert.assert_called_once_with(image_paths, rotation=Rotation.ifvalid)
-                self.file_path.open.assert_called_once_with("wb")
-                buffered_writer.write.assert_called_once_with(image_bytes)
 
     @pytest.mark.asyncio
     async def test_compare_pdfs(self) -> None:
@@ -169,38 +237,246 @@ class TestPDFService(
                     files=[self.download_path, self.download_path],
                     out_file=self.file_path,
                 )
+                self._assert_pool_types(PoolType.process)
 
     @pytest.mark.asyncio
     async def test_compress_pdf(self) -> None:
-        old_size = 20
-        new_size = 10
+        lossless_path, gs_paths = self._mock_compress_paths(
+            old_size=100, lossless_size=80, gs_sizes=[50, 60, 70]
+        )
+
+        with patch(
+            "pdf_bot.pdf.pdf_service._compress_pdf_losslessly", return_value=self.estimate
+        ) as compress_losslessly:
+            async with self.sut.compress_pdf(self.TELEGRAM_FILE_ID) as actual:
+                assert actual.old_size == 100
+                assert actual.new_size == 50
+                assert actual.out_path == gs_paths[0]
+                assert actual.stage_times.keys() == {
+                    "lossless",
+                    "ghostscript_ebook",
+                    "ghostscript_printer",
+                    "ghostscript_default",
+                }
+
+                compress_losslessly.assert_called_once_with(self.download_path, lossless_path)
+                self.cli_service.compress_pdf.assert_has_calls(
+                    [
+                        call(lossless_path, path, profile=profile)
+                        for path, profile in zip(gs_paths, CompressProfile, strict=True)
+                    ],
+                    any_order=True,
+                )
+                self.telegram_service.download_pdf_file.assert_called_once_with(
+                    self.TELEGRAM_FILE_ID
+                )
+
+    @pytest.mark.asyncio
+    async def test_compress_pdf_lossless_smallest(self) -> None:
+        lossless_path, _gs_paths = self._mock_compress_paths(
+            old_size=100, lossless_size=80, gs_sizes=[90, 90, 90]
+        )
 
-        download_stat = self.mock_path_stat(self.download_path)
-        download_stat.st_size = old_size
+        with patch("pdf_bot.pdf.pdf_service._compress_pdf_losslessly", return_value=self.estimate):
+            async with self.sut.compress_pdf(self.TELEGRAM_FILE_ID) as actual:
+                assert actual.new_size == 80
+                assert actual.out_path == lossless_path
 
-        file_stat = self.mock_path_stat(self.file_path)
-        file_stat.st_size = new_size
+    @pytest.mark.asyncio
+    async def test_compress_pdf_skips_ghostscript(self) -> None:
+        lossless_path, _gs_paths = self._mock_compress_paths(old_size=100, lossless_size=80)
+        self.estimate.estimated_saving = 1
 
-        async with self.sut.compress_pdf(self.TELEGRAM_FILE_ID) as compress_result:
-            assert compress_result == CompressResult(old_size, new_size, self.file_path)
-            self.cli_service.compress_pdf.assert_called_once_with(
-                self.download_path, self.file_path
-            )
-            self._assert_telegram_and_io_services("Compressed")
+        with patch("pdf_bot.pdf.pdf_service._compress_pdf_losslessly", return_value=self.estimate):
+            async with self.sut.compress_pdf(self.TELEGRAM_FILE_ID) as actual:
+                assert actual.new_size == 80
+                assert actual.out_path == lossless_path
+                assert actual.stage_times.keys() == {"lossless"}
+                self.cli_service.compress_pdf.assert_not_called()
 
     @pytest.mark.asyncio
-    async def test_convert_to_images(self) -> None:
-        with patch("pdf_bot.pdf.pdf_service.pdf2image") as pdf2image:
-            async with self.sut.convert_pdf_to_images(self.TELEGRAM_FILE_ID) as actual:
-                assert actual == self.dir_path
+    async def test_compress_pdf_not_smaller(self) -> None:
+        self._mock_compress_paths(old_size=100, lossless_size=100, gs_sizes=[110, 120, 130])
+
+        with (
+            patch("pdf_bot.pdf.pdf_service._compress_pdf_losslessly", return_value=self.estimate),
+            pytest.raises(PdfServiceError),
+        ):
+            async with self.sut.compress_pdf(self.TELEGRAM_FILE_ID):
+                pass
+
+    @pytest.mark.asyncio
+    async def test_compress_pdf_lossless_error(self) -> None:
+        _lossless_path, gs_paths = self._mock_compress_paths(old_size=100, gs_sizes=[50, 60, 70])
+
+        with patch(
+            "pdf_bot.pdf.pdf_service._compress_pdf_losslessly", side_effect=pikepdf.PdfError
+        ):
+            async with self.sut.compress_pdf(self.TELEGRAM_FILE_ID) as actual:
+                assert actual.new_size == 50
+                assert actual.out_path == gs_paths[0]
+                self.cli_service.compress_pdf.assert_any_call(
+                    self.download_path, gs_paths[0], profile=CompressProfile.ebook
+                )
+
+    @pytest.mark.asyncio
+    async def test_compress_pdf_lossless_error_not_smaller(self) -> None:
+        _lossless_path, gs_paths = self._mock_compress_paths(old_size=100, gs_sizes=[0, 110, 0])
+
+        async def compress_pdf(_input_path: Path, out_path: Path, **_kwargs: Any) -> None:
+            if out_path != gs_paths[1]:
+                raise CLIServiceError
+
+        self.cli_service.compress_pdf.side_effect = compress_pdf
+
+        with (
+            patch("pdf_bot.pdf.pdf_service._compress_pdf_losslessly", side_effect=pikepdf.PdfError),
+            pytest.raises(PdfServiceError),
+        ):
+            async with self.sut.compress_pdf(self.TELEGRAM_FILE_ID):
+                pass
+
+    @pytest.mark.asyncio
+    async def test_compress_pdf_cli_error(self) -> None:
+        _lossless_path, gs_paths = self._mock_compress_paths(
+            old_size=100, lossless_size=80, gs_sizes=[50, 60, 70]
+        )
+
+        async def compress_pdf(_input_path: Path, out_path: Path, **_kwargs: Any) -> None:
+            if out_path != gs_paths[1]:
+                raise CLIServiceError
+
+        self.cli_service.compress_pdf.side_effect = compress_pdf
+
+        with patch("pdf_bot.pdf.pdf_service._compress_pdf_losslessly", return_value=self.estimate):
+            async with self.sut.compress_pdf(self.TELEGRAM_FILE_ID) as actual:
+                assert actual.new_size == 60
+                assert actual.out_path == gs_paths[1]
+                assert actual.stage_times.keys() == {"lossless", "ghostscript_printer"}
+
+    @pytest.mark.asyncio
+    async def test_compress_pdf_ghostscript_time_limit(self) -> None:
+        sut = PdfService(
+            self.cli_service,
+            self.io_service,
+            self.telegram_service,
+            self.executor_service,
+            self.font_cache_service,
+            compress_time_limit=0.01,
+        )
+        lossless_path, _gs_paths = self._mock_compress_paths(
+            old_size=100, lossless_size=80, gs_sizes=[50, 60, 70]
+        )
+        cancelled: list[Path] = []
+
+        async def compress_pdf(_input_path: Path, out_path: Path, **_kwargs: Any) -> None:
+            try:
+                await asyncio.sleep(1)
+            except asyncio.CancelledError:
+                cancelled.append(out_path)
+                raise
+
+        self.cli_service.compress_pdf.side_effect = compress_pdf
+
+        with patch("pdf_bot.pdf.pdf_service._compress_pdf_losslessly", return_value=self.estimate):
+            async with sut.compress_pdf(self.TELEGRAM_FILE_ID) as actual:
+                assert actual.out_path == lossless_path
+                assert len(cancelled) == len(CompressProfile)
+
+    @pytest.mark.asyncio
+    async def test_compress_pdf_lossless_and_cli_error(self) -> None:
+        self._mock_compress_paths(old_size=100)
+        self.cli_service.compress_pdf.side_effect = CLIServiceError()
+
+        with (
+            patch("pdf_bot.pdf.pdf_service._compress_pdf_losslessly", side_effect=pikepdf.PdfError),
+            pytest.raises(PdfServiceError),
+        ):
+            async with self.sut.compress_pdf(self.TELEGRAM_FILE_ID):
+                pass
+
+    def test_compress_pdf_losslessly(self, tmp_path: Path) -> None:
+        file_path = tmp_path / "in.pdf"
+        out_path = tmp_path / "out.pdf"
+        image_data = zlib.compress(bytes(range(256)) * 10)
+
+        self._write_image_pdf(file_path, image_data, num_pages=2)
+
+        actual = pdf_service._compress_pdf_losslessly(file_path, out_path)  # noqa: SLF001
+
+        assert actual.num_images == 1
+        assert actual.image_bytes == len(image_data)
+        assert actual.stream_bytes > actual.image_bytes
+        assert 0 < actual.estimated_saving < actual.image_bytes
+        with pikepdf.Pdf.open(out_path) as pdf:
+            images = {x.obj.Resources.XObject.Im0.objgen for x in pdf.pages}
+            assert len(images) == 1
+
+    @pytest.mark.parametrize(
+        ("image_format", "fmt", "extension"),
+        [
+            (ImageFormat.png, "png", "png"),
+            (ImageFormat.jpeg, "jpeg", "jpg"),
+            (ImageFormat.webp, "ppm", "webp"),
+        ],
+    )
+    @pytest.mark.asyncio
+    async def test_convert_pdf_to_images(
+        self, image_format: ImageFormat, fmt: str, extension: str
+    ) -> None:
+        dpi = 300
+        num_pages = self.CHUNK_SIZE + 1
+        image_paths = [["image_1", "image_2"], ["image_3"]]
+
+        with (
+            patch("pdf_bot.pdf.pdf_service.pdf2image") as pdf2image,
+            patch("pdf_bot.pdf.pdf_service.ZipArchiver") as zip_archiver_cls,
+            patch("pdf_bot.pdf.pdf_service.Image") as image_cls,
+            patch("pdf_bot.pdf.pdf_service.os.cpu_count", return_value=self.CPU_COUNT),
+            patch("pdf_bot.pdf.pdf_service.Path.unlink") as unlink,
+        ):
+            pdf2image.pdfinfo_from_path.return_value = {"Pages": num_pages}
+            pdf2image.convert_from_path.side_effect = image_paths
+            archiver = zip_archiver_cls.return_value.__aenter__.return_value
+            archiver.finish.return_value = [self.file_path]
+
+            async with self.sut.convert_pdf_to_images(
+                self.TELEGRAM_FILE_ID, image_format, dpi
+            ) as actual:
+                assert actual == [self.file_path]
                 self.telegram_service.download_pdf_file.assert_called_once_with(
                     self.TELEGRAM_FILE_ID
                 )
-                self.io_service.create_temp_directory.assert_called_once_with("PDF_images")
-                pdf2image.convert_from_path.assert_called_once_with(
-                    self.download_path, output_folder=self.dir_path, fmt="png"
+                zip_archiver_cls.assert_called_once_with("PDF_images")
+                pdf2image.convert_from_path.assert_has_calls(
+                    [
+                        call(
+                            self.download_path,
+                            output_folder=self.dir_path,
+                            first_page=first_page,
+                            last_page=last_page,
+                            thread_count=last_page - first_page + 1,
+                            paths_only=True,
+                            dpi=dpi,
+                            fmt=fmt,
+                        )
+                        for first_page, last_page in [
+                            (1, self.CHUNK_SIZE),
+                            (num_pages, num_pages),
+                        ]
+                    ]
                 )
 
+                names = [x.args[1] for x in archiver.add.call_args_list]
+                assert names == [f"page_{x}.{extension}" for x in range(1, num_pages + 1)]
+                assert all(x.kwargs == {"delete": True} for x in archiver.add.call_args_list)
+                assert unlink.call_count == (num_pages if image_format == ImageFormat.webp else 0)
+
+                if image_format == ImageFormat.webp:
+                    assert image_cls.open.call_count == num_pages
+                else:
+                    image_cls.open.assert_not_called()
+
     @pytest.mark.parametrize("has_font_data", [True, False])
     @pytest.mark.asyncio
     async def test_create_pdf_from_text(self, has_font_data: bool) -> None:
@@ -231,11 +507,12 @@ class TestPDFService(
                 )
 
                 if font_data is not None:
+                    self.font_cache_service.get.assert_called_once_with(font_data.font_url)
                     css_cls.assert_called_once_with(
                         string=(
                             "@font-face {"
                             f"font-family: {font_data.font_family};"
-                            f"src: url({font_data.font_url});"
+                            f"src: url({self.FONT_PATH.as_uri()});"
                             "}"
                             "p {"
                             f"font-family: {font_data.font_family};"
@@ -244,7 +521,39 @@ class TestPDFService(
                         font_config=font_config,
                     )
                 else:
+                    self.font_cache_service.get.assert_not_called()
                     css_cls.assert_not_called()
+            self._assert_pool_types(PoolType.process)
+
+    @pytest.mark.asyncio
+    async def test_create_pdf_from_text_font_not_cached(self) -> None:
+        font_data = FontData("family", "url")
+        self.font_cache_service.get.return_value.__aenter__.return_value = None
+
+        with (
+            patch("pdf_bot.pdf.pdf_service.HTML"),
+            patch("pdf_bot.pdf.pdf_service.CSS") as css_cls,
+            patch("pdf_bot.pdf.pdf_service.FontConfiguration"),
+        ):
+            async with self.sut.create_pdf_from_text(self.TELEGRAM_TEXT, font_data):
+                assert f"src: url({font_data.font_url});" in css_cls.call_args.kwargs["string"]
+
+    @pytest.mark.asyncio
+    async def test_create_pdf_from_text_reuses_stylesheets(self) -> None:
+        font_data = FontData("family", "url")
+
+        with (
+            patch("pdf_bot.pdf.pdf_service.HTML") as html_cls,
+            patch("pdf_bot.pdf.pdf_service.CSS") as css_cls,
+            patch("pdf_bot.pdf.pdf_service.FontConfiguration") as font_config_cls,
+        ):
+            for _ in range(2):
+                async with self.sut.create_pdf_from_text(self.TELEGRAM_TEXT, font_data):
+                    pass
+
+            css_cls.assert_called_once()
+            font_config_cls.assert_called_once()
+            assert html_cls.return_value.write_pdf.call_count == 2
 
     @pytest.mark.asyncio
     async def test_crop_pdf_by_percentage(self) -> None:
@@ -257,6 +566,7 @@ class TestPDFService(
                     ["-p", str(percent), "-o", str(self.file_path), str(self.download_path)]
                 )
                 self._assert_telegram_and_io_services("Cropped")
+                self._assert_pool_types(PoolType.process)
 
     @pytest.mark.asyncio
     async def test_crop_pdf_by_margin_size(self) -> None:
@@ -303,9 +613,9 @@ class TestPDFService(
             async with self.sut.decrypt_pdf(self.TELEGRAM_FILE_ID, self.PASSWORD):
                 pass
 
-        self.telegram_service.download_pdf_file.assert_called_once_with(self.TELEGRAM_FILE_ID)
+        self._assert_telegram_and_io_services("Decrypted")
         reader.decrypt.assert_not_called()
-        self.io_service.create_temp_pdf_file.assert_not_called()
+        self.pdf_writer_cls.return_value.write.assert_not_called()
 
     @pytest.mark.asyncio
     async def test_decrypt_pdf_incorrect_password(self) -> None:
@@ -362,8 +672,12 @@ class TestPDFService(
             async with self.sut.encrypt_pdf(self.TELEGRAM_FILE_ID, self.PASSWORD):
                 pass
 
-        self.telegram_service.download_pdf_file.assert_called_once_with(self.TELEGRAM_FILE_ID)
-        self.io_service.create_temp_pdf_file.assert_not_called()
+        self._assert_telegram_and_io_services("Encrypted")
+        self.pdf_writer_cls.return_value.write.assert_not_called()
+
+    def test_encrypted_error_pickle(self) -> None:
+        actual = pickle.loads(pickle.dumps(PdfEncryptedError()))  # noqa: S301
+        assert actual.args == PdfEncryptedError().args
 
     @pytest.mark.asyncio
     async def test_extract_pdf_text(self) -> None:
@@ -372,6 +686,7 @@ class TestPDFService(
             self.telegram_service.download_pdf_file.assert_called_once_with(self.TELEGRAM_FILE_ID)
             self.io_service.create_temp_txt_file.assert_called_once_with("PDF_text")
             self.extract_text.assert_called_once_with(self.download_path)
+            self._assert_pool_types(PoolType.process)
 
     @pytest.mark.asyncio
     async def test_extract_pdf_text_error(self) -> None:
@@ -445,42 +760,91 @@ class TestPDFService(
     @pytest.mark.parametrize("num_files", [0, 1, 2, 5])
     async def test_merge_pdfs(self, num_files: int) -> None:
         file_data_list, file_ids, file_paths = self._get_file_data_list(num_files)
-        writer = MagicMock(spec=PdfWriter)
-        self.pdf_writer_cls.return_value = writer
         self.telegram_service.download_files.return_value.__aenter__.return_value = file_paths
 
-        async with self.sut.merge_pdfs(file_data_list):
-            self.telegram_service.download_files.assert_called_once_with(file_ids)
-            calls = [call(x) for x in file_paths]
-            writer.append.assert_has_calls(calls)
-            self.io_service.create_temp_pdf_file.assert_called_once_with("Merged")
-            writer.write.assert_called_once()
+        with patch("pdf_bot.pdf.pdf_service._merge_pdfs") as merge_pdfs:
+            async with self.sut.merge_pdfs(file_data_list) as actual:
+                assert actual == self.file_path
+                self.telegram_service.download_files.assert_called_once_with(file_ids)
+                self.io_service.create_temp_directory.assert_called_once_with("Merge")
+                self.io_service.create_temp_pdf_file.assert_called_once_with("Merged")
+                merge_pdfs.assert_called_once_with(file_paths, self.file_path, self.dir_path)
+                self._assert_pool_types(PoolType.process)
 
     @pytest.mark.asyncio
-    @pytest.mark.parametrize("exception", [PyPdfReadError(), ValueError()])
-    async def test_merge_pdfs_read_error(self, exception: Exception) -> None:
-        file_data_list, file_ids, file_paths = self._get_file_data_list(2)
-        writer = MagicMock(spec=PdfWriter)
-        writer.append.side_effect = exception
-        self.pdf_writer_cls.return_value = writer
+    async def test_merge_pdfs_read_error(self) -> None:
+        file_data_list, _file_ids, file_paths = self._get_file_data_list(2)
         self.telegram_service.download_files.return_value.__aenter__.return_value = file_paths
 
-        with pytest.raises(PdfReadError):
+        with (
+            patch(
+                "pdf_bot.pdf.pdf_service._merge_pdfs",
+                side_effect=pdf_service._MergePdfInputError(1),  # noqa: SLF001
+            ),
+            pytest.raises(PdfReadError, match=file_data_list[1].name),
+        ):
             async with self.sut.merge_pdfs(file_data_list):
                 pass
 
-        self.telegram_service.download_files.assert_called_once_with(file_ids)
-        self.io_service.create_temp_pdf_file.assert_not_called()
-        writer.write.assert_not_called()
+    def test_merge_pdfs_with_merger(self, tmp_path: Path) -> None:
+        file_paths = [tmp_path / f"in_{i}.pdf" for i in range(2)]
+        out_path = tmp_path / "out.pdf"
+
+        with patch("pdf_bot.pdf.pdf_service.PdfMerger") as merger_cls:
+            pdf_service._merge_pdfs(file_paths, out_path, tmp_path)  # noqa: SLF001
+
+            merger_cls.assert_called_once_with(tmp_path)
+            merger = merger_cls.return_value
+            merger.append.assert_has_calls([call(x) for x in file_paths])
+            merger.save.assert_called_once_with(out_path)
+
+    def test_merge_pdfs_with_merger_invalid_file(self, tmp_path: Path) -> None:
+        file_paths = [tmp_path / f"in_{i}.pdf" for i in range(3)]
+
+        with patch("pdf_bot.pdf.pdf_service.PdfMerger") as merger_cls:
+            merger_cls.return_value.append.side_effect = [1, 1, pikepdf.PdfError]
+            with pytest.raises(pdf_service._MergePdfInputError) as exc_info:  # noqa: SLF001
+                pdf_service._merge_pdfs(file_paths, tmp_path / "out.pdf", tmp_path)  # noqa: SLF001
+
+        assert exc_info.value.index == 2
 
     @pytest.mark.asyncio
     async def test_ocr_pdf(self) -> None:
-        async with self.sut.ocr_pdf(self.TELEGRAM_FILE_ID) as actual:
-            assert actual == self.file_path
-            self._assert_telegram_and_io_services("OCR")
-            self.ocrmypdf.ocr.assert_called_once_with(
-                self.download_path, self.file_path, progress_bar=False
-            )
+        with patch("pdf_bot.pdf.pdf_service.pikepdf") as pikepdf:
+            pikepdf.Pdf.open.return_value.__enter__.return_value.pages = [MagicMock()] * 2
+
+            async with self.sut.ocr_pdf(self.TELEGRAM_FILE_ID) as actual:
+                assert actual == self.file_path
+                self._assert_telegram_and_io_services("OCR")
+                self.ocrmypdf.ocr.assert_called_once_with(
+                    self.download_path,
+                    self.file_path,
+                    progress_bar=False,
+                    jobs=self.OCR_JOBS,
+                    skip_text=True,
+                    plugins=["pdf_bot.pdf.ocr_plugin"],
+                )
+                pikepdf.Pdf.open.assert_called_once_with(self.file_path)
+                self._assert_pool_types(PoolType.process)
+
+    @pytest.mark.asyncio
+    async def test_ocr_pdf_fast_profile(self) -> None:
+        self.sut.ocr_profile = OcrProfile.fast
+
+        with patch("pdf_bot.pdf.pdf_service.pikepdf"):
+            async with self.sut.ocr_pdf(self.TELEGRAM_FILE_ID) as actual:
+                assert actual == self.file_path
+                self.ocrmypdf.ocr.assert_called_once_with(
+                    self.download_path,
+                    self.file_path,
+                    progress_bar=False,
+                    jobs=self.OCR_JOBS,
+                    skip_text=True,
+                    plugins=["pdf_bot.pdf.ocr_plugin"],
+                    optimize=0,
+                    output_type="pdf",
+                    tesseract_timeout=self.OCR_TESSERACT_TIMEOUT,
+                )
 
     @pytest.mark.asyncio
     @pytest.mark.parametrize(
@@ -499,9 +863,7 @@ class TestPDFService(
                 pass
 
         self._assert_telegram_and_io_services("OCR")
-        self.ocrmypdf.ocr.assert_called_once_with(
-            self.download_path, self.file_path, progress_bar=False
-        )
+        self.ocrmypdf.ocr.assert_called_once()
 
     @pytest.mark.asyncio
     async def test_preview_pdf(self) -> None:
@@ -567,6 +929,7 @@ class TestPDFService(
         async with self.sut.rotate_pdf(self.TELEGRAM_FILE_ID, degree) as actual:
             assert actual == self.file_path
             self._assert_telegram_and_io_services("Rotated")
+            self._assert_pool_types(PoolType.process)
 
             for page in pages:
                 page.rotate.assert_called_once_with(degree)
@@ -694,11 +1057,57 @@ class TestPDFService(
 
         return file_data_list, file_ids, file_paths
 
+    def _assert_pool_types(self, *pool_types: PoolType) -> None:
+        actual = [x.args[0] for x in self.executor_service.run.call_args_list]
+        assert actual == list(pool_types)
+
+    def _mock_compress_paths(
+        self, old_size: int, lossless_size: int = 0, gs_sizes: list[int] | None = None
+    ) -> tuple[MagicMock, list[MagicMock]]:
+        self.mock_path_stat(self.download_path).st_size = old_size
+        lossless_path = self.mock_file_path()
+        self.mock_path_stat(lossless_path).st_size = lossless_size
+
+        gs_paths = []
+        for size in gs_sizes or [0] * len(CompressProfile):
+            gs_path = self.mock_file_path()
+            self.mock_path_stat(gs_path).st_size = size
+            gs_paths.append(gs_path)
+
+        self.io_service.create_temp_pdf_file.return_value.__enter__.side_effect = [
+            lossless_path,
+            *gs_paths,
+        ]
+        return lossless_path, gs_paths
+
+    @staticmethod
+    def _write_image_pdf(file_path: Path, image_data: bytes, num_pages: int) -> None:
+        # Each page embeds its own copy of the same image
+        with pikepdf.Pdf.new() as pdf:
+            for _ in range(num_pages):
+                page = pdf.add_blank_page()
+                image = pikepdf.Stream(
+                    pdf,
+                    image_data,
+                    Type=pikepdf.Name.XObject,
+                    Subtype=pikepdf.Name.Image,
+                    Width=16,
+                    Height=160,
+                    BitsPerComponent=8,
+                    ColorSpace=pikepdf.Name.DeviceGray,
+                    Filter=pikepdf.Name.FlateDecode,
+                )
+                page.obj.Resources = pikepdf.Dictionary(
+                    XObject=pikepdf.Dictionary(Im0=pdf.make_indirect(image))
+                )
+                page.obj.Contents = pdf.make_stream(b"q 16 0 0 160 0 0 cm /Im0 Do Q")
+            pdf.save(file_path)
+
     def _assert_telegram_and_io_services(self, temp_pdf_file_prefix: str) -> None:
         self.telegram_service.download_pdf_file.assert_called_once_with(self.TELEGRAM_FILE_ID)
         self.io_service.create_temp_pdf_file.assert_called_once_with(temp_pdf_file_prefix)
 
     def _assert_decrypt_failure(self, reader: MagicMock) -> None:
-        self.telegram_service.download_pdf_file.assert_called_once_with(self.TELEGRAM_FILE_ID)
+        self._assert_telegram_and_io_services("Decrypted")
         reader.decrypt.assert_called_once_with(self.PASSWORD)
-        self.io_service.create_temp_pdf_file.assert_not_called()
+        self.pdf_writer_cls.return_value.write.assert_not_called()
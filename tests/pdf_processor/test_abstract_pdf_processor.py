@@ -11,6 +11,8 @@ from pdf_bot.models import FileData, FileTaskResult, TaskData
 from pdf_bot.pdf import PdfService, PdfServiceError
 from pdf_bot.pdf_processor import AbstractPdfProcessor
 from tests.language import LanguageServiceTestMixin
+from tests.result_cache import ResultCacheServiceTestMixin
+from tests.scheduler import SchedulerServiceTestMixin
 from tests.telegram_internal import TelegramServiceTestMixin
 
 
@@ -32,11 +34,18 @@ class MockProcessor(AbstractPdfProcessor):
         yield MagicMock(spec=FileTaskResult)
 
 
-class TestAbstractPdfProcessor(LanguageServiceTestMixin, TelegramServiceTestMixin):
+class TestAbstractPdfProcessor(
+    LanguageServiceTestMixin,
+    TelegramServiceTestMixin,
+    ResultCacheServiceTestMixin,
+    SchedulerServiceTestMixin,
+):
     def setup_method(self) -> None:
         super().setup_method()
         self.pdf_service = MagicMock(spec=PdfService)
         self.language_service = self.mock_language_service()
+        self.result_cache_service = self.mock_result_cache_service()
+        self.scheduler_service = self.mock_scheduler_service()
         self.telegram_service = self.mock_telegram_service()
 
         self.pdf_processors_patcher = patch(
@@ -58,7 +67,13 @@ class TestAbstractPdfProcessor(LanguageServiceTestMixin, TelegramServiceTestMixi
         processors: dict = {}
         self.pdf_processors.__contains__.side_effect = processors.__contains__
 
-        proc = MockProcessor(self.pdf_service, self.telegram_service, self.language_service)
+        proc = MockProcessor(
+            self.pdf_service,
+            self.telegram_service,
+            self.language_service,
+            self.result_cache_service,
+            self.scheduler_service,
+        )
 
         self.pdf_processors.__setitem__.assert_called_once_with(proc.__class__.__name__, proc)
 
@@ -67,7 +82,13 @@ class TestAbstractPdfProcessor(LanguageServiceTestMixin, TelegramServiceTestMixi
         self.pdf_processors.__contains__.side_effect = processors.__contains__
 
         with pytest.raises(DuplicateClassError):
-            MockProcessor(self.pdf_service, self.telegram_service, self.language_service)
+            MockProcessor(
+                self.pdf_service,
+                self.telegram_service,
+                self.language_service,
+                self.result_cache_service,
+                self.scheduler_service,
+            )
 
         self.pdf_processors.__setitem__.assert_not_called()
 
@@ -86,6 +107,8 @@ class TestAbstractPdfProcessor(LanguageServiceTestMixin, TelegramServiceTestMixi
             self.pdf_service,
             self.telegram_service,
             self.language_service,
+            self.result_cache_service,
+            self.scheduler_service,
             bypass_init_check=True,
         )
         assert processor.generic_error_types == {PdfServiceError}
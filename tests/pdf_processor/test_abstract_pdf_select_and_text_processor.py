@@ -17,9 +17,13 @@ from pdf_bot.pdf_processor import (
     SelectOption,
     SelectOptionData,
 )
+from pdf_bot.result_cache import ResultCacheService
+from pdf_bot.scheduler import SchedulerService
 from pdf_bot.telegram_internal import TelegramService
 from tests.language import LanguageServiceTestMixin
 from tests.path_test_mixin import PathTestMixin
+from tests.result_cache import ResultCacheServiceTestMixin
+from tests.scheduler import SchedulerServiceTestMixin
 from tests.telegram_internal import TelegramServiceTestMixin, TelegramTestMixin
 
 
@@ -35,14 +39,23 @@ class OptionType(SelectOption):
 class MockProcessor(PathTestMixin, AbstractPdfSelectAndTextProcessor):
     CLEANED_TEXT = "cleaned_text"
 
-    def __init__(
+    def __init__(  # noqa: PLR0913, PLR0917
         self,
         pdf_service: PdfService,
         telegram_service: TelegramService,
         language_service: LanguageService,
+        result_cache_service: ResultCacheService,
+        scheduler_service: SchedulerService,
         bypass_init_check: bool = False,
     ) -> None:
-        super().__init__(pdf_service, telegram_service, language_service, bypass_init_check)
+        super().__init__(
+            pdf_service,
+            telegram_service,
+            language_service,
+            result_cache_service,
+            scheduler_service,
+            bypass_init_check,
+        )
         path = self.mock_file_path()
         self.file_task_result = FileTaskResult(path)
 
@@ -82,6 +95,8 @@ class TestAbstractPdfTextInputProcessor(
     LanguageServiceTestMixin,
     TelegramServiceTestMixin,
     TelegramTestMixin,
+    ResultCacheServiceTestMixin,
+    SchedulerServiceTestMixin,
 ):
     WAIT_SELECT_OPTION = "wait_select_option"
     WAIT_TEXT_INPUT = "wait_text_input"
@@ -104,12 +119,16 @@ class TestAbstractPdfTextInputProcessor(
 
         self.pdf_service = MagicMock(spec=PdfService)
         self.language_service = self.mock_language_service()
+        self.result_cache_service = self.mock_result_cache_service()
+        self.scheduler_service = self.mock_scheduler_service()
         self.telegram_service = self.mock_telegram_service()
 
         self.sut = MockProcessor(
             self.pdf_service,
             self.telegram_service,
             self.language_service,
+            self.result_cache_service,
+            self.scheduler_service,
             bypass_init_check=True,
         )
 
@@ -9,6 +9,8 @@ from pdf_bot.pdf import PdfService
 from pdf_bot.pdf.models import CompressResult
 from pdf_bot.pdf_processor import CompressPdfData, CompressPdfProcessor
 from tests.language import LanguageServiceTestMixin
+from tests.result_cache import ResultCacheServiceTestMixin
+from tests.scheduler import SchedulerServiceTestMixin
 from tests.telegram_internal import TelegramServiceTestMixin, TelegramTestMixin
 
 
@@ -16,17 +18,23 @@ class TestCompressPdfProcessor(
     LanguageServiceTestMixin,
     TelegramServiceTestMixin,
     TelegramTestMixin,
+    ResultCacheServiceTestMixin,
+    SchedulerServiceTestMixin,
 ):
     def setup_method(self) -> None:
         super().setup_method()
         self.pdf_service = MagicMock(spec=PdfService)
         self.language_service = self.mock_language_service()
+        self.result_cache_service = self.mock_result_cache_service()
+        self.scheduler_service = self.mock_scheduler_service()
         self.telegram_service = self.mock_telegram_service()
 
         self.sut = CompressPdfProcessor(
             self.pdf_service,
             self.telegram_service,
             self.language_service,
+            self.result_cache_service,
+            self.scheduler_service,
             bypass_init_check=True,
         )
 
@@ -52,4 +60,9 @@ class TestCompressPdfProcessor(
         async with self.sut.process_file_task(self.FILE_DATA) as actual:
             assert actual.path == self.file_path
             assert actual.message is not None
+            assert actual.message.params == {
+                "percent": "50%",
+                "old_size": result.readable_old_size,
+                "new_size": result.readable_new_size,
+            }
             self.pdf_service.compress_pdf.assert_called_once_with(self.FILE_DATA.id)
@@ -8,6 +8,8 @@ from pdf_bot.models import FileData, TaskData
 from pdf_bot.pdf import PdfIncorrectPasswordError, PdfService
 from pdf_bot.pdf_processor import DecryptPdfData, DecryptPdfProcessor
 from tests.language import LanguageServiceTestMixin
+from tests.result_cache import ResultCacheServiceTestMixin
+from tests.scheduler import SchedulerServiceTestMixin
 from tests.telegram_internal import TelegramServiceTestMixin, TelegramTestMixin
 
 
@@ -15,6 +17,8 @@ class TestDecryptPdfProcessor(
     LanguageServiceTestMixin,
     TelegramServiceTestMixin,
     TelegramTestMixin,
+    ResultCacheServiceTestMixin,
+    SchedulerServiceTestMixin,
 ):
     WAIT_TEXT_INPUT = "wait_text_input"
 
@@ -22,12 +26,16 @@ class TestDecryptPdfProcessor(
         super().setup_method()
         self.pdf_service = MagicMock(spec=PdfService)
         self.language_service = self.mock_language_service()
+        self.result_cache_service = self.mock_result_cache_service()
+        self.scheduler_service = self.mock_scheduler_service()
         self.telegram_service = self.mock_telegram_service()
 
         self.sut = DecryptPdfProcessor(
             self.pdf_service,
             self.telegram_service,
             self.language_service,
+            self.result_cache_service,
+            self.scheduler_service,
             bypass_init_check=True,
         )
 
@@ -47,6 +55,9 @@ class TestDecryptPdfProcessor(
         actual = self.sut.get_cleaned_text_input(self.TELEGRAM_TEXT)
         assert actual == self.TELEGRAM_TEXT
 
+    def test_cache_results(self) -> None:
+        assert self.sut.cache_results is False
+
     @pytest.mark.asyncio
     async def test_get_custom_error_handlers(self) -> None:
         file_data = FileData(self.TELEGRAM_DOCUMENT_ID, self.TELEGRAM_DOCUMENT_NAME)
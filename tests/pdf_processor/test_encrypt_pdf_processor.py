@@ -8,6 +8,8 @@ from pdf_bot.models import TaskData
 from pdf_bot.pdf import PdfService
 from pdf_bot.pdf_processor import EncryptPdfData, EncryptPdfProcessor
 from tests.language import LanguageServiceTestMixin
+from tests.result_cache import ResultCacheServiceTestMixin
+from tests.scheduler import SchedulerServiceTestMixin
 from tests.telegram_internal import TelegramServiceTestMixin, TelegramTestMixin
 
 
@@ -15,17 +17,23 @@ class TestEncryptPdfProcessor(
     LanguageServiceTestMixin,
     TelegramServiceTestMixin,
     TelegramTestMixin,
+    ResultCacheServiceTestMixin,
+    SchedulerServiceTestMixin,
 ):
     def setup_method(self) -> None:
         super().setup_method()
         self.pdf_service = MagicMock(spec=PdfService)
         self.language_service = self.mock_language_service()
+        self.result_cache_service = self.mock_result_cache_service()
+        self.scheduler_service = self.mock_scheduler_service()
         self.telegram_service = self.mock_telegram_service()
 
         self.sut = EncryptPdfProcessor(
             self.pdf_service,
             self.telegram_service,
             self.language_service,
+            self.result_cache_service,
+            self.scheduler_service,
             bypass_init_check=True,
         )
 
@@ -45,6 +53,9 @@ class TestEncryptPdfProcessor(
         actual = self.sut.get_cleaned_text_input(self.TELEGRAM_TEXT)
         assert actual == self.TELEGRAM_TEXT
 
+    def test_cache_results(self) -> None:
+        assert self.sut.cache_results is False
+
     @pytest.mark.asyncio
     async def test_process_file_task(self) -> None:
         self.pdf_service.encrypt_pdf.return_value.__aenter__.return_value = self.file_path
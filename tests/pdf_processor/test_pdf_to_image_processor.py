@@ -1,31 +1,51 @@
+from typing import TYPE_CHECKING
 from unittest.mock import MagicMock
 
 import pytest
-from telegram.ext import CallbackQueryHandler
+from telegram import InlineKeyboardMarkup
+from telegram.ext import CallbackQueryHandler, CommandHandler, ConversationHandler
 
 from pdf_bot.analytics import TaskType
-from pdf_bot.models import TaskData
-from pdf_bot.pdf import PdfService
-from pdf_bot.pdf_processor import PdfToImageData, PdfToImageProcessor
+from pdf_bot.errors import CallbackQueryDataTypeError, FileDataTypeError
+from pdf_bot.file_processor import AbstractFileTaskProcessor
+from pdf_bot.models import BackData, FileTaskResult, TaskData
+from pdf_bot.pdf import ImageFormat, PdfService
+from pdf_bot.pdf_processor import PdfToImageData, PdfToImageOptionData, PdfToImageProcessor
 from tests.language import LanguageServiceTestMixin
+from tests.result_cache import ResultCacheServiceTestMixin
+from tests.scheduler import SchedulerServiceTestMixin
 from tests.telegram_internal import TelegramServiceTestMixin, TelegramTestMixin
 
+if TYPE_CHECKING:
+    from pathlib import Path
+
 
 class TestPdfToImageProcessor(
     LanguageServiceTestMixin,
     TelegramServiceTestMixin,
     TelegramTestMixin,
+    ResultCacheServiceTestMixin,
+    SchedulerServiceTestMixin,
 ):
+    WAIT_IMAGE_OPTION = "wait_image_option"
+    DPI = 300
+
     def setup_method(self) -> None:
         super().setup_method()
+        self.telegram_update.callback_query = None
+
         self.pdf_service = MagicMock(spec=PdfService)
         self.language_service = self.mock_language_service()
+        self.result_cache_service = self.mock_result_cache_service()
+        self.scheduler_service = self.mock_scheduler_service()
         self.telegram_service = self.mock_telegram_service()
 
         self.sut = PdfToImageProcessor(
             self.pdf_service,
             self.telegram_service,
             self.language_service,
+            self.result_cache_service,
+            self.scheduler_service,
             bypass_init_check=True,
         )
 
@@ -39,14 +59,91 @@ class TestPdfToImageProcessor(
 
     def test_handler(self) -> None:
         actual = self.sut.handler
+        assert isinstance(actual, ConversationHandler)
+
+        entry_points = actual.entry_points
+        assert len(entry_points) == 1
+        assert isinstance(entry_points[0], CallbackQueryHandler)
+        assert entry_points[0].pattern == PdfToImageData
+
+        assert self.WAIT_IMAGE_OPTION in actual.states
+        wait_image_option_state = actual.states[self.WAIT_IMAGE_OPTION]
+        assert len(wait_image_option_state) == 2
+
+        assert isinstance(wait_image_option_state[0], CallbackQueryHandler)
+        assert wait_image_option_state[0].pattern == PdfToImageOptionData
 
-        assert isinstance(actual, CallbackQueryHandler)
-        assert actual.pattern == PdfToImageData
+        assert isinstance(wait_image_option_state[1], CallbackQueryHandler)
+        assert wait_image_option_state[1].pattern == BackData
+
+        fallbacks = actual.fallbacks
+        assert len(fallbacks) == 1
+        assert isinstance(fallbacks[0], CommandHandler)
+        assert fallbacks[0].commands == {"cancel"}
+
+        map_to_parent = actual.map_to_parent
+        assert map_to_parent is not None
+        assert (
+            map_to_parent[AbstractFileTaskProcessor.WAIT_FILE_TASK]
+            == AbstractFileTaskProcessor.WAIT_FILE_TASK
+        )
 
     @pytest.mark.asyncio
     async def test_process_file_task(self) -> None:
-        self.pdf_service.convert_pdf_to_images.return_value.__aenter__.return_value = self.file_path
+        option_data = PdfToImageOptionData(
+            id=self.TELEGRAM_DOCUMENT_ID,
+            name=self.TELEGRAM_DOCUMENT_NAME,
+            image_format=ImageFormat.webp,
+            dpi=self.DPI,
+        )
+        paths: list[Path] = [self.file_path]
+        self.pdf_service.convert_pdf_to_images.return_value.__aenter__.return_value = paths
+
+        async with self.sut.process_file_task(option_data) as actual:
+            assert actual == FileTaskResult(paths)
+            self.pdf_service.convert_pdf_to_images.assert_called_once_with(
+                option_data.id, ImageFormat.webp, self.DPI
+            )
+
+    @pytest.mark.asyncio
+    async def test_process_file_task_invalid_file_data(self) -> None:
+        with pytest.raises(FileDataTypeError):
+            async with self.sut.process_file_task(self.FILE_DATA):
+                pass
+        self.pdf_service.convert_pdf_to_images.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_ask_image_option(self) -> None:
+        self.telegram_callback_query.data = PdfToImageData(
+            self.TELEGRAM_DOCUMENT_ID, self.TELEGRAM_DOCUMENT_NAME
+        )
+        self.telegram_update.callback_query = self.telegram_callback_query
+
+        actual = await self.sut.ask_image_option(self.telegram_update, self.telegram_context)
+
+        assert actual == self.WAIT_IMAGE_OPTION
+        self.telegram_service.answer_query_and_drop_data.assert_called_once_with(
+            self.telegram_context, self.telegram_callback_query
+        )
+
+        reply_markup = self.telegram_callback_query.edit_message_text.call_args.kwargs[
+            "reply_markup"
+        ]
+        assert isinstance(reply_markup, InlineKeyboardMarkup)
+
+        options = [
+            button.callback_data
+            for row in reply_markup.inline_keyboard[:-1]
+            for button in row
+            if isinstance(button.callback_data, PdfToImageOptionData)
+        ]
+        assert {x.image_format for x in options} == set(ImageFormat)
+        assert all(x.id == self.TELEGRAM_DOCUMENT_ID for x in options)
+
+    @pytest.mark.asyncio
+    async def test_ask_image_option_invalid_callback_query_data(self) -> None:
+        self.telegram_update.callback_query = self.telegram_callback_query
 
-        async with self.sut.process_file_task(self.FILE_DATA) as actual:
-            assert actual == self.file_task_result
-            self.pdf_service.convert_pdf_to_images.assert_called_once_with(self.FILE_DATA.id)
+        with pytest.raises(CallbackQueryDataTypeError):
+            await self.sut.ask_image_option(self.telegram_update, self.telegram_context)
+        self.telegram_callback_query.edit_message_text.assert_not_called()
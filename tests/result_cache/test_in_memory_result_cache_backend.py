@@ -0,0 +1,69 @@
+from unittest.mock import patch
+
+import pytest
+
+from pdf_bot.models import TranslatableText
+from pdf_bot.result_cache import CachedResult, InMemoryResultCacheBackend, ResultFileType
+
+
+class TestInMemoryResultCacheBackend:
+    KEY = "key"
+    OTHER_KEY = "other_key"
+    MAX_SIZE = 2
+    TTL = 10
+
+    def setup_method(self) -> None:
+        self.result = CachedResult("file_id", ResultFileType.document)
+        self.other_result = CachedResult(
+            "other_file_id", ResultFileType.photo, TranslatableText("text {param}", {"param": "a"})
+        )
+
+        self.time_patcher = patch(
+            "pdf_bot.result_cache.in_memory_result_cache_backend.time.monotonic", return_value=0
+        )
+        self.monotonic = self.time_patcher.start()
+
+        self.sut = InMemoryResultCacheBackend(self.MAX_SIZE, self.TTL)
+
+    def teardown_method(self) -> None:
+        self.time_patcher.stop()
+
+    @pytest.mark.asyncio
+    async def test_get(self) -> None:
+        await self.sut.set(self.KEY, self.result)
+        actual = await self.sut.get(self.KEY)
+        assert actual == self.result
+
+    @pytest.mark.asyncio
+    async def test_get_missing(self) -> None:
+        actual = await self.sut.get(self.KEY)
+        assert actual is None
+
+    @pytest.mark.asyncio
+    async def test_get_expired(self) -> None:
+        await self.sut.set(self.KEY, self.result)
+        self.monotonic.return_value = self.TTL
+
+        actual = await self.sut.get(self.KEY)
+
+        assert actual is None
+
+    @pytest.mark.asyncio
+    async def test_set_evicts_least_recently_used(self) -> None:
+        await self.sut.set(self.KEY, self.result)
+        await self.sut.set(self.OTHER_KEY, self.other_result)
+        await self.sut.get(self.KEY)
+
+        await self.sut.set("new_key", self.result)
+
+        assert await self.sut.get(self.KEY) == self.result
+        assert await self.sut.get(self.OTHER_KEY) is None
+
+    @pytest.mark.asyncio
+    async def test_delete(self) -> None:
+        await self.sut.set(self.KEY, self.result)
+
+        await self.sut.delete(self.KEY)
+        await self.sut.delete(self.OTHER_KEY)
+
+        assert await self.sut.get(self.KEY) is None
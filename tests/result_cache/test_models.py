@@ -0,0 +1,39 @@
+from unittest.mock import MagicMock
+
+from telegram import Document, Message, PhotoSize
+
+from pdf_bot.models import TranslatableText
+from pdf_bot.result_cache import CachedResult, ResultFileType
+
+
+class TestCachedResult:
+    FILE_ID = "file_id"
+    TEXT = TranslatableText("text")
+
+    def setup_method(self) -> None:
+        self.message = MagicMock(spec=Message)
+        self.message.photo = ()
+        self.message.document = None
+
+    def test_from_telegram_message_document(self) -> None:
+        document = MagicMock(spec=Document)
+        document.file_id = self.FILE_ID
+        self.message.document = document
+
+        actual = CachedResult.from_telegram_message(self.message, self.TEXT)
+
+        assert actual == CachedResult(self.FILE_ID, ResultFileType.document, self.TEXT)
+
+    def test_from_telegram_message_photo(self) -> None:
+        small_photo = MagicMock(spec=PhotoSize)
+        large_photo = MagicMock(spec=PhotoSize)
+        large_photo.file_id = self.FILE_ID
+        self.message.photo = (small_photo, large_photo)
+
+        actual = CachedResult.from_telegram_message(self.message, None)
+
+        assert actual == CachedResult(self.FILE_ID, ResultFileType.photo)
+
+    def test_from_telegram_message_without_file(self) -> None:
+        actual = CachedResult.from_telegram_message(self.message, self.TEXT)
+        assert actual is None
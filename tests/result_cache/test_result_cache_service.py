@@ -0,0 +1,70 @@
+import hashlib
+import json
+from unittest.mock import MagicMock
+
+import pytest
+
+from pdf_bot.result_cache import (
+    AbstractResultCacheBackend,
+    CachedResult,
+    ResultCacheService,
+    ResultFileType,
+)
+
+
+class TestResultCacheService:
+    KEY = "key"
+    SOURCE_KEY = "source_key"
+    TASK = "task"
+
+    def setup_method(self) -> None:
+        self.result = CachedResult("file_id", ResultFileType.document)
+        self.backend = MagicMock(spec=AbstractResultCacheBackend)
+        self.sut = ResultCacheService(self.backend)
+
+    def test_get_key(self) -> None:
+        actual = self.sut.get_key(self.SOURCE_KEY, self.TASK, {"a": 1, "b": 2})
+
+        assert actual == self.sut.get_key(self.SOURCE_KEY, self.TASK, {"b": 2, "a": 1})
+        assert actual != self.sut.get_key(self.SOURCE_KEY, self.TASK, {"a": 1, "b": 3})
+        assert actual != self.sut.get_key(self.SOURCE_KEY, "other_task", {"a": 1, "b": 2})
+        assert actual != self.sut.get_key("other_source_key", self.TASK, {"a": 1, "b": 2})
+
+    def test_get_key_keeps_existing_keys(self) -> None:
+        actual = self.sut.get_key(self.SOURCE_KEY, self.TASK, {})
+
+        data = json.dumps(
+            {"file_unique_id": self.SOURCE_KEY, "params": {}, "task": self.TASK}, sort_keys=True
+        )
+        assert actual == hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+    @pytest.mark.asyncio
+    async def test_get_hit(self) -> None:
+        self.backend.get.return_value = self.result
+
+        actual = await self.sut.get(self.KEY)
+
+        assert actual == self.result
+        assert self.sut.hits == 1
+        assert self.sut.misses == 0
+        self.backend.get.assert_awaited_once_with(self.KEY)
+
+    @pytest.mark.asyncio
+    async def test_get_miss(self) -> None:
+        self.backend.get.return_value = None
+
+        actual = await self.sut.get(self.KEY)
+
+        assert actual is None
+        assert self.sut.hits == 0
+        assert self.sut.misses == 1
+
+    @pytest.mark.asyncio
+    async def test_set(self) -> None:
+        await self.sut.set(self.KEY, self.result)
+        self.backend.set.assert_awaited_once_with(self.KEY, self.result)
+
+    @pytest.mark.asyncio
+    async def test_delete(self) -> None:
+        await self.sut.delete(self.KEY)
+        self.backend.delete.assert_awaited_once_with(self.KEY)
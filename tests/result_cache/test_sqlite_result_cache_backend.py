@@ -0,0 +1,92 @@
+from unittest.mock import patch
+
+import pytest
+
+from pdf_bot.models import TranslatableText
+from pdf_bot.result_cache import CachedResult, ResultFileType, SqliteResultCacheBackend
+
+
+class TestSqliteResultCacheBackend:
+    KEY = "key"
+    OTHER_KEY = "other_key"
+    MAX_SIZE = 2
+    TTL = 10
+
+    def setup_method(self) -> None:
+        self.result = CachedResult("file_id", ResultFileType.document)
+        self.other_result = CachedResult(
+            "other_file_id", ResultFileType.photo, TranslatableText("text {param}", {"param": "a"})
+        )
+
+        self.time_patcher = patch(
+            "pdf_bot.result_cache.sqlite_result_cache_backend.time.time", return_value=0
+        )
+        self.time = self.time_patcher.start()
+
+        self.sut = SqliteResultCacheBackend(":memory:", self.MAX_SIZE, self.TTL)
+
+    def teardown_method(self) -> None:
+        self.time_patcher.stop()
+
+    @pytest.mark.asyncio
+    async def test_get(self) -> None:
+        await self.sut.set(self.KEY, self.result)
+        await self.sut.set(self.OTHER_KEY, self.other_result)
+
+        assert await self.sut.get(self.KEY) == self.result
+        assert await self.sut.get(self.OTHER_KEY) == self.other_result
+
+    @pytest.mark.asyncio
+    async def test_get_missing(self) -> None:
+        actual = await self.sut.get(self.KEY)
+        assert actual is None
+
+    @pytest.mark.asyncio
+    async def test_get_expired(self) -> None:
+        await self.sut.set(self.KEY, self.result)
+        self.time.return_value = self.TTL
+
+        actual = await self.sut.get(self.KEY)
+
+        assert actual is None
+
+    @pytest.mark.asyncio
+    async def test_set_evicts_least_recently_used(self) -> None:
+        await self.sut.set(self.KEY, self.result)
+        self.time.return_value = 1
+        await self.sut.set(self.OTHER_KEY, self.other_result)
+        self.time.return_value = 2
+        await self.sut.get(self.KEY)
+
+        self.time.return_value = 3
+        await self.sut.set("new_key", self.result)
+
+        assert await self.sut.get(self.KEY) == self.result
+        assert await self.sut.get(self.OTHER_KEY) is None
+
+    @pytest.mark.asyncio
+    async def test_set_replaces_existing(self) -> None:
+        await self.sut.set(self.KEY, self.result)
+        await self.sut.set(self.KEY, self.other_result)
+
+        actual = await self.sut.get(self.KEY)
+
+        assert actual == self.other_result
+
+    @pytest.mark.asyncio
+    async def test_get_untranslatable_message(self) -> None:
+        await self.sut.set(self.KEY, self.other_result)
+        self.sut._conn.execute("UPDATE result_cache SET message = 'text'")  # noqa: SLF001
+
+        actual = await self.sut.get(self.KEY)
+
+        assert actual == CachedResult("other_file_id", ResultFileType.photo)
+
+    @pytest.mark.asyncio
+    async def test_delete(self) -> None:
+        await self.sut.set(self.KEY, self.result)
+        await self.sut.delete(self.KEY)
+
+        actual = await self.sut.get(self.KEY)
+
+        assert actual is None
@@ -0,0 +1,3 @@
+from .scheduler_service_test_mixin import SchedulerServiceTestMixin
+
+__all__ = ["SchedulerServiceTestMixin"]
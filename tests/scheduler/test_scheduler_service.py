@@ -0,0 +1,151 @@
+import asyncio
+from unittest.mock import MagicMock
+
+import pytest
+from telegram import Update
+from telegram.error import TelegramError
+
+from pdf_bot.analytics import TaskType
+from pdf_bot.models import TranslatableText
+from pdf_bot.scheduler import SchedulerService
+from tests.telegram_internal import TelegramServiceTestMixin, TelegramTestMixin
+
+
+class TestSchedulerService(TelegramServiceTestMixin, TelegramTestMixin):
+    MAX_JOBS = 2
+    USER_ID = 1
+    OTHER_USER_ID = 2
+
+    def setup_method(self) -> None:
+        super().setup_method()
+        self.telegram_service = self.mock_telegram_service()
+
+        self.sut = SchedulerService(
+            self.telegram_service,
+            max_jobs=self.MAX_JOBS,
+            task_limits={TaskType.ocr_pdf.value: 1},
+        )
+        self.started: list[tuple[int, TaskType]] = []
+        self.release = asyncio.Event()
+
+    @pytest.mark.asyncio
+    async def test_schedule(self) -> None:
+        async with self.sut.schedule(self.telegram_update, self.telegram_context, TaskType.ocr_pdf):
+            stats = self.sut.get_stats()
+            assert stats.running == 1
+            assert stats.queued == 0
+
+        stats = self.sut.get_stats()
+        assert stats.running == 0
+        assert stats.completed == 1
+        self.telegram_service.send_message.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_schedule_global_limit(self) -> None:
+        tasks = [
+            self._create_job(self.USER_ID, TaskType.compress_pdf) for _ in range(self.MAX_JOBS + 1)
+        ]
+        await asyncio.sleep(0)
+
+        stats = self.sut.get_stats()
+        assert stats.running == self.MAX_JOBS
+        assert stats.queued == 1
+        self.telegram_service.send_message.assert_called_once()
+        text = self.telegram_service.send_message.call_args.args[2]
+        assert isinstance(text, TranslatableText)
+        assert text.params == {"position": "1"}
+
+        self.release.set()
+        await asyncio.gather(*tasks)
+
+        stats = self.sut.get_stats()
+        assert stats.running == 0
+        assert stats.queued == 0
+        assert stats.completed == self.MAX_JOBS + 1
+
+    @pytest.mark.asyncio
+    async def test_schedule_task_limit(self) -> None:
+        tasks = [
+            self._create_job(self.USER_ID, TaskType.ocr_pdf),
+            self._create_job(self.USER_ID, TaskType.ocr_pdf),
+            self._create_job(self.OTHER_USER_ID, TaskType.compress_pdf),
+        ]
+        await asyncio.sleep(0)
+
+        # The compress job can start even though an OCR job was queued before it
+        assert self.started == [
+            (self.USER_ID, TaskType.ocr_pdf),
+            (self.OTHER_USER_ID, TaskType.compress_pdf),
+        ]
+        assert self.sut.get_stats().queued == 1
+
+        self.release.set()
+        await asyncio.gather(*tasks)
+        assert len(self.started) == len(tasks)
+
+    @pytest.mark.asyncio
+    async def test_schedule_fair_queuing(self) -> None:
+        tasks = [self._create_job(self.USER_ID, TaskType.compress_pdf) for _ in range(4)]
+        await asyncio.sleep(0)
+        tasks.append(self._create_job(self.OTHER_USER_ID, TaskType.compress_pdf))
+        await asyncio.sleep(0)
+
+        # The other user should only have to wait for the next job of the first user
+        positions = [
+            x.args[2].params["position"] for x in self.telegram_service.send_message.call_args_list
+        ]
+        assert positions == ["1", "2", "2"]
+
+        self.release.set()
+        await asyncio.gather(*tasks)
+
+        assert [user_id for user_id, _ in self.started] == [
+            self.USER_ID,
+            self.USER_ID,
+            self.USER_ID,
+            self.OTHER_USER_ID,
+            self.USER_ID,
+        ]
+
+    @pytest.mark.asyncio
+    async def test_schedule_cancelled_while_queued(self) -> None:
+        tasks = [
+            self._create_job(self.USER_ID, TaskType.compress_pdf) for _ in range(self.MAX_JOBS + 1)
+        ]
+        await asyncio.sleep(0)
+
+        tasks[-1].cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await tasks[-1]
+
+        stats = self.sut.get_stats()
+        assert stats.queued == 0
+        assert stats.running == self.MAX_JOBS
+
+        self.release.set()
+        await asyncio.gather(*tasks[:-1])
+        assert len(self.started) == self.MAX_JOBS
+        assert self.sut.get_stats().running == 0
+
+    @pytest.mark.asyncio
+    async def test_schedule_send_message_error(self) -> None:
+        self.telegram_service.send_message.side_effect = TelegramError("Error")
+        tasks = [
+            self._create_job(self.USER_ID, TaskType.compress_pdf) for _ in range(self.MAX_JOBS + 1)
+        ]
+        await asyncio.sleep(0)
+
+        self.release.set()
+        await asyncio.gather(*tasks)
+        assert len(self.started) == self.MAX_JOBS + 1
+
+    def _create_job(self, user_id: int, task_type: TaskType) -> asyncio.Task[None]:
+        update = MagicMock(spec=Update)
+        update.effective_user.id = user_id
+
+        async def run() -> None:
+            async with self.sut.schedule(update, self.telegram_context, task_type):
+                self.started.append((user_id, task_type))
+                await self.release.wait()
+
+        return asyncio.create_task(run())
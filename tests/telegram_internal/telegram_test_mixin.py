@@ -29,7 +29,9 @@ class TelegramTestMixin(PathTestMixin):
     TELEGRAM_FILE_ID = "file_id"
     TELEGRAM_DOCUMENT_ID = "document_id"
     TELEGRAM_DOCUMENT_NAME = "document_name"
+    TELEGRAM_DOCUMENT_UNIQUE_ID = "document_unique_id"
     TELEGRAM_PHOTO_SIZE_ID = "photo_size_id"
+    TELEGRAM_PHOTO_SIZE_UNIQUE_ID = "photo_size_unique_id"
     TELEGRAM_TEXT = "text"
 
     FILE_DATA = FileData(TELEGRAM_DOCUMENT_ID, TELEGRAM_DOCUMENT_NAME)
@@ -66,9 +68,11 @@ class TelegramTestMixin(PathTestMixin):
         self.telegram_document = MagicMock(spec=Document)
         self.telegram_document.file_id = self.TELEGRAM_DOCUMENT_ID
         self.telegram_document.file_name = self.TELEGRAM_DOCUMENT_NAME
+        self.telegram_document.file_unique_id = self.TELEGRAM_DOCUMENT_UNIQUE_ID
 
         self.telegram_photo_size = MagicMock(spec=PhotoSize)
         self.telegram_photo_size.file_id = self.TELEGRAM_PHOTO_SIZE_ID
+        self.telegram_photo_size.file_unique_id = self.TELEGRAM_PHOTO_SIZE_UNIQUE_ID
 
         self.telegram_message = AsyncMock(spec=Message)
         self.telegram_message.chat = self.telegram_chat
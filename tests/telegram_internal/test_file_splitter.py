@@ -0,0 +1,70 @@
+from pathlib import Path
+from zipfile import ZIP_STORED, ZipFile
+
+import pytest
+from pypdf import PdfReader, PdfWriter
+
+from pdf_bot.telegram_internal.file_splitter import split_file
+
+
+class TestFileSplitter:
+    NUM_PAGES = 8
+    FILE_SIZE = 1000
+
+    @pytest.fixture(autouse=True)
+    def setup_dir(self, tmp_path: Path) -> None:
+        self.tmp_path = tmp_path
+
+    @pytest.mark.asyncio
+    async def test_split_file_pdf(self) -> None:
+        path = self._create_pdf(self.NUM_PAGES)
+        max_size = path.stat().st_size // 3
+
+        async with split_file(path, max_size) as actual:
+            assert len(actual) > 1
+
+            num_pages = 0
+            for part in actual:
+                pages = PdfReader(part).pages
+                assert part.stat().st_size <= max_size or len(pages) == 1
+                num_pages += len(pages)
+            assert num_pages == self.NUM_PAGES
+
+        assert not any(x.exists() for x in actual)
+
+    @pytest.mark.asyncio
+    async def test_split_file_pdf_single_page(self) -> None:
+        path = self._create_pdf(1)
+
+        async with split_file(path, 1) as actual:
+            assert actual == [path]
+
+    @pytest.mark.asyncio
+    async def test_split_file_zip(self) -> None:
+        names = ["a.png", "b.png", "c.png"]
+        path = self.tmp_path / "images.zip"
+        with ZipFile(path, "w", ZIP_STORED) as zip_file:
+            for name in names:
+                zip_file.writestr(name, b"a" * self.FILE_SIZE)
+
+        async with split_file(path, self.FILE_SIZE * 3 // 2) as actual:
+            assert [x.name for x in actual] == [f"images_part{i}.zip" for i in range(1, 4)]
+            for part, name in zip(actual, names, strict=True):
+                with ZipFile(part) as zip_file:
+                    assert zip_file.namelist() == [name]
+
+    @pytest.mark.asyncio
+    async def test_split_file_unsupported(self) -> None:
+        path = self.tmp_path / "image.png"
+
+        async with split_file(path, 1) as actual:
+            assert actual == [path]
+
+    def _create_pdf(self, num_pages: int) -> Path:
+        writer = PdfWriter()
+        for _ in range(num_pages):
+            writer.add_blank_page(100, 100)
+
+        path = self.tmp_path / "file.pdf"
+        writer.write(path)
+        return path
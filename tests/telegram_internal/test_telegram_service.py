@@ -1,15 +1,20 @@
+import asyncio
 from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
 from unittest.mock import MagicMock, call, patch
 
 import pytest
-from telegram import File, InlineKeyboardMarkup, Message, ReplyKeyboardMarkup
-from telegram.constants import ChatAction, FileSizeLimit, MessageLimit, ParseMode
+from telegram import File, InlineKeyboardMarkup, InputMediaDocument, Message, ReplyKeyboardMarkup
+from telegram.constants import ChatAction, FileSizeLimit, MediaGroupLimit, MessageLimit, ParseMode
+from telegram.error import BadRequest, TelegramError
 from telegram.ext import Application, ConversationHandler
 
 from pdf_bot.analytics import AnalyticsService, EventAction, TaskType
 from pdf_bot.consts import FILE_DATA, MESSAGE_DATA
 from pdf_bot.io_internal import IOService
-from pdf_bot.models import BackData, FileData, MessageData
+from pdf_bot.models import BackData, FileData, MessageData, TranslatableText
+from pdf_bot.result_cache import CachedResult, ResultFileType
 from pdf_bot.telegram_internal import (
     TelegramFileMimeTypeError,
     TelegramFileTooLargeError,
@@ -18,11 +23,18 @@ from pdf_bot.telegram_internal import (
     TelegramService,
     TelegramUpdateUserDataError,
 )
+from tests.file_cache import FileCacheServiceTestMixin
 from tests.language import LanguageServiceTestMixin
+from tests.result_cache import ResultCacheServiceTestMixin
 from tests.telegram_internal.telegram_test_mixin import TelegramTestMixin
 
 
-class TestTelegramService(LanguageServiceTestMixin, TelegramTestMixin):
+class TestTelegramService(
+    LanguageServiceTestMixin,
+    FileCacheServiceTestMixin,
+    ResultCacheServiceTestMixin,
+    TelegramTestMixin,
+):
     IMG_MIME_TYPE = "image"
     PDF_MIME_TYPE = "pdf"
 
@@ -31,24 +43,34 @@ class TestTelegramService(LanguageServiceTestMixin, TelegramTestMixin):
     BACK = "Back"
     CANCEL = "Cancel"
     MESSAGE_TRUNCATED = "\n..."
+    FILE_DIGEST = "file_digest"
 
     def setup_method(self) -> None:
         super().setup_method()
         self.io_service = MagicMock(spec=IOService)
         self.language_service = self.mock_language_service()
         self.analytics_service = MagicMock(spec=AnalyticsService)
+        self.file_cache_service = self.mock_file_cache_service()
+        self.output_cache_service = self.mock_result_cache_service()
         self.sut = TelegramService(
             self.io_service,
             self.language_service,
             self.analytics_service,
+            self.file_cache_service,
+            self.output_cache_service,
             bot=self.telegram_bot,
         )
 
         self.open_patcher = patch("builtins.open")
         self.open_patcher.start()
 
+        self.hashlib_patcher = patch("pdf_bot.telegram_internal.telegram_service.hashlib")
+        self.hashlib = self.hashlib_patcher.start()
+        self.hashlib.file_digest.return_value.hexdigest.return_value = self.FILE_DIGEST
+
     def teardown_method(self) -> None:
         self.open_patcher.stop()
+        self.hashlib_patcher.stop()
         super().teardown_method()
 
     @pytest.mark.asyncio
@@ -167,13 +189,90 @@ class TestTelegramService(LanguageServiceTestMixin, TelegramTestMixin):
 
     @pytest.mark.asyncio
     async def test_download_pdf_file(self) -> None:
-        self.io_service.create_temp_pdf_file.return_value.__enter__.return_value = self.file_path
+        self.file_cache_service.get_or_download.return_value.__aenter__.return_value = (
+            self.file_path
+        )
         self.telegram_bot.get_file.return_value = self.telegram_file
 
         async with self.sut.download_pdf_file(self.TELEGRAM_FILE_ID) as actual:
             assert actual == self.file_path
-            self.telegram_bot.get_file.assert_called_with(self.TELEGRAM_FILE_ID)
-            self.telegram_file.download_to_drive.assert_called_once_with(custom_path=self.file_path)
+
+        args = self.file_cache_service.get_or_download.call_args.args
+        assert args[0] == self.TELEGRAM_FILE_ID
+        assert args[2] == ".pdf"
+
+        download = args[1]
+        await download(self.download_path)
+        self.telegram_bot.get_file.assert_called_with(self.TELEGRAM_FILE_ID)
+        self.telegram_file.download_to_drive.assert_called_once_with(custom_path=self.download_path)
+
+    @pytest.mark.asyncio
+    async def test_download_files_prefetched(self) -> None:
+        cached_path = self.mock_file_path()
+        self.file_cache_service.get.side_effect = lambda file_id: self._mock_cached_file(
+            cached_path if file_id == "cached" else None
+        )
+        self.io_service.create_temp_files.return_value.__enter__.return_value = ["a", "b"]
+        self.telegram_bot.get_file.return_value = self.telegram_file
+
+        async with self.sut.download_files(["cached", "file_id"]) as actual:
+            assert actual == [cached_path, "b"]
+            self.telegram_bot.get_file.assert_called_once_with("file_id")
+            self.telegram_file.download_to_drive.assert_called_once_with(custom_path="b")
+
+    def test_prefetch_file(self) -> None:
+        self.telegram_update.effective_user = self.telegram_user
+        self.telegram_document.file_size = 1
+
+        self.sut.prefetch_file(self.telegram_update, self.telegram_document, ".pdf")
+
+        self.file_cache_service.prefetch.assert_called_once()
+        args = self.file_cache_service.prefetch.call_args.args
+        assert args[0] == self.TELEGRAM_USER_ID
+        assert args[1] == self.TELEGRAM_DOCUMENT_ID
+        assert args[2] == 1
+        assert args[4] == ".pdf"
+
+    @pytest.mark.asyncio
+    async def test_prefetch_file_leaves_capacity_for_downloads(self) -> None:
+        self.telegram_update.effective_user = self.telegram_user
+        prefetch_started = asyncio.Event()
+        release_prefetch = asyncio.Event()
+
+        async def download_to_drive(custom_path: Path) -> None:
+            if custom_path == self.file_path:
+                prefetch_started.set()
+                await release_prefetch.wait()
+
+        self.telegram_file.download_to_drive.side_effect = download_to_drive
+        self.telegram_bot.get_file.return_value = self.telegram_file
+        sut = TelegramService(
+            self.io_service,
+            self.language_service,
+            self.analytics_service,
+            self.file_cache_service,
+            self.output_cache_service,
+            bot=self.telegram_bot,
+            max_concurrent_downloads=2,
+            max_concurrent_prefetches=1,
+        )
+
+        sut.prefetch_file(self.telegram_update, self.telegram_document)
+        prefetch = self.file_cache_service.prefetch.call_args.args[3]
+        tasks = [asyncio.create_task(prefetch(self.file_path)) for _ in range(2)]
+        await prefetch_started.wait()
+
+        # The second prefetch waits for the first one, while a download still goes ahead
+        await asyncio.wait_for(sut._download_file("file_id", self.download_path), 1)  # noqa: SLF001
+        assert not tasks[1].done()
+
+        release_prefetch.set()
+        await asyncio.gather(*tasks)
+
+    def test_prefetch_file_without_user(self) -> None:
+        self.telegram_update.effective_user = None
+        self.sut.prefetch_file(self.telegram_update, self.telegram_document)
+        self.file_cache_service.prefetch.assert_not_called()
 
     @pytest.mark.asyncio
     @pytest.mark.parametrize("num_files", [1, 2, 5])
@@ -210,13 +309,74 @@ class TestTelegramService(LanguageServiceTestMixin, TelegramTestMixin):
                     custom_path=file_and_path.path
                 )
 
+    @pytest.mark.asyncio
+    async def test_download_files_concurrency_limit(self) -> None:
+        max_concurrent_downloads = 2
+        num_files = 5
+        running = 0
+        max_running = 0
+
+        async def download_to_drive(**_kwargs: Any) -> None:
+            nonlocal running, max_running
+            running += 1
+            max_running = max(max_running, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+
+        self.telegram_file.download_to_drive.side_effect = download_to_drive
+        self.telegram_bot.get_file.return_value = self.telegram_file
+        file_paths = [f"file_path_{i}" for i in range(num_files)]
+        self.io_service.create_temp_files.return_value.__enter__.return_value = file_paths
+        sut = TelegramService(
+            self.io_service,
+            self.language_service,
+            self.analytics_service,
+            self.file_cache_service,
+            self.output_cache_service,
+            bot=self.telegram_bot,
+            max_concurrent_downloads=max_concurrent_downloads,
+        )
+
+        async with sut.download_files([f"file_id_{i}" for i in range(num_files)]) as actual:
+            assert actual == file_paths
+            assert max_running == max_concurrent_downloads
+            assert self.telegram_file.download_to_drive.call_count == num_files
+
+    @pytest.mark.asyncio
+    async def test_download_files_error(self) -> None:
+        cancelled = asyncio.Event()
+        error = TelegramError("Error")
+
+        async def get_file(file_id: str) -> MagicMock:
+            if file_id == "error":
+                raise error
+
+            try:
+                await asyncio.sleep(1)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+            return self.telegram_file
+
+        self.telegram_bot.get_file.side_effect = get_file
+        self.io_service.create_temp_files.return_value.__enter__.return_value = ["a", "b"]
+
+        with pytest.raises(TelegramError):
+            async with self.sut.download_files(["file_id", "error"]):
+                pass
+
+        assert cancelled.is_set()
+        self.telegram_file.download_to_drive.assert_not_called()
+
     @pytest.mark.asyncio
     async def test_cancel_conversation(self) -> None:
         self.telegram_update.callback_query = None
+        self.telegram_update.effective_user = self.telegram_user
 
         actual = await self.sut.cancel_conversation(self.telegram_update, self.telegram_context)
 
         assert actual == ConversationHandler.END
+        self.file_cache_service.discard_user_files.assert_called_once_with(self.TELEGRAM_USER_ID)
         self.telegram_message.reply_text.assert_called_once()
         self.telegram_callback_query.answer.assert_not_called()
         self.telegram_callback_query.edit_message_text.assert_not_called()
@@ -380,13 +540,14 @@ class TestTelegramService(LanguageServiceTestMixin, TelegramTestMixin):
         stat.st_size = FileSizeLimit.FILESIZE_UPLOAD
         self.telegram_update.callback_query = None
 
-        await self.sut.send_file(
+        actual = await self.sut.send_file(
             self.telegram_update,
             self.telegram_context,
             file_path,
             TaskType.merge_pdf,
         )
 
+        assert actual == self.telegram_bot.send_document.return_value
         self.telegram_bot.send_chat_action.assert_called_once_with(
             self.TELEGRAM_CHAT_ID, ChatAction.UPLOAD_DOCUMENT
         )
@@ -453,9 +614,38 @@ class TestTelegramService(LanguageServiceTestMixin, TelegramTestMixin):
         )
 
     @pytest.mark.asyncio
-    async def test_send_file_too_large(self) -> None:
+    async def test_send_file_caches_upload(self) -> None:
+        file_path = self.file_path.with_suffix(".pdf")
+        stat = self.mock_path_stat(file_path)
+        stat.st_size = FileSizeLimit.FILESIZE_UPLOAD
+        self.telegram_update.callback_query = None
+        self.telegram_message.photo = ()
+        self.telegram_bot.send_document.return_value = self.telegram_message
+
+        await self.sut.send_file(
+            self.telegram_update,
+            self.telegram_context,
+            file_path,
+            TaskType.merge_pdf,
+        )
+
+        self.io_service.get_display_name.assert_called_once_with(file_path)
+        file_name = self.io_service.get_display_name.return_value
+        self.output_cache_service.get_key.assert_called_once_with(
+            self.FILE_DIGEST, "output", {"file_name": file_name}
+        )
+        assert self.telegram_bot.send_document.call_args.kwargs["filename"] == file_name
+        self.output_cache_service.set.assert_awaited_once_with(
+            self.output_cache_service.get_key.return_value,
+            CachedResult(self.TELEGRAM_DOCUMENT_ID, ResultFileType.document),
+        )
+
+    @pytest.mark.asyncio
+    async def test_send_file_caches_image_upload_without_name(self) -> None:
+        self.file_path.suffix = ".png"
         stat = self.mock_path_stat(self.file_path)
-        stat.st_size = FileSizeLimit.FILESIZE_UPLOAD + 1
+        stat.st_size = FileSizeLimit.FILESIZE_UPLOAD
+        self.telegram_update.callback_query = None
 
         await self.sut.send_file(
             self.telegram_update,
@@ -464,10 +654,150 @@ class TestTelegramService(LanguageServiceTestMixin, TelegramTestMixin):
             TaskType.merge_pdf,
         )
 
+        self.io_service.get_display_name.assert_not_called()
+        self.output_cache_service.get_key.assert_called_once_with(self.FILE_DIGEST, "output", {})
+
+    @pytest.mark.asyncio
+    async def test_send_file_uploaded(self) -> None:
+        file_path = self.file_path.with_suffix(".pdf")
+        stat = self.mock_path_stat(file_path)
+        stat.st_size = FileSizeLimit.FILESIZE_UPLOAD
+        self.telegram_update.callback_query = None
+        self.output_cache_service.get.return_value = CachedResult(
+            self.TELEGRAM_FILE_ID, ResultFileType.document
+        )
+
+        actual = await self.sut.send_file(
+            self.telegram_update,
+            self.telegram_context,
+            file_path,
+            TaskType.merge_pdf,
+        )
+
+        assert actual == self.telegram_bot.send_document.return_value
         self.telegram_bot.send_chat_action.assert_not_called()
-        self.telegram_bot.send_document.assert_not_called()
-        self.telegram_bot.send_photo.assert_not_called()
-        self.analytics_service.send_event.assert_not_called()
+        self.telegram_bot.send_document.assert_called_once()
+        assert self.telegram_bot.send_document.call_args.args == (
+            self.TELEGRAM_CHAT_ID,
+            self.TELEGRAM_FILE_ID,
+        )
+        self.output_cache_service.set.assert_not_awaited()
+        self.analytics_service.send_event.assert_called_once_with(
+            self.telegram_update,
+            self.telegram_context,
+            TaskType.merge_pdf,
+            EventAction.complete,
+        )
+
+    @pytest.mark.asyncio
+    async def test_send_file_uploaded_invalid_file_id(self) -> None:
+        file_path = self.file_path.with_suffix(".pdf")
+        stat = self.mock_path_stat(file_path)
+        stat.st_size = FileSizeLimit.FILESIZE_UPLOAD
+        self.telegram_update.callback_query = None
+        self.output_cache_service.get.return_value = CachedResult(
+            self.TELEGRAM_FILE_ID, ResultFileType.document
+        )
+        self.telegram_bot.send_document.side_effect = [BadRequest("Error"), self.telegram_message]
+
+        actual = await self.sut.send_file(
+            self.telegram_update,
+            self.telegram_context,
+            file_path,
+            TaskType.merge_pdf,
+        )
+
+        assert actual == self.telegram_message
+        cache_key = self.output_cache_service.get_key.return_value
+        self.output_cache_service.delete.assert_awaited_once_with(cache_key)
+        assert self.telegram_bot.send_document.call_args.args == (self.TELEGRAM_CHAT_ID, file_path)
+
+    @pytest.mark.asyncio
+    async def test_send_file_too_large(self) -> None:
+        stat = self.mock_path_stat(self.file_path)
+        stat.st_size = FileSizeLimit.FILESIZE_UPLOAD + 1
+
+        with patch("pdf_bot.telegram_internal.telegram_service.split_file") as split_file:
+            split_file.return_value.__aenter__.return_value = [self.file_path]
+
+            actual = await self.sut.send_file(
+                self.telegram_update,
+                self.telegram_context,
+                self.file_path,
+                TaskType.merge_pdf,
+            )
+
+            assert actual is None
+            split_file.assert_called_once_with(self.file_path, FileSizeLimit.FILESIZE_UPLOAD)
+            self.telegram_bot.send_message.assert_called_once()
+            self.telegram_bot.send_chat_action.assert_not_called()
+            self.telegram_bot.send_document.assert_not_called()
+            self.telegram_bot.send_media_group.assert_not_called()
+            self.analytics_service.send_event.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_send_file_split(self) -> None:
+        num_parts = MediaGroupLimit.MAX_MEDIA_LENGTH + 1
+        stat = self.mock_path_stat(self.file_path)
+        stat.st_size = FileSizeLimit.FILESIZE_UPLOAD + 1
+
+        parts = [self.mock_file_path() for _ in range(num_parts)]
+        for part in parts:
+            self.mock_path_stat(part).st_size = FileSizeLimit.FILESIZE_UPLOAD
+
+        with patch("pdf_bot.telegram_internal.telegram_service.split_file") as split_file:
+            split_file.return_value.__aenter__.return_value = parts
+
+            actual = await self.sut.send_file(
+                self.telegram_update,
+                self.telegram_context,
+                self.file_path,
+                TaskType.merge_pdf,
+            )
+
+            assert actual is None
+            self.telegram_bot.send_media_group.assert_called_once()
+            media = self.telegram_bot.send_media_group.call_args.args[1]
+            assert len(media) == MediaGroupLimit.MAX_MEDIA_LENGTH
+            assert all(isinstance(x, InputMediaDocument) for x in media)
+            self.telegram_bot.send_document.assert_called_once_with(
+                self.TELEGRAM_CHAT_ID, parts[-1]
+            )
+            self.telegram_bot.send_message.assert_called_once()
+            assert "reply_markup" in self.telegram_bot.send_message.call_args.kwargs
+            self.output_cache_service.set.assert_not_awaited()
+            self.analytics_service.send_event.assert_called_once_with(
+                self.telegram_update,
+                self.telegram_context,
+                TaskType.merge_pdf,
+                EventAction.complete,
+            )
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize(
+        ("file_type", "send_method"),
+        [(ResultFileType.document, "send_document"), (ResultFileType.photo, "send_photo")],
+    )
+    async def test_send_cached_file(self, file_type: ResultFileType, send_method: str) -> None:
+        self.telegram_update.callback_query = None
+        cached_result = CachedResult(self.TELEGRAM_FILE_ID, file_type)
+
+        await self.sut.send_cached_file(
+            self.telegram_update,
+            self.telegram_context,
+            cached_result,
+            TaskType.merge_pdf,
+        )
+
+        send_file = getattr(self.telegram_bot, send_method)
+        send_file.assert_called_once()
+        assert send_file.call_args.args == (self.TELEGRAM_CHAT_ID, self.TELEGRAM_FILE_ID)
+        self.analytics_service.send_event.assert_called_once_with(
+            self.telegram_update,
+            self.telegram_context,
+            TaskType.merge_pdf,
+            EventAction.complete,
+        )
 
     @pytest.mark.asyncio
     async def test_send_file_names(self) -> None:
@@ -498,3 +828,17 @@ class TestTelegramService(LanguageServiceTestMixin, TelegramTestMixin):
         self.telegram_bot.send_message.assert_called_once_with(
             self.TELEGRAM_CHAT_ID, self.TELEGRAM_TEXT
         )
+
+    @pytest.mark.asyncio
+    async def test_send_message_translatable_text(self) -> None:
+        text = TranslatableText("{name} text", {"name": "name"})
+
+        await self.sut.send_message(self.telegram_update, self.telegram_context, text)
+
+        self.telegram_bot.send_message.assert_called_once_with(self.TELEGRAM_CHAT_ID, "name text")
+
+    @staticmethod
+    def _mock_cached_file(path: Path | None) -> MagicMock:
+        cached_file = MagicMock()
+        cached_file.__aenter__.return_value = path
+        return cached_file
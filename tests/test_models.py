@@ -12,10 +12,12 @@ class TestFileData(TelegramTestMixin):
     def test_from_telegram_document(self) -> None:
         actual = FileData.from_telegram_object(self.telegram_document)
         assert actual == FileData(self.TELEGRAM_DOCUMENT_ID, self.TELEGRAM_DOCUMENT_NAME)
+        assert actual.unique_id == self.TELEGRAM_DOCUMENT_UNIQUE_ID
 
     def test_from_telegram_photo_size(self) -> None:
         actual = FileData.from_telegram_object(self.telegram_photo_size)
         assert actual == FileData(self.TELEGRAM_PHOTO_SIZE_ID)
+        assert actual.unique_id == self.TELEGRAM_PHOTO_SIZE_UNIQUE_ID
 
 
 class TestTaskData(TelegramTestMixin):
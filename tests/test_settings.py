@@ -0,0 +1,46 @@
+import pytest
+
+from pdf_bot.settings import Settings
+
+
+class TestSettings:
+    @pytest.mark.parametrize(
+        ("max_downloads", "pool_size", "expected"),
+        [(4, 12, 4), (12, 12, 11), (4, 1, 1)],
+    )
+    def test_limit_concurrent_downloads(
+        self, max_downloads: int, pool_size: int, expected: int
+    ) -> None:
+        actual = Settings(
+            telegram_max_concurrent_downloads=max_downloads,
+            request_connection_pool_size=pool_size,
+        )
+        assert actual.telegram_max_concurrent_downloads == expected
+
+    @pytest.mark.parametrize(
+        ("max_prefetches", "max_downloads", "expected"),
+        [(2, 4, 2), (4, 4, 3), (2, 1, 1)],
+    )
+    def test_limit_concurrent_prefetches(
+        self, max_prefetches: int, max_downloads: int, expected: int
+    ) -> None:
+        actual = Settings(
+            telegram_max_concurrent_prefetches=max_prefetches,
+            telegram_max_concurrent_downloads=max_downloads,
+        )
+        assert actual.telegram_max_concurrent_prefetches == expected
+
+    @pytest.mark.parametrize(
+        ("ocr_jobs", "max_processes", "max_tasks", "expected"),
+        [(None, 8, 2, 4), (None, 1, 2, 1), (None, 4, None, 4), (3, 8, 2, 3)],
+    )
+    def test_limit_ocr_jobs(
+        self, ocr_jobs: int | None, max_processes: int, max_tasks: int | None, expected: int
+    ) -> None:
+        task_limits = {} if max_tasks is None else {"ocr_pdf": max_tasks}
+        actual = Settings(
+            pdf_ocr_jobs=ocr_jobs,
+            executor_max_processes=max_processes,
+            scheduler_task_limits=task_limits,
+        )
+        assert actual.pdf_ocr_jobs == expected
@@ -1,5 +1,10 @@
-from unittest.mock import MagicMock
+import json
+from http import HTTPStatus
+from pathlib import Path
+from unittest.mock import MagicMock, patch
 
+import pytest
+from requests import ConnectionError as RequestsConnectionError
 from requests import Response, Session
 
 from pdf_bot.pdf import FontData
@@ -7,34 +12,42 @@ from pdf_bot.text import TextRepository
 
 
 class TestTextRepository:
-    FONT_FAMILY = "font_family"
-    FONT_URL = "font_url"
+    FONT_FAMILY = "Open Sans"
+    FONT_URL = "https://fonts.gstatic.com/s/opensans/v40/regular.ttf"
     GOOGLE_FONTS_TOKEN = "google_fonts_token"
+    ETAG = "etag"
+    CACHE_TTL = 60
+    WEBFONTS_PATH = Path(__file__).parent / "webfonts.json"
+
+    @pytest.fixture(autouse=True)
+    def setup_cache_path(self, tmp_path: Path) -> None:
+        self.cache_path = tmp_path / "webfonts.json"
+        self.sut = TextRepository(
+            self.session, self.GOOGLE_FONTS_TOKEN, self.cache_path, self.CACHE_TTL
+        )
 
     def setup_method(self) -> None:
         self.response = MagicMock(spec=Response)
-        self.response.json.return_value = {
-            "items": [{"family": self.FONT_FAMILY, "files": {"regular": self.FONT_URL}}]
-        }
+        self.response.status_code = HTTPStatus.OK
+        self.response.headers = {"ETag": self.ETAG}
+        self.response.json.return_value = json.loads(self.WEBFONTS_PATH.read_text())
 
         self.session = MagicMock(spec=Session)
         self.session.get.return_value = self.response
 
-        self.sut = TextRepository(self.session, self.GOOGLE_FONTS_TOKEN)
-
     def test_get_font(self) -> None:
         actual = self.sut.get_font(self.FONT_FAMILY)
 
         assert actual == FontData(self.FONT_FAMILY, self.FONT_URL)
         self._assert_api_call()
 
-    def test_get_font_no_regular_font(self) -> None:
-        self.response.json.return_value = {"items": [{"family": self.FONT_FAMILY, "files": {}}]}
-
-        actual = self.sut.get_font(self.FONT_FAMILY)
+    def test_get_font_case_insensitive(self) -> None:
+        actual = self.sut.get_font("oPEN sANS")
+        assert actual == FontData(self.FONT_FAMILY, self.FONT_URL)
 
+    def test_get_font_no_regular_font(self) -> None:
+        actual = self.sut.get_font("Buda")
         assert actual is None
-        self._assert_api_call()
 
     def test_get_font_unknown_font(self) -> None:
         actual = self.sut.get_font("clearly_unknown_font")
@@ -42,8 +55,105 @@ class TestTextRepository:
         assert actual is None
         self._assert_api_call()
 
-    def _assert_api_call(self) -> None:
+    def test_get_font_fetched_once(self) -> None:
+        self.sut.get_font(self.FONT_FAMILY)
+        self.sut.get_font("Roboto")
+
+        self.session.get.assert_called_once()
+
+    def test_get_font_from_disk_cache(self) -> None:
+        self.sut.get_font(self.FONT_FAMILY)
+        sut = TextRepository(self.session, self.GOOGLE_FONTS_TOKEN, self.cache_path)
+
+        actual = sut.get_font(self.FONT_FAMILY)
+
+        assert actual == FontData(self.FONT_FAMILY, self.FONT_URL)
+        self.session.get.assert_called_once()
+
+    def test_get_font_invalid_disk_cache(self) -> None:
+        self.cache_path.write_text("invalid")
+
+        actual = self.sut.get_font(self.FONT_FAMILY)
+
+        assert actual == FontData(self.FONT_FAMILY, self.FONT_URL)
+        self._assert_api_call()
+
+    def test_get_font_expired_not_modified(self) -> None:
+        with patch("pdf_bot.text.text_repository.time") as time:
+            time.time.return_value = 0
+            self.sut.get_font(self.FONT_FAMILY)
+
+            self.response.status_code = HTTPStatus.NOT_MODIFIED
+            time.time.return_value = self.CACHE_TTL
+            actual = self.sut.get_font(self.FONT_FAMILY)
+
+        assert actual == FontData(self.FONT_FAMILY, self.FONT_URL)
+        self._assert_api_call(etag=self.ETAG)
+        assert json.loads(self.cache_path.read_text())["fetched_at"] == self.CACHE_TTL
+
+    def test_get_font_expired_modified(self) -> None:
+        with patch("pdf_bot.text.text_repository.time") as time:
+            time.time.return_value = 0
+            self.sut.get_font(self.FONT_FAMILY)
+
+            self.response.json.return_value = {
+                "items": [{"family": "New Font", "files": {"regular": self.FONT_URL}}]
+            }
+            time.time.return_value = self.CACHE_TTL
+            actual = self.sut.get_font("New Font")
+
+        assert actual == FontData("New Font", self.FONT_URL)
+        assert self.sut.get_font(self.FONT_FAMILY) is None
+
+    def test_get_font_refresh_error(self) -> None:
+        with patch("pdf_bot.text.text_repository.time") as time:
+            time.time.return_value = 0
+            self.sut.get_font(self.FONT_FAMILY)
+
+            self.session.get.side_effect = RequestsConnectionError
+            time.time.return_value = self.CACHE_TTL
+            actual = self.sut.get_font(self.FONT_FAMILY)
+
+        assert actual == FontData(self.FONT_FAMILY, self.FONT_URL)
+
+    def test_get_font_refresh_error_retry(self) -> None:
+        with patch("pdf_bot.text.text_repository.time") as time:
+            time.time.return_value = 0
+            self.sut.get_font(self.FONT_FAMILY)
+
+            self.session.get.side_effect = RequestsConnectionError
+            time.time.return_value = self.CACHE_TTL
+            self.sut.get_font(self.FONT_FAMILY)
+
+            # The refresh isn't retried until the retry interval has passed
+            time.time.return_value = self.CACHE_TTL + TextRepository.REFRESH_RETRY_INTERVAL - 1
+            self.sut.get_font(self.FONT_FAMILY)
+            assert self.session.get.call_count == 2
+
+            self.session.get.side_effect = None
+            time.time.return_value = self.CACHE_TTL + TextRepository.REFRESH_RETRY_INTERVAL
+            self.sut.get_font(self.FONT_FAMILY)
+            assert self.session.get.call_count == 3
+
+    def test_get_font_error(self) -> None:
+        self.session.get.side_effect = RequestsConnectionError
+
+        with pytest.raises(RequestsConnectionError):
+            self.sut.get_font(self.FONT_FAMILY)
+
+    def test_get_font_suggestions(self) -> None:
+        actual = self.sut.get_font_suggestions("robto")
+        assert actual == ["Roboto", "Roboto Mono"]
+
+    def test_get_font_suggestions_no_matches(self) -> None:
+        actual = self.sut.get_font_suggestions("clearly_unknown_font")
+        assert actual == []
+
+    def _assert_api_call(self, etag: str | None = None) -> None:
+        headers = {"If-None-Match": etag} if etag is not None else {}
         self.session.get.assert_called_with(
             "https://www.googleapis.com/webfonts/v1/webfonts",
             params={"key": self.GOOGLE_FONTS_TOKEN},
+            headers=headers,
+            timeout=TextRepository.REQUEST_TIMEOUT,
         )
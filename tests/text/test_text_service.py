@@ -9,10 +9,16 @@ from pdf_bot.pdf.models import FontData
 from pdf_bot.telegram_internal import TelegramServiceError
 from pdf_bot.text import TextRepository, TextService
 from tests.language import LanguageServiceTestMixin
+from tests.scheduler import SchedulerServiceTestMixin
 from tests.telegram_internal import TelegramServiceTestMixin, TelegramTestMixin
 
 
-class TestTextService(LanguageServiceTestMixin, TelegramServiceTestMixin, TelegramTestMixin):
+class TestTextService(
+    LanguageServiceTestMixin,
+    SchedulerServiceTestMixin,
+    TelegramServiceTestMixin,
+    TelegramTestMixin,
+):
     WAIT_TEXT = 0
     WAIT_FONT = 1
 
@@ -26,10 +32,12 @@ class TestTextService(LanguageServiceTestMixin, TelegramServiceTestMixin, Telegr
 
         self.text_repository = MagicMock(spec=TextRepository)
         self.text_repository.get_font.return_value = self.font_data
+        self.text_repository.get_font_suggestions.return_value = []
 
         self.pdf_service = MagicMock(spec=PdfService)
         self.language_service = self.mock_language_service()
 
+        self.scheduler_service = self.mock_scheduler_service()
         self.telegram_service = self.mock_telegram_service()
         self.telegram_service.get_user_data.side_effect = None
         self.telegram_service.get_user_data.return_value = self.PDF_TEXT
@@ -39,6 +47,7 @@ class TestTextService(LanguageServiceTestMixin, TelegramServiceTestMixin, Telegr
             self.pdf_service,
             self.telegram_service,
             self.language_service,
+            self.scheduler_service,
         )
 
     @pytest.mark.asyncio
@@ -78,6 +87,9 @@ class TestTextService(LanguageServiceTestMixin, TelegramServiceTestMixin, Telegr
         self.telegram_service.get_user_data.assert_called_once_with(
             self.telegram_context, self.TEXT_KEY
         )
+        self.scheduler_service.schedule.assert_called_once_with(
+            self.telegram_update, self.telegram_context, TaskType.text_to_pdf
+        )
         self.pdf_service.create_pdf_from_text.assert_called_once_with(self.PDF_TEXT, self.font_data)
         self.telegram_service.send_file.assert_called_once_with(
             self.telegram_update,
@@ -111,6 +123,20 @@ class TestTextService(LanguageServiceTestMixin, TelegramServiceTestMixin, Telegr
         self.telegram_service.get_user_data.assert_not_called()
         self.pdf_service.create_pdf_from_text.assert_not_called()
         self.telegram_service.send_file.assert_not_called()
+        self.telegram_message.reply_text.assert_called_once_with("Unknown font, please try again")
+
+    @pytest.mark.asyncio
+    async def test_check_text_unknown_font_with_suggestions(self) -> None:
+        self.text_repository.get_font.return_value = None
+        self.text_repository.get_font_suggestions.return_value = ["Roboto", "Roboto Mono"]
+
+        actual = await self.sut.check_text(self.telegram_update, self.telegram_context)
+
+        assert actual == self.WAIT_FONT
+        self.text_repository.get_font_suggestions.assert_called_once_with(self.TELEGRAM_TEXT)
+        self.telegram_message.reply_text.assert_called_once_with(
+            "Unknown font, please try again\n\nDid you mean: Roboto, Roboto Mono"
+        )
 
     @pytest.mark.asyncio
     async def test_check_text_skip_option(self) -> None:
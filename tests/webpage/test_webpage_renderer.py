@@ -0,0 +1,168 @@
+import time
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import pytest
+from weasyprint.urls import URLFetchingError
+
+from pdf_bot.webpage import (
+    WebpageFetchError,
+    WebpageRenderer,
+    WebpageRenderError,
+    WebpageRenderLimits,
+    WebpageTimeoutError,
+    WebpageTooLargeError,
+)
+from pdf_bot.webpage.webpage_renderer import _FetchLimitError, _LimitedURLFetcher, _render_webpage
+
+
+class TestWebpageRenderer:
+    URL = "https://example.com"
+    OUT_PATH = Path("out.pdf")
+    MAX_PAGES = 2
+    MAX_FETCH_BYTES = 10
+
+    def setup_method(self) -> None:
+        self.limits = WebpageRenderLimits(
+            max_pages=self.MAX_PAGES, max_fetch_bytes=self.MAX_FETCH_BYTES, fetch_timeout=1
+        )
+
+        self.document = MagicMock()
+        self.document.pages = [MagicMock()] * self.MAX_PAGES
+
+        self.html_cls_patcher = patch("pdf_bot.webpage.webpage_renderer.HTML")
+        self.html_cls = self.html_cls_patcher.start()
+        self.html_cls.return_value.render.return_value = self.document
+
+        # Fork the workers so that they inherit the patches
+        self.start_method_patcher = patch.object(WebpageRenderer, "_START_METHOD", "fork")
+        self.start_method_patcher.start()
+
+    def teardown_method(self) -> None:
+        self.html_cls_patcher.stop()
+        self.start_method_patcher.stop()
+
+    @pytest.mark.asyncio
+    async def test_render(self) -> None:
+        sut = WebpageRenderer(memory_limit_mb=None)
+
+        with patch("pdf_bot.webpage.webpage_renderer._render_webpage", return_value=None):
+            await sut.render(self.URL, self.OUT_PATH)
+            await sut.render(self.URL, self.OUT_PATH)
+
+        # The worker is reused between jobs
+        assert len(sut._idle_workers) == 1  # noqa: SLF001
+        assert sut._idle_workers[0].num_jobs == 2  # noqa: SLF001
+        sut.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_render_recycles_worker(self) -> None:
+        sut = WebpageRenderer(max_jobs_per_worker=1, memory_limit_mb=None)
+
+        with patch("pdf_bot.webpage.webpage_renderer._render_webpage", return_value=None):
+            await sut.render(self.URL, self.OUT_PATH)
+
+        assert sut._idle_workers == []  # noqa: SLF001
+
+    @pytest.mark.asyncio
+    async def test_render_error(self) -> None:
+        sut = WebpageRenderer(memory_limit_mb=None)
+        error = WebpageFetchError("error")
+
+        with (
+            patch("pdf_bot.webpage.webpage_renderer._render_webpage", return_value=error),
+            pytest.raises(WebpageFetchError),
+        ):
+            await sut.render(self.URL, self.OUT_PATH)
+        sut.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_render_timeout(self) -> None:
+        sut = WebpageRenderer(time_limit=0.5, memory_limit_mb=None)
+
+        with (
+            patch(
+                "pdf_bot.webpage.webpage_renderer._render_webpage",
+                side_effect=lambda *_: time.sleep(10),
+            ),
+            pytest.raises(WebpageTimeoutError),
+        ):
+            await sut.render(self.URL, self.OUT_PATH)
+
+        assert sut._idle_workers == []  # noqa: SLF001
+
+    @pytest.mark.asyncio
+    async def test_render_worker_died(self) -> None:
+        sut = WebpageRenderer(memory_limit_mb=None)
+
+        with (
+            patch("pdf_bot.webpage.webpage_renderer._render_webpage", side_effect=SystemExit),
+            pytest.raises(WebpageTooLargeError),
+        ):
+            await sut.render(self.URL, self.OUT_PATH)
+
+        assert sut._idle_workers == []  # noqa: SLF001
+
+    def test_render_webpage(self) -> None:
+        actual = _render_webpage(self.URL, self.OUT_PATH, self.limits)
+
+        assert actual is None
+        self.html_cls.assert_called_once()
+        assert self.html_cls.call_args.kwargs["url"] == self.URL
+        self.document.write_pdf.assert_called_once_with(self.OUT_PATH)
+
+    def test_render_webpage_too_many_pages(self) -> None:
+        self.document.pages = [MagicMock()] * (self.MAX_PAGES + 1)
+
+        actual = _render_webpage(self.URL, self.OUT_PATH, self.limits)
+
+        assert isinstance(actual, WebpageTooLargeError)
+        self.document.write_pdf.assert_not_called()
+
+    @pytest.mark.parametrize(
+        ("error", "expected"),
+        [
+            (URLFetchingError, WebpageFetchError),
+            (_FetchLimitError, WebpageTooLargeError),
+            (MemoryError, WebpageTooLargeError),
+            (ValueError, WebpageRenderError),
+        ],
+    )
+    def test_render_webpage_error(self, error: type[BaseException], expected: type) -> None:
+        self.html_cls.return_value.render.side_effect = error
+
+        actual = _render_webpage(self.URL, self.OUT_PATH, self.limits)
+
+        assert isinstance(actual, expected)
+
+    def test_limited_url_fetcher(self) -> None:
+        sut = _LimitedURLFetcher(self.MAX_FETCH_BYTES)
+
+        with (
+            patch("pdf_bot.webpage.webpage_renderer.URLFetcher.fetch") as fetch,
+            patch("pdf_bot.webpage.webpage_renderer.URLFetcherResponse") as response_cls,
+        ):
+            for size in (5, 5):
+                fetch.return_value = self._mock_response(size)
+                actual = sut.fetch(self.URL)
+
+                assert actual == response_cls.return_value
+                assert response_cls.call_args.args[1] == b"a" * size
+
+    @pytest.mark.parametrize("sizes", [[5, 6], [11]])
+    def test_limited_url_fetcher_exceeded(self, sizes: list[int]) -> None:
+        sut = _LimitedURLFetcher(self.MAX_FETCH_BYTES)
+
+        with patch("pdf_bot.webpage.webpage_renderer.URLFetcher.fetch") as fetch:
+            fetch.side_effect = [self._mock_response(x) for x in sizes]
+            for _ in sizes[:-1]:
+                sut.fetch(self.URL)
+
+            with pytest.raises(_FetchLimitError):
+                sut.fetch(self.URL)
+
+    @staticmethod
+    def _mock_response(size: int) -> MagicMock:
+        response = MagicMock()
+        response.read.side_effect = lambda n: b"a" * min(size, n)
+        return response
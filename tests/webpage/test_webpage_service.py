@@ -1,23 +1,46 @@
+import asyncio
 import hashlib
-from unittest.mock import MagicMock, patch
+from collections.abc import Callable, Coroutine
+from typing import Any
+from unittest.mock import MagicMock
 
 import pytest
-from weasyprint import HTML
-from weasyprint.css.tokens import InvalidValues
-from weasyprint.urls import URLFetchingError
+from telegram import Message
+from telegram.error import BadRequest
 
 from pdf_bot.analytics import TaskType
 from pdf_bot.io_internal import IOService
+from pdf_bot.result_cache import (
+    CachedResult,
+    InMemoryResultCacheBackend,
+    ResultCacheService,
+    ResultFileType,
+)
 from pdf_bot.telegram_internal import TelegramGetUserDataError, TelegramUpdateUserDataError
-from pdf_bot.webpage import WebpageService
+from pdf_bot.webpage import (
+    WebpageFetchError,
+    WebpageRenderer,
+    WebpageRenderError,
+    WebpageService,
+    WebpageServiceError,
+    WebpageTimeoutError,
+    WebpageTooLargeError,
+)
 from tests.language import LanguageServiceTestMixin
+from tests.scheduler import SchedulerServiceTestMixin
 from tests.telegram_internal import TelegramServiceTestMixin, TelegramTestMixin
 
 
-class TestWebpageService(LanguageServiceTestMixin, TelegramServiceTestMixin, TelegramTestMixin):
+class TestWebpageService(
+    LanguageServiceTestMixin,
+    SchedulerServiceTestMixin,
+    TelegramServiceTestMixin,
+    TelegramTestMixin,
+):
     URL = "https://example.com"
     HOSTNAME = "example.com"
     URL_HASH = hashlib.sha256(URL.encode("utf-8")).hexdigest()
+    FILE_ID = "file_id"
 
     def setup_method(self) -> None:
         super().setup_method()
@@ -26,20 +49,32 @@ class TestWebpageService(LanguageServiceTestMixin, TelegramServiceTestMixin, Tel
         self.io_service = MagicMock(spec=IOService)
         self.io_service.create_temp_pdf_file.return_value.__enter__.return_value = self.file_path
 
+        self.scheduler_service = self.mock_scheduler_service()
         self.telegram_service = self.mock_telegram_service()
         self.telegram_service.user_data_contains.return_value = False
 
         self.language_service = self.mock_language_service()
-        self.sut = WebpageService(self.io_service, self.language_service, self.telegram_service)
+        self.scheduler_service = self.mock_scheduler_service()
+        self.webpage_renderer = MagicMock(spec=WebpageRenderer)
 
-        self.html = MagicMock(spec=HTML)
-        self.html_cls_patcher = patch(
-            "pdf_bot.webpage.webpage_service.HTML", return_value=self.html
+        message = MagicMock(spec=Message)
+        message.photo = ()
+        message.document.file_id = self.FILE_ID
+        self.telegram_service.send_file.return_value = message
+
+        self.webpage_cache_service = ResultCacheService(
+            InMemoryResultCacheBackend(max_size=10, ttl=60)
         )
-        self.html_cls = self.html_cls_patcher.start()
+        self.cached_result = CachedResult(self.FILE_ID, ResultFileType.document)
 
-    def teardown_method(self) -> None:
-        self.html_cls_patcher.stop()
+        self.sut = WebpageService(
+            self.io_service,
+            self.language_service,
+            self.telegram_service,
+            self.scheduler_service,
+            self.webpage_renderer,
+            self.webpage_cache_service,
+        )
 
     @pytest.mark.asyncio
     async def test_url_to_pdf(self) -> None:
@@ -77,7 +112,7 @@ class TestWebpageService(LanguageServiceTestMixin, TelegramServiceTestMixin, Tel
         )
         self.telegram_service.update_user_data.assert_not_called()
         self.io_service.create_temp_pdf_file.assert_not_called()
-        self.html.write_pdf.assert_not_called()
+        self.webpage_renderer.render.assert_not_called()
 
         self.telegram_service.get_user_data.assert_not_called()
         self.telegram_update.effective_message.reply_text.assert_called_once()
@@ -85,27 +120,126 @@ class TestWebpageService(LanguageServiceTestMixin, TelegramServiceTestMixin, Tel
     @pytest.mark.parametrize(
         "error",
         [
-            URLFetchingError,
-            AssertionError,
-            AttributeError,
-            IndexError,
-            InvalidValues,
-            KeyError,
-            OverflowError,
-            RuntimeError,
-            ValueError,
-            TypeError,
+            WebpageFetchError("fetch"),
+            WebpageRenderError("render"),
+            WebpageTimeoutError("timeout"),
+            WebpageTooLargeError("too_large"),
         ],
     )
     @pytest.mark.asyncio
-    async def test_url_to_pdf_error(self, error: type[Exception]) -> None:
-        self.html.write_pdf.side_effect = error
+    async def test_url_to_pdf_error(self, error: WebpageServiceError) -> None:
+        self.webpage_renderer.render.side_effect = error
 
         await self.sut.url_to_pdf(self.telegram_update, self.telegram_context)
 
         self._assert_url_to_pdf_calls()
         self.telegram_service.send_file.assert_not_called()
-        assert self.telegram_update.effective_message.reply_text.call_count == 2
+        self.telegram_update.effective_message.reply_text.assert_called_with(str(error))
+
+    @pytest.mark.asyncio
+    async def test_url_to_pdf_cached(self) -> None:
+        await self.sut.url_to_pdf(self.telegram_update, self.telegram_context)
+        self.telegram_message.text = "HTTPS://Example.com:443/#section"
+
+        await self.sut.url_to_pdf(self.telegram_update, self.telegram_context)
+
+        self.webpage_renderer.render.assert_called_once()
+        self.telegram_service.send_cached_file.assert_called_once_with(
+            self.telegram_update, self.telegram_context, self.cached_result, TaskType.url_to_pdf
+        )
+
+    @pytest.mark.asyncio
+    async def test_url_to_pdf_cached_invalid_file_id(self) -> None:
+        await self.sut.url_to_pdf(self.telegram_update, self.telegram_context)
+        self.telegram_service.send_cached_file.side_effect = BadRequest("error")
+
+        await self.sut.url_to_pdf(self.telegram_update, self.telegram_context)
+
+        assert self.webpage_renderer.render.call_count == 2
+        assert self.telegram_service.send_file.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_url_to_pdf_concurrent(self) -> None:
+        event = asyncio.Event()
+        self.webpage_renderer.render.side_effect = self._wait_for_event(event)
+
+        tasks = [
+            asyncio.create_task(self.sut.url_to_pdf(self.telegram_update, self.telegram_context))
+            for _ in range(3)
+        ]
+        await asyncio.sleep(0)
+        event.set()
+        await asyncio.gather(*tasks)
+
+        self.webpage_renderer.render.assert_called_once()
+        self.telegram_service.send_file.assert_called_once()
+        assert self.telegram_service.send_cached_file.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_url_to_pdf_concurrent_error(self) -> None:
+        event = asyncio.Event()
+        error = WebpageFetchError("error")
+
+        async def render(*_args: object) -> None:
+            await event.wait()
+            raise error
+
+        self.webpage_renderer.render.side_effect = render
+
+        tasks = [
+            asyncio.create_task(self.sut.url_to_pdf(self.telegram_update, self.telegram_context))
+            for _ in range(2)
+        ]
+        await asyncio.sleep(0)
+        event.set()
+        await asyncio.gather(*tasks)
+
+        self.webpage_renderer.render.assert_called_once()
+        self.telegram_service.send_file.assert_not_called()
+        self.telegram_message.reply_text.assert_called_with(str(error))
+
+    @pytest.mark.asyncio
+    async def test_url_to_pdf_concurrent_unexpected_error(self) -> None:
+        event = asyncio.Event()
+        self.webpage_renderer.render.side_effect = self._wait_for_event(event)
+        self.telegram_service.send_file.side_effect = ValueError()
+
+        tasks = [
+            asyncio.create_task(self.sut.url_to_pdf(self.telegram_update, self.telegram_context))
+            for _ in range(2)
+        ]
+        await asyncio.sleep(0)
+        event.set()
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+
+        assert isinstance(results[0], ValueError)
+        assert results[1] is None
+        self.webpage_renderer.render.assert_called_once()
+        self.telegram_message.reply_text.assert_called_with("Failed to convert your webpage")
+
+    @pytest.mark.asyncio
+    async def test_url_to_pdf_concurrent_not_cached(self) -> None:
+        event = asyncio.Event()
+        self.webpage_renderer.render.side_effect = self._wait_for_event(event)
+        self.telegram_service.send_file.return_value = None
+
+        tasks = [
+            asyncio.create_task(self.sut.url_to_pdf(self.telegram_update, self.telegram_context))
+            for _ in range(2)
+        ]
+        await asyncio.sleep(0)
+        event.set()
+        await asyncio.gather(*tasks)
+
+        # The result couldn't be reused, so the webpage is rendered again
+        assert self.webpage_renderer.render.call_count == 2
+
+    @staticmethod
+    def _wait_for_event(event: asyncio.Event) -> Callable[..., Coroutine[Any, Any, None]]:
+        async def wait(*_args: object) -> None:
+            await event.wait()
+
+        return wait
 
     def _assert_url_to_pdf_calls(self) -> None:
         self.telegram_service.user_data_contains.assert_called_once_with(
@@ -115,13 +249,16 @@ class TestWebpageService(LanguageServiceTestMixin, TelegramServiceTestMixin, Tel
             self.telegram_context, self.URL_HASH, None
         )
         self.io_service.create_temp_pdf_file.assert_called_once_with(self.HOSTNAME)
-        self.html.write_pdf.assert_called_once_with(self.file_path)
+        self.webpage_renderer.render.assert_called_once_with(self.URL, self.file_path)
 
         self.telegram_service.get_user_data.assert_called_once_with(
             self.telegram_context, self.URL_HASH
         )
 
     def _assert_url_to_pdf_send_file(self) -> None:
+        self.scheduler_service.schedule.assert_called_once_with(
+            self.telegram_update, self.telegram_context, TaskType.url_to_pdf
+        )
         self.telegram_service.send_file.assert_called_once_with(
             self.telegram_update,
             self.telegram_context,